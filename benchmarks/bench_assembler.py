@@ -0,0 +1,90 @@
+"""Tempo de montagem de listagens MEPA grandes.
+
+Uso: python benchmarks/bench_assembler.py [--instructions N] [--repeat N]
+
+Gera uma listagem no formato do `MepaGenerator` (rótulos, comentários com
+nomes de variáveis, strings de `CRCS`) com N instruções e compara o
+montador (`assemble`) com a leitura por `parse_listing` seguida da
+resolução de rótulos, que era o caminho do carregador antigo.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from codegen.mepa_ir import parse_listing
+from mepa import assemble
+
+
+def synthetic_listing(size: int) -> List[str]:
+    """Laços repetidos até `size` instruções (cada bloco tem 16)."""
+    lines = ["INPP", "AMEM 8"]
+    block = 0
+    while len(lines) + 16 <= size - 1:
+        block += 1
+        x, y = block % 8, (block + 3) % 8
+        lines += [
+            f"L{block}a: NADA",
+            f"CRVL {x} # v{x}",
+            "CRCT 10",
+            "CMME",
+            f"DSVF L{block}b",
+            f"CRVL {x} # v{x}",
+            f"CRVL {y} # v{y}",
+            "MULT",
+            "CRCT 1",
+            "SOMA",
+            f"ARMZ {x} # v{x}",
+            'CRCS "laço \\"interno\\""',
+            "IMPR",
+            f"DSVS L{block}a",
+            f"L{block}b: NADA",
+            "DMEM 0",
+        ]
+    lines.append("PARA")
+    return lines
+
+
+def parse_and_resolve(lines: List[str]) -> Dict[str, int]:
+    instrs = parse_listing(lines)
+    labels = {ins.label: i for i, ins in enumerate(instrs) if ins.label is not None}
+    return {i: labels[ins.target] for i, ins in enumerate(instrs) if ins.op in ("DSVS", "DSVF")}
+
+
+def best_of(repeat: int, action: Callable[[], object]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        action()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Tempo de montagem MEPA")
+    parser.add_argument("--instructions", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    lines = synthetic_listing(args.instructions)
+    text = "\n".join(lines)
+    print(f"{len(lines)} instruções, {len(text) / 1e6:.1f} MB de texto")
+    for name, action in (
+        ("parse_listing + rótulos", lambda: parse_and_resolve(lines)),
+        ("assemble (linhas)", lambda: assemble(lines)),
+        ("assemble (texto)", lambda: assemble(text)),
+    ):
+        seconds = best_of(args.repeat, action)
+        print(f"{name:<26} {seconds:7.3f}s  {len(lines) / seconds / 1e6:6.2f} M linhas/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Backend Python (`codegen.python_backend`) contra a máquina MEPA.
+
+Uso: python benchmarks/bench_backends.py [--scale K] [--repeat N]
+
+Para cada programa de bench_vm.py (entradas multiplicadas por `--scale`)
+mostra o tempo de compilação (geração MEPA + montagem, ou geração da AST
+Python + `compile()`) e o melhor de `--repeat` execuções: interpretador
+MEPA, blocos compilados e o código Python gerado. As saídas de todos
+precisam coincidir.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from bench_vm import PROGRAMS
+from codegen import MepaGenerator, PythonGenerator
+from lexer import LexerPython
+from mepa import MepaVM, assemble
+from mepa.vm import input_reader
+from semantic import SemanticAnalyzer
+from syntax import SyntaxAnalyzer
+
+
+def parse(source: str):
+    ast = SyntaxAnalyzer(LexerPython(source).get_tokens()).parse()
+    SemanticAnalyzer(ast).analyze()
+    return ast
+
+
+def best_of(repeat: int, run):
+    best, output = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = run()
+        best = min(best, time.perf_counter() - start)
+    return best, output
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1, help="multiplica as entradas dos programas")
+    parser.add_argument("--repeat", type=int, default=3, help="execuções por medida (vale a melhor)")
+    args = parser.parse_args()
+
+    print(f"{'programa':18} {'comp. MEPA':>10} {'comp. Py':>9} {'interpretador':>13} "
+          f"{'compilado':>10} {'python':>8} {'vs interp.':>10} {'vs comp.':>9}")
+    for name, (source, inputs) in PROGRAMS.items():
+        inputs = [value * args.scale for value in inputs]
+        ast = parse(source)
+        start = time.perf_counter()
+        program = assemble(MepaGenerator().generate(ast))
+        mepa_compile = time.perf_counter() - start
+        start = time.perf_counter()
+        python = PythonGenerator().generate(ast)
+        python_compile = time.perf_counter() - start
+
+        def mepa(engine):
+            return lambda: MepaVM(program, engine=engine, read=input_reader(inputs)).run().output
+
+        interpreted, expected = best_of(args.repeat, mepa("interpreter"))
+        compiled, output = best_of(args.repeat, mepa("compiled"))
+        native, native_output = best_of(args.repeat, lambda: python.run(read=input_reader(inputs)))
+        assert output == expected and native_output == expected, name
+        print(f"{name:18} {1e3 * mepa_compile:>8.2f}ms {1e3 * python_compile:>7.2f}ms "
+              f"{interpreted:>13.3f} {compiled:>10.3f} {native:>8.3f} "
+              f"{interpreted / native:>9.1f}x {compiled / native:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Vazão do lote (execuções por segundo) contra um processo por execução.
+
+Uso: python benchmarks/bench_batch.py [--runs N] [--fresh N] [--jobs 1,2,4]
+
+Compila um programa curto que lê uma entrada, grava em ``.mepab`` e mede:
+um processo novo por execução (``main.py -f programa.mepab --run``, como
+faziam os corretores) e `run_batch` com 1, 2, ... processos.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from bench_vm import compile_source
+from mepa import load_program, run_batch, save_binary
+
+
+SOURCE = (
+    "n=input()\n"
+    "s=0\n"
+    "i=0\n"
+    "while i<n:\n"
+    "    s=s+i*i\n"
+    "    i=i+1\n"
+    "print(s)\n"
+)
+
+
+def fresh_processes(path: str, inputs, count: int) -> float:
+    start = time.perf_counter()
+    for values in inputs[:count]:
+        subprocess.run(
+            [sys.executable, str(SRC / "main.py"), "-f", path, "--run"],
+            input="\n".join(map(str, values)) + "\n",
+            capture_output=True, text=True, check=True,
+        )
+    return count / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=2000, help="execuções do lote")
+    parser.add_argument("--fresh", type=int, default=20, help="execuções com processo novo")
+    parser.add_argument("--jobs", default=None, help="processos a medir (ex.: 1,2,4)")
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    jobs = [int(j) for j in args.jobs.split(",")] if args.jobs else sorted({1, 2, cores})
+    program = load_program(compile_source(SOURCE, 2))
+    inputs = [[100 + i % 400] for i in range(args.runs)]
+
+    print(f"núcleos: {cores}  execuções: {args.runs}")
+    print(f"{'modo':24} {'execuções/s':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "programa.mepab")
+        save_binary(program, path)
+        rate = fresh_processes(path, inputs, args.fresh)
+        print(f"{'processo por execução':24} {rate:>12.1f}")
+    for workers in jobs:
+        report = run_batch(program, inputs, workers=workers)
+        print(f"{'lote, ' + str(workers) + ' processo(s)':24} {report.runs_per_second:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
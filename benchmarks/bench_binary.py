@@ -0,0 +1,48 @@
+"""Tamanho e tempo de carga: listagem textual x programa binário ``.mepab``.
+
+Uso: python benchmarks/bench_binary.py [--instructions N] [--repeat N]
+
+Grava a mesma listagem sintética (ver `bench_assembler.py`) nos dois
+formatos num diretório temporário e mede o tamanho dos arquivos e o tempo
+para obter um `MepaProgram` de cada um com `load_file`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from bench_assembler import best_of, synthetic_listing
+from mepa import assemble, load_file, save_binary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Formato textual x binário")
+    parser.add_argument("--instructions", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    lines = synthetic_listing(args.instructions)
+    with tempfile.TemporaryDirectory() as tmp:
+        text_path = os.path.join(tmp, "programa.mepa")
+        binary_path = os.path.join(tmp, "programa.mepab")
+        with open(text_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        save_binary(assemble(lines), binary_path)
+
+        print(f"{len(lines)} instruções")
+        for name, path in (("texto", text_path), ("binário", binary_path)):
+            size = os.path.getsize(path)
+            seconds = best_of(args.repeat, lambda: load_file(path))
+            print(f"{name:<8} {size / 1e6:8.2f} MB  carga {seconds * 1e3:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
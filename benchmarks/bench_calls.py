@@ -0,0 +1,212 @@
+"""Chamadas de função na máquina MEPA: expansão de funções folha e chamadas de cauda.
+
+Uso: python benchmarks/bench_calls.py [--scale K] [--repeat N]
+
+Para cada programa com muitas chamadas (entradas multiplicadas por
+`--scale`), gera o código sem e com `MepaGenerator(inline=True)`, nos
+níveis -O0 e -O1, e mostra os `CHPR` executados, as instruções executadas
+e o melhor de `--repeat` tempos nos dois motores. Depois compara, nos
+programas com recursão de cauda, `tail_calls=False` e `tail_calls=True`,
+com a profundidade máxima de pilha dada por `verify` ("-" quando há
+recursão). Por fim, mostra os slots de pilha que cada nível de recursão
+ocupa (o registro da função mais o que quem chama empilha), medidos pelo
+pico da pilha com entradas n e n + 1. As saídas precisam coincidir com as
+do backend Python (na recursão de cauda, que passa do limite de recursão
+do Python, entre si).
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from codegen import MepaGenerator, PythonGenerator
+from lexer import LexerPython
+from mepa import MepaVM, assemble, verify
+from mepa.opcodes import CHPR
+from mepa.vm import input_reader
+from optimizer import MepaOptimizer
+from semantic import SemanticAnalyzer
+from syntax import SyntaxAnalyzer
+
+
+PROGRAMS = {
+    # funções folha pequenas chamadas no laço: todas são expandidas
+    "folhas": (
+        "def quadrado(x):\n"
+        "    return x * x\n"
+        "def maior(a, b):\n"
+        "    if a > b:\n"
+        "        return a\n"
+        "    return b\n"
+        "n=input()\n"
+        "s=0\n"
+        "for i in range(n):\n"
+        "    s=s+quadrado(i)-maior(i, n/2)\n"
+        "print(s)\n",
+        [60000],
+    ),
+    # folha com laço interno, chamada por uma função que não é folha
+    "aninhadas": (
+        "def digitos(x):\n"
+        "    d = 0\n"
+        "    while x > 0:\n"
+        "        x = x / 10\n"
+        "        d = d + 1\n"
+        "    return d\n"
+        "def total(n):\n"
+        "    t = 0\n"
+        "    for k in range(n):\n"
+        "        t = t + digitos(k)\n"
+        "    return t\n"
+        "n=input()\n"
+        "print(total(n))\n",
+        [30000],
+    ),
+    # recursiva: não é expandida, cada chamada ganha um registro na pilha
+    "fib": (
+        "def fib(n):\n"
+        "    if n < 2:\n"
+        "        return n\n"
+        "    return fib(n - 1) + fib(n - 2)\n"
+        "n=input()\n"
+        "print(fib(n))\n",
+        [18],
+    ),
+}
+
+# recursão de cauda: com tail_calls=False, cada nível gasta pilha (a entrada
+# não é escalada, para caber na memória da máquina)
+TAIL_PROGRAMS = {
+    "soma": (
+        "def soma(n, acc):\n"
+        "    if n == 0:\n"
+        "        return acc\n"
+        "    return soma(n - 1, acc + n)\n"
+        "print(soma(input(), 0))\n",
+        [12000],
+    ),
+    "mdc": (
+        "def mdc(a, b):\n"
+        "    if b == 0:\n"
+        "        return a\n"
+        "    if a < b:\n"
+        "        return mdc(b, a)\n"
+        "    return mdc(a - b, b)\n"
+        "n=input()\n"
+        "s=0\n"
+        "for i in range(n):\n"
+        "    s=s+mdc(n * 7, i + 1)\n"
+        "print(s)\n",
+        [300],
+    ),
+}
+
+
+def parse(source: str):
+    ast = SyntaxAnalyzer(LexerPython(source).get_tokens()).parse()
+    SemanticAnalyzer(ast).analyze()
+    return ast
+
+
+def compile_program(source: str, level: int, inline: bool, tail_calls: bool = True):
+    generator = MepaGenerator(cse=level >= 1, inline=inline, tail_calls=tail_calls)
+    code = generator.generate(parse(source))
+    return assemble(MepaOptimizer(level).optimize(code) if level else code)
+
+
+def calls_executed(program, inputs) -> int:
+    """CHPR executados, com o perfil por instrução."""
+    vm = MepaVM(program, read=input_reader(inputs), profile=True)
+    vm.run()
+    counts = vm.profile.instruction_counts()
+    return sum(count for op, count in zip(program.opcodes, counts) if op == CHPR)
+
+
+def peak_stack(program, inputs) -> int:
+    """Maior topo de pilha, executando uma instrução por vez."""
+    vm = MepaVM(program, read=input_reader(inputs), fuse=False)
+    peak = 0
+    while not vm.halted:
+        vm.run(max_steps=1)
+        peak = max(peak, vm.sp + 1)
+    return peak
+
+
+def best_of(repeat: int, program, inputs, engine: str):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        vm = MepaVM(program, engine=engine, read=input_reader(inputs))
+        start = time.perf_counter()
+        result = vm.run()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1, help="multiplica as entradas dos programas")
+    parser.add_argument("--repeat", type=int, default=3, help="execuções por medida (vale a melhor)")
+    args = parser.parse_args()
+
+    print(f"{'programa':10} {'nível':>5} {'expansão':>8} {'CHPR':>8} {'instruções':>11} "
+          f"{'interp.':>8} {'compilado':>10} {'ganho':>6} {'ganho comp.':>11}")
+    for name, (source, inputs) in PROGRAMS.items():
+        if name != "fib":
+            inputs = [value * args.scale for value in inputs]
+        expected = PythonGenerator().generate(parse(source)).run(read=input_reader(inputs))
+        for level in (0, 1):
+            baseline = None
+            for inline in (False, True):
+                program = compile_program(source, level, inline)
+                interpreted, result = best_of(args.repeat, program, inputs, "interpreter")
+                compiled, compiled_result = best_of(args.repeat, program, inputs, "compiled")
+                assert result.output == expected == compiled_result.output, name
+                if baseline is None:
+                    baseline = (interpreted, compiled)
+                print(f"{name:10} {'-O' + str(level):>5} {'sim' if inline else 'não':>8} "
+                      f"{calls_executed(program, inputs):>8} {result.steps:>11} "
+                      f"{interpreted:>8.3f} {compiled:>10.3f} "
+                      f"{baseline[0] / interpreted:>5.2f}x {baseline[1] / compiled:>10.2f}x")
+
+    print()
+    print(f"{'programa':10} {'nível':>5} {'cauda':>8} {'CHPR':>8} {'instruções':>11} {'pilha':>6} "
+          f"{'interp.':>8} {'compilado':>10} {'ganho':>6} {'ganho comp.':>11}")
+    for name, (source, inputs) in TAIL_PROGRAMS.items():
+        expected = None
+        for level in (0, 1):
+            baseline = None
+            for tail_calls in (False, True):
+                program = compile_program(source, level, level >= 1, tail_calls)
+                depth = verify(program).max_depth
+                interpreted, result = best_of(args.repeat, program, inputs, "interpreter")
+                compiled, compiled_result = best_of(args.repeat, program, inputs, "compiled")
+                expected = expected or result.output
+                assert result.output == expected == compiled_result.output, name
+                if baseline is None:
+                    baseline = (interpreted, compiled)
+                print(f"{name:10} {'-O' + str(level):>5} {'sim' if tail_calls else 'não':>8} "
+                      f"{calls_executed(program, inputs):>8} {result.steps:>11} "
+                      f"{'-' if depth is None else depth:>6} {interpreted:>8.3f} {compiled:>10.3f} "
+                      f"{baseline[0] / interpreted:>5.2f}x {baseline[1] / compiled:>10.2f}x")
+
+    print()
+    print(f"{'programa':10} {'cauda':>8} {'slots/nível':>12}")
+    for name, source, tail_calls, n in (
+        ("fib", PROGRAMS["fib"][0], True, 10),
+        ("soma", TAIL_PROGRAMS["soma"][0], False, 10),
+        ("soma", TAIL_PROGRAMS["soma"][0], True, 10),
+    ):
+        program = compile_program(source, 0, False, tail_calls)
+        growth = peak_stack(program, [n + 1]) - peak_stack(program, [n])
+        print(f"{name:10} {'sim' if tail_calls else 'não':>8} {growth:>12}")
+
+
+if __name__ == "__main__":
+    main()
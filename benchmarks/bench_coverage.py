@@ -0,0 +1,65 @@
+"""Custo da coleta de cobertura (`mepa.coverage`).
+
+Uso: python benchmarks/bench_coverage.py [--scale K] [--runs N]
+
+Executa os programas de bench_vm.py (entradas multiplicadas por
+`--scale`) sem e com cobertura, nos dois motores, e mostra a lentidão
+relativa: as sondas saem dos blocos assim que eles são cobertos, então o
+custo fica na primeira passagem por cada bloco. Depois roda `--runs`
+execuções curtas numa máquina reaproveitada com a mesma cobertura (como
+num lote) e compara com as mesmas execuções sem cobertura.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from bench_vm import PROGRAMS, compile_source
+from mepa import Coverage, MepaVM, load_program
+from mepa.vm import input_reader
+
+
+def timed_runs(program, input_sets, engine: str, coverage=None) -> float:
+    vm = MepaVM(program, engine=engine, coverage=coverage)
+    start = time.perf_counter()
+    for inputs in input_sets:
+        vm.read = input_reader(inputs)
+        vm.reset()
+        vm.run()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1, help="multiplica as entradas dos programas")
+    parser.add_argument("--runs", type=int, default=2000, help="execuções curtas por programa")
+    args = parser.parse_args()
+
+    print(f"{'programa':18} {'motor':>11} {'longa sem':>10} {'com':>8} {'lentidão':>8} "
+          f"{'lote sem':>9} {'com':>8} {'lentidão':>8} {'cobertura':>10}")
+    for name, (source, inputs) in PROGRAMS.items():
+        program = load_program(compile_source(source, 0))
+        long_run = [[value * args.scale for value in inputs]]
+        # execuções curtas: entradas pequenas e variadas, que cobrem aos poucos
+        short_runs = [[k % 7 + 1 for _ in inputs] for k in range(args.runs)]
+        for engine in ("interpreter", "compiled"):
+            plain = timed_runs(program, long_run, engine)
+            covered = timed_runs(program, long_run, engine, Coverage(program))
+            batch_plain = timed_runs(program, short_runs, engine)
+            coverage = Coverage(program)
+            batch_covered = timed_runs(program, short_runs, engine, coverage)
+            rate = 100 * coverage.covered / len(coverage.instructions)
+            print(f"{name:18} {engine:>11} {plain:>10.3f} {covered:>8.3f} {covered / plain:>7.2f}x "
+                  f"{batch_plain:>9.3f} {batch_covered:>8.3f} {batch_covered / batch_plain:>7.2f}x "
+                  f"{rate:>9.1f}%")
+
+
+if __name__ == "__main__":
+    main()
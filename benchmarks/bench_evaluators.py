@@ -0,0 +1,224 @@
+"""Execução direta da AST: closures (`codegen.closures`) contra um percorredor ingênuo e a MEPA.
+
+Uso: python benchmarks/bench_evaluators.py [--scale K] [--repeat N]
+
+Para cada programa de bench_vm.py (entradas multiplicadas por `--scale`),
+e para um programa com chamadas de função, mostra o melhor de `--repeat`
+execuções de:
+
+- `walk`: percorre a AST a cada execução, com `isinstance` em cada nó e
+  as variáveis em dicionários (o avaliador mais simples possível);
+- `ClosureCompiler`: AST compilada uma vez em closures com índices fixos
+  (o tempo de compilação aparece à parte);
+- a máquina MEPA (interpretador e blocos compilados).
+
+As saídas de todos precisam coincidir.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from bench_vm import PROGRAMS
+from codegen import ClosureCompiler, MepaGenerator
+from codegen.mepa_ir import mepa_div
+from codegen.mepa_generator import _assigned_names
+from lexer import LexerPython
+from mepa import MepaVM, assemble
+from mepa.vm import input_reader
+from semantic import SemanticAnalyzer
+from syntax import SyntaxAnalyzer
+from syntax.ast_nodes import (
+    BinaryOperation, BreakStatement, Call, ContinueStatement, ForStatement,
+    FunctionDeclaration, Identifier, IfStatement, Literal, ReturnStatement, UnaryOp,
+    VarAssign, WhileStatement,
+)
+
+CALLS = (
+    "def fib(n):\n"
+    "    if n < 2:\n"
+    "        return n\n"
+    "    return fib(n - 1) + fib(n - 2)\n"
+    "def quadrado(x):\n"
+    "    return x * x\n"
+    "n=input()\n"
+    "s=0\n"
+    "for i in range(n * 500):\n"
+    "    s=s+quadrado(i)\n"
+    "print(fib(n), s)\n",
+    [20],
+)
+
+_OPERATORS = {
+    "+": lambda a, b: a + b, "-": lambda a, b: a - b, "*": lambda a, b: a * b,
+    "/": mepa_div, "//": mepa_div,
+    "<": lambda a, b: int(a < b), ">": lambda a, b: int(a > b),
+    "<=": lambda a, b: int(a <= b), ">=": lambda a, b: int(a >= b),
+    "==": lambda a, b: int(a == b), "!=": lambda a, b: int(a != b),
+}
+
+
+class _Break(Exception):
+    pass
+
+
+class _Continue(Exception):
+    pass
+
+
+class _Return(Exception):
+    def __init__(self, value):
+        self.value = value
+
+
+def walk(program, read, write):
+    """Avaliador ingênuo, com a mesma semântica de `ClosureCompiler`."""
+    globals_ = {}
+    functions = {}
+    assigned = set()
+    for stmt in program.statements:
+        if isinstance(stmt, FunctionDeclaration):
+            shared = assigned - set(stmt.params)
+            functions[stmt.name] = (stmt, _assigned_names(stmt.body.statements) - shared)
+        elif isinstance(stmt, VarAssign):
+            assigned.add(stmt.name)
+        elif isinstance(stmt, ForStatement):
+            assigned.add(stmt.var_name)
+
+    def store(env, name, value):
+        local, names = env
+        if local is not None and (name in names or name in local):
+            local[name] = value
+        else:
+            globals_[name] = value
+
+    def evaluate(expr, env):
+        if isinstance(expr, Literal):
+            value = expr.value
+            return int(value) if isinstance(value, bool) else value
+        if isinstance(expr, Identifier):
+            local = env[0]
+            if local is not None and expr.name in local:
+                return local[expr.name]
+            return globals_[expr.name]
+        if isinstance(expr, BinaryOperation):
+            return _OPERATORS[expr.op](evaluate(expr.left, env), evaluate(expr.right, env))
+        if isinstance(expr, UnaryOp):
+            return -evaluate(expr.operand, env)
+        if isinstance(expr, Call):
+            if expr.callee.name == "input":
+                return read()
+            func, names = functions[expr.callee.name]
+            local = dict(zip(func.params, [evaluate(arg, env) for arg in expr.args]))
+            try:
+                execute(func.body.statements, (local, names | set(func.params)))
+            except _Return as ret:
+                return ret.value
+            return 0
+        raise TypeError(type(expr).__name__)
+
+    def execute(statements, env):
+        for stmt in statements:
+            if isinstance(stmt, VarAssign):
+                store(env, stmt.name, evaluate(stmt.expr, env))
+            elif isinstance(stmt, IfStatement):
+                if evaluate(stmt.cond, env):
+                    execute(stmt.then_block.statements, env)
+                elif stmt.else_block is not None:
+                    execute(stmt.else_block.statements, env)
+            elif isinstance(stmt, WhileStatement):
+                while evaluate(stmt.cond, env):
+                    try:
+                        execute(stmt.body.statements, env)
+                    except _Break:
+                        break
+                    except _Continue:
+                        pass
+            elif isinstance(stmt, ForStatement):
+                limit = evaluate(stmt.iterable.args[0], env)
+                store(env, stmt.var_name, 0)
+                while evaluate(Identifier(stmt.var_name), env) < limit:
+                    try:
+                        execute(stmt.body.statements, env)
+                    except _Break:
+                        break
+                    except _Continue:
+                        pass
+                    store(env, stmt.var_name, evaluate(Identifier(stmt.var_name), env) + 1)
+            elif isinstance(stmt, ReturnStatement):
+                raise _Return(0 if stmt.expr is None else evaluate(stmt.expr, env))
+            elif isinstance(stmt, BreakStatement):
+                raise _Break()
+            elif isinstance(stmt, ContinueStatement):
+                raise _Continue()
+            elif isinstance(stmt, Call) and stmt.callee.name == "print":
+                for arg in stmt.args:
+                    write(evaluate(arg, env))
+            elif isinstance(stmt, Call):
+                evaluate(stmt, env)
+
+    execute([s for s in program.statements if not isinstance(s, FunctionDeclaration)], (None, set()))
+
+
+def parse(source: str):
+    ast = SyntaxAnalyzer(LexerPython(source).get_tokens()).parse()
+    SemanticAnalyzer(ast).analyze()
+    return ast
+
+
+def best_of(repeat: int, run):
+    best, output = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = run()
+        best = min(best, time.perf_counter() - start)
+    return best, output
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1, help="multiplica as entradas dos programas")
+    parser.add_argument("--repeat", type=int, default=3, help="execuções por medida (vale a melhor)")
+    args = parser.parse_args()
+
+    print(f"{'programa':18} {'walk':>8} {'comp.':>8} {'closures':>9} {'interp.':>8} "
+          f"{'compilado':>10} {'vs walk':>8} {'vs interp.':>10} {'vs comp.':>9}")
+    programs = {name: (source, [value * args.scale for value in inputs])
+                for name, (source, inputs) in PROGRAMS.items()}
+    programs["chamadas"] = CALLS  # fib(n) cresce rápido demais para escalar
+    for name, (source, inputs) in programs.items():
+        ast = parse(source)
+        start = time.perf_counter()
+        closures = ClosureCompiler().compile(ast)
+        compile_time = time.perf_counter() - start
+
+        def naive():
+            output = []
+            walk(ast, input_reader(inputs), output.append)
+            return output
+
+        walked, expected = best_of(args.repeat, naive)
+        fast, output = best_of(args.repeat, lambda: closures.run(read=input_reader(inputs)))
+        assert output == expected, name
+        program = assemble(MepaGenerator().generate(ast))
+
+        def mepa(engine):
+            return lambda: MepaVM(program, engine=engine, read=input_reader(inputs)).run().output
+
+        interpreted, output = best_of(args.repeat, mepa("interpreter"))
+        compiled, compiled_output = best_of(args.repeat, mepa("compiled"))
+        assert output == expected and compiled_output == expected, name
+        print(f"{name:18} {walked:>8.3f} {1e3 * compile_time:>6.2f}ms {fast:>9.3f} "
+              f"{interpreted:>8.3f} {compiled:>10.3f} {walked / fast:>7.1f}x "
+              f"{interpreted / fast:>9.1f}x {compiled / fast:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
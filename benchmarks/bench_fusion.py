@@ -0,0 +1,62 @@
+"""Superinstruções: cobertura e despachos com e sem fusão.
+
+Uso: python benchmarks/bench_fusion.py [--repeat N]
+
+Para os programas de `bench_vm.py` nos níveis -O0 e -O2, mostra a fração
+das instruções cobertas por superinstruções, quantos despachos o
+interpretador fez com e sem fusão (as instruções MEPA executadas são as
+mesmas) e o tempo de cada execução (melhor de N).
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from bench_vm import PROGRAMS, compile_source
+from mepa import MepaVM, load_program
+from mepa.fusion import fusion_report
+
+
+def measure(program, inputs, fuse: bool, repeat: int):
+    best = None
+    for _ in range(repeat):
+        pending = iter(inputs)
+        vm = MepaVM(program, fuse=fuse, read=lambda: next(pending))
+        start = time.perf_counter()
+        result = vm.run()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best[1]:
+            best = (result, elapsed)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--report", action="store_true", help="mostra os padrões fundidos")
+    args = parser.parse_args()
+
+    print(f"{'programa':18} {'nível':>5} {'cobertura':>9} {'instruções':>11} "
+          f"{'despachos':>11} {'tempo sem':>9} {'tempo com':>9}")
+    for name, (source, inputs) in PROGRAMS.items():
+        for level in (0, 2):
+            program = load_program(compile_source(source, level))
+            report = fusion_report(program)
+            plain, plain_time = measure(program, inputs, False, args.repeat)
+            fused, fused_time = measure(program, inputs, True, args.repeat)
+            assert fused.output == plain.output and fused.steps == plain.steps
+            print(f"{name:18} {'-O' + str(level):>5} {100 * report.coverage:>8.1f}% {plain.steps:>11} "
+                  f"{fused.dispatches:>11} {plain_time:>9.3f} {fused_time:>9.3f}")
+            if args.report:
+                print(report.format())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Faixas NumPy contra a máquina escalar executada uma vez por entrada.
+
+Uso: python benchmarks/bench_lanes.py [--lanes N] [--repeat N]
+
+Para cada programa, executa as N entradas com `run_batch` (uma máquina
+escalar reaproveitada, um processo) e com `run_lanes`, confere que as
+saídas são iguais e mostra o tempo de cada um, os despachos vetoriais, as
+divisões de grupo e quantas faixas terminaram na máquina escalar.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from bench_vm import compile_source
+from mepa import load_program, run_batch
+from mepa.lanes import HAS_NUMPY, LaneVM
+
+
+# (fonte, entradas da faixa i)
+PROGRAMS = {
+    # mesmo número de voltas em todas as faixas: nenhuma divergência
+    "polinomio": (
+        "x=input()\n"
+        "s=0\n"
+        "for i in range(200):\n"
+        "    s=s+x*i*i-3*x+i/7\n"
+        "print(s)\n",
+        lambda i: [i % 1000],
+    ),
+    # número de voltas depende da entrada: divergência no fim do laço
+    "soma_ate_n": (
+        "n=input()\n"
+        "s=0\n"
+        "while n>0:\n"
+        "    s=s+n*n\n"
+        "    n=n-1\n"
+        "print(s)\n",
+        lambda i: [150 + i % 100],
+    ),
+    # desvios dependentes dos dados a cada volta
+    "collatz": (
+        "n=input()\n"
+        "c=0\n"
+        "while n!=1:\n"
+        "    if n/2*2==n:\n"
+        "        n=n/2\n"
+        "    else:\n"
+        "        n=3*n+1\n"
+        "    c=c+1\n"
+        "print(c)\n",
+        lambda i: [i + 1],
+    ),
+}
+
+
+def best_of(repeat, function):
+    best = None
+    for _ in range(repeat):
+        value = function()
+        if best is None or value[0].elapsed < best[0].elapsed:
+            best = value
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lanes", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    if not HAS_NUMPY:
+        sys.exit("NumPy não está instalado: a execução em faixas não está disponível")
+
+    print(f"{'programa':12} {'faixas':>7} {'escalar (s)':>11} {'faixas (s)':>10} {'ganho':>6} "
+          f"{'despachos':>9} {'divisões':>8} {'escalares':>9}")
+    for name, (source, make_inputs) in PROGRAMS.items():
+        program = load_program(compile_source(source, 0))
+        inputs = [make_inputs(i) for i in range(args.lanes)]
+        (scalar,) = best_of(args.repeat, lambda: (run_batch(program, inputs, workers=1),))
+
+        def lanes():
+            vm = LaneVM(program, inputs)
+            return vm.run(), vm
+
+        report, vm = best_of(args.repeat, lanes)
+        assert [r.output for r in report.results] == [r.output for r in scalar.results], name
+        print(f"{name:12} {args.lanes:>7} {scalar.elapsed:>11.3f} {report.elapsed:>10.3f} "
+              f"{scalar.elapsed / report.elapsed:>5.1f}x {vm.vector_dispatches:>9} {vm.splits:>8} "
+              f"{vm.scalar_lanes:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Teste de carga das sessões interativas (`mepa.sessions`).
+
+Uso: python benchmarks/bench_sessions.py [--sessions N] [--inputs K] [--think S]
+
+Simula N usuários ao mesmo tempo, todos no mesmo laço asyncio. Cada um
+envia K números ao programa (soma acumulada, um `LEIT` por rodada, com uma
+conta de ~`--work` iterações entre leituras) esperando até `--think`
+segundos antes de cada envio, e depois 0 para encerrar. Mede o tempo
+total, entradas/s, instruções/s e a latência entre enviar um número e
+receber a resposta (`IMPR`), que mostra se uma sessão ocupada atrasa as
+outras. O instante do envio é marcado quando o usuário decide enviar, e
+não quando a sessão volta a ler; a conta padrão (~10 mil instruções) passa
+de uma fatia (`--quantum`), para que a latência inclua a espera pelas
+outras sessões.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import resource
+import time
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from bench_vm import compile_source
+from mepa import Session, load_program, run_sessions
+from mepa.sessions import DEFAULT_QUANTUM
+
+
+SOURCE = (
+    "s=0\n"
+    "n=input()\n"
+    "while n!=0:\n"
+    "    i=0\n"
+    "    while i<WORK:\n"
+    "        s=s+i*3\n"
+    "        i=i+1\n"
+    "    s=s+n\n"
+    "    print(s)\n"
+    "    n=input()\n"
+    "print(s)\n"
+)
+
+
+class SimulatedUser:
+    """Envia `inputs` números com pausas e anota a latência de cada resposta."""
+
+    def __init__(self, rng: random.Random, inputs: int, think: float, latencies: list) -> None:
+        self.values = [rng.randint(1, 9) for _ in range(inputs)] + [0]
+        self.rng, self.think, self.latencies = rng, think, latencies
+        self.sent_at = None
+        self.schedule()
+
+    def schedule(self) -> None:
+        """Decide já quando o próximo número sai: a latência conta a partir daí,
+        mesmo que o laço só retome a sessão (e chame `read`) mais tarde."""
+        self.send_at = time.perf_counter() + self.rng.uniform(0, self.think)
+
+    async def read(self):
+        await asyncio.sleep(max(0.0, self.send_at - time.perf_counter()))
+        if not self.values:
+            raise EOFError
+        self.sent_at = self.send_at
+        return self.values.pop(0)
+
+    async def write(self, values) -> None:
+        if self.sent_at is not None:
+            self.latencies.append(time.perf_counter() - self.sent_at)
+            self.sent_at = None
+            self.schedule()
+
+
+async def load_test(program, sessions: int, inputs: int, think: float, quantum: int, engine: str):
+    rng = random.Random(1)
+    latencies: list = []
+    users = [SimulatedUser(rng, inputs, think, latencies) for _ in range(sessions)]
+    started = time.perf_counter()
+    running = [
+        Session(program, user.read, user.write, quantum=quantum, memory_size=64, engine=engine)
+        for user in users
+    ]
+    setup = time.perf_counter() - started
+    results = await run_sessions(running)
+    elapsed = time.perf_counter() - started
+    failures = [r for r in results if isinstance(r, BaseException)]
+    if failures:
+        raise failures[0]
+    steps = sum(r.steps for r in results)
+    return setup, elapsed, steps, latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10_000, help="sessões simultâneas")
+    parser.add_argument("--inputs", type=int, default=5, help="números enviados por sessão")
+    parser.add_argument("--think", type=float, default=0.5, help="pausa máxima antes de cada envio (s)")
+    parser.add_argument("--work", type=int, default=1000, help="iterações da conta por entrada")
+    parser.add_argument("--quantum", type=int, default=DEFAULT_QUANTUM, help="instruções por fatia")
+    parser.add_argument("--engine", default="interpreter", choices=("interpreter", "compiled"))
+    args = parser.parse_args()
+
+    program = load_program(compile_source(SOURCE.replace("WORK", str(args.work)), 2))
+    setup, elapsed, steps, latencies = asyncio.run(load_test(
+        program, args.sessions, args.inputs, args.think, args.quantum, args.engine,
+    ))
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # KiB no Linux
+
+    answered = len(latencies)
+    latencies.sort()
+    p99 = latencies[int(0.99 * (answered - 1))] if answered else 0.0
+    print(f"sessões: {args.sessions}  entradas/sessão: {args.inputs}  motor: {args.engine}")
+    print(f"criação das sessões: {setup:.2f} s")
+    print(f"tempo total:         {elapsed:.2f} s")
+    print(f"entradas/s:          {answered / elapsed:,.0f}")
+    print(f"instruções/s:        {steps / elapsed:,.0f}")
+    if answered:
+        print(f"latência (ms):       mediana {1000 * statistics.median(latencies):.1f}  "
+              f"p99 {1000 * p99:.1f}  máx {1000 * latencies[-1]:.1f}")
+    print(f"memória máxima:      {peak / 2 ** 20:.1f} MiB (processo inteiro)")
+
+
+if __name__ == "__main__":
+    main()
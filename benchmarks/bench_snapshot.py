@@ -0,0 +1,101 @@
+"""Snapshots pré-aquecidos: partir do estado depois da inicialização.
+
+Uso: python benchmarks/bench_snapshot.py [--runs N] [--setup K]
+
+O programa gasta ~`--setup` iterações preparando uma tabela antes do
+primeiro `LEIT` e depois responde a uma consulta curta. Compara N execuções
+completas com N execuções que partem do snapshot tirado no primeiro
+`LEIT` (`restore` numa máquina reaproveitada e `resume` numa máquina
+nova), e mostra o tamanho e o custo de tirar e restaurar o snapshot.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from bench_vm import compile_source
+from mepa import InputPending, MepaVM, load_program, restore, resume, snapshot
+from mepa.vm import input_reader
+
+
+SOURCE = (
+    "a=0\n"
+    "b=1\n"
+    "i=0\n"
+    "while i<SETUP:\n"
+    "    c=b-a\n"
+    "    a=b\n"
+    "    b=c\n"
+    "    i=i+1\n"
+    "n=input()\n"
+    "print(a*n+b)\n"
+)
+
+
+def _pending():
+    raise InputPending
+
+
+def timed(label: str, runs: int, body) -> float:
+    start = time.perf_counter()
+    for k in range(runs):
+        body(k)
+    elapsed = time.perf_counter() - start
+    print(f"{label:34} {elapsed:8.3f} s  {runs / elapsed:10.1f} execuções/s")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=200, help="execuções de cada modo")
+    parser.add_argument("--setup", type=int, default=5000, help="iterações da inicialização")
+    args = parser.parse_args()
+
+    program = load_program(compile_source(SOURCE.replace("SETUP", str(args.setup)), 2))
+
+    # aquece até o primeiro LEIT: a leitura sinaliza que ainda não há valor
+    warm = MepaVM(program, read=_pending)
+    try:
+        warm.run()
+    except InputPending:
+        pass
+    began = time.perf_counter()
+    data = snapshot(warm)
+    taken = time.perf_counter() - began
+    print(f"snapshot no LEIT: pc {warm.pc}, {warm.steps} passos, {len(data)} bytes, "
+          f"{1e6 * taken:.0f} µs para tirar")
+
+    expected = [MepaVM(program, read=input_reader([k])).run().output for k in range(3)]
+
+    def full(k):
+        return MepaVM(program, read=input_reader([k])).run().output
+
+    reused = MepaVM(program)
+
+    def from_restore(k):
+        reused.read = input_reader([k])
+        restore(reused, data)
+        return list(reused.run().output)
+
+    def from_resume(k):
+        return resume(data, program, read=input_reader([k])).run().output
+
+    for mode in (full, from_restore, from_resume):
+        assert [mode(k) for k in range(3)] == expected, mode.__name__
+
+    base = timed("execução completa", args.runs, full)
+    for label, mode in (("snapshot, máquina reaproveitada", from_restore),
+                        ("snapshot, máquina nova", from_resume)):
+        elapsed = timed(label, args.runs, mode)
+        print(f"{'':34} {base / elapsed:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
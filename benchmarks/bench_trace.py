@@ -0,0 +1,67 @@
+"""Custo do rastro de execução (`mepa.trace`) e das consultas sobre ele.
+
+Uso: python benchmarks/bench_trace.py [--scale K]
+
+Executa os programas de bench_vm.py (entradas multiplicadas por
+`--scale`) sem e com rastro, nos dois motores, e mostra o tempo, a
+lentidão relativa, o tamanho do arquivo (bits por instrução) e o tempo de
+duas consultas: a última gravação de uma variável antes do fim e o estado
+da máquina no meio da execução.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from bench_vm import PROGRAMS, compile_source
+from mepa import MepaVM, load_program
+from mepa.trace import TraceReader, TraceWriter
+from mepa.vm import input_reader
+
+
+def timed_run(program, inputs, engine: str, trace=None):
+    vm = MepaVM(program, engine=engine, trace=trace, read=input_reader(inputs))
+    start = time.perf_counter()
+    result = vm.run()
+    if trace is not None:
+        trace.close()
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1, help="multiplica as entradas dos programas")
+    args = parser.parse_args()
+
+    print(f"{'programa':18} {'motor':>11} {'instruções':>11} {'sem (s)':>8} {'com (s)':>8} "
+          f"{'lentidão':>8} {'bits/instr':>10} {'consultas (s)':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "exec.mept")
+        for name, (source, inputs) in PROGRAMS.items():
+            inputs = [value * args.scale for value in inputs]
+            program = load_program(compile_source(source, 0))
+            for engine in ("interpreter", "compiled"):
+                result, plain = timed_run(program, inputs, engine)
+                _, traced = timed_run(program, inputs, engine, TraceWriter(path))
+                bits = 8 * os.path.getsize(path) / result.steps
+                start = time.perf_counter()
+                with TraceReader(path) as reader:
+                    slot = max(reader.program.symbols)
+                    reader.last_write(slot, reader.steps)
+                    reader.state_at(reader.steps // 2)
+                queries = time.perf_counter() - start
+                print(f"{name:18} {engine:>11} {result.steps:>11} {plain:>8.3f} {traced:>8.3f} "
+                      f"{traced / plain:>7.2f}x {bits:>10.2f} {queries:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
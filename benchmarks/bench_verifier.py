@@ -0,0 +1,67 @@
+"""Ganho da máquina sem conferências (``MepaVM(..., checked=False)``).
+
+Uso: python benchmarks/bench_verifier.py [--scale K] [--runs N]
+
+Para cada programa de bench_vm.py mostra o tempo da verificação estática
+(`mepa.verifier`), a memória que ela calcula e, nos dois motores, o tempo
+de uma execução longa (entradas multiplicadas por `--scale`) e de `--runs`
+execuções curtas numa máquina reaproveitada (como num lote), com e sem as
+conferências. Nas curtas o ganho vem da memória do tamanho exato, que
+`reset` zera a cada execução; nas longas, do despacho dos blocos
+compilados sem conferir o pc.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from bench_vm import PROGRAMS, compile_source
+from mepa import MepaVM, load_program, verify
+from mepa.vm import input_reader
+
+
+def timed_runs(program, input_sets, engine: str, checked: bool) -> float:
+    vm = MepaVM(program, engine=engine, checked=checked)
+    start = time.perf_counter()
+    for inputs in input_sets:
+        vm.read = input_reader(inputs)
+        vm.reset()
+        vm.run()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1, help="multiplica as entradas dos programas")
+    parser.add_argument("--runs", type=int, default=2000, help="execuções curtas por programa")
+    args = parser.parse_args()
+
+    print(f"{'programa':18} {'verificação':>11} {'slots':>5} {'motor':>11} {'longa com':>10} "
+          f"{'sem':>8} {'ganho':>7} {'lote com':>9} {'sem':>8} {'ganho':>7}")
+    for name, (source, inputs) in PROGRAMS.items():
+        program = load_program(compile_source(source, 0))
+        start = time.perf_counter()
+        verification = verify(program)
+        elapsed = time.perf_counter() - start
+        long_run = [[value * args.scale for value in inputs]]
+        short_runs = [[k % 7 + 1 for _ in inputs] for k in range(args.runs)]
+        for engine in ("interpreter", "compiled"):
+            checked = timed_runs(program, long_run, engine, True)
+            unchecked = timed_runs(program, long_run, engine, False)
+            batch_checked = timed_runs(program, short_runs, engine, True)
+            batch_unchecked = timed_runs(program, short_runs, engine, False)
+            print(f"{name:18} {1e3 * elapsed:>9.2f}ms {verification.max_depth:>5} {engine:>11} "
+                  f"{checked:>10.3f} {unchecked:>8.3f} {checked / unchecked:>6.2f}x "
+                  f"{batch_checked:>9.3f} {batch_unchecked:>8.3f} "
+                  f"{batch_checked / batch_unchecked:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Vazão da máquina MEPA (instruções por segundo).
+
+Uso: python benchmarks/bench_vm.py [--repeat N]
+
+Compila alguns programas com laços, executa cada um nos níveis -O0 e -O2,
+com os dois tipos de memória e com os blocos compilados, e mostra instruções executadas, tempo e
+milhões de instruções por segundo (melhor de N execuções).
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from lexer import LexerPython
+from syntax import SyntaxAnalyzer
+from semantic import SemanticAnalyzer
+from codegen import MepaGenerator
+from optimizer import MepaOptimizer
+from mepa import MepaVM, load_program
+
+
+PROGRAMS = {
+    "soma_aritmetica": (
+        "n=input()\n"
+        "i=0\n"
+        "s=0\n"
+        "while i<n:\n"
+        "    s=s+i*3-i/7\n"
+        "    i=i+1\n"
+        "print(s)\n",
+        [200000],
+    ),
+    "lacos_aninhados": (
+        "n=input()\n"
+        "s=0\n"
+        "for i in range(n):\n"
+        "    for j in range(n):\n"
+        "        s=s+i*n+j\n"
+        "print(s)\n",
+        [300],
+    ),
+    "desvios": (
+        "n=input()\n"
+        "x=0\n"
+        "p=0\n"
+        "while x<n:\n"
+        "    x=x+1\n"
+        "    if x/2*2==x:\n"
+        "        p=p+1\n"
+        "print(p)\n",
+        [200000],
+    ),
+}
+
+
+def compile_source(source: str, level: int):
+    ast = SyntaxAnalyzer(LexerPython(source).get_tokens()).parse()
+    SemanticAnalyzer(ast).analyze()
+    code = MepaGenerator(invert_loops=level >= 2, cse=level >= 1, inline=level >= 1).generate(ast)
+    return MepaOptimizer(level).optimize(code)
+
+
+# (memória, motor) medidos para cada programa
+CONFIGURATIONS = (("list", "interpreter"), ("array", "interpreter"), ("list", "compiled"))
+
+
+def measure(program, inputs, storage: str, repeat: int, engine: str = "interpreter"):
+    best = None
+    for _ in range(repeat):
+        pending = iter(inputs)
+        vm = MepaVM(program, storage=storage, engine=engine, read=lambda: next(pending))
+        start = time.perf_counter()
+        result = vm.run()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best[1]:
+            best = (result, elapsed)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'programa':18} {'nível':>5} {'memória':>7} {'motor':>11} {'instruções':>11} {'tempo (s)':>9} {'Minstr/s':>8}")
+    for name, (source, inputs) in PROGRAMS.items():
+        for level in (0, 2):
+            program = load_program(compile_source(source, level))
+            for storage, engine in CONFIGURATIONS:
+                result, elapsed = measure(program, inputs, storage, args.repeat, engine)
+                rate = result.steps / elapsed / 1e6
+                print(f"{name:18} {'-O' + str(level):>5} {storage:>7} {engine:>11} {result.steps:>11} {elapsed:>9.3f} {rate:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+from .cfg import ControlFlowGraph, BasicBlock, Edge, build_cfg
+from .errors import AnalysisError
+
+__all__ = ["ControlFlowGraph", "BasicBlock", "Edge", "build_cfg", "AnalysisError"]
@@ -0,0 +1,318 @@
+"""Grafo de fluxo de controle (CFG) em blocos básicos sobre o código MEPA.
+
+A construção é linear no número de instruções:
+1. uma passada registra rótulos e marca os líderes (primeira instrução,
+   instruções rotuladas e instruções após desvios/`PARA`/`RTPR`);
+2. uma segunda passada corta os blocos e liga as arestas.
+
+Os dominadores são calculados pelo algoritmo iterativo de Cooper, Harvey e
+Kennedy sobre a ordem pós-fixa reversa, com uma raiz virtual ligada a todas as
+entradas (início do programa e alvos de `CHPR`).
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Union
+
+from codegen.mepa_ir import (
+    Instr, parse_listing, JUMP_OPS, BRANCH_OPS, CALL_OPS, EXIT_OPS,
+)
+from .errors import AnalysisError
+
+
+# Tipos de aresta
+EDGE_FALL = "fall"      # execução segue para a próxima instrução
+EDGE_JUMP = "jump"      # DSVS
+EDGE_FALSE = "false"    # DSVF com topo falso
+
+
+@dataclass
+class Edge:
+    """Aresta dirigida entre dois blocos básicos."""
+    source: int
+    target: int
+    kind: str
+
+
+@dataclass
+class BasicBlock:
+    """Sequência maximal de instruções com uma entrada e uma saída."""
+    index: int
+    start: int                      # índice da primeira instrução
+    end: int                        # índice após a última instrução
+    label: Optional[str] = None
+    successors: List[int] = field(default_factory=list)
+    predecessors: List[int] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    @property
+    def last(self) -> int:
+        """Índice da última instrução do bloco."""
+        return self.end - 1
+
+
+class ControlFlowGraph:
+    """CFG de uma listagem MEPA com blocos, arestas, entradas e dominadores."""
+
+    def __init__(
+        self,
+        instructions: List[Instr],
+        blocks: List[BasicBlock],
+        edges: List[Edge],
+        entries: List[int],
+        labels: Dict[str, int],
+        block_at: List[int],
+    ) -> None:
+        self.instructions: List[Instr] = instructions
+        self.blocks: List[BasicBlock] = blocks
+        self.edges: List[Edge] = edges
+        self.entries: List[int] = entries
+        self.labels: Dict[str, int] = labels      # rótulo -> índice do bloco
+        self._block_at: List[int] = block_at      # instrução -> índice do bloco
+        self._idom: Optional[List[Optional[int]]] = None
+        self._rpo: Optional[List[int]] = None
+        self._reachable: Optional[List[bool]] = None
+
+    # ----------------------------------------------------------
+    # Consultas
+    # ----------------------------------------------------------
+    def block_instructions(self, block: Union[int, BasicBlock]) -> List[Instr]:
+        """Instruções pertencentes ao bloco."""
+        b = self.blocks[block] if isinstance(block, int) else block
+        return self.instructions[b.start:b.end]
+
+    def block_of(self, instr_index: int) -> int:
+        """Bloco que contém a instrução."""
+        return self._block_at[instr_index]
+
+    def reverse_postorder(self) -> List[int]:
+        """Blocos alcançáveis a partir das entradas em ordem pós-fixa reversa."""
+        if self._rpo is None:
+            visited = [False] * len(self.blocks)
+            order: List[int] = []
+            for entry in self.entries:
+                if visited[entry]:
+                    continue
+                visited[entry] = True
+                stack = [(entry, iter(self.blocks[entry].successors))]
+                while stack:
+                    node, it = stack[-1]
+                    nxt = next(it, None)
+                    if nxt is None:
+                        stack.pop()
+                        order.append(node)
+                    elif not visited[nxt]:
+                        visited[nxt] = True
+                        stack.append((nxt, iter(self.blocks[nxt].successors)))
+            order.reverse()
+            self._rpo = order
+        return self._rpo
+
+    def reachable(self) -> List[bool]:
+        """Marca os blocos alcançáveis a partir de alguma entrada."""
+        if self._reachable is None:
+            flags = [False] * len(self.blocks)
+            for b in self.reverse_postorder():
+                flags[b] = True
+            self._reachable = flags
+        return self._reachable
+
+    # ----------------------------------------------------------
+    # Dominadores
+    # ----------------------------------------------------------
+    def immediate_dominators(self) -> List[Optional[int]]:
+        """Dominador imediato de cada bloco (None para entradas e inalcançáveis)."""
+        if self._idom is not None:
+            return self._idom
+
+        n = len(self.blocks)
+        root = n  # raiz virtual que precede todas as entradas
+        rpo = self.reverse_postorder()
+        order_num = [-1] * (n + 1)
+        order_num[root] = 0
+        for pos, b in enumerate(rpo, start=1):
+            order_num[b] = pos
+
+        preds: List[List[int]] = [list(b.predecessors) for b in self.blocks]
+        for entry in self.entries:
+            preds[entry].append(root)
+
+        idom: List[Optional[int]] = [None] * (n + 1)
+        idom[root] = root
+
+        def intersect(a: int, b: int) -> int:
+            while a != b:
+                while order_num[a] > order_num[b]:
+                    a = idom[a]  # type: ignore[assignment]
+                while order_num[b] > order_num[a]:
+                    b = idom[b]  # type: ignore[assignment]
+            return a
+
+        changed = True
+        while changed:
+            changed = False
+            for b in rpo:
+                new_idom: Optional[int] = None
+                for p in preds[b]:
+                    if idom[p] is None:
+                        continue
+                    new_idom = p if new_idom is None else intersect(p, new_idom)
+                if new_idom is not None and idom[b] != new_idom:
+                    idom[b] = new_idom
+                    changed = True
+
+        self._idom = [None if d == root else d for d in idom[:n]]
+        return self._idom
+
+    def dominates(self, a: int, b: int) -> bool:
+        """True se o bloco `a` domina o bloco `b` (todo caminho até b passa por a)."""
+        idom = self.immediate_dominators()
+        if not self.reachable()[b]:
+            return False
+        node: Optional[int] = b
+        while node is not None:
+            if node == a:
+                return True
+            node = idom[node]
+        return False
+
+    def dominators(self, block: int) -> List[int]:
+        """Lista de dominadores do bloco, do próprio bloco até a entrada."""
+        idom = self.immediate_dominators()
+        result: List[int] = []
+        node: Optional[int] = block if self.reachable()[block] else None
+        while node is not None:
+            result.append(node)
+            node = idom[node]
+        return result
+
+    # ----------------------------------------------------------
+    # Exportação
+    # ----------------------------------------------------------
+    def to_dict(self) -> dict:
+        """Representação serializável (JSON) do grafo."""
+        idom = self.immediate_dominators()
+        return {
+            "entries": list(self.entries),
+            "blocks": [
+                {
+                    "id": b.index,
+                    "label": b.label,
+                    "start": b.start,
+                    "end": b.end,
+                    "instructions": [str(i) for i in self.block_instructions(b)],
+                    "successors": list(b.successors),
+                    "predecessors": list(b.predecessors),
+                    "idom": idom[b.index],
+                }
+                for b in self.blocks
+            ],
+            "edges": [
+                {"source": e.source, "target": e.target, "kind": e.kind}
+                for e in self.edges
+            ],
+        }
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.to_dict(), indent=indent, ensure_ascii=False)
+
+    def to_dot(self, name: str = "mepa") -> str:
+        """Representação Graphviz (DOT) com as instruções de cada bloco."""
+        lines = [f'digraph "{_dot_escape(name)}" {{', "  node [shape=box, fontname=monospace];"]
+        for b in self.blocks:
+            body = "".join(
+                _dot_escape(str(instr)) + "\\l" for instr in self.block_instructions(b)
+            )
+            lines.append(f'  B{b.index} [label="B{b.index}\\l{body}"];')
+        for e in self.edges:
+            style = "" if e.kind == EDGE_FALL else f' [label="{e.kind}"]'
+            lines.append(f"  B{e.source} -> B{e.target}{style};")
+        lines.append("}")
+        return "\n".join(lines)
+
+
+def _dot_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace('"', '\\"')
+
+
+# ================================================================
+# Construção
+# ================================================================
+def build_cfg(listing: Iterable[Union[str, Instr]]) -> ControlFlowGraph:
+    """Constrói o CFG a partir da saída do `MepaGenerator` (strings ou `Instr`)."""
+    instrs = parse_listing(listing)
+    n = len(instrs)
+
+    # 1ª passada: rótulos e líderes
+    label_at: Dict[str, int] = {}
+    leader = [False] * (n + 1)
+    if n:
+        leader[0] = True
+    for i, instr in enumerate(instrs):
+        if instr.label is not None:
+            if instr.label in label_at:
+                raise AnalysisError(i, f"rótulo '{instr.label}' duplicado")
+            label_at[instr.label] = i
+            leader[i] = True
+        if instr.op in JUMP_OPS or instr.op in BRANCH_OPS or instr.op in EXIT_OPS:
+            leader[i + 1] = True
+
+    # 2ª passada: cortes dos blocos
+    blocks: List[BasicBlock] = []
+    block_at = [0] * n
+    for i in range(n):
+        if leader[i]:
+            blocks.append(BasicBlock(index=len(blocks), start=i, end=i, label=instrs[i].label))
+        blocks[-1].end = i + 1
+        block_at[i] = blocks[-1].index
+
+    labels = {name: block_at[i] for name, i in label_at.items()}
+
+    def resolve(i: int, name: Optional[str]) -> int:
+        if name is None or name not in label_at:
+            raise AnalysisError(i, f"rótulo '{name}' não definido")
+        return block_at[label_at[name]]
+
+    edges: List[Edge] = []
+
+    def link(src: BasicBlock, dst: int, kind: str) -> None:
+        edges.append(Edge(src.index, dst, kind))
+        if dst not in src.successors:
+            src.successors.append(dst)
+            blocks[dst].predecessors.append(src.index)
+
+    entries: List[int] = [0] if blocks else []
+    for b in blocks:
+        last = instrs[b.last]
+        for i in range(b.start, b.end):
+            if instrs[i].op in CALL_OPS:
+                callee = resolve(i, instrs[i].target)
+                if callee not in entries:
+                    entries.append(callee)
+        if last.op in JUMP_OPS:
+            link(b, resolve(b.last, last.target), EDGE_JUMP)
+        elif last.op in BRANCH_OPS:
+            link(b, resolve(b.last, last.target), EDGE_FALSE)
+            if b.end < n:
+                link(b, block_at[b.end], EDGE_FALL)
+        elif last.op in EXIT_OPS:
+            pass
+        elif b.end < n:
+            link(b, block_at[b.end], EDGE_FALL)
+
+    return ControlFlowGraph(instrs, blocks, edges, entries, labels, block_at)
+
+
+__all__ = [
+    "ControlFlowGraph",
+    "BasicBlock",
+    "Edge",
+    "build_cfg",
+    "EDGE_FALL",
+    "EDGE_JUMP",
+    "EDGE_FALSE",
+]
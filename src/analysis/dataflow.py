@@ -0,0 +1,177 @@
+"""Resolvedor genérico de análises de fluxo de dados sobre o CFG.
+
+Os valores do reticulado são conjuntos representados como inteiros Python
+(bit i ligado = elemento i presente), o que torna união/interseção operações
+únicas sobre inteiros de tamanho arbitrário. O resolvedor usa uma lista de
+trabalho de blocos básicos inicializada na ordem pós-fixa reversa (análises
+para frente) ou na ordem inversa dela (análises para trás).
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from typing import List
+
+from .cfg import ControlFlowGraph
+
+
+FORWARD = "forward"
+BACKWARD = "backward"
+
+
+class DataflowProblem:
+    """Descrição de uma análise: direção, valores iniciais, junção e transferência.
+
+    Subclasses sobrescrevem `transfer`; o padrão gen/kill é oferecido por
+    `GenKillProblem`.
+    """
+
+    direction: str = FORWARD
+    # True: junção por união ("may"); False: interseção ("must")
+    union: bool = True
+
+    def boundary(self) -> int:
+        """Valor na entrada das entradas (para frente) ou na saída das saídas (para trás)."""
+        return 0
+
+    def initial(self) -> int:
+        """Valor inicial dos demais blocos (topo do reticulado)."""
+        return 0
+
+    def transfer(self, block: int, value: int) -> int:
+        """Aplica o efeito do bloco ao valor (in → out, ou out → in para trás)."""
+        raise NotImplementedError
+
+
+class GenKillProblem(DataflowProblem):
+    """Problema clássico gen/kill: out = gen | (in & ~kill)."""
+
+    def __init__(
+        self,
+        gen: List[int],
+        kill: List[int],
+        *,
+        direction: str = FORWARD,
+        union: bool = True,
+        boundary: int = 0,
+        initial: int = 0,
+    ) -> None:
+        self.gen: List[int] = gen
+        self.kill: List[int] = kill
+        self.direction = direction
+        self.union = union
+        self._boundary = boundary
+        self._initial = initial
+
+    def boundary(self) -> int:
+        return self._boundary
+
+    def initial(self) -> int:
+        return self._initial
+
+    def transfer(self, block: int, value: int) -> int:
+        return self.gen[block] | (value & ~self.kill[block])
+
+
+@dataclass
+class DataflowResult:
+    """Valores na entrada (`block_in`) e na saída (`block_out`) de cada bloco.
+
+    Os nomes seguem a ordem de execução, independentemente da direção da análise.
+    """
+    block_in: List[int]
+    block_out: List[int]
+    iterations: int
+
+
+def solve(cfg: ControlFlowGraph, problem: DataflowProblem) -> DataflowResult:
+    """Calcula o ponto fixo da análise com uma lista de trabalho de blocos."""
+    n = len(cfg.blocks)
+    forward = problem.direction == FORWARD
+    union = problem.union
+    init = problem.initial()
+    boundary = problem.boundary()
+
+    rpo = cfg.reverse_postorder()
+    order = rpo if forward else list(reversed(rpo))
+    reachable = cfg.reachable()
+    is_entry = [False] * n
+    for e in cfg.entries:
+        is_entry[e] = True
+
+    # "entrada" e "saída" no sentido da análise
+    before = [init] * n
+    after = [init] * n
+
+    def sources(b: int) -> List[int]:
+        blk = cfg.blocks[b]
+        return blk.predecessors if forward else blk.successors
+
+    def sinks(b: int) -> List[int]:
+        blk = cfg.blocks[b]
+        return blk.successors if forward else blk.predecessors
+
+    def is_boundary(b: int) -> bool:
+        return is_entry[b] if forward else not cfg.blocks[b].successors
+
+    queue = deque(order)
+    queued = [False] * n
+    for b in order:
+        queued[b] = True
+
+    iterations = 0
+    while queue:
+        b = queue.popleft()
+        queued[b] = False
+        iterations += 1
+
+        value = None
+        if is_boundary(b):
+            value = boundary
+        for src in sources(b):
+            if not reachable[src]:
+                continue
+            other = after[src]
+            if value is None:
+                value = other
+            else:
+                value = value | other if union else value & other
+        if value is None:
+            value = init
+        before[b] = value
+
+        out = problem.transfer(b, value)
+        if out != after[b]:
+            after[b] = out
+            for dst in sinks(b):
+                if reachable[dst] and not queued[dst]:
+                    queued[dst] = True
+                    queue.append(dst)
+
+    if forward:
+        return DataflowResult(before, after, iterations)
+    return DataflowResult(after, before, iterations)
+
+
+def bits(value: int) -> List[int]:
+    """Índices dos bits ligados (útil para inspecionar resultados)."""
+    result: List[int] = []
+    i = 0
+    while value:
+        if value & 1:
+            result.append(i)
+        value >>= 1
+        i += 1
+    return result
+
+
+__all__ = [
+    "DataflowProblem",
+    "GenKillProblem",
+    "DataflowResult",
+    "solve",
+    "bits",
+    "FORWARD",
+    "BACKWARD",
+]
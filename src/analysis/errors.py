@@ -0,0 +1,18 @@
+"""Tipo de erro levantado pelas análises sobre o código MEPA."""
+
+from __future__ import annotations
+
+from typing import Optional
+
+
+class AnalysisError(Exception):
+    """Levantado quando a listagem MEPA não pode ser analisada (ex.: rótulo inexistente)."""
+    def __init__(self, indice: Optional[int], detalhe: str) -> None:
+        self.indice: Optional[int] = indice
+        prefixo = "Erro de análise"
+        if indice is not None:
+            prefixo += f" na instrução {indice}"
+        super().__init__(f"{prefixo}: {detalhe}")
+
+
+__all__ = ["AnalysisError"]
@@ -0,0 +1,108 @@
+"""Laços naturais identificados a partir das arestas de retorno do CFG.
+
+Uma aresta b → h é de retorno quando h domina b. O laço natural de h é
+formado por h e pelos blocos que alcançam alguma dessas arestas sem passar
+por h. Laços com o mesmo cabeçalho são unidos.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+from .cfg import ControlFlowGraph, EDGE_FALL
+
+
+@dataclass
+class Loop:
+    """Laço natural: cabeçalho, blocos do corpo e blocos com aresta de retorno."""
+    header: int
+    blocks: Set[int]
+    latches: List[int]
+    parent: Optional["Loop"] = None
+    children: List["Loop"] = field(default_factory=list)
+
+    @property
+    def depth(self) -> int:
+        """Profundidade de aninhamento (1 = laço mais externo)."""
+        depth, loop = 1, self.parent
+        while loop is not None:
+            depth += 1
+            loop = loop.parent
+        return depth
+
+    def exits(self, cfg: ControlFlowGraph) -> List[int]:
+        """Blocos fora do laço alcançados diretamente a partir dele."""
+        result: List[int] = []
+        for b in sorted(self.blocks):
+            for s in cfg.blocks[b].successors:
+                if s not in self.blocks and s not in result:
+                    result.append(s)
+        return result
+
+    def preheader_edge(self, cfg: ControlFlowGraph) -> Optional[int]:
+        """Bloco que entra no cabeçalho "caindo" nele, se for a única entrada externa.
+
+        Código inserido entre esse bloco e o rótulo do cabeçalho executa uma
+        única vez antes do laço (pré-cabeçalho). Devolve None se houver outra
+        entrada externa ou se a entrada for por desvio.
+        """
+        outside = [p for p in cfg.blocks[self.header].predecessors if p not in self.blocks]
+        if len(outside) != 1 or outside[0] != self.header - 1:
+            return None
+        kinds = {
+            e.kind for e in cfg.edges if e.source == outside[0] and e.target == self.header
+        }
+        if kinds != {EDGE_FALL}:
+            return None
+        return outside[0]
+
+
+def find_loops(cfg: ControlFlowGraph) -> List[Loop]:
+    """Laços naturais do CFG, dos mais internos para os mais externos."""
+    reachable = cfg.reachable()
+    by_header: Dict[int, Loop] = {}
+    for block in cfg.blocks:
+        if not reachable[block.index]:
+            continue
+        for succ in block.successors:
+            if cfg.dominates(succ, block.index):
+                loop = by_header.setdefault(succ, Loop(succ, {succ}, []))
+                loop.latches.append(block.index)
+                _collect_body(cfg, loop, block.index, reachable)
+
+    loops = list(by_header.values())
+    # aninhamento: o pai é o menor laço que contém o cabeçalho
+    for loop in loops:
+        candidates = [
+            other for other in loops
+            if other is not loop and loop.header in other.blocks and loop.blocks <= other.blocks
+        ]
+        if candidates:
+            loop.parent = min(candidates, key=lambda l: len(l.blocks))
+            loop.parent.children.append(loop)
+    loops.sort(key=lambda l: (len(l.blocks), l.header))
+    return loops
+
+
+def _collect_body(cfg: ControlFlowGraph, loop: Loop, latch: int, reachable: List[bool]) -> None:
+    stack = [latch]
+    while stack:
+        b = stack.pop()
+        if b in loop.blocks or not reachable[b]:
+            continue
+        loop.blocks.add(b)
+        stack.extend(cfg.blocks[b].predecessors)
+
+
+def loop_depths(cfg: ControlFlowGraph, loops: List[Loop]) -> List[int]:
+    """Profundidade de laço de cada bloco (0 = fora de qualquer laço)."""
+    depth = [0] * len(cfg.blocks)
+    for loop in loops:
+        d = loop.depth
+        for b in loop.blocks:
+            depth[b] = max(depth[b], d)
+    return depth
+
+
+__all__ = ["Loop", "find_loops", "loop_depths"]
@@ -0,0 +1,260 @@
+"""Análises de fluxo de dados sobre as posições de memória (slots) MEPA.
+
+Um slot é o operando normalizado de `CRVL`/`ARMZ`. `CHPR` é tratado de forma
+conservadora: pode ler e escrever qualquer slot. `RTPR` devolve o controle a
+quem chamou, que pode ler qualquer slot.
+
+- `ReachingDefinitions`: quais `ARMZ` podem ter produzido o valor de um slot.
+- `AvailableCopies`: cópias `x := y` (``CRVL y; ARMZ x``) válidas em um ponto.
+- `LiveSlots`: slots cujo valor ainda pode ser lido adiante.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from codegen.mepa_ir import Instr, CALL_OPS, slot_of
+from .cfg import ControlFlowGraph
+from .dataflow import (
+    DataflowProblem, DataflowResult, GenKillProblem, solve, BACKWARD, FORWARD,
+)
+
+
+def collect_slots(instructions: List[Instr]) -> Dict[str, int]:
+    """Numera os slots referenciados na listagem (slot -> bit)."""
+    index: Dict[str, int] = {}
+    for instr in instructions:
+        slot = slot_of(instr)
+        if slot is not None and slot not in index:
+            index[slot] = len(index)
+    return index
+
+
+def _all_bits(count: int) -> int:
+    return (1 << count) - 1
+
+
+# ================================================================
+# Definições que alcançam
+# ================================================================
+@dataclass
+class Definition:
+    """Um ponto que define o slot: `ARMZ` em `index` ou origem desconhecida (index=None)."""
+    slot: str
+    index: Optional[int]
+
+
+class ReachingDefinitions:
+    """Definições que alcançam cada ponto do programa.
+
+    Além de cada `ARMZ`, há uma definição "desconhecida" por slot, gerada nas
+    entradas do CFG e em cada `CHPR`, representando valores que o procedimento
+    corrente não controla.
+    """
+
+    def __init__(self, cfg: ControlFlowGraph) -> None:
+        self.cfg = cfg
+        instrs = cfg.instructions
+        self.slots: Dict[str, int] = collect_slots(instrs)
+        self.definitions: List[Definition] = [Definition(s, None) for s in self.slots]
+        self.def_at: Dict[int, int] = {}
+        for i, instr in enumerate(instrs):
+            if instr.op == "ARMZ":
+                self.def_at[i] = len(self.definitions)
+                self.definitions.append(Definition(slot_of(instr), i))
+
+        self.unknown_mask: int = _all_bits(len(self.slots))
+        self.slot_defs: Dict[str, int] = {s: 1 << b for s, b in self.slots.items()}
+        for d, definition in enumerate(self.definitions):
+            if definition.index is not None:
+                self.slot_defs[definition.slot] |= 1 << d
+
+        gen: List[int] = []
+        kill: List[int] = []
+        for block in cfg.blocks:
+            g, k = 0, 0
+            for i in range(block.start, block.end):
+                g, k = self._step(i, g, k)
+            gen.append(g)
+            kill.append(k)
+
+        problem = GenKillProblem(gen, kill, direction=FORWARD, boundary=self.unknown_mask)
+        self.result: DataflowResult = solve(cfg, problem)
+
+    def _step(self, i: int, gen: int, kill: int) -> Tuple[int, int]:
+        instr = self.cfg.instructions[i]
+        if instr.op == "ARMZ":
+            mask = self.slot_defs[slot_of(instr)]
+            bit = 1 << self.def_at[i]
+            return (gen & ~mask) | bit, (kill | mask) & ~bit
+        if instr.op in CALL_OPS:
+            return gen | self.unknown_mask, kill & ~self.unknown_mask
+        return gen, kill
+
+    def transfer(self, i: int, value: int) -> int:
+        """Aplica a instrução `i` ao conjunto de definições."""
+        gen, kill = self._step(i, 0, 0)
+        return gen | (value & ~kill)
+
+    def walk(self, block: int) -> Iterator[Tuple[int, int]]:
+        """Percorre o bloco devolvendo (índice, definições que alcançam a instrução)."""
+        value = self.result.block_in[block]
+        blk = self.cfg.blocks[block]
+        for i in range(blk.start, blk.end):
+            yield i, value
+            value = self.transfer(i, value)
+
+    def reaching(self, value: int, slot: str) -> List[Definition]:
+        """Definições do slot presentes no conjunto `value`."""
+        mask = value & self.slot_defs.get(slot, 0)
+        return [self.definitions[d] for d in _iter_bits(mask)]
+
+
+# ================================================================
+# Cópias disponíveis
+# ================================================================
+@dataclass
+class Copy:
+    """Cópia `target := source` feita pelo par ``CRVL source; ARMZ target``."""
+    target: str
+    source: str
+    index: int      # índice do ARMZ
+
+
+class AvailableCopies:
+    """Cópias válidas em cada ponto: em todo caminho, nem origem nem destino mudaram."""
+
+    def __init__(self, cfg: ControlFlowGraph) -> None:
+        self.cfg = cfg
+        instrs = cfg.instructions
+        self.copies: List[Copy] = []
+        self.copy_at: Dict[int, int] = {}
+        self.touching: Dict[str, int] = {}
+        for block in cfg.blocks:
+            for i in range(block.start + 1, block.end):
+                prev, cur = instrs[i - 1], instrs[i]
+                if cur.op == "ARMZ" and prev.op == "CRVL" and cur.label is None:
+                    target, source = slot_of(cur), slot_of(prev)
+                    if target == source:
+                        continue
+                    c = len(self.copies)
+                    self.copy_at[i] = c
+                    self.copies.append(Copy(target, source, i))
+                    self.touching[target] = self.touching.get(target, 0) | (1 << c)
+                    self.touching[source] = self.touching.get(source, 0) | (1 << c)
+        self.universe: int = _all_bits(len(self.copies))
+
+        gen: List[int] = []
+        kill: List[int] = []
+        for block in cfg.blocks:
+            g, k = 0, 0
+            for i in range(block.start, block.end):
+                g, k = self._step(i, g, k)
+            gen.append(g)
+            kill.append(k)
+
+        problem = GenKillProblem(
+            gen, kill, direction=FORWARD, union=False, initial=self.universe
+        )
+        self.result: DataflowResult = solve(cfg, problem)
+
+    def _step(self, i: int, gen: int, kill: int) -> Tuple[int, int]:
+        instr = self.cfg.instructions[i]
+        if instr.op == "ARMZ":
+            mask = self.touching.get(slot_of(instr), 0)
+            gen, kill = gen & ~mask, kill | mask
+            c = self.copy_at.get(i)
+            if c is not None:
+                gen, kill = gen | (1 << c), kill & ~(1 << c)
+            return gen, kill
+        if instr.op in CALL_OPS:
+            return 0, self.universe
+        return gen, kill
+
+    def transfer(self, i: int, value: int) -> int:
+        gen, kill = self._step(i, 0, 0)
+        return gen | (value & ~kill)
+
+    def walk(self, block: int) -> Iterator[Tuple[int, int]]:
+        """Percorre o bloco devolvendo (índice, cópias disponíveis antes da instrução)."""
+        value = self.result.block_in[block]
+        blk = self.cfg.blocks[block]
+        for i in range(blk.start, blk.end):
+            yield i, value
+            value = self.transfer(i, value)
+
+    def copy_for(self, value: int, slot: str) -> Optional[Copy]:
+        """Cópia disponível cujo destino é `slot`, se houver."""
+        mask = value & self.touching.get(slot, 0)
+        for c in _iter_bits(mask):
+            if self.copies[c].target == slot:
+                return self.copies[c]
+        return None
+
+
+# ================================================================
+# Slots vivos
+# ================================================================
+class _LivenessProblem(DataflowProblem):
+    direction = BACKWARD
+    union = True
+
+    def __init__(self, owner: "LiveSlots") -> None:
+        self.owner = owner
+
+    def transfer(self, block: int, value: int) -> int:
+        blk = self.owner.cfg.blocks[block]
+        for i in range(blk.end - 1, blk.start - 1, -1):
+            value = self.owner.transfer(i, value)
+        return value
+
+
+class LiveSlots:
+    """Slots vivos: existe caminho até uma leitura sem escrita intermediária."""
+
+    def __init__(self, cfg: ControlFlowGraph) -> None:
+        self.cfg = cfg
+        self.slots: Dict[str, int] = collect_slots(cfg.instructions)
+        self.universe: int = _all_bits(len(self.slots))
+        self.result: DataflowResult = solve(cfg, _LivenessProblem(self))
+
+    def transfer(self, i: int, live_after: int) -> int:
+        """Slots vivos antes da instrução `i` dados os vivos depois dela."""
+        instr = self.cfg.instructions[i]
+        if instr.op == "CRVL":
+            return live_after | (1 << self.slots[slot_of(instr)])
+        if instr.op == "ARMZ":
+            return live_after & ~(1 << self.slots[slot_of(instr)])
+        if instr.op in CALL_OPS or instr.op == "RTPR":
+            return self.universe
+        return live_after
+
+    def walk_backward(self, block: int) -> Iterator[Tuple[int, int]]:
+        """Percorre o bloco de trás para frente devolvendo (índice, vivos após a instrução)."""
+        value = self.result.block_out[block]
+        blk = self.cfg.blocks[block]
+        for i in range(blk.end - 1, blk.start - 1, -1):
+            yield i, value
+            value = self.transfer(i, value)
+
+    def is_live(self, value: int, slot: str) -> bool:
+        bit = self.slots.get(slot)
+        return bit is not None and bool(value >> bit & 1)
+
+
+def _iter_bits(value: int) -> Iterator[int]:
+    while value:
+        low = value & -value
+        yield low.bit_length() - 1
+        value ^= low
+
+
+__all__ = [
+    "collect_slots",
+    "Definition",
+    "ReachingDefinitions",
+    "Copy",
+    "AvailableCopies",
+    "LiveSlots",
+]
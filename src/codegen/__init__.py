@@ -1,3 +1,9 @@
 from .mepa_generator import MepaGenerator, CodeGenerationError
+from .line_table import LineTable
+from .python_backend import PythonGenerator, PythonProgram, ExecutionError
+from .closures import ClosureCompiler, ClosureProgram
 
-__all__ = ["MepaGenerator", "CodeGenerationError"]
+__all__ = [
+    "MepaGenerator", "CodeGenerationError", "LineTable", "PythonGenerator", "PythonProgram",
+    "ExecutionError", "ClosureCompiler", "ClosureProgram",
+]
@@ -0,0 +1,601 @@
+"""Execução direta da AST por closures (`ClosureCompiler`).
+
+Roda o programa logo depois do `SemanticAnalyzer`, sem gerar MEPA nem
+código Python. Cada nó é compilado uma única vez numa função Python
+aninhada que recebe só o quadro corrente `L` (uma lista): as variáveis
+viram índices fixos nesse quadro, resolvidos na compilação, e os
+operadores já escolhidos viram o corpo da closure. Executar não faz
+`isinstance`, nem busca em dicionário, nem percorre a AST.
+
+- O corpo principal usa o quadro global `G`; cada chamada de função cria
+  um quadro novo (cópia de um modelo com o tamanho certo), com os
+  parâmetros nos primeiros índices e o valor de retorno no último.
+- Comandos devolvem None ou um sinal (`BREAK`, `CONTINUE`, `RETURN`),
+  tratado pelo laço ou pela chamada mais próxima; blocos sem comandos
+  que sinalizam nem testam o retorno.
+- Expressões com variável local e constante (``i + 1``, ``i < n``) têm
+  closures próprias, sem chamadas para buscar os operandos.
+
+A semântica é a de `PythonGenerator` (e do código MEPA): as mesmas regras
+de divisão, comparações 1/0, `for ... in range`, escopo das funções e
+retorno 0. O programa compilado guarda os quadros e as funções de E/S
+entre as closures, então um `ClosureProgram` não pode executar em duas
+threads ao mesmo tempo.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from syntax.ast_nodes import (
+    ASTNode, Program, FunctionDeclaration, VarAssign, IfStatement, WhileStatement,
+    ForStatement, ReturnStatement, BreakStatement, ContinueStatement,
+    BinaryOperation, UnaryOp, Literal, Identifier, Call,
+)
+from .mepa_generator import CodeGenerationError, _assigned_names
+from .mepa_ir import mepa_div
+from .python_backend import ExecutionError, _range_count, _read_number
+
+
+# sinais devolvidos pelos comandos
+BREAK, CONTINUE, RETURN = 1, 2, 3
+
+# erros do Python que viram ExecutionError com a linha do comando
+_FAILURES = (ZeroDivisionError, RecursionError, TypeError, OverflowError)
+
+Closure = Callable[[List[Any]], Any]
+
+
+def _failure(exc: BaseException, line: Optional[int]) -> ExecutionError:
+    if isinstance(exc, ZeroDivisionError):
+        return ExecutionError(line, "divisão por zero")
+    if isinstance(exc, RecursionError):
+        return ExecutionError(line, "recursão profunda demais")
+    return ExecutionError(line, str(exc))
+
+
+# Operadores binários por forma dos operandos: (closure, closure),
+# (slot local, constante), (slot local, slot local) e (closure, constante).
+_ARITHMETIC: Dict[str, Tuple[Callable[..., Closure], ...]] = {
+    "+": (
+        lambda a, b: lambda L: a(L) + b(L),
+        lambda i, c: lambda L: L[i] + c,
+        lambda i, j: lambda L: L[i] + L[j],
+        lambda a, c: lambda L: a(L) + c,
+    ),
+    "-": (
+        lambda a, b: lambda L: a(L) - b(L),
+        lambda i, c: lambda L: L[i] - c,
+        lambda i, j: lambda L: L[i] - L[j],
+        lambda a, c: lambda L: a(L) - c,
+    ),
+    "*": (
+        lambda a, b: lambda L: a(L) * b(L),
+        lambda i, c: lambda L: L[i] * c,
+        lambda i, j: lambda L: L[i] * L[j],
+        lambda a, c: lambda L: a(L) * c,
+    ),
+    "/": (
+        lambda a, b: lambda L: mepa_div(a(L), b(L)),
+        lambda i, c: lambda L: mepa_div(L[i], c),
+        lambda i, j: lambda L: mepa_div(L[i], L[j]),
+        lambda a, c: lambda L: mepa_div(a(L), c),
+    ),
+}
+_ARITHMETIC["//"] = _ARITHMETIC["/"]
+
+# comparações devolvem bool: `_value` converte para 1/0 fora de condições
+_COMPARISONS: Dict[str, Tuple[Callable[..., Closure], ...]] = {
+    "<": (
+        lambda a, b: lambda L: a(L) < b(L),
+        lambda i, c: lambda L: L[i] < c,
+        lambda i, j: lambda L: L[i] < L[j],
+        lambda a, c: lambda L: a(L) < c,
+    ),
+    ">": (
+        lambda a, b: lambda L: a(L) > b(L),
+        lambda i, c: lambda L: L[i] > c,
+        lambda i, j: lambda L: L[i] > L[j],
+        lambda a, c: lambda L: a(L) > c,
+    ),
+    "<=": (
+        lambda a, b: lambda L: a(L) <= b(L),
+        lambda i, c: lambda L: L[i] <= c,
+        lambda i, j: lambda L: L[i] <= L[j],
+        lambda a, c: lambda L: a(L) <= c,
+    ),
+    ">=": (
+        lambda a, b: lambda L: a(L) >= b(L),
+        lambda i, c: lambda L: L[i] >= c,
+        lambda i, j: lambda L: L[i] >= L[j],
+        lambda a, c: lambda L: a(L) >= c,
+    ),
+    "==": (
+        lambda a, b: lambda L: a(L) == b(L),
+        lambda i, c: lambda L: L[i] == c,
+        lambda i, j: lambda L: L[i] == L[j],
+        lambda a, c: lambda L: a(L) == c,
+    ),
+    "!=": (
+        lambda a, b: lambda L: a(L) != b(L),
+        lambda i, c: lambda L: L[i] != c,
+        lambda i, j: lambda L: L[i] != L[j],
+        lambda a, c: lambda L: a(L) != c,
+    ),
+}
+
+
+class _Function:
+    """Função do usuário; `body` é preenchido depois (chamadas antes do `def` e recursão)."""
+    __slots__ = ("name", "arity", "body", "size")
+
+    def __init__(self, name: str, arity: int) -> None:
+        self.name = name
+        self.arity = arity
+        self.body: Optional[Closure] = None
+        self.size = 0
+
+
+@dataclass
+class _Scope:
+    """Variáveis de um quadro: nome -> índice."""
+    slots: Dict[str, int]
+
+    def slot(self, name: str) -> int:
+        if name not in self.slots:
+            self.slots[name] = len(self.slots)
+        return self.slots[name]
+
+
+@dataclass
+class _Operand:
+    # "const" (value), "slot" (índice no quadro corrente) ou "closure" (fn)
+    kind: str
+    value: Any = None
+    index: int = 0
+    fn: Optional[Closure] = None
+
+
+class ClosureProgram:
+    """Programa compilado por `ClosureCompiler`."""
+
+    def __init__(self, main: Closure, frame: List[Any], io: List[Any], size: int) -> None:
+        self._main = main
+        # quadro global e [read, write]: as closures guardam estas listas
+        self._frame = frame
+        self._io = io
+        self.size = size
+
+    def run(
+        self,
+        read: Optional[Callable[[], Any]] = None,
+        write: Optional[Callable[[Any], None]] = None,
+    ) -> List[Any]:
+        """Executa o programa; sem `write`, devolve os valores escritos."""
+        output: List[Any] = []
+        self._frame[:] = [None] * self.size
+        self._io[:] = [read or _read_number, write or output.append]
+        self._main(self._frame)
+        return output
+
+
+class ClosureCompiler:
+    """Compila a AST (já verificada pelo `SemanticAnalyzer`) num `ClosureProgram`."""
+
+    def compile(self, program: Program) -> ClosureProgram:
+        statements = [s for s in program.statements if not isinstance(s, FunctionDeclaration)]
+        self._frame: List[Any] = []
+        self._io: List[Any] = [None, None]
+        self._globals = _Scope({})
+        for name in sorted(_assigned_names(statements)):
+            self._globals.slot(name)
+        self._functions: Dict[str, _Function] = {
+            stmt.name: _Function(stmt.name, len(stmt.params))
+            for stmt in program.statements if isinstance(stmt, FunctionDeclaration)
+        }
+        self._scope = self._globals
+        self._in_function = False
+        self._loops = 0
+        # (função, modelo do quadro) de cada chamada, preenchidos no fim
+        self._templates: List[Tuple[_Function, List[Any]]] = []
+        self._line: Optional[int] = None
+
+        # globais atribuídas antes de cada `def` são compartilhadas com a função
+        assigned: Set[str] = set()
+        main: List[ASTNode] = []
+        for stmt in program.statements:
+            if isinstance(stmt, FunctionDeclaration):
+                self._function(stmt, assigned)
+                continue
+            if isinstance(stmt, VarAssign):
+                assigned.add(stmt.name)
+            elif isinstance(stmt, ForStatement):
+                assigned.add(stmt.var_name)
+            main.append(stmt)
+        body, _ = self._block(main)
+        for function, template in self._templates:
+            template[:] = [None] * function.size + [0]
+        return ClosureProgram(body, self._frame, self._io, len(self._globals.slots))
+
+    # ----------------------------------------------------------
+    def _function(self, func: FunctionDeclaration, visible: Set[str]) -> None:
+        if func.line is not None:
+            self._line = func.line
+        local_names = _assigned_names(func.body.statements) - (visible - set(func.params))
+        scope = _Scope({})
+        for name in func.params:
+            scope.slot(name)
+        for name in sorted(local_names - set(func.params)):
+            scope.slot(name)
+
+        outer = self._scope
+        self._scope = scope
+        self._in_function = True
+        body, _ = self._block(func.body.statements)
+        self._scope = outer
+        self._in_function = False
+        function = self._functions[func.name]
+        function.body = body
+        function.size = len(scope.slots)
+
+    def _block(self, statements: Iterable[ASTNode]) -> Tuple[Closure, bool]:
+        """Closure do bloco e se ele pode devolver um sinal."""
+        compiled = [self._statement(stmt) for stmt in statements]
+        steps = [fn for fn, _ in compiled]
+        if any(signals for _, signals in compiled):
+            if len(steps) == 1:
+                return steps[0], True
+
+            def block(L):
+                for step in steps:
+                    signal = step(L)
+                    if signal is not None:
+                        return signal
+            return block, True
+
+        if not steps:
+            return (lambda L: None), False
+        if len(steps) == 1:
+            return steps[0], False
+        if len(steps) == 2:
+            first, second = steps
+
+            def pair(L):
+                first(L)
+                second(L)
+            return pair, False
+
+        def sequence(L):
+            for step in steps:
+                step(L)
+        return sequence, False
+
+    def _statement(self, stmt: ASTNode) -> Tuple[Closure, bool]:
+        if stmt.line is not None:
+            self._line = stmt.line
+        line = self._line
+
+        if isinstance(stmt, FunctionDeclaration):
+            raise CodeGenerationError("Função declarada fora do nível de cima não suportada.")
+
+        if isinstance(stmt, VarAssign):
+            value = self._value(stmt.expr)
+            frame, i = self._store(stmt.name)
+            if frame is not None:
+                def assign_global(L):
+                    try:
+                        frame[i] = value(L)
+                    except _FAILURES as exc:
+                        raise _failure(exc, line) from None
+                return assign_global, False
+
+            def assign(L):
+                try:
+                    L[i] = value(L)
+                except _FAILURES as exc:
+                    raise _failure(exc, line) from None
+            return assign, False
+
+        if isinstance(stmt, IfStatement):
+            test = self._test(stmt.cond)
+            then, then_signals = self._block(stmt.then_block.statements)
+            if stmt.else_block is None:
+                def if_(L):
+                    try:
+                        condition = test(L)
+                    except _FAILURES as exc:
+                        raise _failure(exc, line) from None
+                    if condition:
+                        return then(L)
+                return if_, then_signals
+
+            orelse, else_signals = self._block(stmt.else_block.statements)
+
+            def if_else(L):
+                try:
+                    condition = test(L)
+                except _FAILURES as exc:
+                    raise _failure(exc, line) from None
+                if condition:
+                    return then(L)
+                return orelse(L)
+            return if_else, then_signals or else_signals
+
+        if isinstance(stmt, WhileStatement):
+            test = self._test(stmt.cond)
+            body, signals = self._loop_body(stmt.body.statements)
+            if not signals:
+                def while_(L):
+                    try:
+                        while test(L):
+                            body(L)
+                    except _FAILURES as exc:
+                        raise _failure(exc, line) from None
+                return while_, False
+
+            def while_signals(L):
+                try:
+                    while test(L):
+                        signal = body(L)
+                        if signal is not None:
+                            if signal == BREAK:
+                                return None
+                            if signal == RETURN:
+                                return signal
+                except _FAILURES as exc:
+                    raise _failure(exc, line) from None
+            return while_signals, self._in_function
+
+        if isinstance(stmt, ForStatement):
+            return self._for(stmt, line)
+
+        if isinstance(stmt, BreakStatement):
+            if not self._loops:
+                raise CodeGenerationError("Comando 'break' fora de laço.")
+            return (lambda L: BREAK), True
+
+        if isinstance(stmt, ContinueStatement):
+            if not self._loops:
+                raise CodeGenerationError("Comando 'continue' fora de laço.")
+            return (lambda L: CONTINUE), True
+
+        if isinstance(stmt, ReturnStatement):
+            if not self._in_function:
+                raise CodeGenerationError("Comando 'return' fora de função.")
+            if stmt.expr is None:
+                return (lambda L: RETURN), True
+            value = self._value(stmt.expr)
+
+            # o valor de retorno fica no último índice do quadro
+            def return_(L):
+                try:
+                    L[-1] = value(L)
+                except _FAILURES as exc:
+                    raise _failure(exc, line) from None
+                return RETURN
+            return return_, True
+
+        if isinstance(stmt, Call):
+            callee = stmt.callee.name if isinstance(stmt.callee, Identifier) else None
+            io = self._io
+            if callee == "print":
+                values = [self._value(arg) for arg in stmt.args]
+
+                def print_(L):
+                    try:
+                        for value in values:
+                            io[1](value(L))
+                    except _FAILURES as exc:
+                        raise _failure(exc, line) from None
+                return print_, False
+
+            call = self._value(stmt)
+
+            def expression(L):
+                try:
+                    call(L)
+                except _FAILURES as exc:
+                    raise _failure(exc, line) from None
+            return expression, False
+
+        raise CodeGenerationError("Expressão usada como comando não suportada.")
+
+    def _loop_body(self, statements: Iterable[ASTNode]) -> Tuple[Closure, bool]:
+        self._loops += 1
+        body = self._block(statements)
+        self._loops -= 1
+        return body
+
+    def _for(self, stmt: ForStatement, line: Optional[int]) -> Tuple[Closure, bool]:
+        iterable = stmt.iterable
+        if (
+            not isinstance(iterable, Call)
+            or not isinstance(iterable.callee, Identifier)
+            or iterable.callee.name != "range"
+        ):
+            raise CodeGenerationError("Somente 'for ... in range(...)' é suportado.")
+        if len(iterable.args) != 1:
+            raise CodeGenerationError("range() deve ter exatamente 1 argumento.")
+        limit = self._value(iterable.args[0])
+        frame, i = self._store(stmt.var_name)
+        body, signals = self._loop_body(stmt.body.statements)
+        returns = signals and self._in_function
+
+        if stmt.var_name not in _assigned_names(stmt.body.statements):
+            # o corpo não muda o contador: laço nativo sobre range; ao sair
+            # sem break, o contador avança até o limite como no laço MEPA
+            def for_range(L):
+                V = L if frame is None else frame
+                try:
+                    n = _range_count(limit(L))
+                    for k in range(n):
+                        V[i] = k
+                        signal = body(L)
+                        if signal is not None:
+                            if signal == BREAK:
+                                return None
+                            if signal == RETURN:
+                                return signal
+                    V[i] = n if n > 0 else 0
+                except _FAILURES as exc:
+                    raise _failure(exc, line) from None
+            if signals:
+                return for_range, returns
+
+            def for_plain(L):
+                V = L if frame is None else frame
+                try:
+                    n = _range_count(limit(L))
+                    for k in range(n):
+                        V[i] = k
+                        body(L)
+                    V[i] = n if n > 0 else 0
+                except _FAILURES as exc:
+                    raise _failure(exc, line) from None
+            return for_plain, False
+
+        # contador alterado no corpo: o mesmo laço do código MEPA
+        def for_counter(L):
+            V = L if frame is None else frame
+            try:
+                n = limit(L)
+                V[i] = 0
+                while V[i] < n:
+                    signal = body(L)
+                    if signal is not None:
+                        if signal == BREAK:
+                            return None
+                        if signal == RETURN:
+                            return signal
+                    V[i] = V[i] + 1
+            except _FAILURES as exc:
+                raise _failure(exc, line) from None
+        return for_counter, returns
+
+    def _store(self, name: str) -> Tuple[Optional[List[Any]], int]:
+        """Onde gravar `name`: (None, índice no quadro corrente) ou (quadro global, índice)."""
+        if name in self._scope.slots or name not in self._globals.slots:
+            return None, self._scope.slot(name)
+        return self._frame, self._globals.slots[name]
+
+    # ----------------------------------------------------------
+    def _test(self, expr: ASTNode) -> Closure:
+        """Condição de `if`/`while`: a comparação é testada sem virar 1/0."""
+        if isinstance(expr, BinaryOperation) and expr.op in _COMPARISONS:
+            return self._binary(_COMPARISONS[expr.op], expr)
+        return self._value(expr)
+
+    def _value(self, expr: ASTNode) -> Closure:
+        operand = self._operand(expr)
+        if operand.kind == "const":
+            value = operand.value
+            return lambda L: value
+        if operand.kind == "slot":
+            i = operand.index
+            return lambda L: L[i]
+        return operand.fn
+
+    def _operand(self, expr: ASTNode) -> _Operand:
+        if isinstance(expr, Literal):
+            value = expr.value
+            if isinstance(value, bool):
+                return _Operand("const", 1 if value else 0)
+            if isinstance(value, (int, float, str)):
+                return _Operand("const", value)
+            raise CodeGenerationError(f"Literal {type(value)} não suportado")
+
+        if isinstance(expr, Identifier):
+            name = expr.name
+            if name in self._scope.slots:
+                return _Operand("slot", index=self._scope.slots[name])
+            if name not in self._globals.slots:
+                raise CodeGenerationError(f"Variável '{name}' não declarada.")
+            G, g = self._frame, self._globals.slots[name]
+            return _Operand("closure", fn=lambda L: G[g])
+
+        if isinstance(expr, BinaryOperation):
+            if expr.op in _COMPARISONS:
+                test = self._binary(_COMPARISONS[expr.op], expr)
+                return _Operand("closure", fn=lambda L: 1 if test(L) else 0)
+            if expr.op in _ARITHMETIC:
+                return _Operand("closure", fn=self._binary(_ARITHMETIC[expr.op], expr))
+            raise CodeGenerationError(f"Operador {expr.op} não suportado.")
+
+        if isinstance(expr, UnaryOp):
+            operand = self._operand(expr.operand)
+            if operand.kind == "const" and not isinstance(operand.value, str):
+                return _Operand("const", -operand.value)
+            if operand.kind == "slot":
+                i = operand.index
+                return _Operand("closure", fn=lambda L: -L[i])
+            value = self._value(expr.operand)
+            return _Operand("closure", fn=lambda L: -value(L))
+
+        if isinstance(expr, Call):
+            return _Operand("closure", fn=self._call(expr))
+
+        raise CodeGenerationError(f"Nó de expressão {type(expr).__name__} não suportado.")
+
+    def _binary(self, shapes: Tuple[Callable[..., Closure], ...], expr: BinaryOperation) -> Closure:
+        generic, slot_const, slot_slot, closure_const = shapes
+        left, right = self._operand(expr.left), self._operand(expr.right)
+        if left.kind == "slot" and right.kind == "const":
+            return slot_const(left.index, right.value)
+        if left.kind == "slot" and right.kind == "slot":
+            return slot_slot(left.index, right.index)
+        if right.kind == "const":
+            return closure_const(self._value(expr.left), right.value)
+        return generic(self._value(expr.left), self._value(expr.right))
+
+    def _call(self, expr: Call) -> Closure:
+        if not isinstance(expr.callee, Identifier):
+            raise CodeGenerationError("Só funções chamadas pelo nome são suportadas.")
+        name = expr.callee.name
+        if name == "input":
+            io = self._io
+            return lambda L: io[0]()
+        if name == "print":
+            raise CodeGenerationError("'print' não devolve valor.")
+        if name == "range":
+            raise CodeGenerationError("range() só é suportado em 'for ... in range(...)'.")
+        function = self._functions.get(name)
+        if function is None:
+            raise CodeGenerationError(f"Função '{name}' não declarada.")
+        if len(expr.args) != function.arity:
+            raise CodeGenerationError(
+                f"Função '{name}' espera {function.arity} argumento(s), "
+                f"recebeu {len(expr.args)}."
+            )
+        args = [self._value(arg) for arg in expr.args]
+        # o tamanho do quadro só é conhecido depois de compilar o corpo
+        template: List[Any] = []
+        self._templates.append((function, template))
+
+        if not args:
+            def call0(L):
+                F = template[:]
+                function.body(F)
+                return F[-1]
+            return call0
+        if len(args) == 1:
+            (arg,) = args
+
+            def call1(L):
+                F = template[:]
+                F[0] = arg(L)
+                function.body(F)
+                return F[-1]
+            return call1
+
+        count = len(args)
+
+        def call(L):
+            F = template[:]
+            F[:count] = [arg(L) for arg in args]
+            function.body(F)
+            return F[-1]
+        return call
+
+
+__all__ = ["ClosureCompiler", "ClosureProgram"]
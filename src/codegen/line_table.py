@@ -0,0 +1,64 @@
+"""Tabela de linhas do fonte das instruções geradas.
+
+Comandos consecutivos costumam gerar várias instruções para a mesma linha,
+então a tabela guarda só trechos: ``(primeira instrução, linha)``, e cada
+instrução pertence ao último trecho que começa antes dela (ou nela). Um
+programa de N comandos tem no máximo ~N trechos, independente de quantas
+instruções cada um gera.
+
+É o mesmo formato de `MepaProgram.lines` (dicionário só com os inícios de
+trecho), usado pelo perfil, pelo formato ``.mepab`` e pelos erros da máquina.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class LineTable:
+    """Trechos ``(índice inicial, linha)`` em ordem crescente de índice."""
+
+    def __init__(self, runs: Iterable[Tuple[int, int]] = ()) -> None:
+        self.starts: List[int] = []
+        self.lines: List[int] = []
+        for index, line in runs:
+            self.mark(index, line)
+
+    @classmethod
+    def from_dict(cls, lines: Dict[int, int]) -> "LineTable":
+        return cls(sorted(lines.items()))
+
+    def mark(self, index: int, line: int) -> None:
+        """A partir de `index` as instruções são da linha `line`.
+
+        Índices devem vir em ordem não decrescente; uma nova marca no mesmo
+        índice substitui a anterior e uma marca da mesma linha é ignorada.
+        """
+        if self.starts and self.starts[-1] == index:
+            self.starts.pop()
+            self.lines.pop()
+        if self.lines and self.lines[-1] == line:
+            return
+        self.starts.append(index)
+        self.lines.append(line)
+
+    def line_of(self, index: int) -> Optional[int]:
+        """Linha do fonte da instrução `index` (None antes do primeiro trecho)."""
+        k = bisect_right(self.starts, index)
+        return self.lines[k - 1] if k else None
+
+    def to_dict(self) -> Dict[int, int]:
+        return dict(zip(self.starts, self.lines))
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return iter(zip(self.starts, self.lines))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __repr__(self) -> str:
+        return f"LineTable({list(self)!r})"
+
+
+__all__ = ["LineTable"]
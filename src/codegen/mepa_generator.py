@@ -1,10 +1,31 @@
-"""Gerador de código intermediário no formato MEPA."""
+"""Gerador de código intermediário no formato MEPA.
+
+O programa principal fica no nível léxico 0, com as variáveis em endereços
+absolutos (``CRVL n``). Cada função tem o nível 1 e um registro de
+ativação próprio na pilha, acessado por ``CRVL 1,n``/``ARMZ 1,n`` a partir
+de ``D[1]``: quem chama empilha o slot do resultado e os argumentos, e a
+função faz ``ENPR 1`` (salva o display), ``AMEM`` dos locais e, no fim,
+``DMEM`` e ``RTPR 1,p``. Com p parâmetros, o registro fica assim::
+
+    D[1] - p - 3    resultado
+    D[1] - p - 2    primeiro parâmetro ... D[1] - 3: último parâmetro
+    D[1] - 2        endereço de retorno
+    D[1] - 1        D[1] de quem chamou
+    D[1] + 0 ...    variáveis locais e temporários
+
+Chamadas recursivas ganham registros separados, e cada chamada ocupa só o
+registro da própria função.
+"""
 
 from __future__ import annotations
+from bisect import bisect_left
 from contextlib import contextmanager
 from dataclasses import dataclass, field
-from typing import Dict, Iterable, List, Optional
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from semantic.errors import SemanticError
+from .line_table import LineTable
+from .mepa_ir import NEGATED_COMPARISONS
+from .value_numbering import ValueKey, plan_common_subexpressions, straight_line_runs
 from syntax.ast_nodes import (
     ASTNode, Program, FunctionDeclaration, VarAssign, IfStatement, WhileStatement,
     ForStatement, ReturnStatement, BreakStatement, ContinueStatement,
@@ -16,15 +37,30 @@ class CodeGenerationError(Exception):
     """Erro genérico de geração de código."""
 
 
+# Tamanho máximo (nós da AST no corpo) de uma função folha expandida por `inline`
+INLINE_LIMIT = 24
+
+
 # ================================================================
 # Estruturas auxiliares
 # ================================================================
+# Endereço de uma variável: (nível léxico, deslocamento); no nível 0 o
+# deslocamento é o endereço absoluto
+Address = Tuple[int, int]
+
+
 @dataclass
 class _Scope:
-    """Escopo de variáveis com endereços relativos e suporte a deslocamento absoluto."""
+    """Escopo de variáveis com endereços relativos ao registro do seu nível léxico.
+
+    Um escopo com `base` começa nesse deslocamento em vez de logo após os
+    pais (registros de função e expansões de funções folha).
+    """
     parent: Optional["_Scope"]
     symbols: Dict[str, int]
     next_addr: int = 0
+    base: Optional[int] = None
+    level: int = 0
 
     def declare(self, name: str) -> int:
         """Declara uma variável neste escopo."""
@@ -35,24 +71,21 @@ class _Scope:
         self.next_addr += 1
         return addr
 
-    def abs_offset_from_root(self) -> int:
-        """Soma quantos slots existem acima deste escopo."""
+    def frame_offset(self) -> int:
+        """Slots acima deste escopo no mesmo nível (até um escopo com `base`)."""
         offset = 0
-        scope = self.parent
-        while scope is not None:
-            offset += scope.next_addr
+        scope = self
+        while scope.base is None and scope.parent is not None and scope.parent.level == self.level:
             scope = scope.parent
-        return offset
+            offset += scope.next_addr
+        return offset + (scope.base or 0)
 
-    def lookup_abs(self, name: str) -> Optional[int]:
-        """Procura variável e retorna endereço absoluto (soma deslocamentos dos escopos pais)."""
+    def lookup(self, name: str) -> Optional[Address]:
+        """Procura variável e retorna (nível, deslocamento no registro desse nível)."""
         scope = self
-        offset_below = 0
         while scope is not None:
             if name in scope.symbols:
-                rel = scope.symbols[name]
-                return self.abs_offset_from_root() + rel + offset_below
-            offset_below += scope.next_addr
+                return scope.level, scope.frame_offset() + scope.symbols[name]
             scope = scope.parent
         return None
 
@@ -61,21 +94,38 @@ class _Scope:
 class LoopContext:
     break_label: str
     continue_label: str
+    scope_depth: int = 0  # escopos abertos fora do laço; os internos são liberados no desvio
 
 
 @dataclass
 class FunctionInfo:
+    """Parâmetros e variáveis locais de uma função.
+
+    `local_names` são todos os nomes locais além dos parâmetros (inclusive
+    os de blocos internos e os limites de `for`), declarados no registro de
+    uma vez; `inline` marca funções expandidas nas chamadas e
+    `entry_label`, o rótulo para onde desviam as chamadas de cauda a ela mesma.
+    """
     name: str
     label: str
     end_label: str
-    return_addr: int
-    param_addresses: List[int] = field(default_factory=list)
+    params: List[str] = field(default_factory=list)
+    local_names: List[str] = field(default_factory=list)
     instructions: List[str] = field(default_factory=list)
+    declaration: Optional[FunctionDeclaration] = None
+    inline: bool = False
+    entry_label: Optional[str] = None
 
 
 @dataclass
 class FunctionContext:
     info: FunctionInfo
+    return_addr: Address
+    end_label: Optional[str] = None
+    scope_depth: int = 0  # escopos abertos fora da função; os internos são liberados no return
+    # return que é o último comando: segue direto para o fim (numa expansão,
+    # com o valor na pilha)
+    tail: Optional[ReturnStatement] = None
 
 
 # ================================================================
@@ -84,35 +134,77 @@ class FunctionContext:
 class MepaGenerator:
     """Converte a AST em uma sequência de instruções MEPA."""
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        invert_loops: bool = False,
+        cse: bool = False,
+        inline: bool = False,
+        tail_calls: bool = True,
+    ) -> None:
+        # invert_loops: laços testados no fim (uma entrada protegida), com um
+        # único desvio por iteração em vez de DSVF no topo + DSVS de volta.
+        # cse: subexpressões repetidas num trecho sem desvios são calculadas
+        # uma vez e relidas de um temporário (ver value_numbering).
+        # inline: funções folha pequenas (sem chamadas a funções do usuário,
+        # até INLINE_LIMIT nós) são expandidas em cada chamada, sem CHPR/RTPR.
+        # tail_calls: `return f(...)` dentro da própria f regrava os parâmetros
+        # e desvia para o início, em espaço de pilha constante.
+        self.invert_loops = invert_loops
+        self.cse = cse
+        self.inline = inline
+        self.tail_calls = tail_calls
         self.instructions: List[str] = []
         self._current_output: List[str] = self.instructions
         self._label_counter: int = 0
         self._current_scope: _Scope = _Scope(parent=None, symbols={})
+        self._global_scope: _Scope = self._current_scope
         self._loop_stack: List[LoopContext] = []
         self._function_stack: List[FunctionContext] = []
         self._function_infos: Dict[str, FunctionInfo] = {}
         self._function_segments: List[List[str]] = []
-        self._address_names: Dict[int, str] = {}
+        self._address_names: Dict[Address, str] = {}
         self._program_end_label: Optional[str] = None
+        self._statement_line: Optional[int] = None
         self._locals_count_stack: List[int] = []
-        self._max_abs_addr: int = -1  # controla maior endereço usado
+        self._scope_amem_stack: List[Tuple[List[str], int]] = []  # AMEM de cada escopo aberto
+        self._scope_jumps_stack: List[List[Tuple[List[str], int]]] = []  # DMEM de break/continue
+        self._max_offset: List[int] = [-1, -1]  # maior deslocamento usado em cada nível
+        self._dropped: List[Tuple[List[str], int]] = []  # AMEM 0 de registros sem locais
+        self._temp_counter: int = 0
+        self._cse_keys: Dict[int, ValueKey] = {}    # id(nó) -> valor a guardar/reler
+        self._cse_temps: Dict[ValueKey, Address] = {}   # valor já calculado -> endereço
+        # (saída, posição nela, linha) de cada comando; vira `line_table` no fim
+        self._line_marks: List[Tuple[List[str], int, int]] = []
+        self.line_table: LineTable = LineTable()
 
     # ----------------------------------------------------------
     def generate(self, program: Program) -> List[str]:
-        """Gera as instruções MEPA para o programa completo."""
+        """Gera as instruções MEPA para o programa completo.
+
+        Depois da chamada, `line_table` mapeia cada instrução da lista
+        devolvida para a linha do fonte do comando que a gerou.
+        """
         self.instructions = ["INPP", "AMEM 0"]
         self._current_output = self.instructions
         self._label_counter = 0
         self._current_scope = _Scope(parent=None, symbols={})
+        self._global_scope = self._current_scope
         self._loop_stack = []
         self._function_stack = []
         self._function_infos = {}
         self._function_segments = []
         self._address_names = {}
         self._program_end_label = None
+        self._statement_line = None
         self._locals_count_stack = []
-        self._max_abs_addr = -1
+        self._scope_amem_stack = []
+        self._scope_jumps_stack = []
+        self._max_offset = [-1, -1]
+        self._dropped = []
+        self._temp_counter = 0
+        self._cse_keys = {}
+        self._cse_temps = {}
+        self._line_marks = []
 
         try:
             self._generate_program(program)
@@ -126,35 +218,256 @@ class MepaGenerator:
 
         self._emit(f"DSVS {self._program_end_label}")
 
+        bases = {id(self.instructions): 0}
         for segment in self._function_segments:
+            bases[id(segment)] = len(self.instructions)
             self.instructions.extend(segment)
 
         self._emit(f"{self._program_end_label}: NADA")
         self._emit("PARA")
 
+        # break/continue que não saem de nenhum escopo com variáveis e
+        # funções sem variáveis locais
+        removed = sorted(
+            [k for k, i in enumerate(self.instructions) if i == "DMEM 0"]
+            + [bases[id(output)] + index for output, index in self._dropped]
+        )
+        if removed:
+            skip = set(removed)
+            self.instructions[:] = [i for k, i in enumerate(self.instructions) if k not in skip]
+        self.line_table = self._build_line_table(bases, removed)
+
         # Corrige AMEM inicial
-        total_mem = max(0, self._max_abs_addr + 1)
+        total_mem = max(0, self._max_offset[0] + 1)
         self.instructions[1] = f"AMEM {total_mem}"
 
         return self.instructions
 
     # ----------------------------------------------------------
     def _generate_program(self, program: Program) -> None:
-        """Processa funções e corpo principal."""
-        for stmt in program.statements:
-            if isinstance(stmt, FunctionDeclaration):
-                self._generate_function(stmt)
-
-        for stmt in program.statements:
-            if not isinstance(stmt, FunctionDeclaration):
-                self._generate_statement(stmt)
+        """Processa funções e corpo principal.
+
+        As variáveis globais ocupam o início da memória; o código das
+        funções é gerado por último, cada uma com o seu registro.
+        """
+        self._plan_functions(program.statements)
+        self._generate_statements(
+            [stmt for stmt in program.statements if not isinstance(stmt, FunctionDeclaration)]
+        )
+        for info in self._function_infos.values():
+            if not info.inline:
+                self._generate_function(info)
 
         if self._program_end_label is None:
             self._program_end_label = self._new_label("LEND_")
 
+    def _plan_functions(self, statements: List[ASTNode]) -> None:
+        """Registra as funções e os nomes locais de cada uma.
+
+        Como no backend Python, parâmetros e nomes atribuídos no corpo são
+        locais, exceto as globais atribuídas no nível de cima antes do
+        `def`, que são as mesmas dentro da função. Todos os nomes locais
+        (inclusive os de blocos internos e os limites de `for`) são
+        declarados no registro de uma vez, antes de gerar o corpo.
+        """
+        shared: Set[str] = set()
+        calls: Dict[str, Set[str]] = {}
+        for stmt in statements:
+            if isinstance(stmt, VarAssign):
+                shared.add(stmt.name)
+            elif isinstance(stmt, ForStatement):
+                shared.add(stmt.var_name)
+            if not isinstance(stmt, FunctionDeclaration):
+                continue
+            if stmt.name in self._function_infos:
+                raise CodeGenerationError(f"Função '{stmt.name}' declarada mais de uma vez.")
+            body = stmt.body.statements
+            names = sorted(_assigned_names(body) - (shared - set(stmt.params)) - set(stmt.params))
+            names += sorted(f"_limite_{name}" for name in _for_variables(body))
+            self._function_infos[stmt.name] = FunctionInfo(
+                name=stmt.name,
+                label=f"F_{stmt.name}",
+                end_label=self._new_label("Lfim"),
+                params=list(stmt.params),
+                local_names=names,
+                declaration=stmt,
+            )
+            calls[stmt.name] = _called_functions(body)
+            if self.tail_calls and _has_self_tail_call(body, stmt.name):
+                self._function_infos[stmt.name].entry_label = self._new_label("Linicio")
+
+        for name, info in self._function_infos.items():
+            info.inline = (
+                self.inline
+                and not calls[name] & set(self._function_infos)
+                and _node_count(info.declaration.body.statements) <= INLINE_LIMIT
+            )
+
+    def _generate_function(self, info: FunctionInfo) -> None:
+        """Código da função num segmento próprio, no nível léxico 1.
+
+        ``F_nome: ENPR 1; AMEM m; corpo; fim: DMEM m; RTPR 1,p``, com m o
+        tamanho do registro (locais e temporários), conhecido só depois do
+        corpo. O resultado vai para o slot que quem chama empilhou antes dos
+        argumentos, já com 0 para quando a função termina sem `return`.
+        """
+        func = info.declaration
+        segment: List[str] = []
+        self._function_segments.append(segment)
+        outer_scope = self._current_scope
+        params = len(info.params)
+        self._max_offset[1] = -1
+        self._address_names = {
+            addr: name for addr, name in self._address_names.items() if addr[0] == 0
+        }
+        self._current_scope = _Scope(parent=self._global_scope, symbols={}, base=0, level=1)
+        for index, name in enumerate(info.params):
+            self._bind(name, index - params - 2)
+        self._bind(f"{info.name}.retorno", -params - 3)
+        for name in info.local_names:
+            self._bind(name)
+        with self._using_output(segment):
+            self._mark_line(func.line)
+            self._emit(f"{info.label}: ENPR 1")
+            frame_amem = len(segment)
+            self._emit("AMEM 0")
+            if info.entry_label is not None:
+                self._emit(f"{info.entry_label}: NADA")
+            body = func.body.statements
+            tail = body[-1] if _ends_with_return(body) else None
+            self._function_stack.append(FunctionContext(
+                info, (1, -params - 3), info.end_label, len(self._locals_count_stack), tail,
+            ))
+            self._generate_statements(body)
+            self._function_stack.pop()
+            size = self._max_offset[1] + 1
+            if size:
+                segment[frame_amem] = f"AMEM {size}"
+                self._emit(f"{info.end_label}: DMEM {size}")
+                self._emit(f"RTPR 1,{params}")
+            else:
+                self._dropped.append((segment, frame_amem))
+                self._emit(f"{info.end_label}: RTPR 1,{params}")
+        self._current_scope = outer_scope
+
+    def _bind(self, name: str, offset: Optional[int] = None) -> Address:
+        """Declara `name` no escopo atual (em `offset`, se dado) e o usa nos comentários."""
+        scope = self._current_scope
+        if offset is None:
+            scope.declare(name)
+        else:
+            scope.symbols[name] = offset
+        addr = scope.lookup(name)
+        self._address_names[addr] = name
+        return addr
+
+    def _generate_call(self, call: Call, value: bool) -> None:
+        """Chamada de função do usuário; com `value`, deixa o resultado na pilha.
+
+        Empilha o slot do resultado (com 0) e os argumentos, que viram os
+        parâmetros no registro da função; o RTPR deixa só o resultado.
+        """
+        info = self._callee(call)
+        if info.inline:
+            self._inline_call(info, call.args, value)
+            return
+        self._emit("CRCT 0")
+        for arg in call.args:
+            self._generate_expression(arg)
+        self._emit(f"CHPR {info.label}")
+        if not value:
+            self._emit("DMEM 1")
+
+    def _callee(self, call: Call) -> FunctionInfo:
+        """Função do usuário chamada em `call`, conferindo o número de argumentos."""
+        name = call.callee.name if isinstance(call.callee, Identifier) else None
+        info = self._function_infos.get(name)
+        if info is None:
+            raise CodeGenerationError(f"Função '{name}' não declarada.")
+        if len(call.args) != len(info.params):
+            raise CodeGenerationError(
+                f"Função '{name}' espera {len(info.params)} argumento(s), "
+                f"recebeu {len(call.args)}."
+            )
+        return info
+
+    def _generate_tail_call(self, call: Call, ctx: FunctionContext) -> None:
+        """`return f(...)` dentro de f: novos parâmetros e desvio para o início.
+
+        Todos os argumentos são calculados antes da primeira escrita, então
+        `return f(b, a)` troca os valores corretamente. O registro é o mesmo.
+        """
+        info = self._callee(call)
+        for arg in call.args:
+            self._generate_expression(arg)
+        for name in reversed(info.params):
+            self._store(self._lookup(name))
+        self._emit_scope_jump(info.entry_label, ctx.scope_depth)
+
+    def _inline_call(self, info: FunctionInfo, args: List[ASTNode], value: bool) -> None:
+        """Expande o corpo da função no lugar da chamada.
+
+        Parâmetros, locais e o resultado da expansão ocupam slots livres do
+        registro de quem chama (no nível dele). Se o único `return` é o
+        último comando, o valor fica direto na pilha; senão cada `return`
+        grava o resultado e desvia para o fim da expansão.
+        """
+        body = info.declaration.body.statements
+        for arg in args:
+            self._generate_expression(arg)
+
+        saved = (
+            self._current_scope, self._loop_stack, self._cse_keys, self._cse_temps,
+            self._statement_line,
+        )
+        self._current_scope = _Scope(
+            parent=self._global_scope, symbols={}, base=self._free_address(),
+            level=self._current_scope.level,
+        )
+        params = [self._bind(name) for name in info.params]
+        for name in info.local_names:
+            self._bind(name)
+        return_addr = self._bind(f"{info.name}.retorno")
+        for addr in reversed(params):
+            self._store(addr)
+
+        returns = _count_returns(body)
+        tail = body[-1] if returns == 1 and _ends_with_return(body) and body[-1].expr else None
+        context = FunctionContext(
+            info, return_addr, None if tail else self._new_label("Lret"),
+            len(self._locals_count_stack), tail,
+        )
+        self._loop_stack = []
+        self._function_stack.append(context)
+        self._generate_statements(body)
+        self._function_stack.pop()
+        (
+            self._current_scope, self._loop_stack, self._cse_keys, self._cse_temps,
+            self._statement_line,
+        ) = saved
+
+        if tail is None:
+            if not _ends_with_return(body):
+                self._emit("CRCT 0")
+                self._store(return_addr)
+            self._emit(f"{context.end_label}: NADA")
+            if value:
+                self._load(return_addr)
+        elif not value:
+            self._store(return_addr)  # descarta o valor
+        self._mark_line(self._statement_line)
+
+    def _free_address(self) -> int:
+        """Primeiro deslocamento do nível atual acima de tudo o que já foi declarado ou usado."""
+        scope = self._current_scope
+        return max(self._max_offset[scope.level] + 1, scope.frame_offset() + scope.next_addr)
+
     # ----------------------------------------------------------
     def _generate_statement(self, stmt: ASTNode) -> None:
         """Gera código MEPA para uma instrução."""
+        self._mark_line(stmt.line)
+        if stmt.line is not None:
+            self._statement_line = stmt.line
         if isinstance(stmt, VarAssign):
             addr = self._lookup(stmt.name)
             if addr is None:
@@ -169,23 +482,36 @@ class MepaGenerator:
             label_end = self._new_label()
             self._emit(f"DSVF {label_else}")
             self._generate_block(stmt.then_block.statements)
+            self._mark_line(stmt.line)
             self._emit(f"DSVS {label_end}")
             self._emit(f"{label_else}: NADA")
             if stmt.else_block:
                 self._generate_block(stmt.else_block.statements)
+                self._mark_line(stmt.line)
             self._emit(f"{label_end}: NADA")
             return
 
         if isinstance(stmt, WhileStatement):
             label_start = self._new_label()
             label_end = self._new_label()
+            if self.invert_loops:
+                # cond; DSVF fim; corpo; teste: not cond; DSVF corpo; fim
+                label_test = self._new_label()
+                self._generate_expression(stmt.cond)
+                self._emit(f"DSVF {label_end}")
+                self._emit(f"{label_start}: NADA")
+                self._generate_loop_body(stmt.body.statements, label_end, label_test)
+                self._mark_line(stmt.line)
+                self._emit(f"{label_test}: NADA")
+                self._generate_negated_condition(stmt.cond)
+                self._emit(f"DSVF {label_start}")
+                self._emit(f"{label_end}: NADA")
+                return
             self._emit(f"{label_start}: NADA")
             self._generate_expression(stmt.cond)
             self._emit(f"DSVF {label_end}")
-            loop_ctx = LoopContext(break_label=label_end, continue_label=label_start)
-            self._loop_stack.append(loop_ctx)
-            self._generate_block(stmt.body.statements)
-            self._loop_stack.pop()
+            self._generate_loop_body(stmt.body.statements, label_end, label_start)
+            self._mark_line(stmt.line)
             self._emit(f"DSVS {label_start}")
             self._emit(f"{label_end}: NADA")
             return
@@ -222,34 +548,40 @@ class MepaGenerator:
             self._emit("CRCT 0")
             self._store(idx_addr)
 
-            # Labels do laço
+            # Labels do laço; continue vai para o incremento
             label_start = self._new_label("Lfor")
             label_end = self._new_label("Lendfor")
+            label_next = self._new_label("Lincfor")
 
-            # Início
-            self._emit(f"{label_start}: NADA")
-            # Condição: i < limite
+            # Condição: i < limite (no topo, ou só como guarda se invertido)
+            if not self.invert_loops:
+                self._emit(f"{label_start}: NADA")
             self._load(idx_addr)
             self._load(limit_addr)
-            self._emit("CMEG")          # menor ou igual? Aqui usamos < (CMEG = <=). Se quiser estrito, ajuste.
+            self._emit("CMME")
             self._emit(f"DSVF {label_end}")
+            if self.invert_loops:
+                self._emit(f"{label_start}: NADA")
 
             # Corpo do laço (novo escopo)
-            loop_ctx = LoopContext(break_label=label_end, continue_label=label_start)
-            self._loop_stack.append(loop_ctx)
-            self._enter_scope()
-            self._generate_block(stmt.body.statements)
-            self._exit_scope()
-            self._loop_stack.pop()
+            self._generate_loop_body(stmt.body.statements, label_end, label_next, extra_scope=True)
 
             # i = i + 1
+            self._mark_line(stmt.line)
+            self._emit(f"{label_next}: NADA")
             self._load(idx_addr)
             self._emit("CRCT 1")
             self._emit("SOMA")
             self._store(idx_addr)
 
-            # Volta ao início e finaliza
-            self._emit(f"DSVS {label_start}")
+            if self.invert_loops:
+                # continua enquanto i < limite, isto é, sai quando i >= limite
+                self._load(idx_addr)
+                self._load(limit_addr)
+                self._emit("CMAG")
+                self._emit(f"DSVF {label_start}")
+            else:
+                self._emit(f"DSVS {label_start}")
             self._emit(f"{label_end}: NADA")
             return
         # ---------- FIM do suporte a for ----------
@@ -257,23 +589,32 @@ class MepaGenerator:
         if isinstance(stmt, BreakStatement):
             if not self._loop_stack:
                 raise CodeGenerationError("Comando 'break' fora de laço.")
-            self._emit(f"DSVS {self._loop_stack[-1].break_label}")
+            self._emit_loop_jump(self._loop_stack[-1].break_label)
             return
 
         if isinstance(stmt, ContinueStatement):
             if not self._loop_stack:
                 raise CodeGenerationError("Comando 'continue' fora de laço.")
-            self._emit(f"DSVS {self._loop_stack[-1].continue_label}")
+            self._emit_loop_jump(self._loop_stack[-1].continue_label)
             return
 
         if isinstance(stmt, ReturnStatement):
             if not self._function_stack:
                 raise CodeGenerationError("Comando 'return' fora de função.")
             ctx = self._function_stack[-1]
+            if ctx.tail is stmt and ctx.info.inline:
+                self._generate_expression(stmt.expr)
+                return
+            if ctx.info.entry_label is not None and _is_self_tail_call(stmt, ctx.info.name):
+                self._generate_tail_call(stmt.expr, ctx)
+                return
             if stmt.expr is not None:
                 self._generate_expression(stmt.expr)
-                self._store(ctx.info.return_addr)
-            self._emit(f"DSVS {ctx.info.end_label}")
+            else:
+                self._emit("CRCT 0")
+            self._store(ctx.return_addr)
+            if ctx.tail is not stmt:
+                self._emit_scope_jump(ctx.end_label, ctx.scope_depth)
             return
 
         # Chamadas como comandos (print, input, usuário)
@@ -287,7 +628,7 @@ class MepaGenerator:
             if callee_name == "input":
                 self._emit("LEIT")
                 return
-            self._emit(f"CHPR {callee_name}")
+            self._generate_call(stmt, value=False)
             return
 
         # Outras expressões soltas
@@ -297,13 +638,91 @@ class MepaGenerator:
     def _generate_block(self, statements: Iterable[ASTNode]) -> None:
         """Cria um novo escopo para um bloco."""
         self._enter_scope()
-        for stmt in statements:
-            self._generate_statement(stmt)
+        self._generate_statements(statements)
         self._exit_scope()
 
+    def _generate_statements(self, statements: Iterable[ASTNode]) -> None:
+        """Gera uma sequência de comandos, com numeração de valores por trecho se `cse`."""
+        if not self.cse:
+            for stmt in statements:
+                self._generate_statement(stmt)
+            return
+        for run, closing in straight_line_runs(list(statements)):
+            self._cse_keys, _ = plan_common_subexpressions(run, self._expression_before_branch(closing))
+            self._cse_temps = {}
+            for stmt in run:
+                self._generate_statement(stmt)
+            if closing is not None:
+                # blocos internos numeram seus próprios trechos
+                self._generate_statement(closing)
+            self._cse_keys = {}
+            self._cse_temps = {}
+
+    @staticmethod
+    def _expression_before_branch(stmt: Optional[ASTNode]) -> Optional[ASTNode]:
+        """Expressão que o comando de controle avalia logo ao fim do trecho anterior."""
+        if isinstance(stmt, IfStatement):
+            return stmt.cond
+        if isinstance(stmt, ForStatement) and isinstance(stmt.iterable, Call) and stmt.iterable.args:
+            return stmt.iterable.args[0]
+        if isinstance(stmt, ReturnStatement):
+            return stmt.expr
+        return None
+
     # ----------------------------------------------------------
-    def _declare_variable(self, name: str) -> int:
-        """Declara variável no escopo atual e retorna endereço absoluto."""
+    def _generate_loop_body(
+        self,
+        statements: Iterable[ASTNode],
+        break_label: str,
+        continue_label: str,
+        extra_scope: bool = False,
+    ) -> None:
+        """Gera o corpo de um laço com os destinos de break/continue."""
+        loop_ctx = LoopContext(
+            break_label=break_label,
+            continue_label=continue_label,
+            scope_depth=len(self._locals_count_stack),
+        )
+        self._loop_stack.append(loop_ctx)
+        if extra_scope:
+            self._enter_scope()
+        self._generate_block(statements)
+        if extra_scope:
+            self._exit_scope()
+        self._loop_stack.pop()
+
+    def _emit_loop_jump(self, label: str) -> None:
+        """Desvio de break/continue, liberando antes as variáveis dos blocos abandonados."""
+        self._emit_scope_jump(label, self._loop_stack[-1].scope_depth)
+
+    def _emit_scope_jump(self, label: str, depth: int) -> None:
+        """Desvio para fora dos escopos abertos além de `depth` (break, continue, return).
+
+        O tamanho de cada bloco só é conhecido ao fechá-lo, então o DMEM é
+        emitido zerado e acumulado em `_exit_scope`.
+        """
+        if len(self._locals_count_stack) > depth:
+            entry = (self._current_output, len(self._current_output))
+            self._emit("DMEM 0")
+            for jumps in self._scope_jumps_stack[depth:]:
+                jumps.append(entry)
+        self._emit(f"DSVS {label}")
+
+    def _generate_negated_condition(self, cond: ASTNode) -> None:
+        """Empilha `not cond`: inverte a comparação ou aplica NEGA ao valor."""
+        if isinstance(cond, BinaryOperation):
+            op = self._binary_instruction(cond.op)
+            if op in NEGATED_COMPARISONS:
+                self._generate_expression(cond.left)
+                self._generate_expression(cond.right)
+                self._emit(NEGATED_COMPARISONS[op])
+                return
+        self._generate_expression(cond)
+        self._emit("NEGA")
+
+    # ----------------------------------------------------------
+    def _declare_variable(self, name: str) -> Address:
+        """Declara variável no escopo atual e retorna o endereço (nível, deslocamento)."""
         _ = self._current_scope.declare(name)
         full_addr = self._lookup(name)
         self._address_names[full_addr] = name
@@ -311,6 +730,40 @@ class MepaGenerator:
             self._locals_count_stack[-1] += 1
         return full_addr
 
+    def _declare_temporary(self, prefix: str) -> Address:
+        """Declara um temporário do compilador no escopo atual.
+
+        O nome (ex.: ``cse.1``) tem um ponto, que nenhum identificador do
+        programa pode ter, então não colide com variáveis do usuário. O slot
+        fica na área reservada pelo AMEM inicial (numa função, pelo AMEM do
+        registro) e não entra no AMEM/DMEM do bloco: dentro de laços isso
+        custaria duas instruções por iteração.
+        """
+        self._temp_counter += 1
+        name = f"{prefix}.{self._temp_counter}"
+        self._current_scope.declare(name)
+        addr = self._lookup(name)
+        self._address_names[addr] = name
+        return addr
+
+    def _reuse_value(self, expr: ASTNode) -> bool:
+        """Relê o temporário se o valor de `expr` já foi calculado neste trecho."""
+        key = self._cse_keys.get(id(expr))
+        if key is None or key not in self._cse_temps:
+            return False
+        self._load(self._cse_temps[key])
+        return True
+
+    def _save_value(self, expr: ASTNode) -> None:
+        """Guarda o valor recém-calculado de `expr` se ele for reusado adiante."""
+        key = self._cse_keys.get(id(expr))
+        if key is None:
+            return
+        addr = self._declare_temporary("cse")
+        self._store(addr)
+        self._load(addr)
+        self._cse_temps[key] = addr
+
     # ----------------------------------------------------------
     def _generate_expression(self, expr: ASTNode) -> None:
         if isinstance(expr, Literal):
@@ -333,14 +786,20 @@ class MepaGenerator:
             return
 
         if isinstance(expr, BinaryOperation):
+            if self._reuse_value(expr):
+                return
             self._generate_expression(expr.left)
             self._generate_expression(expr.right)
             self._emit(self._binary_instruction(expr.op))
+            self._save_value(expr)
             return
 
         if isinstance(expr, UnaryOp):
+            if self._reuse_value(expr):
+                return
             self._generate_expression(expr.operand)
-            self._emit("NEGA")
+            self._emit("INVR")  # menos unário; NEGA é a negação lógica
+            self._save_value(expr)
             return
 
         if isinstance(expr, Call):
@@ -353,7 +812,7 @@ class MepaGenerator:
             if callee_name == "input":
                 self._emit("LEIT")
                 return
-            self._emit(f"CHPR {callee_name}")
+            self._generate_call(expr, value=True)
             return
 
         raise NotImplementedError(f"Nó de expressão {type(expr).__name__} não suportado.")
@@ -371,18 +830,23 @@ class MepaGenerator:
             if callee_name == "input":
                 self._emit("LEIT")
                 return
-            self._emit(f"CHPR {callee_name}")
+            self._generate_call(expr, value=False)
             return
         raise CodeGenerationError("Expressão usada como comando não suportada.")
 
     # ----------------------------------------------------------
-    def _lookup(self, name: str) -> Optional[int]:
-        return self._current_scope.lookup_abs(name)
+    def _lookup(self, name: str) -> Optional[Address]:
+        return self._current_scope.lookup(name)
 
     # ----------------------------------------------------------
     def _enter_scope(self) -> None:
-        self._current_scope = _Scope(parent=self._current_scope, symbols={})
+        # o bloco continua no registro do escopo de fora (num corpo de função, nível 1)
+        self._current_scope = _Scope(
+            parent=self._current_scope, symbols={}, level=self._current_scope.level
+        )
         self._locals_count_stack.append(0)
+        self._scope_amem_stack.append((self._current_output, len(self._current_output)))
+        self._scope_jumps_stack.append([])
         self._emit("AMEM 0")
 
     def _exit_scope(self) -> None:
@@ -391,10 +855,12 @@ class MepaGenerator:
         local_count = self._locals_count_stack.pop()
         if local_count > 0:
             self._emit(f"DMEM {local_count}")
-        for i in range(len(self._current_output) - 1, -1, -1):
-            if self._current_output[i].startswith("AMEM 0"):
-                self._current_output[i] = f"AMEM {local_count}"
-                break
+        # corrige o AMEM emitido na entrada deste escopo (não o de um bloco interno)
+        output, index = self._scope_amem_stack.pop()
+        output[index] = f"AMEM {local_count}"
+        for output, index in self._scope_jumps_stack.pop():
+            released = int(output[index].split()[1]) + local_count
+            output[index] = f"DMEM {released}"
         self._current_scope = self._current_scope.parent
 
     # ----------------------------------------------------------
@@ -410,6 +876,24 @@ class MepaGenerator:
         return mapping[op]
 
     # ----------------------------------------------------------
+    def _mark_line(self, line: Optional[int]) -> None:
+        """As próximas instruções da saída atual vêm da linha `line` do fonte."""
+        if line is not None:
+            self._line_marks.append((self._current_output, len(self._current_output), line))
+
+    def _build_line_table(self, bases: Dict[int, int], removed: List[int]) -> LineTable:
+        """Converte as marcas em trechos sobre a lista final de instruções.
+
+        `bases` dá a posição de cada saída (corpo principal e segmentos de
+        função) na lista final; `removed` são os índices dos DMEM 0 retirados.
+        """
+        table = LineTable()
+        marks = [(bases[id(output)] + position, line) for output, position, line in self._line_marks]
+        marks.sort(key=lambda mark: mark[0])  # estável: no mesmo índice vale a última
+        for index, line in marks:
+            table.mark(index - bisect_left(removed, index), line)
+        return table
+
     def _emit(self, instruction: str) -> None:
         self._current_output.append(instruction)
 
@@ -417,17 +901,19 @@ class MepaGenerator:
         self._label_counter += 1
         return f"{prefix}{self._label_counter}"
 
-    def _load(self, addr: int) -> None:
-        self._max_abs_addr = max(self._max_abs_addr, addr)
-        comment = self._address_names.get(addr)
-        suffix = f" # {comment}" if comment else ""
-        self._emit(f"CRVL {addr}{suffix}")
+    def _load(self, addr: Address) -> None:
+        self._emit(f"CRVL {self._operand(addr)}")
+
+    def _store(self, addr: Address) -> None:
+        self._emit(f"ARMZ {self._operand(addr)}")
 
-    def _store(self, addr: int) -> None:
-        self._max_abs_addr = max(self._max_abs_addr, addr)
+    def _operand(self, addr: Address) -> str:
+        """``n`` no nível 0 (endereço absoluto) ou ``k,n``, com o nome como comentário."""
+        level, offset = addr
+        self._max_offset[level] = max(self._max_offset[level], offset)
         comment = self._address_names.get(addr)
         suffix = f" # {comment}" if comment else ""
-        self._emit(f"ARMZ {addr}{suffix}")
+        return f"{offset}{suffix}" if level == 0 else f"{level},{offset}{suffix}"
 
     @contextmanager
     def _using_output(self, output: List[str]):
@@ -439,4 +925,103 @@ class MepaGenerator:
             self._current_output = previous
 
 
-__all__ = ["MepaGenerator", "CodeGenerationError"]
+# ================================================================
+# Consultas sobre a AST das funções
+# ================================================================
+def _assigned_names(statements: Iterable[ASTNode]) -> Set[str]:
+    """Nomes atribuídos (inclusive contadores de `for`) nos comandos e blocos internos."""
+    names: Set[str] = set()
+    for stmt in statements:
+        if isinstance(stmt, VarAssign):
+            names.add(stmt.name)
+        elif isinstance(stmt, ForStatement):
+            names.add(stmt.var_name)
+        names |= _assigned_names(_inner_statements(stmt))
+    return names
+
+
+def _for_variables(statements: Iterable[ASTNode]) -> Set[str]:
+    """Contadores de todos os `for`, inclusive os aninhados."""
+    names: Set[str] = set()
+    for stmt in statements:
+        if isinstance(stmt, ForStatement):
+            names.add(stmt.var_name)
+        names |= _for_variables(_inner_statements(stmt))
+    return names
+
+
+def _inner_statements(stmt: ASTNode) -> List[ASTNode]:
+    if isinstance(stmt, (WhileStatement, ForStatement)):
+        return stmt.body.statements
+    if isinstance(stmt, IfStatement):
+        inner = list(stmt.then_block.statements)
+        if stmt.else_block is not None:
+            inner += stmt.else_block.statements
+        return inner
+    return []
+
+
+def _walk(node: ASTNode) -> Iterable[ASTNode]:
+    """O nó e todos os nós internos (comandos e expressões)."""
+    yield node
+    children: List[Optional[ASTNode]] = []
+    if isinstance(node, VarAssign):
+        children = [node.expr]
+    elif isinstance(node, IfStatement):
+        children = [node.cond] + _inner_statements(node)
+    elif isinstance(node, WhileStatement):
+        children = [node.cond] + node.body.statements
+    elif isinstance(node, ForStatement):
+        children = [node.iterable] + node.body.statements
+    elif isinstance(node, ReturnStatement):
+        children = [node.expr]
+    elif isinstance(node, BinaryOperation):
+        children = [node.left, node.right]
+    elif isinstance(node, UnaryOp):
+        children = [node.operand]
+    elif isinstance(node, Call):
+        children = list(node.args)
+    for child in children:
+        if child is not None:
+            yield from _walk(child)
+
+
+def _called_functions(statements: Iterable[ASTNode]) -> Set[str]:
+    """Nomes chamados nos comandos (inclusive `print`, `input` e `range`)."""
+    return {
+        node.callee.name
+        for stmt in statements
+        for node in _walk(stmt)
+        if isinstance(node, Call) and isinstance(node.callee, Identifier)
+    }
+
+
+def _is_self_tail_call(node: ASTNode, name: str) -> bool:
+    """`node` é `return name(...)`."""
+    return (
+        isinstance(node, ReturnStatement)
+        and isinstance(node.expr, Call)
+        and isinstance(node.expr.callee, Identifier)
+        and node.expr.callee.name == name
+    )
+
+
+def _has_self_tail_call(statements: Iterable[ASTNode], name: str) -> bool:
+    return any(_is_self_tail_call(node, name) for stmt in statements for node in _walk(stmt))
+
+
+def _node_count(statements: Iterable[ASTNode]) -> int:
+    return sum(1 for stmt in statements for _ in _walk(stmt))
+
+
+def _count_returns(statements: Iterable[ASTNode]) -> int:
+    return sum(
+        1 for stmt in statements for node in _walk(stmt) if isinstance(node, ReturnStatement)
+    )
+
+
+def _ends_with_return(statements: List[ASTNode]) -> bool:
+    return bool(statements) and isinstance(statements[-1], ReturnStatement)
+
+
+__all__ = ["MepaGenerator", "CodeGenerationError", "INLINE_LIMIT"]
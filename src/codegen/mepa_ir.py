@@ -0,0 +1,227 @@
+"""Representação estruturada das instruções MEPA emitidas pelo gerador.
+
+O `MepaGenerator` produz uma lista de strings (``"CRVL 0 # x"``, ``"L1: NADA"``).
+Este módulo converte essas linhas em objetos `Instr` (rótulo, opcode, operando,
+comentário) e vice-versa, servindo de base para análises e otimizações.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+
+# Instruções que desviam o fluxo de controle
+JUMP_OPS = frozenset({"DSVS"})          # desvio incondicional
+BRANCH_OPS = frozenset({"DSVF"})        # desvio se falso
+CALL_OPS = frozenset({"CHPR"})          # chamada de procedimento
+EXIT_OPS = frozenset({"PARA", "RTPR"})  # encerram o fluxo do procedimento corrente
+
+# Operações aritméticas/lógicas: consomem dois valores do topo e empilham o resultado
+BINARY_OPS = frozenset({
+    "SOMA", "SUBT", "MULT", "DIVI",
+    "CONJ", "DISJ",
+    "CMME", "CMMA", "CMIG", "CMDG", "CMEG", "CMAG",
+})
+UNARY_OPS = frozenset({"INVR", "NEGA"})  # INVR: -x ; NEGA: não lógico
+
+# Comparação com o resultado oposto (a < b  ⇔  não a >= b)
+NEGATED_COMPARISONS: Dict[str, str] = {
+    "CMIG": "CMDG", "CMDG": "CMIG",
+    "CMME": "CMAG", "CMAG": "CMME",
+    "CMMA": "CMEG", "CMEG": "CMMA",
+}
+
+# Efeito na pilha de avaliação: (valores consumidos, valores empilhados).
+# AMEM/DMEM/CHPR/RTPR/ENPR mexem em memória ou quadros e ficam de fora.
+STACK_EFFECTS: Dict[str, Tuple[int, int]] = {
+    "INPP": (0, 0), "NADA": (0, 0), "PARA": (0, 0), "DSVS": (0, 0),
+    "CRCT": (0, 1), "CRCS": (0, 1), "CRVL": (0, 1), "LEIT": (0, 1),
+    "ARMZ": (1, 0), "IMPR": (1, 0), "DSVF": (1, 0),
+    **{op: (2, 1) for op in BINARY_OPS},
+    **{op: (1, 1) for op in UNARY_OPS},
+}
+
+# Instruções sem efeito colateral (podem ser removidas se o resultado não for usado).
+# DIVI fica de fora porque a divisão por zero é um erro observável.
+PURE_OPS = frozenset({"CRCT", "CRCS", "CRVL", "NADA"} | (BINARY_OPS - {"DIVI"}) | UNARY_OPS)
+
+
+@dataclass
+class Instr:
+    """Uma instrução MEPA com rótulo, operando e comentário opcionais."""
+    op: str
+    arg: Optional[str] = None
+    label: Optional[str] = None
+    comment: Optional[str] = None
+
+    def __str__(self) -> str:
+        text = self.op if self.arg is None else f"{self.op} {self.arg}"
+        if self.label is not None:
+            text = f"{self.label}: {text}"
+        if self.comment:
+            text = f"{text} # {self.comment}"
+        return text
+
+    @property
+    def target(self) -> Optional[str]:
+        """Rótulo de destino para desvios e chamadas (primeiro operando)."""
+        if self.arg is None or self.op not in JUMP_OPS | BRANCH_OPS | CALL_OPS:
+            return None
+        return self.arg.split(",", 1)[0].strip()
+
+    def with_target(self, label: str) -> "Instr":
+        """Cópia do desvio/chamada apontando para outro rótulo."""
+        rest = self.arg.partition(",")[1:] if self.arg else ("", "")
+        return Instr(self.op, label + "".join(rest), self.label, self.comment)
+
+    def int_arg(self) -> int:
+        """Operando convertido para inteiro (ex.: endereço de CRVL/ARMZ)."""
+        if self.arg is None:
+            raise ValueError(f"instrução '{self.op}' sem operando")
+        return int(self.arg)
+
+
+# ================================================================
+# Semântica dos operadores (compartilhada por otimizações e execução)
+# ================================================================
+def mepa_div(a, b):
+    """DIVI: divisão inteira truncada em direção a zero (como `div` em Pascal)."""
+    if isinstance(a, int) and isinstance(b, int):
+        q = a // b
+        return q + 1 if q < 0 and q * b != a else q
+    return a / b
+
+
+BINARY_SEMANTICS = {
+    "SOMA": lambda a, b: a + b,
+    "SUBT": lambda a, b: a - b,
+    "MULT": lambda a, b: a * b,
+    "DIVI": mepa_div,
+    "CONJ": lambda a, b: 1 if a and b else 0,
+    "DISJ": lambda a, b: 1 if a or b else 0,
+    "CMME": lambda a, b: 1 if a < b else 0,
+    "CMMA": lambda a, b: 1 if a > b else 0,
+    "CMIG": lambda a, b: 1 if a == b else 0,
+    "CMDG": lambda a, b: 1 if a != b else 0,
+    "CMEG": lambda a, b: 1 if a <= b else 0,
+    "CMAG": lambda a, b: 1 if a >= b else 0,
+}
+
+UNARY_SEMANTICS = {
+    "INVR": lambda a: -a,
+    "NEGA": lambda a: 0 if a else 1,
+}
+
+
+def parse_constant(text: str) -> Union[int, float]:
+    """Operando numérico de CRCT (inteiro ou real)."""
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def format_constant(value: Union[int, float]) -> str:
+    """Inverso de `parse_constant`; booleanos viram 1/0."""
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def slot_of(instr: Instr) -> Optional[str]:
+    """Posição de memória lida/escrita por CRVL/ARMZ (operando normalizado), ou None."""
+    if instr.op in ("CRVL", "ARMZ") and instr.arg is not None:
+        return instr.arg.replace(" ", "")
+    return None
+
+
+def is_nop(instr: Instr) -> bool:
+    """`NADA`, ou ``AMEM 0``/``DMEM 0`` (blocos sem variáveis)."""
+    return instr.op == "NADA" or (instr.op in ("AMEM", "DMEM") and instr.arg == "0")
+
+
+def parse_instruction(line: str) -> Instr:
+    """Converte uma linha textual MEPA em `Instr`.
+
+    Aceita rótulo (``L1: NADA``), operando e comentário (``ARMZ 0 # x``).
+    Strings de `CRCS` podem conter ``#`` ou ``:`` e são lidas até a aspa final.
+    """
+    text = line.strip()
+    label: Optional[str] = None
+
+    head, sep, rest = text.partition(" ")
+    if head.endswith(":") and head[:-1].isidentifier():
+        label = head[:-1]
+        text = rest.strip()
+        head, sep, rest = text.partition(" ")
+
+    op = head
+    rest = rest.strip()
+    if not rest:
+        return Instr(op, None, label, None)
+
+    if op == "CRCS" and rest.startswith('"'):
+        end = _closing_quote(rest)
+        arg = rest[: end + 1]
+        tail = rest[end + 1 :].strip()
+        comment = tail[1:].strip() if tail.startswith("#") else None
+        return Instr(op, arg, label, comment or None)
+
+    arg_text, _, comment = rest.partition("#")
+    arg = arg_text.strip() or None
+    comment = comment.strip() or None
+    return Instr(op, arg, label, comment)
+
+
+def _closing_quote(text: str) -> int:
+    """Índice da aspa que fecha a string iniciada em text[0]."""
+    i = 1
+    while i < len(text):
+        if text[i] == "\\":
+            i += 2
+            continue
+        if text[i] == '"':
+            return i
+        i += 1
+    raise ValueError(f"string sem aspa de fechamento: {text!r}")
+
+
+def parse_listing(lines: Iterable[Union[str, Instr]]) -> List[Instr]:
+    """Converte uma listagem (strings ou `Instr`) em lista de `Instr`."""
+    result: List[Instr] = []
+    for line in lines:
+        if isinstance(line, Instr):
+            result.append(line)
+        elif line.strip():
+            result.append(parse_instruction(line))
+    return result
+
+
+def render_listing(instrs: Iterable[Instr]) -> List[str]:
+    """Converte de volta para o formato textual usado pelo gerador."""
+    return [str(instr) for instr in instrs]
+
+
+__all__ = [
+    "Instr",
+    "parse_instruction",
+    "parse_listing",
+    "render_listing",
+    "JUMP_OPS",
+    "BRANCH_OPS",
+    "CALL_OPS",
+    "EXIT_OPS",
+    "BINARY_OPS",
+    "UNARY_OPS",
+    "NEGATED_COMPARISONS",
+    "STACK_EFFECTS",
+    "PURE_OPS",
+    "BINARY_SEMANTICS",
+    "UNARY_SEMANTICS",
+    "mepa_div",
+    "parse_constant",
+    "format_constant",
+    "slot_of",
+    "is_nop",
+]
@@ -0,0 +1,389 @@
+"""Backend alternativo: compila a AST para código Python (`ast` + `compile()`).
+
+Para rodar programas durante o desenvolvimento sem passar pela máquina
+MEPA. O programa inteiro vira uma função ``_programa(_read, _write, _div,
+_count)``: as variáveis do corpo principal são variáveis locais dela, e as
+funções do usuário são funções aninhadas que enxergam as globais por
+closure. `print`, `input` e `range` viram as funções de E/S recebidas e o
+`range` nativo.
+
+A semântica é a do código MEPA gerado por `MepaGenerator`:
+
+- `/` e `//` são `DIVI` (`mepa_div`): divisão inteira truncada em direção
+  a zero entre inteiros, real nos demais casos;
+- `True`/`False` e os resultados de comparações valem 1 e 0 (num `if` ou
+  `while` a comparação é testada direto, sem virar número);
+- `print(a, b)` escreve cada valor separadamente; `input()` lê um número
+  e ignora os argumentos;
+- em ``for v in range(n)``, `n` é avaliado uma vez e, ao fim do laço, `v`
+  vale o primeiro valor que falhou o teste ``v < n`` (0 se `n` <= 0), como
+  no contador do laço MEPA;
+- atribuir a um nome já visível altera a variável existente; um nome novo
+  num bloco só é usado dentro dele (o analisador semântico garante), então
+  cada função tem um único espaço de nomes;
+- numa função, parâmetros e variáveis atribuídas são locais, exceto as
+  globais atribuídas no nível de cima antes do `def`, que são as mesmas
+  dentro da função (leitura e escrita); sem `return` com valor a função
+  devolve 0.
+"""
+
+from __future__ import annotations
+
+import ast
+import math
+from dataclasses import dataclass
+from types import CodeType
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from syntax.ast_nodes import (
+    ASTNode, Program, FunctionDeclaration, VarAssign, IfStatement, WhileStatement,
+    ForStatement, ReturnStatement, BreakStatement, ContinueStatement,
+    BinaryOperation, UnaryOp, Literal, Identifier, Call,
+)
+from .mepa_generator import CodeGenerationError, _assigned_names
+from .mepa_ir import mepa_div, parse_constant
+
+
+# nome de arquivo dos code objects: identifica os quadros do programa no traceback
+FILENAME = "<programa>"
+# funções recebidas por `_programa`
+HELPERS = ("_read", "_write", "_div", "_count")
+
+_COMPARISONS = {
+    "==": ast.Eq, "!=": ast.NotEq, "<": ast.Lt, ">": ast.Gt, "<=": ast.LtE, ">=": ast.GtE,
+}
+_ARITHMETIC = {"+": ast.Add, "-": ast.Sub, "*": ast.Mult}
+_DIVISIONS = frozenset({"/", "//"})
+
+
+class ExecutionError(Exception):
+    """Erro ao executar o programa fora da máquina MEPA (ex.: divisão por zero)."""
+    def __init__(self, linha: Optional[int], detalhe: str) -> None:
+        self.linha: Optional[int] = linha
+        prefixo = "Erro de execução"
+        if linha is not None:
+            prefixo += f" na linha {linha}"
+        super().__init__(f"{prefixo}: {detalhe}")
+
+
+def _read_number() -> Any:
+    return parse_constant(input().strip())
+
+
+def _range_count(limit: Any) -> int:
+    """Voltas do laço MEPA de ``range(limit)``: o contador parte de 0 enquanto for < `limit`."""
+    return limit if type(limit) is int else math.ceil(limit)
+
+
+@dataclass
+class PythonProgram:
+    """Programa compilado por `PythonGenerator`."""
+    tree: ast.Module
+    code: CodeType
+
+    @property
+    def source(self) -> str:
+        """Código Python equivalente (para inspeção)."""
+        return ast.unparse(self.tree) + "\n"
+
+    def run(
+        self,
+        read: Optional[Callable[[], Any]] = None,
+        write: Optional[Callable[[Any], None]] = None,
+    ) -> List[Any]:
+        """Executa o programa; sem `write`, devolve os valores escritos."""
+        output: List[Any] = []
+        namespace: Dict[str, Any] = {}
+        exec(self.code, namespace)
+        try:
+            namespace["_programa"](
+                read or _read_number, write or output.append, mepa_div, _range_count
+            )
+        except ZeroDivisionError as exc:
+            raise runtime_error(exc, "divisão por zero") from None
+        except RecursionError as exc:
+            raise runtime_error(exc, "recursão profunda demais") from None
+        except NameError as exc:
+            raise runtime_error(exc, f"variável lida antes de receber valor ({exc})") from None
+        except (TypeError, OverflowError) as exc:
+            raise runtime_error(exc, str(exc)) from None
+        return output
+
+
+def runtime_error(exc: BaseException, detalhe: str) -> ExecutionError:
+    """`ExecutionError` com a linha do fonte do último quadro do programa no traceback."""
+    line = None
+    tb = exc.__traceback__
+    while tb is not None:
+        if tb.tb_frame.f_code.co_filename == FILENAME:
+            line = tb.tb_lineno
+        tb = tb.tb_next
+    return ExecutionError(line, detalhe)
+
+
+@dataclass
+class _Loop:
+    # contador a incrementar antes de `continue` (for traduzido para while)
+    increment: Optional[str] = None
+
+
+class PythonGenerator:
+    """Converte a AST (já verificada pelo `SemanticAnalyzer`) num `PythonProgram`."""
+
+    def generate(self, program: Program) -> PythonProgram:
+        self._globals: Set[str] = set()
+        self._arity: Dict[str, int] = {
+            stmt.name: len(stmt.params)
+            for stmt in program.statements if isinstance(stmt, FunctionDeclaration)
+        }
+        self._in_function = False
+        self._loops: List[_Loop] = []
+        self._counter = 0
+        self._line = 1
+
+        # as funções ficam no início: podem ser chamadas antes do `def` no fonte
+        functions: List[ast.stmt] = []
+        body: List[ast.stmt] = []
+        for stmt in program.statements:
+            if isinstance(stmt, FunctionDeclaration):
+                functions.append(self._function(stmt))
+                continue
+            if isinstance(stmt, VarAssign):
+                self._globals.add(stmt.name)
+            elif isinstance(stmt, ForStatement):
+                self._globals.add(stmt.var_name)
+            body.extend(self._statement(stmt))
+
+        main = _template(f"def _programa({', '.join(HELPERS)}):\n    pass")
+        main.body = functions + body or [ast.Pass()]
+        _locate(main, 1)
+        tree = ast.Module(body=[main], type_ignores=[])
+        return PythonProgram(tree, compile(tree, FILENAME, "exec"))
+
+    # ----------------------------------------------------------
+    def _function(self, func: FunctionDeclaration) -> ast.stmt:
+        if func.line is not None:
+            self._line = func.line
+        visible = self._globals - set(func.params)
+        shared = sorted(_var(name) for name in _assigned_names(func.body.statements) & visible)
+        self._in_function = True
+        body = self._block(func.body.statements)
+        self._in_function = False
+        if not body or not isinstance(body[-1], ast.Return):
+            body.append(ast.Return(ast.Constant(0)))
+        params = ", ".join(_var(name) for name in func.params)
+        node = _template(f"def {_func(func.name)}({params}):\n    pass")
+        node.body = ([ast.Nonlocal(names=shared)] if shared else []) + body
+        _locate(node, self._line)
+        return node
+
+    def _block(self, statements: Iterable[ASTNode]) -> List[ast.stmt]:
+        nodes: List[ast.stmt] = []
+        for stmt in statements:
+            nodes.extend(self._statement(stmt))
+        return nodes
+
+    def _statement(self, stmt: ASTNode) -> List[ast.stmt]:
+        if stmt.line is not None:
+            self._line = stmt.line
+        line = self._line
+        nodes = self._statement_nodes(stmt)
+        for node in nodes:
+            _locate(node, line)
+        return nodes
+
+    def _statement_nodes(self, stmt: ASTNode) -> List[ast.stmt]:
+        if isinstance(stmt, FunctionDeclaration):
+            raise CodeGenerationError("Função declarada fora do nível de cima não suportada.")
+
+        if isinstance(stmt, VarAssign):
+            return [_assign(_var(stmt.name), self._value(stmt.expr))]
+
+        if isinstance(stmt, IfStatement):
+            test = self._test(stmt.cond)
+            then = self._block(stmt.then_block.statements) or [ast.Pass()]
+            orelse = self._block(stmt.else_block.statements) if stmt.else_block else []
+            return [ast.If(test=test, body=then, orelse=orelse)]
+
+        if isinstance(stmt, WhileStatement):
+            test = self._test(stmt.cond)
+            body = self._loop_body(stmt.body.statements, _Loop())
+            return [ast.While(test=test, body=body, orelse=[])]
+
+        if isinstance(stmt, ForStatement):
+            return self._for(stmt)
+
+        if isinstance(stmt, BreakStatement):
+            if not self._loops:
+                raise CodeGenerationError("Comando 'break' fora de laço.")
+            return [ast.Break()]
+
+        if isinstance(stmt, ContinueStatement):
+            if not self._loops:
+                raise CodeGenerationError("Comando 'continue' fora de laço.")
+            counter = self._loops[-1].increment
+            if counter is None:
+                return [ast.Continue()]
+            return [_assign(counter, _add(_name(counter), 1)), ast.Continue()]
+
+        if isinstance(stmt, ReturnStatement):
+            if not self._in_function:
+                raise CodeGenerationError("Comando 'return' fora de função.")
+            value = self._value(stmt.expr) if stmt.expr is not None else ast.Constant(0)
+            return [ast.Return(value)]
+
+        if isinstance(stmt, Call):
+            callee = stmt.callee.name if isinstance(stmt.callee, Identifier) else None
+            if callee == "print":
+                return [ast.Expr(_call("_write", [self._value(arg)])) for arg in stmt.args]
+            return [ast.Expr(self._value(stmt))]
+
+        raise CodeGenerationError("Expressão usada como comando não suportada.")
+
+    def _loop_body(self, statements: Iterable[ASTNode], loop: _Loop) -> List[ast.stmt]:
+        self._loops.append(loop)
+        body = self._block(statements)
+        self._loops.pop()
+        return body
+
+    def _for(self, stmt: ForStatement) -> List[ast.stmt]:
+        iterable = stmt.iterable
+        if (
+            not isinstance(iterable, Call)
+            or not isinstance(iterable.callee, Identifier)
+            or iterable.callee.name != "range"
+        ):
+            raise CodeGenerationError("Somente 'for ... in range(...)' é suportado.")
+        if len(iterable.args) != 1:
+            raise CodeGenerationError("range() deve ter exatamente 1 argumento.")
+        var = _var(stmt.var_name)
+        self._counter += 1
+        limit = f"_limite{self._counter}"
+        limit_value = self._value(iterable.args[0])
+
+        if stmt.var_name not in _assigned_names(stmt.body.statements):
+            # o corpo não muda o contador: laço nativo sobre range; ao sair
+            # sem break, o contador avança até o limite como no laço MEPA
+            body = self._loop_body(stmt.body.statements, _Loop())
+            after = ast.IfExp(
+                test=ast.Compare(_name(limit), [ast.Gt()], [ast.Constant(0)]),
+                body=_name(limit), orelse=ast.Constant(0),
+            )
+            loop = ast.For(
+                target=_name(var, ast.Store()),
+                iter=ast.Call(_name("range"), [_name(limit)], []),
+                body=body or [ast.Pass()],
+                orelse=[_assign(var, after)],
+            )
+            return [_assign(limit, _call("_count", [limit_value])), loop]
+
+        # contador alterado no corpo: o mesmo laço do código MEPA
+        body = self._loop_body(stmt.body.statements, _Loop(increment=var))
+        body.append(_assign(var, _add(_name(var), 1)))
+        test = ast.Compare(_name(var), [ast.Lt()], [_name(limit)])
+        return [
+            _assign(limit, limit_value),
+            _assign(var, ast.Constant(0)),
+            ast.While(test=test, body=body, orelse=[]),
+        ]
+
+    # ----------------------------------------------------------
+    def _test(self, expr: ASTNode) -> ast.expr:
+        """Condição de `if`/`while`: a comparação é testada sem virar 1/0."""
+        if isinstance(expr, BinaryOperation) and expr.op in _COMPARISONS:
+            return self._compare(expr)
+        return self._value(expr)
+
+    def _compare(self, expr: BinaryOperation) -> ast.expr:
+        op = _COMPARISONS[expr.op]()
+        return ast.Compare(self._value(expr.left), [op], [self._value(expr.right)])
+
+    def _value(self, expr: ASTNode) -> ast.expr:
+        if isinstance(expr, Literal):
+            value = expr.value
+            if isinstance(value, bool):
+                return ast.Constant(1 if value else 0)
+            if isinstance(value, (int, float, str)):
+                return ast.Constant(value)
+            raise CodeGenerationError(f"Literal {type(value)} não suportado")
+
+        if isinstance(expr, Identifier):
+            return _name(_var(expr.name))
+
+        if isinstance(expr, BinaryOperation):
+            if expr.op in _COMPARISONS:
+                return ast.IfExp(
+                    test=self._compare(expr), body=ast.Constant(1), orelse=ast.Constant(0)
+                )
+            left, right = self._value(expr.left), self._value(expr.right)
+            if expr.op in _DIVISIONS:
+                return _call("_div", [left, right])
+            if expr.op in _ARITHMETIC:
+                return ast.BinOp(left, _ARITHMETIC[expr.op](), right)
+            raise CodeGenerationError(f"Operador {expr.op} não suportado.")
+
+        if isinstance(expr, UnaryOp):
+            return ast.UnaryOp(ast.USub(), self._value(expr.operand))
+
+        if isinstance(expr, Call):
+            if not isinstance(expr.callee, Identifier):
+                raise CodeGenerationError("Só funções chamadas pelo nome são suportadas.")
+            name = expr.callee.name
+            if name == "input":
+                return _call("_read", [])
+            if name == "print":
+                raise CodeGenerationError("'print' não devolve valor.")
+            if name == "range":
+                raise CodeGenerationError("range() só é suportado em 'for ... in range(...)'.")
+            if name not in self._arity:
+                raise CodeGenerationError(f"Função '{name}' não declarada.")
+            if len(expr.args) != self._arity[name]:
+                raise CodeGenerationError(
+                    f"Função '{name}' espera {self._arity[name]} argumento(s), "
+                    f"recebeu {len(expr.args)}."
+                )
+            return ast.Call(_name(_func(name)), [self._value(arg) for arg in expr.args], [])
+
+        raise CodeGenerationError(f"Nó de expressão {type(expr).__name__} não suportado.")
+
+
+# nomes do usuário ganham prefixo: não colidem com palavras reservadas do
+# Python, com `range` nem com os nomes internos (que começam com "_")
+def _var(name: str) -> str:
+    return f"v_{name}"
+
+
+def _func(name: str) -> str:
+    return f"f_{name}"
+
+
+def _name(identifier: str, ctx: Optional[ast.expr_context] = None) -> ast.Name:
+    return ast.Name(identifier, ctx or ast.Load())
+
+
+def _assign(target: str, value: ast.expr) -> ast.stmt:
+    return ast.Assign(targets=[_name(target, ast.Store())], value=value)
+
+
+def _add(value: ast.expr, k: int) -> ast.expr:
+    return ast.BinOp(value, ast.Add(), ast.Constant(k))
+
+
+def _call(helper: str, args: List[ast.expr]) -> ast.expr:
+    return ast.Call(_name(helper), args, [])
+
+
+def _template(source: str) -> ast.FunctionDef:
+    """`def` montado pelo próprio parser do Python (os campos variam entre versões)."""
+    return ast.parse(source).body[0]
+
+
+def _locate(node: ast.AST, line: int) -> None:
+    """Põe `line` nos nós ainda sem posição (comandos internos já têm a sua)."""
+    for child in ast.walk(node):
+        if "lineno" in child._attributes and not hasattr(child, "lineno"):
+            child.lineno = child.end_lineno = line
+            child.col_offset = child.end_col_offset = 0
+
+
+__all__ = ["PythonGenerator", "PythonProgram", "ExecutionError", "runtime_error", "FILENAME"]
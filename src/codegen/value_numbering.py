@@ -0,0 +1,158 @@
+"""Numeração de valores local para eliminar subexpressões comuns.
+
+Um trecho é uma sequência de comandos sem desvios (atribuições e chamadas),
+opcionalmente seguida da expressão avaliada pelo comando de controle que o
+encerra (condição do `if`, argumento do `range`). Cada expressão recebe um
+número de valor: duas expressões com o mesmo número calculam o mesmo valor,
+então a segunda pode reler o resultado guardado num temporário.
+
+Atribuir a uma variável lhe dá o número do valor atribuído, e expressões que
+usavam o valor anterior deixam de coincidir com as novas. `input()` sempre
+produz um valor novo, e chamadas a funções do usuário (que podem alterar
+qualquer variável) invalidam todas as variáveis.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from syntax.ast_nodes import (
+    ASTNode, VarAssign, BinaryOperation, UnaryOp, Literal, Identifier, Call,
+)
+
+
+ValueKey = Hashable
+
+# Operadores cujos operandos podem trocar de ordem sem mudar o resultado
+_COMMUTATIVE = frozenset({"*", "==", "!="})
+
+# Custo fixo de guardar o valor na primeira ocorrência: ARMZ t; CRVL t
+_SAVE_COST = 2
+
+
+class ValueNumbering:
+    """Numeração de valores de um trecho sem desvios, feita antes de gerar o código."""
+
+    def __init__(self) -> None:
+        self.keys: Dict[int, ValueKey] = {}      # id(nó) -> número de valor
+        self.counts: Counter = Counter()         # ocorrências de cada valor
+        self.costs: Dict[ValueKey, int] = {}     # instruções para calcular o valor
+        self.inner: Dict[ValueKey, Counter] = {}  # subexpressões dentro da 1ª ocorrência
+        self._variables: Dict[str, ValueKey] = {}
+        self._epoch = 0
+        self._fresh = 0
+
+    # ----------------------------------------------------------
+    def statement(self, stmt: ASTNode) -> None:
+        """Numera as expressões de uma atribuição ou chamada usada como comando."""
+        if isinstance(stmt, VarAssign):
+            value, _, _ = self._number(stmt.expr)
+            self._variables[stmt.name] = value
+        elif isinstance(stmt, Call):
+            self._number(stmt)
+
+    def expression(self, expr: ASTNode) -> None:
+        """Numera uma expressão avaliada ao fim do trecho (ex.: condição do `if`)."""
+        self._number(expr)
+
+    def worth_caching(self) -> Set[ValueKey]:
+        """Valores que compensa guardar em temporário.
+
+        Reusar um valor de custo c em n ocorrências economiza (c - 1)·(n - 1)
+        instruções e custa 2 na primeira; só entra se o saldo for positivo.
+        Os valores maiores são decididos antes: as ocorrências que passam a
+        ser relidas não avaliam mais as subexpressões de dentro.
+        """
+        counts = Counter(self.counts)
+        chosen: Set[ValueKey] = set()
+        for key in sorted(counts, key=lambda k: -self.costs[k]):
+            uses = counts[key]
+            if (self.costs[key] - 1) * (uses - 1) - _SAVE_COST <= 0:
+                continue
+            chosen.add(key)
+            for inner, times in self.inner[key].items():
+                counts[inner] -= times * (uses - 1)
+        return chosen
+
+    # ----------------------------------------------------------
+    def _fresh_value(self) -> ValueKey:
+        self._fresh += 1
+        return ("novo", self._fresh)
+
+    def _number(self, expr: ASTNode) -> Tuple[ValueKey, int, Counter]:
+        """Devolve (número de valor, custo, subexpressões numeradas dentro de `expr`)."""
+        if isinstance(expr, Literal):
+            return ("const", type(expr.value).__name__, expr.value), 1, Counter()
+
+        if isinstance(expr, Identifier):
+            value = self._variables.get(expr.name, ("var", expr.name, self._epoch))
+            return value, 1, Counter()
+
+        if isinstance(expr, BinaryOperation):
+            left, left_cost, left_inner = self._number(expr.left)
+            right, right_cost, right_inner = self._number(expr.right)
+            operands = (left, right)
+            if expr.op in _COMMUTATIVE:
+                operands = tuple(sorted(operands, key=repr))
+            key = ("bin", expr.op) + operands
+            return self._record(expr, key, left_cost + right_cost + 1, left_inner + right_inner)
+
+        if isinstance(expr, UnaryOp):
+            operand, cost, inner = self._number(expr.operand)
+            return self._record(expr, ("un", expr.op, operand), cost + 1, inner)
+
+        if isinstance(expr, Call):
+            cost = 1
+            for arg in expr.args:
+                _, arg_cost, _ = self._number(arg)
+                cost += arg_cost + 1
+            callee = expr.callee.name if isinstance(expr.callee, Identifier) else None
+            if callee not in ("print", "input"):
+                # a função pode alterar qualquer variável
+                self._variables.clear()
+                self._epoch += 1
+            return self._fresh_value(), cost, Counter()
+
+        return self._fresh_value(), 1, Counter()
+
+    def _record(
+        self, expr: ASTNode, key: ValueKey, cost: int, inner: Counter
+    ) -> Tuple[ValueKey, int, Counter]:
+        self.keys[id(expr)] = key
+        self.counts[key] += 1
+        self.costs.setdefault(key, cost)
+        self.inner.setdefault(key, Counter(inner))
+        return key, cost, inner + Counter({key: 1})
+
+
+def plan_common_subexpressions(
+    statements: Iterable[ASTNode], trailing: Optional[ASTNode] = None
+) -> Tuple[Dict[int, ValueKey], Set[ValueKey]]:
+    """Numera um trecho e devolve (número de cada nó, números que valem um temporário)."""
+    numbering = ValueNumbering()
+    for stmt in statements:
+        numbering.statement(stmt)
+    if trailing is not None:
+        numbering.expression(trailing)
+    chosen = numbering.worth_caching()
+    keys = {node: key for node, key in numbering.keys.items() if key in chosen}
+    return keys, chosen
+
+
+def straight_line_runs(statements: List[ASTNode]) -> List[Tuple[List[ASTNode], Optional[ASTNode]]]:
+    """Divide comandos em trechos sem desvios: (comandos simples, comando que encerra)."""
+    runs: List[Tuple[List[ASTNode], Optional[ASTNode]]] = []
+    current: List[ASTNode] = []
+    for stmt in statements:
+        if isinstance(stmt, (VarAssign, Call)):
+            current.append(stmt)
+            continue
+        runs.append((current, stmt))
+        current = []
+    if current:
+        runs.append((current, None))
+    return runs
+
+
+__all__ = ["ValueNumbering", "plan_common_subexpressions", "straight_line_runs"]
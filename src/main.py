@@ -1,10 +1,27 @@
 """Ponto de entrada da linha de comando para executar o compilador (gera código MEPA)."""
 
 import argparse
+import os
+import sys
 from lexer import LexerPython
 from syntax import SyntaxAnalyzer
 from semantic import SemanticAnalyzer
-from codegen import MepaGenerator, CodeGenerationError
+from codegen import (
+    MepaGenerator, CodeGenerationError, ExecutionError, PythonGenerator, ClosureCompiler,
+)
+from analysis import build_cfg
+from optimizer import MepaOptimizer
+from codegen.mepa_ir import parse_constant
+from mepa import (
+    Coverage, MepaVM, MepaRuntimeError, MepaAssemblyError, MepaSnapshotError, MepaVerifyError,
+    assemble, disassemble, load_binary, load_coverage, load_snapshot, resume, run_batch,
+    run_lanes, save_coverage, save_snapshot, to_bytes, verify,
+)
+from mepa.binary import MAGIC, is_binary
+from mepa.fusion import fusion_report
+from mepa.limits import MEMORY, Limits
+from mepa.snapshot import is_snapshot
+from mepa.trace import TraceReader, TraceWriter, is_trace
 
 
 def main():
@@ -13,11 +30,165 @@ def main():
     parser.add_argument(
         "--file", "-f",
         required=True,
-        help="Caminho do arquivo fonte a ser compilado."
+        help="Caminho do arquivo fonte a ser compilado (ou de um programa .mepab já compilado, "
+             "de um snapshot .meps a retomar ou de um rastro .mept a consultar)."
+    )
+    parser.add_argument(
+        "--cfg",
+        choices=["dot", "json"],
+        help="Em vez da listagem MEPA, imprime o grafo de fluxo de controle no formato indicado."
+    )
+    parser.add_argument(
+        "--optimize", "-O",
+        type=int,
+        choices=[0, 1, 2],
+        default=0,
+        help="Nível de otimização do código MEPA (0 = nenhum, 1 = fluxo de dados, 2 = + laços)."
+    )
+    parser.add_argument(
+        "--invert-loops",
+        action="store_true",
+        help="Gera laços com o teste no fim (um desvio por iteração)."
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["mepa", "python", "closures"],
+        default="mepa",
+        help="Código gerado: MEPA (padrão) ou Python compilado pelo próprio interpretador; "
+             "com python, --run executa direto o código Python e sem --run ele é impresso; "
+             "closures executa a AST compilada em closures, sem gerar código."
+    )
+    parser.add_argument(
+        "--run",
+        action="store_true",
+        help="Executa o código MEPA gerado na máquina virtual (LEIT lê da entrada padrão)."
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["interpreter", "compiled"],
+        default="interpreter",
+        help="Motor usado por --run: interpretador ou blocos compilados para Python."
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Com --run, mostra ao fim o perfil de execução (blocos, instruções e linhas mais quentes)."
+    )
+    parser.add_argument(
+        "--profile-dump",
+        metavar="ARQUIVO",
+        help="Com --run, grava o perfil em JSON (.json) ou em pilhas colapsadas para flamegraph."
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="ARQUIVO",
+        help="Executa o programa uma vez por linha do arquivo (valores de LEIT separados por espaço) "
+             "e imprime os resultados em JSON."
+    )
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        help="Com --batch, número de processos (padrão: um por núcleo)."
+    )
+    parser.add_argument(
+        "--lanes",
+        action="store_true",
+        help="Com --batch, executa as entradas em faixas NumPy (todas de uma vez, num processo)."
+    )
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        help="Com --run ou --batch, orçamento de instruções de cada execução."
+    )
+    parser.add_argument(
+        "--max-memory",
+        type=int,
+        help="Com --run ou --batch, slots de memória (variáveis + pilha) de cada execução."
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="Com --run ou --batch, tempo de parede máximo de cada execução, em segundos."
+    )
+    parser.add_argument(
+        "--snapshot",
+        metavar="ARQUIVO",
+        help="Com --run, se a execução parar num limite de passos ou de tempo, grava o estado "
+             "(com o programa) para retomar depois com -f ARQUIVO."
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="ARQUIVO",
+        help="Com --run, grava o rastro binário da execução (blocos, topo da pilha e gravações)."
+    )
+    parser.add_argument(
+        "--last-write",
+        metavar="VARIAVEL",
+        help="Com -f RASTRO.mept, mostra a última gravação na variável (nome ou endereço)."
+    )
+    parser.add_argument(
+        "--before",
+        type=int,
+        help="Com --last-write, considera só as instruções antes deste passo (padrão: o fim)."
+    )
+    parser.add_argument(
+        "--state-at",
+        type=int,
+        metavar="PASSO",
+        help="Com -f RASTRO.mept, refaz a execução e mostra o estado antes deste passo."
+    )
+    parser.add_argument(
+        "--coverage",
+        metavar="ARQUIVO",
+        help="Com --run ou --batch, coleta a cobertura de instruções e desvios, soma à gravada "
+             "no ARQUIVO (se existir), grava o total nele e mostra o relatório por linha."
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Verifica o programa MEPA (pilha, desvios e procedimentos) e mostra o resumo; com "
+             "--run ou --batch, executa o programa verificado sem as conferências da máquina."
+    )
+    parser.add_argument(
+        "--fusion-report",
+        action="store_true",
+        help="Em vez da listagem, mostra as superinstruções que a máquina fundiria."
+    )
+    parser.add_argument(
+        "--format",
+        choices=["text", "binary"],
+        default="text",
+        help="Formato da saída: listagem textual ou programa binário .mepab."
+    )
+    parser.add_argument(
+        "--output", "-o",
+        help="Arquivo de saída (padrão: saída padrão)."
     )
     args = parser.parse_args()
 
     try:
+        # Programa já compilado: só executa ou lista
+        with open(args.file, "rb") as f:
+            head = f.read(len(MAGIC))
+        if is_trace(head):
+            _query_trace(args)
+            return
+        if is_snapshot(head):
+            # estado salvo por --snapshot: continua a execução de onde parou
+            _execute(None, args, load_snapshot(args.file))
+            return
+        if is_binary(head):
+            program = load_binary(args.file)
+            if args.verify and not (args.run or args.batch):
+                print(verify(program).summary())
+            elif args.batch:
+                _run_batch(program, args)
+            elif args.run:
+                _execute(program, args)
+            else:
+                _emit(disassemble(program), args)
+            return
+
         # Lê o código-fonte
         with open(args.file, "r", encoding="utf-8") as f:
             codigo = f.read()
@@ -30,19 +201,204 @@ def main():
         semantic = SemanticAnalyzer(ast)
         semantic.analyze()
 
+        if args.backend == "python":
+            _python_backend(ast, args)
+            return
+        if args.backend == "closures":
+            ClosureCompiler().compile(ast).run(write=print)
+            return
+
         # Geração de código MEPA
-        generator = MepaGenerator()
+        generator = MepaGenerator(
+            invert_loops=args.invert_loops, cse=args.optimize >= 1, inline=args.optimize >= 1
+        )
         mepa_code = generator.generate(ast)
+        # o otimizador remove e move instruções: a tabela de linhas só vale sem ele
+        lines = generator.line_table.to_dict()
+        if args.optimize:
+            mepa_code = MepaOptimizer(args.optimize).optimize(mepa_code)
+            lines = {}
+
+        if args.cfg:
+            cfg = build_cfg(mepa_code)
+            print(cfg.to_dot() if args.cfg == "dot" else cfg.to_json())
+            return
+
+        if args.fusion_report:
+            print(fusion_report(assemble(mepa_code)).format())
+            return
+
+        if args.verify and not (args.run or args.batch):
+            print(verify(assemble(mepa_code, lines)).summary())
+            return
+
+        if args.batch:
+            _run_batch(assemble(mepa_code, lines), args, codigo)
+            return
+
+        if args.run:
+            _execute(assemble(mepa_code, lines), args, source=codigo)
+            return
 
         # Exibe apenas o resultado final
-        for instr in mepa_code:
-            print(instr)
+        _emit(mepa_code, args, lines)
 
     except CodeGenerationError as e:
         print(f"Erro na geração de código: {e}")
+    except (
+        MepaRuntimeError, MepaAssemblyError, MepaSnapshotError, MepaVerifyError, ExecutionError,
+    ) as e:
+        print(e)
     except Exception as e:
         print(f"Erro: {e}")
 
 
+def _execute(program, args, state=None, source=None):
+    """Executa na máquina virtual (ou retoma o snapshot `state`), com perfil se pedido."""
+    profiling = args.profile or args.profile_dump
+    options = dict(
+        engine=args.engine, profile=bool(profiling), limits=_limits(args), checked=not args.verify,
+        write=print,
+    )
+    if args.coverage:
+        if state is not None:
+            raise ValueError("--coverage não vale para a retomada de um snapshot")
+        options["coverage"] = _load_coverage(program, args)
+    trace = TraceWriter(args.trace) if args.trace else None
+    try:
+        if state is not None:
+            vm = resume(state, trace=trace, **options)
+        else:
+            vm = MepaVM(program, trace=trace, **options)
+        result = vm.run()
+    finally:
+        if trace is not None:
+            trace.close()
+        if args.coverage:
+            # a cobertura até um erro de execução também conta
+            _save_coverage(options["coverage"], args, source)
+    if result.limit is not None:
+        print(result.limit)
+        if args.snapshot and result.limit.kind != MEMORY:
+            size = save_snapshot(vm, args.snapshot, include_program=True)
+            print(f"Estado gravado em {args.snapshot} ({size} bytes)", file=sys.stderr)
+    if args.profile:
+        print(vm.profile.report())
+    if args.profile_dump:
+        dump = vm.profile.to_json() if args.profile_dump.endswith(".json") else vm.profile.to_folded()
+        with open(args.profile_dump, "w", encoding="utf-8") as f:
+            f.write(dump)
+
+
+def _python_backend(ast, args):
+    """--backend python: executa (--run) ou escreve o código Python gerado."""
+    program = PythonGenerator().generate(ast)
+    if args.run:
+        program.run(write=print)
+        return
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(program.source)
+    else:
+        sys.stdout.write(program.source)
+
+
+def _query_trace(args):
+    """Consultas sobre um rastro gravado por --trace."""
+    with TraceReader(args.file) as reader:
+        if args.last_write is not None:
+            slot = reader.slot_of(args.last_write)
+            name = reader.program.symbols.get(slot, f"slot {slot}")
+            write = reader.last_write(slot, args.before)
+            if write is None:
+                print(f"{name}: nenhuma gravação")
+            else:
+                where = f"instrução {write.pc}" + (f" (linha {write.line})" if write.line else "")
+                print(f"{name} = {write.value!r}: {where}, passo {write.step}")
+        elif args.state_at is not None:
+            vm = reader.state_at(args.state_at)
+            line = reader.line_of(vm.pc)
+            print(f"passo {vm.steps}: instrução {vm.pc}" + (f" (linha {line})" if line else "")
+                  + f", topo {vm.sp}")
+            for address in range(vm.sp + 1):
+                name = reader.program.symbols.get(address, "")
+                print(f"  [{address}] {vm.memory[address]!r} {name}".rstrip())
+        else:
+            print(reader.summary())
+
+
+def _run_batch(program, args, source=None):
+    """Executa o lote de entradas de `--batch` e imprime o relatório."""
+    input_sets = _read_input_sets(args.batch)
+    if args.lanes:
+        if args.coverage:
+            raise ValueError("--coverage não vale com --lanes")
+        report = run_lanes(program, input_sets, limits=_limits(args), checked=not args.verify)
+    else:
+        report = run_batch(
+            program, input_sets, workers=args.jobs, engine=args.engine, limits=_limits(args),
+            coverage=bool(args.coverage), checked=not args.verify,
+        )
+    if report.coverage is not None:
+        report.coverage.merge(_load_coverage(program, args))
+    print(report.to_json())
+    print(report.summary(), file=sys.stderr)
+    if report.coverage is not None:
+        _save_coverage(report.coverage, args, source)
+
+
+def _read_input_sets(path):
+    """Conjuntos de entrada de --batch: um por linha, na ordem (linha vazia: sem entradas)."""
+    input_sets = []
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            values = []
+            for text in line.split():
+                try:
+                    values.append(parse_constant(text))
+                except ValueError:
+                    raise ValueError(f"{path}, linha {number}: valor inválido {text!r}") from None
+            input_sets.append(values)
+    return input_sets
+
+
+def _load_coverage(program, args):
+    """Cobertura acumulada no arquivo de --coverage (nova se ele ainda não existe)."""
+    if os.path.exists(args.coverage):
+        return load_coverage(args.coverage, program)
+    return Coverage(program)
+
+
+def _save_coverage(coverage, args, source):
+    """Grava a cobertura total em --coverage e mostra o relatório por linha."""
+    save_coverage(coverage, args.coverage)
+    print(coverage.report(source), file=sys.stderr)
+
+
+def _limits(args):
+    """Limites de recursos pedidos na linha de comando (None se nenhum)."""
+    if args.max_steps is None and args.max_memory is None and args.timeout is None:
+        return None
+    return Limits(max_steps=args.max_steps, max_memory=args.max_memory, timeout=args.timeout)
+
+
+def _emit(mepa_code, args, lines=None):
+    """Escreve a listagem no formato pedido (texto ou .mepab, com as linhas do fonte)."""
+    if args.format == "binary":
+        data = to_bytes(assemble(mepa_code, lines))
+        if args.output:
+            with open(args.output, "wb") as f:
+                f.write(data)
+        else:
+            sys.stdout.buffer.write(data)
+        return
+    text = "\n".join(str(instr) for instr in mepa_code) + "\n"
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,65 @@
+from .errors import (
+    MepaRuntimeError, MepaAssemblyError, MepaMemoryError, MepaOutOfMemoryError, MepaVerifyError,
+    MepaSnapshotError,
+    InputPending,
+)
+from .program import MepaProgram
+from .assembler import assemble, disassemble
+from .binary import save_binary, load_binary, to_bytes, from_bytes
+from .loader import load_program, load_file
+from .compiler import CompiledProgram
+from .profiler import Profile
+from .coverage import Coverage, save_coverage, load_coverage
+from .verifier import Verification, verify
+from .limits import Limits, LimitExceeded
+from .vm import MepaVM, ExecutionResult, run_listing
+from .batch import run_batch, BatchReport, RunResult
+from .lanes import LaneVM, run_lanes
+from .sessions import Session, run_sessions
+from .snapshot import snapshot, restore, resume, save_snapshot, load_snapshot
+from .trace import TraceWriter, TraceReader
+
+__all__ = [
+    "MepaRuntimeError",
+    "MepaAssemblyError",
+    "MepaMemoryError",
+    "MepaOutOfMemoryError",
+    "MepaVerifyError",
+    "MepaSnapshotError",
+    "InputPending",
+    "MepaProgram",
+    "assemble",
+    "disassemble",
+    "load_program",
+    "load_file",
+    "save_binary",
+    "load_binary",
+    "to_bytes",
+    "from_bytes",
+    "CompiledProgram",
+    "Profile",
+    "Coverage",
+    "save_coverage",
+    "load_coverage",
+    "Verification",
+    "verify",
+    "Limits",
+    "LimitExceeded",
+    "MepaVM",
+    "ExecutionResult",
+    "run_listing",
+    "run_batch",
+    "BatchReport",
+    "RunResult",
+    "LaneVM",
+    "run_lanes",
+    "Session",
+    "run_sessions",
+    "snapshot",
+    "restore",
+    "resume",
+    "save_snapshot",
+    "load_snapshot",
+    "TraceWriter",
+    "TraceReader",
+]
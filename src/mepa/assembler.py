@@ -0,0 +1,248 @@
+"""Montador de listagens MEPA textuais.
+
+Lê o texto do `MepaGenerator` (``L1: NADA``, ``ARMZ 0 # x``, strings de
+`CRCS`) e produz um `MepaProgram` com códigos e operandos em vetores
+compactos e destinos de desvio já resolvidos para índices.
+
+A leitura de cada linha usa só `partition`/`split`; as linhas com aspas
+(strings de `CRCS`) passam pelo analisador completo de `codegen.mepa_ir`.
+
+``CRVL k,n``, ``ARMZ k,n`` e ``RTPR k,n`` são as formas de nível léxico
+(ver opcodes.py); no nível 0 (``CRVL 0,n``) o endereço é absoluto e a
+instrução vira a forma de um operando.
+"""
+
+from __future__ import annotations
+
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from codegen.mepa_ir import Instr, parse_instruction
+from .errors import MepaAssemblyError
+from .opcodes import (
+    OPCODES, OPNAMES, TARGET_OPS, INT_OPS, LEXICAL_OPS, LEVELS, CRVL, ARMZ, CRCT, CRCS, RTPR,
+    ENPR, CRVL_K, ARMZ_K, RTPR_K, pack_lexical, unpack_lexical,
+)
+from .program import MepaProgram
+
+
+Source = Union[str, Iterable[Union[str, Instr]]]
+
+_INT64 = (-(1 << 63), (1 << 63) - 1)
+# forma de dois operandos (k,n) de cada instrução
+_LEXICAL = {CRVL: CRVL_K, ARMZ: ARMZ_K, RTPR: RTPR_K}
+
+
+def assemble(source: Source, source_lines: Optional[Dict[int, int]] = None) -> MepaProgram:
+    """Monta o texto (uma string ou linhas/`Instr`) num `MepaProgram`.
+
+    `source_lines` é a tabela de linhas do fonte do gerador
+    (`MepaGenerator.line_table.to_dict()`), guardada em `MepaProgram.lines`.
+
+    Levanta `MepaAssemblyError` com o número da linha para instrução
+    desconhecida, operando inválido e rótulo duplicado ou não definido.
+    """
+    if isinstance(source, str):
+        lines: Iterable = source.splitlines()
+    else:
+        lines = source
+
+    opcodes: List[int] = []
+    operands: List[int] = []
+    constants: List[Union[str, int, float]] = []
+    labels: Dict[str, int] = {}
+    symbols: Dict[int, str] = {}
+    fixups: List[Tuple[int, str, int]] = []   # (instrução, rótulo, linha)
+    # linhas sem rótulo nem desvio se repetem muito ("SOMA", "CRVL 0 # x"):
+    # cada texto é decodificado uma vez só (strings iguais dividem a constante)
+    decoded: Dict[str, Tuple[int, int]] = {}
+    lookup = OPCODES.get
+
+    for lineno, line in enumerate(lines, 1):
+        if isinstance(line, Instr):
+            line = str(line)
+        known = decoded.get(line)
+        if known is not None:
+            opcodes.append(known[0])
+            operands.append(known[1])
+            continue
+
+        if '"' in line:
+            instr = _parse_quoted(line, lineno)
+            label, name, arg, comment = instr.label, instr.op, instr.arg, instr.comment
+        else:
+            code, _, comment = line.partition("#")
+            parts = code.split()
+            if not parts:
+                continue
+            label = None
+            if parts[0][-1] == ":":
+                label = parts[0][:-1]
+                del parts[0]
+                if not parts:
+                    raise MepaAssemblyError(lineno, f"rótulo '{label}' sem instrução")
+            name = parts[0]
+            arg = "".join(parts[1:]) if len(parts) > 1 else None
+
+        if label is not None:
+            if not label.isidentifier():
+                raise MepaAssemblyError(lineno, f"rótulo inválido '{label}'")
+            if label in labels:
+                raise MepaAssemblyError(lineno, f"rótulo '{label}' duplicado")
+            labels[label] = len(opcodes)
+
+        op = lookup(name)
+        if op is None:
+            raise MepaAssemblyError(lineno, f"instrução desconhecida '{name}'")
+
+        if op in TARGET_OPS:
+            if arg is None:
+                raise MepaAssemblyError(lineno, f"'{name}' exige um rótulo")
+            fixups.append((len(opcodes), arg.split(",", 1)[0], lineno))
+            opcodes.append(op)
+            operands.append(0)
+            continue
+
+        if op in _LEXICAL and arg is not None and "," in arg:
+            op, value = _lexical_operand(op, arg, name, lineno)
+        elif op in INT_OPS:
+            value = _int_operand(arg, name, lineno)
+            if op == ENPR and not 0 < value < LEVELS:
+                raise MepaAssemblyError(lineno, f"nível léxico inválido em 'ENPR {value}'")
+        elif op == CRCT:
+            if arg is None:
+                raise MepaAssemblyError(lineno, "'CRCT' exige operando")
+            constant = _number(arg, lineno)
+            if isinstance(constant, int) and _INT64[0] <= constant <= _INT64[1]:
+                value = constant
+            else:
+                op = CRCS
+                value = len(constants)
+                constants.append(constant)
+        elif op == CRCS:
+            value = len(constants)
+            constants.append(_string(arg, lineno))
+        elif op == RTPR:
+            value = _int_operand(arg, name, lineno) if arg is not None else 0
+        else:
+            if arg is not None:
+                raise MepaAssemblyError(lineno, f"'{name}' não tem operando")
+            value = 0
+        if (op == CRVL or op == ARMZ) and comment:
+            # endereço absoluto; o de um `CRVL k,n` muda a cada ativação
+            comment = comment.strip()
+            if comment:
+                symbols.setdefault(value, comment)
+
+        if label is None:
+            decoded[line] = (op, value)
+        opcodes.append(op)
+        operands.append(value)
+
+    for index, label, lineno in fixups:
+        target = labels.get(label)
+        if target is None:
+            raise MepaAssemblyError(lineno, f"rótulo '{label}' não definido")
+        operands[index] = target
+
+    return MepaProgram(
+        array("B", opcodes), array("q", operands), constants, labels, symbols,
+        dict(source_lines) if source_lines else {},
+    )
+
+
+def disassemble(program: MepaProgram) -> List[str]:
+    """Volta ao texto do gerador (rótulos e nomes de variáveis como comentário)."""
+    names: Dict[int, str] = {index: label for label, index in program.labels.items()}
+    for op, value in zip(program.opcodes, program.operands):
+        if op in TARGET_OPS and value not in names:
+            names[value] = f"L_{value}"
+
+    lines: List[str] = []
+    for i, (op, value) in enumerate(zip(program.opcodes, program.operands)):
+        name = OPNAMES[op]
+        if op in TARGET_OPS:
+            text = f"{name} {names[value]}"
+        elif op == CRCS:
+            constant = program.constants[value]
+            if isinstance(constant, str):
+                text = 'CRCS "' + constant.replace('"', '\\"') + '"'
+            else:
+                text = f"CRCT {constant!r}"
+        elif op in LEXICAL_OPS:
+            text = "{} {},{}".format(name, *unpack_lexical(value))
+        elif op in INT_OPS or op == CRCT or (op == RTPR and value):
+            text = f"{name} {value}"
+            if (op == CRVL or op == ARMZ) and value in program.symbols:
+                text += f" # {program.symbols[value]}"
+        else:
+            text = name
+        if i in names:
+            text = f"{names[i]}: {text}"
+        lines.append(text)
+    return lines
+
+
+def _parse_quoted(line: str, lineno: int) -> Instr:
+    try:
+        return parse_instruction(line)
+    except ValueError as exc:
+        raise MepaAssemblyError(lineno, str(exc)) from exc
+
+
+def _int_operand(arg: Optional[str], name: str, lineno: int) -> int:
+    if arg is None:
+        raise MepaAssemblyError(lineno, f"'{name}' exige operando inteiro")
+    try:
+        value = int(arg)
+    except ValueError:
+        raise MepaAssemblyError(lineno, f"operando inteiro inválido '{arg}' em '{name}'") from None
+    if not _INT64[0] <= value <= _INT64[1]:
+        raise MepaAssemblyError(lineno, f"operando fora do intervalo em '{name}'")
+    return value
+
+
+def _lexical_operand(op: int, arg: str, name: str, lineno: int) -> Tuple[int, int]:
+    """``k,n``: a instrução de nível léxico e o operando (nível 0: a forma absoluta)."""
+    level_text, _, offset_text = arg.partition(",")
+    level = _int_operand(level_text, name, lineno)
+    offset = _int_operand(offset_text, name, lineno)
+    if not 0 <= level < LEVELS:
+        raise MepaAssemblyError(lineno, f"nível léxico inválido em '{name} {arg}'")
+    if level == 0:
+        if op == RTPR:
+            raise MepaAssemblyError(lineno, "'RTPR 0,n': o nível 0 não tem display a restaurar")
+        return op, offset
+    if not _INT64[0] <= offset << 8 <= _INT64[1]:
+        raise MepaAssemblyError(lineno, f"deslocamento fora do intervalo em '{name}'")
+    return _LEXICAL[op], pack_lexical(level, offset)
+
+
+def _number(arg: str, lineno: int) -> Union[int, float]:
+    try:
+        return int(arg)
+    except ValueError:
+        pass
+    try:
+        return float(arg)
+    except ValueError:
+        raise MepaAssemblyError(lineno, f"constante numérica inválida '{arg}'") from None
+
+
+def unescape_string(text: str) -> str:
+    """Operando de `CRCS` (``"..."`` com aspas escapadas) para o valor da string."""
+    if len(text) < 2 or not (text.startswith('"') and text.endswith('"')):
+        raise ValueError(f"string mal formada: {text}")
+    return text[1:-1].replace('\\"', '"')
+
+
+def _string(arg: Optional[str], lineno: int) -> str:
+    if arg is None:
+        raise MepaAssemblyError(lineno, "'CRCS' exige operando")
+    try:
+        return unescape_string(arg)
+    except ValueError as exc:
+        raise MepaAssemblyError(lineno, str(exc)) from None
+
+
+__all__ = ["assemble", "disassemble", "unescape_string", "Source"]
@@ -0,0 +1,213 @@
+"""Execução em lote: um programa MEPA contra muitos conjuntos de entrada.
+
+`run_batch` carrega o programa uma vez por processo do pool (ele viaja
+como bytes ``.mepab``) e reaproveita a mesma máquina em todas as execuções
+daquele processo, só com `reset()`: por entrada não há início de
+interpretador Python, montagem nem compilação de blocos.
+
+As entradas vão em pedaços (`chunksize` execuções por tarefa) para que o
+custo de comunicação entre processos não domine programas curtos. Com
+``workers=1`` tudo roda no processo atual, sem pool.
+
+Cada execução devolve um `RunResult` com a saída de `IMPR`, os passos e a
+situação: ``"ok"`` (chegou ao `PARA`), ``"limite"`` (esgotou `max_steps`)
+ou ``"erro"`` (`MepaRuntimeError`, inclusive entrada esgotada). Outros
+limites (`Limits` de memória e tempo) podem ir em ``limits=``; o limite
+estourado vem descrito em `RunResult.limit`.
+
+Com ``coverage=True`` cada processo coleta a cobertura de todas as suas
+execuções numa só `Coverage` (os blocos cobertos por uma execução já
+rodam sem sonda nas seguintes), e o relatório traz a soma delas em
+`BatchReport.coverage`.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .binary import from_bytes, to_bytes
+from .coverage import Coverage
+from .errors import MepaRuntimeError
+from .limits import Limits
+from .program import MepaProgram
+from .vm import MepaVM, input_reader
+
+
+OK, LIMIT, ERROR = "ok", "limite", "erro"
+
+# tarefas por processo quando `chunksize` não é dado: pedaços pequenos o
+# bastante para equilibrar a carga, grandes o bastante para amortizar o envio
+_TASKS_PER_WORKER = 4
+
+
+@dataclass
+class RunResult:
+    """Resultado de uma execução do lote."""
+    index: int                     # posição do conjunto de entrada
+    status: str                    # OK, LIMIT ou ERROR
+    output: List[Any] = field(default_factory=list)
+    steps: int = 0
+    error: Optional[str] = None
+    elapsed: float = 0.0           # segundos dentro de `run`
+    limit: Optional[str] = None    # limite estourado (status LIMIT), com instrução e linha
+
+
+@dataclass
+class BatchReport:
+    """Todas as execuções de um lote, em ordem, e a vazão obtida."""
+    results: List[RunResult]
+    elapsed: float                 # tempo de parede do lote inteiro
+    workers: int
+    coverage: Optional[Coverage] = None   # com `coverage=True`: de todas as execuções
+
+    @property
+    def runs_per_second(self) -> float:
+        return len(self.results) / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def steps(self) -> int:
+        return sum(result.steps for result in self.results)
+
+    def counts(self) -> Dict[str, int]:
+        """Execuções por situação."""
+        counts = {OK: 0, LIMIT: 0, ERROR: 0}
+        for result in self.results:
+            counts[result.status] += 1
+        return counts
+
+    def summary(self) -> str:
+        counts = self.counts()
+        return (
+            f"execuções: {len(self.results)}  ok: {counts[OK]}  limite: {counts[LIMIT]}  "
+            f"erro: {counts[ERROR]}  processos: {self.workers}  "
+            f"tempo: {self.elapsed:.3f} s  vazão: {self.runs_per_second:.1f} execuções/s"
+        )
+
+    def to_dict(self) -> dict:
+        data = {
+            "results": [asdict(result) for result in self.results],
+            "elapsed": self.elapsed,
+            "workers": self.workers,
+            "runs_per_second": self.runs_per_second,
+        }
+        if self.coverage is not None:
+            data["coverage"] = json.loads(self.coverage.to_json())
+        return data
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.to_dict(), indent=indent, ensure_ascii=False)
+
+
+def run_batch(
+    program: MepaProgram,
+    input_sets: Sequence[Sequence[Any]],
+    *,
+    max_steps: Optional[int] = None,
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    coverage: bool = False,
+    **options: Any,
+) -> BatchReport:
+    """Executa `program` uma vez para cada conjunto de entradas de `LEIT`.
+
+    `max_steps` é o orçamento de instruções de cada execução; `workers` o
+    número de processos (padrão: um por núcleo); `coverage` coleta a
+    cobertura do lote; `options` vão para `MepaVM` (``engine``, ``storage``,
+    ``fuse``, ``memory_size``, ``limits``).
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers deve ser positivo")
+    if "read" in options or "write" in options:
+        raise ValueError("o lote define a leitura e a escrita de cada execução")
+    jobs = list(enumerate(input_sets))
+    workers = max(1, min(workers, len(jobs)))
+    start = time.perf_counter()
+    total = Coverage(program) if coverage else None
+    if workers == 1:
+        runner = _BatchRunner(program, max_steps, coverage, options)
+        results, bits = runner.run_chunk(jobs)
+        if total is not None:
+            total.merge(bits)
+    else:
+        if chunksize is None:
+            chunksize = max(1, len(jobs) // (workers * _TASKS_PER_WORKER))
+        chunks = [jobs[i:i + chunksize] for i in range(0, len(jobs), chunksize)]
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(to_bytes(program), max_steps, coverage, options),
+        ) as pool:
+            results = []
+            for chunk, bits in pool.map(_run_chunk, chunks):
+                results.extend(chunk)
+                if total is not None:
+                    total.merge(bits)
+    return BatchReport(results, time.perf_counter() - start, workers, total)
+
+
+class _BatchRunner:
+    """Uma máquina reaproveitada para várias execuções do mesmo programa."""
+
+    def __init__(
+        self,
+        program: MepaProgram,
+        max_steps: Optional[int],
+        coverage: bool,
+        options: Dict[str, Any],
+    ) -> None:
+        if max_steps is not None:
+            limits = options.get("limits") or Limits()
+            options = {**options, "limits": replace(limits, max_steps=max_steps)}
+        self.coverage = Coverage(program) if coverage else None
+        self.vm = MepaVM(program, coverage=self.coverage, **options)
+
+    def run_chunk(
+        self, jobs: Sequence[Tuple[int, Sequence[Any]]]
+    ) -> Tuple[List[RunResult], Optional[bytes]]:
+        """Resultados das execuções e as marcas de cobertura acumuladas no processo."""
+        results = [self.run_one(index, inputs) for index, inputs in jobs]
+        return results, self.coverage.bits() if self.coverage is not None else None
+
+    def run_one(self, index: int, inputs: Sequence[Any]) -> RunResult:
+        vm = self.vm
+        vm.read = input_reader(inputs)
+        vm.reset()
+        began = time.perf_counter()
+        try:
+            result = vm.run()
+        except MepaRuntimeError as exc:
+            return RunResult(
+                index, ERROR, list(vm.output), vm.steps, str(exc), time.perf_counter() - began
+            )
+        elapsed = time.perf_counter() - began
+        if result.halted:
+            return RunResult(index, OK, list(result.output), result.steps, None, elapsed)
+        limit = str(result.limit) if result.limit is not None else None
+        return RunResult(index, LIMIT, list(result.output), result.steps, None, elapsed, limit)
+
+
+# estado de cada processo do pool (montado uma vez pelo inicializador)
+_worker: Optional[_BatchRunner] = None
+
+
+def _init_worker(
+    data: bytes, max_steps: Optional[int], coverage: bool, options: Dict[str, Any]
+) -> None:
+    global _worker
+    _worker = _BatchRunner(from_bytes(data), max_steps, coverage, options)
+
+
+def _run_chunk(
+    jobs: Sequence[Tuple[int, Sequence[Any]]]
+) -> Tuple[List[RunResult], Optional[bytes]]:
+    return _worker.run_chunk(jobs)
+
+
+__all__ = ["run_batch", "RunResult", "BatchReport", "OK", "LIMIT", "ERROR"]
@@ -0,0 +1,249 @@
+"""Formato binário de programas MEPA montados (``.mepab``).
+
+Layout (inteiros little-endian)::
+
+    cabeçalho   "MEPB" | versão u16 | flags u16 | largura u8 | 3 bytes zero |
+                instruções u32 | constantes u32 | rótulos u32 | símbolos u32 |
+                linhas u32
+    códigos     1 byte por instrução
+    operandos   inteiro de `largura` bytes (1, 2, 4 ou 8) por instrução;
+                desvios já são índices
+    constantes  tipo u8 ('s' string, 'f' real, 'i' inteiro grande) | dados
+    rótulos     índices u32 | tamanho u32 | nomes UTF-8 separados por "\\n"
+    símbolos    endereços i64 | tamanho u32 | nomes UTF-8 separados por "\\n"
+    linhas      índices u32 | linhas u32             (só com FLAG_LINES)
+
+A largura dos operandos é a menor em que todos cabem. Os vetores são
+copiados direto do arquivo para `array`, sem decodificar item por item.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import mmap
+import struct
+import sys
+from array import array
+from itertools import compress
+from typing import Dict, List, Union
+
+from .errors import MepaAssemblyError
+from .opcodes import CRCS, TARGET_OPS, VALID_OPS
+from .program import Constant, MepaProgram
+
+
+MAGIC = b"MEPB"
+VERSION = 1
+FLAG_LINES = 0x1
+
+_HEADER = struct.Struct("<4sHHB3xIIIII")
+_U32 = struct.Struct("<I")
+_F64 = struct.Struct("<d")
+
+_BIG_ENDIAN = sys.byteorder == "big"
+
+# código de `array` com exatamente n bytes, para n = 1, 2, 4, 8
+_SIGNED = {array(code).itemsize: code for code in "qlihb"}
+_UNSIGNED32 = next(code for code in "ILH" if array(code).itemsize == 4)
+
+# 1 nos códigos cujo operando é índice de instrução, 2 no de constante
+_OPERAND_KIND = bytes(
+    1 if op in TARGET_OPS else 2 if op == CRCS else 0 for op in range(256)
+)
+
+
+def to_bytes(program: MepaProgram) -> bytes:
+    """Serializa o programa no formato ``.mepab``."""
+    count = len(program.opcodes)
+    width = _operand_width(program.operands)
+    flags = FLAG_LINES if program.lines else 0
+    parts: List[bytes] = [_HEADER.pack(
+        MAGIC, VERSION, flags, width, count, len(program.constants),
+        len(program.labels), len(program.symbols), len(program.lines),
+    )]
+    parts.append(program.opcodes.tobytes())
+    parts.append(_pack(array(_SIGNED[width], program.operands)))
+    for constant in program.constants:
+        if isinstance(constant, str):
+            parts.append(b"s" + _sized(constant.encode("utf-8")))
+        elif isinstance(constant, float):
+            parts.append(b"f" + _F64.pack(constant))
+        else:
+            parts.append(b"i" + _sized(str(constant).encode("ascii")))
+    parts.append(_pack(array(_UNSIGNED32, program.labels.values())))
+    parts.append(_sized("\n".join(program.labels).encode("utf-8")))
+    parts.append(_pack(array(_SIGNED[8], program.symbols)))
+    parts.append(_sized("\n".join(program.symbols.values()).encode("utf-8")))
+    if program.lines:
+        ordered = sorted(program.lines.items())
+        parts.append(_pack(array(_UNSIGNED32, (index for index, _ in ordered))))
+        parts.append(_pack(array(_UNSIGNED32, (line for _, line in ordered))))
+    return b"".join(parts)
+
+
+def from_bytes(data: Union[bytes, bytearray, memoryview, mmap.mmap]) -> MepaProgram:
+    """Lê um programa ``.mepab`` de um buffer (bytes ou `mmap`)."""
+    reader = _Reader(data)
+    try:
+        magic, version, flags, width, count, n_constants, n_labels, n_symbols, n_lines = (
+            reader.struct(_HEADER)
+        )
+        if magic != MAGIC:
+            raise MepaAssemblyError(None, "arquivo não é um programa MEPA binário")
+        if version != VERSION:
+            raise MepaAssemblyError(None, f"versão {version} do formato binário não suportada")
+        if width not in (1, 2, 4, 8):
+            raise ValueError(f"largura de operando inválida {width}")
+
+        opcodes = reader.array("B", count)
+        operands = reader.array(_SIGNED[width], count)
+        if width != 8:
+            operands = array("q", operands)
+
+        constants: List[Constant] = []
+        for _ in range(n_constants):
+            kind = reader.take(1)
+            if kind == b"f":
+                constants.append(reader.struct(_F64)[0])
+            elif kind == b"s":
+                constants.append(reader.sized().decode("utf-8"))
+            elif kind == b"i":
+                constants.append(int(reader.sized().decode("ascii")))
+            else:
+                raise ValueError(f"tipo de constante inválido {kind!r}")
+
+        label_indices = reader.array(_UNSIGNED32, n_labels)
+        labels = dict(zip(reader.names(n_labels), label_indices))
+        addresses = reader.array(_SIGNED[8], n_symbols)
+        symbols = dict(zip(addresses, reader.names(n_symbols)))
+
+        lines: Dict[int, int] = {}
+        if flags & FLAG_LINES:
+            indices = reader.array(_UNSIGNED32, n_lines)
+            lines = dict(zip(indices, reader.array(_UNSIGNED32, n_lines)))
+    except (struct.error, UnicodeDecodeError, ValueError) as exc:
+        raise MepaAssemblyError(None, f"programa binário corrompido: {exc}") from None
+    finally:
+        reader.close()
+
+    _check_operands(opcodes, operands, len(constants))
+    return MepaProgram(opcodes, operands, constants, labels, symbols, lines)
+
+
+def save_binary(program: MepaProgram, path: str) -> int:
+    """Grava o programa em `path`; devolve o tamanho em bytes."""
+    data = to_bytes(program)
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(data)
+
+
+def load_binary(path: str) -> MepaProgram:
+    """Carrega um arquivo ``.mepab`` mapeando-o em memória."""
+    with open(path, "rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # arquivo vazio não pode ser mapeado
+            raise MepaAssemblyError(None, "programa binário vazio") from None
+        with mapped:
+            return from_bytes(mapped)
+
+
+def program_digest(program: MepaProgram) -> bytes:
+    """Resumo de 8 bytes do programa (do seu ``.mepab``)."""
+    return hashlib.blake2b(to_bytes(program), digest_size=8).digest()
+
+
+def is_binary(head: bytes) -> bool:
+    """Os primeiros bytes de um arquivo indicam o formato ``.mepab``."""
+    return head[:len(MAGIC)] == MAGIC
+
+
+class _Reader:
+    """Leitura sequencial de um buffer, sem copiar o que não for preciso."""
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview, mmap.mmap]) -> None:
+        self.view = memoryview(data)
+        self.offset = 0
+
+    def span(self, size: int) -> memoryview:
+        """Os próximos `size` bytes, como fatia do buffer (sem cópia)."""
+        end = self.offset + size
+        if end > len(self.view):
+            raise ValueError("fim inesperado do arquivo")
+        chunk = self.view[self.offset:end]
+        self.offset = end
+        return chunk
+
+    def take(self, size: int) -> bytes:
+        with self.span(size) as chunk:
+            return chunk.tobytes()
+
+    def struct(self, layout: struct.Struct) -> tuple:
+        with self.span(layout.size) as chunk:
+            return layout.unpack(chunk)
+
+    def array(self, code: str, count: int) -> array:
+        values = array(code)
+        # copia uma vez, da fatia do buffer (ou do mmap) direto para o array
+        with self.span(values.itemsize * count) as chunk:
+            values.frombytes(chunk)
+        if _BIG_ENDIAN:
+            values.byteswap()
+        return values
+
+    def sized(self) -> bytes:
+        (size,) = self.struct(_U32)
+        return self.take(size)
+
+    def names(self, count: int) -> List[str]:
+        blob = self.sized().decode("utf-8")
+        names = blob.split("\n") if count else []
+        if len(names) != count:
+            raise ValueError("tabela de nomes incompleta")
+        return names
+
+    def close(self) -> None:
+        self.view.release()
+
+
+def _operand_width(operands: array) -> int:
+    if not operands:
+        return 1
+    low, high = min(operands), max(operands)
+    for width in (1, 2, 4):
+        limit = 1 << (8 * width - 1)
+        if -limit <= low and high < limit:
+            return width
+    return 8
+
+
+def _pack(values: array) -> bytes:
+    if _BIG_ENDIAN:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _sized(data: bytes) -> bytes:
+    return _U32.pack(len(data)) + data
+
+
+def _check_operands(opcodes: array, operands: array, n_constants: int) -> None:
+    """Códigos válidos; desvios e constantes apontam para dentro do programa."""
+    invalid = set(opcodes.tobytes()) - VALID_OPS
+    if invalid:
+        raise MepaAssemblyError(None, f"código de instrução inválido {min(invalid)}")
+    kinds = opcodes.tobytes().translate(_OPERAND_KIND)
+    targets = list(compress(operands, kinds.replace(b"\2", b"\0")))
+    if targets and (min(targets) < 0 or max(targets) >= len(opcodes)):
+        raise MepaAssemblyError(None, "desvio para fora do programa")
+    pooled = list(compress(operands, kinds.replace(b"\1", b"\0")))
+    if pooled and (min(pooled) < 0 or max(pooled) >= n_constants):
+        raise MepaAssemblyError(None, "constante fora da tabela")
+
+
+__all__ = [
+    "MAGIC", "VERSION", "to_bytes", "from_bytes", "save_binary", "load_binary", "is_binary",
+    "program_digest",
+]
@@ -0,0 +1,348 @@
+"""Compilação de programas MEPA em funções Python, uma por bloco básico.
+
+Cada bloco vira uma função ``b<i>(s) -> (próximo pc, s)`` gerada como
+código-fonte e compilada uma vez com `compile()`. Dentro do bloco a pilha
+de avaliação é simulada na compilação: ``CRVL 0; CRCT 1; SOMA; ARMZ 0``
+vira ``M[0] = (M[0] + 1)``, sem tocar nos slots da pilha. O que ainda está
+na pilha simulada é gravado na memória antes de desvios, `AMEM`/`DMEM` e
+no fim do bloco, então entre blocos o estado é o mesmo do interpretador.
+
+Uma comparação seguida de `DSVF` vira um ``if`` direto, sem materializar
+o 0/1. A memória, as constantes, as funções de E/S e o display ficam
+ligados às funções por closure (`CompiledProgram.bind`). Dentro do bloco,
+``D[k]`` é lido uma vez para uma variável local (``d1 = D[1]``) e os
+acessos ``CRVL k,n`` viram ``M[d1 + n]``.
+
+Como no interpretador, o bloco acusa (`BelowMemory`) a pilha abaixo de
+vazia e o endereço negativo, que numa lista apontariam para o fim da
+memória. A pilha só é conferida quando o bloco desce abaixo do `s` de
+entrada, uma vez por profundidade nova; o quadro, no primeiro acesso a
+cada ``n`` negativo mais fundo. Com ``checked=False`` (programa já
+verificado, ver `mepa.verifier`) os blocos saem sem essas conferências.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from codegen.mepa_ir import mepa_div
+from .errors import BelowMemory
+from .opcodes import (
+    OPNAMES, CRVL, CRCT, ARMZ, SOMA, SUBT, MULT, DIVI, CMME, CMMA, CMIG, CMDG, CMEG,
+    CMAG, DSVF, DSVS, NADA, CRCS, INVR, NEGA, CONJ, DISJ, IMPR, LEIT, AMEM, DMEM, CHPR,
+    RTPR, INPP, PARA, ENPR, CRVL_K, ARMZ_K, RTPR_K, TARGET_OPS, unpack_lexical,
+)
+from .program import MepaProgram
+
+
+Block = Callable[[int], Tuple[int, int]]
+
+# nome de arquivo do código gerado, que identifica os blocos num traceback
+_FILENAME = "<mepa-compilado>"
+
+_ARITHMETIC = {SOMA: "+", SUBT: "-", MULT: "*"}
+_COMPARISONS = {CMME: "<", CMMA: ">", CMIG: "==", CMDG: "!=", CMEG: "<=", CMAG: ">="}
+_LOGICAL = {CONJ: "&", DISJ: "|"}
+# terminam o bloco: a instrução seguinte é início de outro
+_ENDS_BLOCK = frozenset({DSVS, DSVF, CHPR, RTPR, RTPR_K, PARA})
+
+# valores da pilha simulada: (expressão, tipo)
+_CONST, _VALUE, _BOOL = "const", "valor", "bool"
+
+
+class CompiledProgram:
+    """Blocos de um `MepaProgram` compilados para funções Python.
+
+    `sizes[pc]` é o número de instruções do bloco que começa em `pc` (0 fora
+    dos inícios de bloco). Uma função de bloco devolve ``(pc, s)`` do
+    próximo bloco; ao executar `PARA` devolve ``(~pc, s)`` (negativo), com
+    `pc` apontando para depois do `PARA`. `extra_leaders` corta blocos em
+    pontos a mais (o rastreamento usa isso, ver trace.py); `checked` gera as
+    conferências de pilha e endereço.
+    """
+
+    def __init__(
+        self, program: MepaProgram, extra_leaders: Iterable[int] = (), checked: bool = True
+    ) -> None:
+        self.program = program
+        self.leaders = sorted(set(find_leaders(program)).union(extra_leaders))
+        self.sizes: List[int] = [0] * len(program)
+        bounds = self.leaders + [len(program)]
+        for start, end in zip(bounds, bounds[1:]):
+            self.sizes[start] = end - start
+
+        opcodes = program.opcodes.tolist()
+        operands = program.operands.tolist()
+        lines = ["def _bind(M, K, read, write, div, D):"]
+        # pc da instrução que gerou cada linha do fonte (numeradas a partir de 1)
+        self._line_pcs: List[int] = [0, 0]
+        for start, end in zip(bounds, bounds[1:]):
+            writer = _BlockWriter(start, end, opcodes, operands, checked)
+            lines.extend(writer.compile())
+            self._line_pcs.append(start)
+            self._line_pcs.extend(writer.pcs)
+        names = ", ".join(f"{start}: b{start}" for start in self.leaders)
+        lines.append(f"    return {{{names}}}")
+        self.source = "\n".join(lines) + "\n"
+        namespace: Dict[str, Any] = {"BelowMemory": BelowMemory}
+        exec(compile(self.source, _FILENAME, "exec"), namespace)
+        self._bind = namespace["_bind"]
+
+    def fault_pc(self, exc: BaseException) -> Optional[int]:
+        """pc da instrução cujo código levantou `exc` num bloco (None fora deles)."""
+        pc = None
+        tb = exc.__traceback__
+        while tb is not None:
+            if tb.tb_frame.f_code.co_filename == _FILENAME:
+                pc = self._line_pcs[tb.tb_lineno]
+            tb = tb.tb_next
+        return pc
+
+    def distance_to_leader(self, pc: int) -> int:
+        """Instruções de `pc` até o início do bloco seguinte (ou o fim do programa)."""
+        k = bisect_right(self.leaders, pc)
+        return (self.leaders[k] if k < len(self.leaders) else len(self.program)) - pc
+
+    def bind(
+        self,
+        memory: Any,
+        read: Callable[[], Any],
+        write: Callable[[Any], None],
+        display: List[int],
+    ) -> List[Optional[Block]]:
+        """Funções dos blocos indexadas por pc (None fora dos inícios de bloco)."""
+        table: List[Optional[Block]] = [None] * len(self.program)
+        constants = tuple(self.program.constants)
+        for start, block in self._bind(memory, constants, read, write, mepa_div, display).items():
+            table[start] = block
+        return table
+
+
+def find_leaders(program: MepaProgram) -> List[int]:
+    """Índices das instruções que começam blocos básicos, em ordem."""
+    count = len(program)
+    leaders = {0} if count else set()
+    for i, (op, arg) in enumerate(zip(program.opcodes, program.operands)):
+        if op == LEIT:
+            # `read` pode levantar `InputPending`: com o LEIT no início do
+            # bloco, nada do bloco foi executado e ele recomeça do mesmo pc
+            leaders.add(i)
+        if op in _ENDS_BLOCK:
+            if i + 1 < count:
+                leaders.add(i + 1)
+            if op in TARGET_OPS and 0 <= arg < count:
+                leaders.add(arg)
+    return sorted(leaders)
+
+
+class _BlockWriter:
+    """Gera o código de um bloco simulando a pilha de avaliação.
+
+    `depth` é a posição do topo relativa ao `s` da entrada do bloco; os
+    valores em `pending` ocupam as posições ``depth - len(pending) + 1 ..
+    depth`` e ainda não foram gravados na memória.
+    """
+
+    def __init__(
+        self, start: int, end: int, opcodes: Sequence[int], operands: Sequence[int],
+        checked: bool = True,
+    ) -> None:
+        self.start, self.end = start, end
+        self.opcodes, self.operands = opcodes, operands
+        self.checked = checked
+        self.body: List[str] = []
+        self.pcs: List[int] = []    # pc da instrução de cada linha de `body`
+        self.pc = start
+        self.pending: List[Tuple[str, str]] = []
+        self.origins: List[int] = []  # pc da instrução que empilhou cada pendente
+        self.depth = 0
+        self.temps = 0
+        self.display: Dict[int, str] = {}   # nível -> variável local com D[k]
+        self.floor = 0                      # menor `depth` já conferido
+        self.reach: Dict[int, int] = {}     # nível -> maior -n já conferido
+
+    def compile(self) -> List[str]:
+        for pc in range(self.start, self.end):
+            self.pc = pc
+            self.instruction(pc, self.opcodes[pc], self.operands[pc])
+        if self.opcodes[self.end - 1] not in _ENDS_BLOCK:
+            self.flush()
+            self.emit(f"return {self.end}, {self.slot(0)}")
+        header = [f"    def b{self.start}(s):"]
+        return header + [f"        {line}" for line in self.body]
+
+    # ----------------------------------------------------------
+    def emit(self, line: str) -> None:
+        self.body.append(line)
+        self.pcs.append(self.pc)
+
+    def slot(self, offset: int) -> str:
+        """Expressão do endereço ``s + depth + offset``."""
+        return _address(self.depth + offset)
+
+    def push(self, expr: str, kind: str = _VALUE) -> None:
+        self.depth += 1
+        self.pending.append((expr, kind))
+        self.origins.append(self.pc)
+
+    def pop(self) -> Tuple[str, str]:
+        if self.pending:
+            self.depth -= 1
+            self.origins.pop()
+            return self.pending.pop()
+        expr = f"M[{self.slot(0)}]"
+        self.depth -= 1
+        self.guard(self.depth)
+        return expr, _VALUE
+
+    def guard(self, depth: int) -> None:
+        """Confere que o topo ``s + depth`` não fica abaixo da pilha vazia."""
+        if self.checked and depth < self.floor:
+            self.floor = depth
+            self.emit(f"if s < {-1 - depth}:")
+            self.emit("    raise BelowMemory")
+
+    def pop_value(self) -> str:
+        expr, kind = self.pop()
+        return f"(1 if {expr} else 0)" if kind == _BOOL else expr
+
+    def pop_truth(self) -> str:
+        expr, kind = self.pop()
+        return f"({expr})" if kind == _BOOL else f"bool({expr})"
+
+    def temporary(self, expr: str) -> str:
+        self.temps += 1
+        name = f"t{self.temps}"
+        self.emit(f"{name} = {expr}")
+        return name
+
+    def flush(self) -> None:
+        """Grava na memória os valores ainda pendentes na pilha simulada."""
+        base, pc = self.depth - len(self.pending) + 1, self.pc
+        for i, (expr, kind) in enumerate(self.pending, base):
+            value = f"(1 if {expr} else 0)" if kind == _BOOL else expr
+            # um erro na gravação é da instrução que empilhou o valor
+            self.pc = self.origins[i - base]
+            self.emit(f"M[{_address(i)}] = {value}")
+        self.pc = pc
+        self.pending, self.origins = [], []
+
+    def frame(self, arg: int) -> str:
+        """Endereço ``D[k] + n`` de um operando de nível léxico."""
+        level, offset = unpack_lexical(arg)
+        base = self.display.get(level)
+        if base is None:
+            base = self.display[level] = f"d{level}"
+            self.emit(f"{base} = D[{level}]")
+        if self.checked and offset < 0 and -offset > self.reach.get(level, 0):
+            self.reach[level] = -offset
+            self.emit(f"if {base} < {-offset}:")
+            self.emit("    raise BelowMemory")
+        if offset == 0:
+            return base
+        return f"{base} + {offset}" if offset > 0 else f"{base} - {-offset}"
+
+    # ----------------------------------------------------------
+    def instruction(self, pc: int, op: int, arg: int) -> None:
+        if self.checked and (op == CRVL or op == ARMZ) and arg < 0:
+            self.emit("raise BelowMemory")
+        elif op == CRVL:
+            self.push(f"M[{arg}]")
+        elif op == CRCT:
+            self.push(str(arg) if arg >= 0 else f"({arg})", _CONST)
+        elif op == CRCS:
+            self.push(f"K[{arg}]", _CONST)
+        elif op == ARMZ:
+            value = self.pop_value()
+            # valores pendentes podem ler M[arg]: são avaliados antes da escrita
+            if any(kind != _CONST for _, kind in self.pending):
+                self.flush()
+            self.emit(f"M[{arg}] = {value}")
+        elif op == CRVL_K:
+            self.push(f"M[{self.frame(arg)}]")
+        elif op == ARMZ_K:
+            value = self.pop_value()
+            if any(kind != _CONST for _, kind in self.pending):
+                self.flush()
+            self.emit(f"M[{self.frame(arg)}] = {value}")
+        elif op in _ARITHMETIC:
+            b, a = self.pop_value(), self.pop_value()
+            self.push(f"({a} {_ARITHMETIC[op]} {b})")
+        elif op == DIVI:
+            # calculada no próprio pc: a divisão por zero vem antes das
+            # escritas seguintes do bloco, como no interpretador
+            b, a = self.pop_value(), self.pop_value()
+            self.push(self.temporary(f"div({a}, {b})"))
+        elif op in _COMPARISONS:
+            b, a = self.pop_value(), self.pop_value()
+            self.push(f"{a} {_COMPARISONS[op]} {b}", _BOOL)
+        elif op in _LOGICAL:
+            # os dois lados já foram avaliados na MEPA: sem curto-circuito
+            b, a = self.pop_truth(), self.pop_truth()
+            self.push(f"{a} {_LOGICAL[op]} {b}", _BOOL)
+        elif op == INVR:
+            self.push(f"(-{self.pop_value()})")
+        elif op == NEGA:
+            self.push(f"not {self.pop_truth()}", _BOOL)
+        elif op == IMPR:
+            self.emit(f"write({self.pop_value()})")
+        elif op == LEIT:
+            self.push(self.temporary("read()"))
+        elif op == NADA:
+            pass
+        elif op == AMEM or op == DMEM:
+            self.flush()
+            self.depth += arg if op == AMEM else -arg
+            self.guard(self.depth)
+        elif op == INPP:
+            self.flush()
+            self.emit("s = -1")
+            self.depth = self.floor = 0
+        elif op == DSVS:
+            self.flush()
+            self.emit(f"return {arg}, {self.slot(0)}")
+        elif op == DSVF:
+            expr, kind = self.pop()
+            condition = f"not ({expr})" if kind == _BOOL else f"{expr} == 0"
+            if self.pending:
+                condition = self.temporary(condition)
+                self.flush()
+            self.emit(f"if {condition}:")
+            self.emit(f"    return {arg}, {self.slot(0)}")
+            self.emit(f"return {pc + 1}, {self.slot(0)}")
+        elif op == CHPR:
+            self.flush()
+            self.emit(f"M[{self.slot(1)}] = {pc + 1}")
+            self.emit(f"return {arg}, {self.slot(1)}")
+        elif op == RTPR:
+            self.flush()
+            ret = self.pop_value()
+            self.guard(self.depth - arg)
+            self.emit(f"return {ret}, {self.slot(-arg)}")
+        elif op == ENPR:
+            self.flush()
+            self.emit(f"M[{self.slot(1)}] = D[{arg}]")
+            self.depth += 1
+            self.display[arg] = f"d{arg}"
+            self.reach.pop(arg, None)
+            self.emit(f"d{arg} = D[{arg}] = {self.slot(1)}")
+        elif op == RTPR_K:
+            self.flush()
+            level, params = unpack_lexical(arg)
+            self.guard(self.depth - 2)
+            self.guard(self.depth - params - 2)
+            self.emit(f"D[{level}] = M[{self.slot(0)}]")
+            self.emit(f"return M[{self.slot(-1)}], {self.slot(-params - 2)}")
+        elif op == PARA:
+            self.flush()
+            self.emit(f"return {~(pc + 1)}, {self.slot(0)}")
+        else:
+            raise ValueError(f"instrução sem compilação: {OPNAMES[op]}")
+
+
+def _address(k: int) -> str:
+    return "s" if k == 0 else f"s + {k}" if k > 0 else f"s - {-k}"
+
+
+__all__ = ["CompiledProgram", "find_leaders"]
@@ -0,0 +1,266 @@
+"""Cobertura de instruções e de desvios de programas MEPA.
+
+Com ``MepaVM(..., coverage=Coverage(programa))`` a máquina marca um byte
+por instrução alcançada e um por aresta de desvio condicional percorrida
+(`DSVF` que desvia, `DSVF` que segue), em `bytearray` alocados uma vez.
+
+A instrumentação só fica nos blocos básicos ainda não cobertos: o início
+de cada um deles recebe a sonda `PROBE` no código do interpretador (com e
+sem fusão) e sai da tabela de blocos compilados. Ao encontrar a sonda, a
+máquina executa o bloco sem ela e marca o que rodou. Se depois disso só
+falta uma aresta do `DSVF` final (o caso do teste de um laço, que só sai
+no fim), a sonda passa para o `DSVF`, que para apenas antes de seguir por
+essa aresta; no motor compilado o bloco é embrulhado numa função que
+compara o próximo pc. Com tudo marcado a sonda sai e o bloco volta ao
+despacho normal, sem teste nenhum.
+
+A mesma `Coverage` pode ser usada por várias máquinas e execuções
+(``reset`` mantém as marcas); `merge` soma coberturas de outros processos
+(`run_batch(..., coverage=True)`) e `save_coverage`/`load_coverage`
+acumulam entre execuções do CLI. `report` mostra a cobertura por linha do
+fonte.
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Union
+
+from codegen.line_table import LineTable
+from .binary import program_digest, to_bytes
+from .compiler import find_leaders
+from .errors import MepaAssemblyError
+from .opcodes import DSVF
+from .program import MepaProgram
+
+
+# Códigos das sondas (entre os códigos MEPA e os das superinstruções):
+# PROBE para antes do bloco; PROBE_JUMP e PROBE_NEXT trocam o DSVF final de
+# um bloco já alcançado e param só antes da aresta que ainda falta
+PROBE = 29
+PROBE_JUMP = 30
+PROBE_NEXT = 31
+
+MAGIC = b"MEPC"
+VERSION = 1
+_HEADER = struct.Struct("<4sH2xII")
+
+
+@dataclass
+class LineCoverage:
+    """Cobertura das instruções geradas para uma linha do fonte."""
+    line: int
+    instructions: int
+    covered: int
+    branches: int = 0            # arestas de DSVF (duas por desvio)
+    branches_covered: int = 0
+
+    @property
+    def complete(self) -> bool:
+        return self.covered == self.instructions and self.branches_covered == self.branches
+
+
+class Coverage:
+    """Bits de cobertura de um programa: instruções e arestas de `DSVF`."""
+
+    def __init__(self, program: MepaProgram) -> None:
+        self.program = program
+        count = len(program)
+        self.instructions = bytearray(count)
+        opcodes = program.opcodes.tolist()
+        operands = program.operands.tolist()
+        # cada DSVF tem duas arestas: [2k] desvia para o rótulo, [2k + 1] segue
+        self.branches: List[int] = [pc for pc, op in enumerate(opcodes) if op == DSVF]
+        self.edges = bytearray(2 * len(self.branches))
+        self._branch: Dict[int, int] = {pc: k for k, pc in enumerate(self.branches)}
+        self._targets: List[int] = operands
+
+        self.leaders = find_leaders(program)
+        bounds = self.leaders + [count]
+        self.block_end: Dict[int, int] = dict(zip(bounds, bounds[1:]))
+        # início do bloco de cada instrução: uma retomada no meio cai no bloco certo
+        self.block_start: List[int] = [0] * count
+        for start, end in zip(bounds, bounds[1:]):
+            for i in range(start, end):
+                self.block_start[i] = start
+        self._lines = LineTable.from_dict(program.lines)
+
+    # ----------------------------------------------------------
+    def mark(self, pc: int, count: int, next_pc: int) -> bool:
+        """`count` instruções alcançadas a partir de `pc`, parando em `next_pc`.
+
+        Devolve se o bloco de `pc` ficou coberto (a sonda pode sair).
+        """
+        if count:
+            end = pc + count
+            self.instructions[pc:end] = b"\x01" * count
+            k = self._branch.get(end - 1)
+            if k is not None:
+                if next_pc == self._targets[end - 1]:
+                    self.edges[2 * k] = 1
+                if next_pc == end:
+                    self.edges[2 * k + 1] = 1
+        return self.complete(self.block_start[pc])
+
+    def complete(self, start: int) -> bool:
+        """O bloco que começa em `start` teve todas as instruções e arestas percorridas."""
+        end = self.block_end[start]
+        if self.instructions.find(0, start, end) >= 0:
+            return False
+        k = self._branch.get(end - 1)
+        return k is None or bool(self.edges[2 * k] and self.edges[2 * k + 1])
+
+    def missing_edge(self, start: int) -> Optional[int]:
+        """Destino da única aresta não percorrida do DSVF final de um bloco já alcançado.
+
+        None se falta alguma instrução do bloco (ou nenhuma aresta).
+        """
+        end = self.block_end[start]
+        k = self._branch.get(end - 1)
+        if k is None or self.instructions.find(0, start, end) >= 0:
+            return None
+        jumped, followed = self.edges[2 * k], self.edges[2 * k + 1]
+        if jumped == followed:
+            return None
+        return end if jumped else self._targets[end - 1]
+
+    def matches(self, program: MepaProgram) -> bool:
+        """`program` é o programa desta cobertura (o mesmo objeto ou o mesmo ``.mepab``)."""
+        return program is self.program or to_bytes(program) == to_bytes(self.program)
+
+    def merge(self, other: Union["Coverage", bytes]) -> None:
+        """Soma (OU bit a bit) outra cobertura do mesmo programa, ou os bytes de `bits()`."""
+        if isinstance(other, Coverage):
+            if not self.matches(other.program):
+                raise ValueError("a cobertura é de outro programa")
+            other = other.bits()
+        if len(other) != len(self.instructions) + len(self.edges):
+            raise ValueError("a cobertura é de outro programa")
+        split = len(self.instructions)
+        # atribuição no lugar: as máquinas guardam a referência a esta cobertura
+        self.instructions[:] = bytes(map(int.__or__, self.instructions, other[:split]))
+        self.edges[:] = bytes(map(int.__or__, self.edges, other[split:]))
+
+    def bits(self) -> bytes:
+        """Marcas de instruções seguidas das de arestas (o que `merge` aceita)."""
+        return bytes(self.instructions) + bytes(self.edges)
+
+    def clear(self) -> None:
+        self.instructions[:] = bytes(len(self.instructions))
+        self.edges[:] = bytes(len(self.edges))
+
+    # ----------------------------------------------------------
+    @property
+    def covered(self) -> int:
+        return len(self.instructions) - self.instructions.count(0)
+
+    @property
+    def branches_covered(self) -> int:
+        return len(self.edges) - self.edges.count(0)
+
+    def line_of(self, index: int) -> Optional[int]:
+        return self._lines.line_of(index)
+
+    def uncovered(self) -> List[int]:
+        """Índices das instruções nunca alcançadas."""
+        return [pc for pc, bit in enumerate(self.instructions) if not bit]
+
+    def lines(self) -> List[LineCoverage]:
+        """Cobertura por linha do fonte (só linhas que geraram instruções)."""
+        by_line: Dict[int, LineCoverage] = {}
+        for pc, bit in enumerate(self.instructions):
+            line = self.line_of(pc)
+            if line is None:
+                continue
+            entry = by_line.setdefault(line, LineCoverage(line, 0, 0))
+            entry.instructions += 1
+            entry.covered += bit
+            k = self._branch.get(pc)
+            if k is not None:
+                entry.branches += 2
+                entry.branches_covered += self.edges[2 * k] + self.edges[2 * k + 1]
+        return [by_line[line] for line in sorted(by_line)]
+
+    def summary(self) -> str:
+        return (
+            f"instruções: {self.covered}/{len(self.instructions)} "
+            f"({_percent(self.covered, len(self.instructions))})  "
+            f"desvios: {self.branches_covered}/{len(self.edges)} "
+            f"({_percent(self.branches_covered, len(self.edges))})"
+        )
+
+    def report(self, source: Optional[str] = None) -> str:
+        """Relatório por linha; com o texto do fonte, anota cada linha dele.
+
+        Marcas: ``>`` coberta, ``~`` em parte (instrução ou aresta faltando),
+        ``!`` nunca alcançada.
+        """
+        lines = [self.summary(), ""]
+        entries = {entry.line: entry for entry in self.lines()}
+        if source is None:
+            numbers = sorted(entries)
+            texts: Dict[int, str] = {}
+        else:
+            texts = dict(enumerate(source.splitlines(), start=1))
+            numbers = sorted(set(texts) | set(entries))
+        for number in numbers:
+            entry = entries.get(number)
+            if entry is None:
+                lines.append(f"{number:>5}   {'':>15} | {texts.get(number, '')}".rstrip())
+                continue
+            mark = ">" if entry.complete else "!" if not entry.covered else "~"
+            detail = f"{entry.covered}/{entry.instructions}"
+            if entry.branches:
+                detail += f" d{entry.branches_covered}/{entry.branches}"
+            lines.append(f"{number:>5} {mark} {detail:>15} | {texts.get(number, '')}".rstrip())
+        return "\n".join(lines)
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        data = {
+            "instructions": len(self.instructions),
+            "covered": self.covered,
+            "branches": len(self.edges),
+            "branches_covered": self.branches_covered,
+            "uncovered": self.uncovered(),
+            "lines": [asdict(entry) for entry in self.lines()],
+        }
+        return json.dumps(data, indent=indent)
+
+
+def save_coverage(coverage: Coverage, path: str) -> None:
+    """Grava as marcas de `coverage` (com o resumo do programa) em `path`."""
+    digest = program_digest(coverage.program)
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(coverage.instructions), len(coverage.edges)))
+        f.write(digest + coverage.bits())
+
+
+def load_coverage(path: str, program: MepaProgram) -> Coverage:
+    """Cobertura gravada por `save_coverage` para `program`."""
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        magic, version, count, edges = _HEADER.unpack_from(data)
+    except struct.error:
+        raise MepaAssemblyError(None, "arquivo de cobertura truncado") from None
+    if magic != MAGIC or version != VERSION:
+        raise MepaAssemblyError(None, "arquivo não é uma cobertura MEPA")
+    digest = data[_HEADER.size:_HEADER.size + 8]
+    bits = data[_HEADER.size + 8:]
+    if digest != program_digest(program) or len(bits) != count + edges:
+        raise MepaAssemblyError(None, "a cobertura gravada é de outro programa")
+    coverage = Coverage(program)
+    coverage.merge(bits)
+    return coverage
+
+
+def _percent(part: int, total: int) -> str:
+    return f"{100 * part / total:.1f}%" if total else "-"
+
+
+__all__ = [
+    "Coverage", "LineCoverage", "save_coverage", "load_coverage", "PROBE", "PROBE_JUMP",
+    "PROBE_NEXT",
+]
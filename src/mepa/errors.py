@@ -0,0 +1,81 @@
+"""Tipos de erro da máquina MEPA."""
+
+from __future__ import annotations
+
+from typing import Optional
+
+
+class MepaRuntimeError(Exception):
+    """Levantado ao executar um programa MEPA inválido (ex.: divisão por zero).
+
+    `linha` é a linha do fonte da instrução, quando o programa traz a tabela
+    de linhas do gerador.
+    """
+    def __init__(self, indice: Optional[int], detalhe: str, linha: Optional[int] = None) -> None:
+        self.indice: Optional[int] = indice
+        self.linha: Optional[int] = linha
+        prefixo = "Erro de execução MEPA"
+        if indice is not None:
+            prefixo += f" na instrução {indice}"
+        if linha is not None:
+            prefixo += f" (linha {linha})"
+        super().__init__(f"{prefixo}: {detalhe}")
+
+
+class MepaMemoryError(MepaRuntimeError):
+    """Pilha ou endereço fora da memória: abaixo da pilha vazia, negativo ou além do fim."""
+
+
+class MepaOutOfMemoryError(MepaMemoryError):
+    """Pilha ou endereço além do fim da memória; com `Limits.max_memory`, vira limite."""
+
+
+class BelowMemory(IndexError):
+    """Sinal interno das conferências: pilha abaixo de vazia ou endereço negativo.
+
+    A máquina o troca por `MepaMemoryError`; um `IndexError` comum, de
+    acesso além do fim, vira `MepaOutOfMemoryError`.
+    """
+
+
+class InputPending(Exception):
+    """Sinal (não é erro) da função de leitura: `LEIT` ainda sem valor.
+
+    A máquina para sem executar o `LEIT`, com `pc` apontando para ele; o
+    próximo `run` lê de novo. Usado pelas sessões assíncronas (sessions.py).
+    """
+
+
+class MepaAssemblyError(Exception):
+    """Levantado ao montar uma listagem MEPA inválida (instrução ou rótulo desconhecido)."""
+    def __init__(self, linha: Optional[int], detalhe: str) -> None:
+        self.linha: Optional[int] = linha
+        prefixo = "Erro de montagem MEPA"
+        if linha is not None:
+            prefixo += f" na linha {linha}"
+        super().__init__(f"{prefixo}: {detalhe}")
+
+
+class MepaVerifyError(Exception):
+    """Levantado pela verificação estática de um programa MEPA (pilha, rótulos ou quadros)."""
+    def __init__(self, indice: Optional[int], detalhe: str, linha: Optional[int] = None) -> None:
+        self.indice: Optional[int] = indice
+        self.linha: Optional[int] = linha
+        prefixo = "Erro de verificação MEPA"
+        if indice is not None:
+            prefixo += f" na instrução {indice}"
+        if linha is not None:
+            prefixo += f" (linha {linha})"
+        super().__init__(f"{prefixo}: {detalhe}")
+
+
+class MepaSnapshotError(Exception):
+    """Levantado ao retomar um snapshot inválido ou de outro programa."""
+    def __init__(self, detalhe: str) -> None:
+        super().__init__(f"Snapshot MEPA inválido: {detalhe}")
+
+
+__all__ = [
+    "MepaRuntimeError", "MepaMemoryError", "MepaOutOfMemoryError", "MepaAssemblyError",
+    "MepaVerifyError", "MepaSnapshotError", "InputPending", "BelowMemory",
+]
@@ -0,0 +1,190 @@
+"""Superinstruções: sequências frequentes do gerador fundidas numa instrução.
+
+Na carga, `fuse_program` procura as sequências da tabela `PATTERNS` (a
+mais longa primeiro) e troca a primeira instrução de cada ocorrência por
+uma superinstrução cujo operando é uma tupla com os operandos da
+sequência. As demais instruções continuam nos seus índices, então os
+endereços de desvio e o `pc` da máquina são os mesmos com ou sem fusão; a
+superinstrução só avança o `pc` por cima delas.
+
+Uma sequência só é fundida se nenhuma instrução depois da primeira for
+início de bloco (destino de desvio ou retorno de `CHPR`).
+"""
+
+from __future__ import annotations
+
+import operator
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple, Union
+
+from codegen.mepa_ir import mepa_div
+from .compiler import find_leaders
+from .opcodes import (
+    CRVL, CRCT, ARMZ, SOMA, SUBT, MULT, DIVI, CMME, CMMA, CMIG, CMDG, CMEG, CMAG, DSVF,
+)
+from .program import MepaProgram
+
+
+# Códigos das superinstruções (depois dos códigos MEPA de opcodes.py)
+FIRST_FUSED = 32
+JCVV = 32   # CRVL a; CRVL b; CMxx; DSVF L   -> (a, b, cmp, L)
+JCVK = 33   # CRVL a; CRCT k; CMxx; DSVF L   -> (a, k, cmp, L)
+OPVKS = 34  # CRVL a; CRCT k; op; ARMZ c     -> (a, k, op, c)
+OPVVS = 35  # CRVL a; CRVL b; op; ARMZ c     -> (a, b, op, c)
+OPVK = 36   # CRVL a; CRCT k; op             -> (a, k, op)
+OPVV = 37   # CRVL a; CRVL b; op             -> (a, b, op)
+JCMP = 38   # CMxx; DSVF L                   -> (cmp, L)
+MOVE = 39   # CRVL a; ARMZ b                 -> (a, b)
+STCT = 40   # CRCT k; ARMZ a                 -> (k, a)
+
+FUSED_NAMES: Dict[int, str] = {
+    JCVV: "JCVV", JCVK: "JCVK", OPVKS: "OPVKS", OPVVS: "OPVVS", OPVK: "OPVK",
+    OPVV: "OPVV", JCMP: "JCMP", MOVE: "MOVE", STCT: "STCT",
+}
+
+_ARITHMETIC: Dict[int, Callable[[Any, Any], Any]] = {
+    SOMA: operator.add, SUBT: operator.sub, MULT: operator.mul, DIVI: mepa_div,
+}
+_COMPARISONS: Dict[int, Callable[[Any, Any], bool]] = {
+    CMME: operator.lt, CMMA: operator.gt, CMIG: operator.eq,
+    CMDG: operator.ne, CMEG: operator.le, CMAG: operator.ge,
+}
+_ARITH = frozenset(_ARITHMETIC)
+_CMP = frozenset(_COMPARISONS)
+
+Step = Union[int, FrozenSet[int]]
+Builder = Callable[[Sequence[int], Sequence[Any]], Optional[tuple]]
+
+
+@dataclass(frozen=True)
+class FusionPattern:
+    """Sequência de códigos (um código ou um conjunto por posição) e a
+    função que monta o operando da superinstrução (None: não funde)."""
+    name: str
+    opcode: int
+    sequence: Tuple[Step, ...]
+    build: Builder
+
+    def matches(self, opcodes: Sequence[int], start: int) -> bool:
+        if start + len(self.sequence) > len(opcodes):
+            return False
+        for step, op in zip(self.sequence, opcodes[start:start + len(self.sequence)]):
+            if op != step if isinstance(step, int) else op not in step:
+                return False
+        return True
+
+
+PATTERNS: Tuple[FusionPattern, ...] = (
+    FusionPattern(
+        "compara_vars_e_desvia", JCVV, (CRVL, CRVL, _CMP, DSVF),
+        lambda ops, args: (args[0], args[1], _COMPARISONS[ops[2]], args[3]),
+    ),
+    FusionPattern(
+        "compara_var_const_e_desvia", JCVK, (CRVL, CRCT, _CMP, DSVF),
+        lambda ops, args: (args[0], args[1], _COMPARISONS[ops[2]], args[3]),
+    ),
+    FusionPattern(
+        "opera_var_const_e_armazena", OPVKS, (CRVL, CRCT, _ARITH, ARMZ),
+        lambda ops, args: (args[0], args[1], _ARITHMETIC[ops[2]], args[3]),
+    ),
+    FusionPattern(
+        "opera_vars_e_armazena", OPVVS, (CRVL, CRVL, _ARITH, ARMZ),
+        lambda ops, args: (args[0], args[1], _ARITHMETIC[ops[2]], args[3]),
+    ),
+    FusionPattern(
+        "opera_var_const", OPVK, (CRVL, CRCT, _ARITH),
+        lambda ops, args: (args[0], args[1], _ARITHMETIC[ops[2]]),
+    ),
+    FusionPattern(
+        "opera_vars", OPVV, (CRVL, CRVL, _ARITH),
+        lambda ops, args: (args[0], args[1], _ARITHMETIC[ops[2]]),
+    ),
+    FusionPattern(
+        "compara_e_desvia", JCMP, (_CMP, DSVF),
+        lambda ops, args: (_COMPARISONS[ops[0]], args[1]),
+    ),
+    FusionPattern("copia", MOVE, (CRVL, ARMZ), lambda ops, args: (args[0], args[1])),
+    FusionPattern(
+        "armazena_const", STCT, (CRCT, ARMZ), lambda ops, args: (args[0], args[1]),
+    ),
+)
+
+# maior número de instruções substituídas por uma superinstrução
+MAX_FUSED_LENGTH = max(len(pattern.sequence) for pattern in PATTERNS)
+
+
+@dataclass
+class FusionReport:
+    """Cobertura estática da fusão num programa."""
+    instructions: int
+    fused_instructions: int = 0
+    patterns: Counter = field(default_factory=Counter)   # nome -> ocorrências
+
+    @property
+    def coverage(self) -> float:
+        """Fração das instruções que fazem parte de alguma superinstrução."""
+        return self.fused_instructions / self.instructions if self.instructions else 0.0
+
+    def format(self) -> str:
+        lines = [
+            f"instruções: {self.instructions}  fundidas: {self.fused_instructions} "
+            f"({100 * self.coverage:.1f}%)"
+        ]
+        lengths = {pattern.name: len(pattern.sequence) for pattern in PATTERNS}
+        for name, count in self.patterns.most_common():
+            lines.append(f"  {name:<28} {count:>6} x {lengths[name]}")
+        return "\n".join(lines)
+
+
+def fuse_program(
+    program: MepaProgram,
+    opcodes: Optional[List[int]] = None,
+    operands: Optional[List[Any]] = None,
+    patterns: Sequence[FusionPattern] = PATTERNS,
+) -> Tuple[List[int], List[Any], FusionReport]:
+    """Códigos e operandos com superinstruções, mais o relatório de cobertura.
+
+    `opcodes`/`operands` são as listas que a máquina executa (padrão: as do
+    programa, com as constantes já substituídas).
+    """
+    if opcodes is None:
+        opcodes = program.opcodes.tolist()
+    if operands is None:
+        operands = program.operand_values()
+    fused_ops, fused_args = list(opcodes), list(operands)
+    report = FusionReport(len(opcodes))
+    leaders = set(find_leaders(program))
+
+    i = 0
+    while i < len(opcodes):
+        for pattern in patterns:
+            size = len(pattern.sequence)
+            if not pattern.matches(opcodes, i):
+                continue
+            if any(k in leaders for k in range(i + 1, i + size)):
+                continue
+            operand = pattern.build(opcodes[i:i + size], operands[i:i + size])
+            if operand is None:
+                continue
+            fused_ops[i] = pattern.opcode
+            fused_args[i] = operand
+            report.fused_instructions += size
+            report.patterns[pattern.name] += 1
+            i += size
+            break
+        else:
+            i += 1
+    return fused_ops, fused_args, report
+
+
+def fusion_report(program: MepaProgram) -> FusionReport:
+    """Só o relatório de cobertura da fusão do programa."""
+    return fuse_program(program)[2]
+
+
+__all__ = [
+    "FusionPattern", "FusionReport", "PATTERNS", "MAX_FUSED_LENGTH", "FIRST_FUSED",
+    "FUSED_NAMES", "fuse_program", "fusion_report",
+    "JCVV", "JCVK", "OPVKS", "OPVVS", "OPVK", "OPVV", "JCMP", "MOVE", "STCT",
+]
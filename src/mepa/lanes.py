@@ -0,0 +1,597 @@
+"""Execução em faixas: o mesmo programa MEPA para muitas entradas de uma vez.
+
+A memória é uma matriz NumPy ``(slots, faixas)``: cada faixa (coluna) é
+uma execução independente, e `CRVL`, `SOMA`, `CMME`... operam sobre a
+linha inteira numa só operação vetorial. As faixas andam em grupos que
+compartilham `pc` e topo de pilha; um `DSVF` em que parte das faixas
+desvia divide o grupo em dois (máscaras sobre as faixas), e grupos que
+chegam ao mesmo `pc` com o mesmo topo voltam a se juntar. O grupo de menor
+`pc` roda primeiro, o que faz as faixas que saíram antes de um laço
+esperarem pelas outras no fim dele. O display (``D[k]`` de ``CRVL k,n``)
+é do grupo: ``ENPR`` o calcula do topo, igual em todas as faixas, e um
+``RTPR k,n`` que restaura valores diferentes divide o grupo.
+
+Quando as faixas divergem demais (grupo com menos de `min_lanes` faixas
+ou mais de `max_groups` grupos), as faixas desses grupos terminam na
+máquina escalar (`MepaVM`), a partir do estado em que estavam.
+
+A memória de cada faixa tem `memory_size` slots, como a da máquina
+escalar, mas a matriz começa com `DEFAULT_LANE_MEMORY` linhas e dobra
+quando a pilha passa delas. Os `Limits` valem por faixa: o tempo de uma
+faixa é a soma dos blocos executados pelo grupo em que ela estava (e
+depois o da máquina escalar), conferido entre um bloco e outro. Com
+``checked=False`` o programa é verificado antes (`mepa.verifier`) e a
+matriz já nasce com a profundidade exata.
+
+Restrições: só programas com constantes inteiras de 64 bits (como a
+memória ``"array"`` de `MepaVM`) e entradas inteiras de 64 bits. A
+aritmética é a do NumPy em ``int64``; antes de gravar o resultado de
+`SOMA`, `SUBT`, `MULT`, `INVR` ou `DIVI`, as faixas em que ele estouraria
+passam para a máquina escalar no estado de antes da instrução, e seguem
+com os inteiros sem limite do Python.
+
+NumPy é dependência opcional; sem ele, `LaneVM` levanta `RuntimeError`.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import replace
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # dependência opcional
+    np = None
+
+from codegen.line_table import LineTable
+from .batch import OK, LIMIT, ERROR, BatchReport, RunResult
+from .errors import MepaRuntimeError
+from .limits import MEMORY, STEPS, TIME, LimitExceeded, Limits
+from .opcodes import (
+    CRVL, CRCT, ARMZ, SOMA, SUBT, MULT, DIVI, CMME, CMMA, CMIG, CMDG, CMEG, CMAG, DSVF,
+    DSVS, NADA, CRCS, INVR, NEGA, CONJ, DISJ, IMPR, LEIT, AMEM, DMEM, CHPR, RTPR, INPP,
+    PARA, ENPR, CRVL_K, ARMZ_K, RTPR_K, LEVELS, LEXICAL_OPS, OPNAMES, unpack_lexical,
+)
+from .program import MepaProgram
+from .verifier import verify
+from .vm import DEFAULT_MEMORY_SIZE, MepaVM, input_reader
+
+
+HAS_NUMPY = np is not None
+
+# linhas iniciais da matriz (slots x faixas); ela cresce até `memory_size`
+DEFAULT_LANE_MEMORY = 1024
+DEFAULT_MIN_LANES = 8
+DEFAULT_MAX_GROUPS = 16
+
+_INT64 = (-(1 << 63), (1 << 63) - 1)
+
+
+class _Group:
+    """Faixas (índices em ordem crescente) no mesmo `pc`, topo de pilha e display."""
+    __slots__ = ("pc", "sp", "lanes", "display")
+
+    def __init__(self, pc: int, sp: int, lanes: Any, display: Tuple[int, ...]) -> None:
+        self.pc, self.sp, self.lanes, self.display = pc, sp, lanes, display
+
+
+class LaneVM:
+    """Executa um `MepaProgram` para vários conjuntos de entradas em faixas."""
+
+    def __init__(
+        self,
+        program: MepaProgram,
+        input_sets: Sequence[Sequence[int]],
+        *,
+        memory_size: int = DEFAULT_MEMORY_SIZE,
+        limits: Optional[Limits] = None,
+        checked: bool = True,
+        min_lanes: int = DEFAULT_MIN_LANES,
+        max_groups: int = DEFAULT_MAX_GROUPS,
+    ) -> None:
+        if np is None:
+            raise RuntimeError("a execução em faixas precisa do NumPy")
+        if any(
+            not isinstance(value, int) or not _INT64[0] <= value <= _INT64[1]
+            for value in program.constants
+        ):
+            raise ValueError("faixas só aceitam programas com constantes inteiras de 64 bits")
+        if any(
+            not isinstance(value, int) or not _INT64[0] <= value <= _INT64[1]
+            for values in input_sets for value in values
+        ):
+            raise ValueError("faixas só aceitam entradas inteiras de 64 bits")
+        self.program = program
+        if not checked:
+            max_depth = verify(program).max_depth
+            if max_depth is not None:
+                memory_size = max_depth
+        self.limits = limits
+        if limits is not None and limits.max_memory is not None:
+            memory_size = min(memory_size, limits.max_memory)
+        self.memory_size = memory_size
+        self.min_lanes = min_lanes
+        self.max_groups = max_groups
+        self._code: List[int] = program.opcodes.tolist()
+        self._args: List[Any] = [
+            unpack_lexical(arg) if op in LEXICAL_OPS else arg
+            for op, arg in zip(self._code, program.operands.tolist())
+        ]
+        self._lines = LineTable.from_dict(program.lines)
+        self.input_sets = [list(values) for values in input_sets]
+
+        # maior endereço fixo usado (CRVL/ARMZ): o que se copia para a máquina escalar
+        self._top_address = max(
+            (arg for op, arg in zip(self._code, self._args) if op == CRVL or op == ARMZ),
+            default=-1,
+        )
+        count = len(self.input_sets)
+        self.lanes = count
+        rows = min(memory_size, max(DEFAULT_LANE_MEMORY, self._top_address + 1))
+        self.memory = np.zeros((rows, count), dtype=np.int64)
+        width = max((len(values) for values in self.input_sets), default=0)
+        self._inputs = np.zeros((count, max(width, 1)), dtype=np.int64)
+        for lane, values in enumerate(self.input_sets):
+            self._inputs[lane, :len(values)] = values
+        self._available = np.array([len(values) for values in self.input_sets], dtype=np.int64)
+        self._cursor = np.zeros(count, dtype=np.int64)
+        self.steps = np.zeros(count, dtype=np.int64)
+        # segundos de cada faixa nos blocos que executou (para o limite de tempo)
+        self.elapsed = np.zeros(count)
+        self.outputs: List[List[Any]] = [[] for _ in range(count)]
+        self.results: List[Optional[RunResult]] = [None] * count
+        self.groups: List[_Group] = (
+            [_Group(0, -1, np.arange(count), (0,) * LEVELS)] if count else []
+        )
+
+        self._scalar: Optional[MepaVM] = None
+        self.vector_dispatches = 0   # instruções executadas por grupo (uma para várias faixas)
+        self.splits = 0
+        self.scalar_lanes = 0
+
+    # ----------------------------------------------------------
+    def run(self, max_steps: Optional[int] = None) -> BatchReport:
+        """Executa todas as faixas até `PARA`, erro ou `max_steps` instruções cada."""
+        limit = max_steps if max_steps is not None else 1 << 62
+        limits = self.limits
+        if limits is not None and limits.max_steps is not None:
+            limit = min(limit, limits.max_steps)
+        timeout = limits.timeout if limits is not None else None
+        start = time.perf_counter()
+        while self.groups:
+            if len(self.groups) > self.max_groups:
+                smallest = min(self.groups, key=lambda group: len(group.lanes))
+                self._finish_scalar(smallest, limit)
+                continue
+            group = min(self.groups, key=lambda group: group.pc)
+            if len(group.lanes) < self.min_lanes:
+                self._finish_scalar(group, limit)
+                continue
+            if timeout is None:
+                self._run_block(group, limit)
+            else:
+                lanes, before = group.lanes, time.perf_counter()
+                self._run_block(group, limit)
+                self._charge(lanes, time.perf_counter() - before, timeout)
+            self._merge()
+        results = [result for result in self.results if result is not None]
+        return BatchReport(results, time.perf_counter() - start, 1)
+
+    def _charge(self, lanes: Any, seconds: float, timeout: float) -> None:
+        """Soma `seconds` ao tempo de `lanes` e encerra as que passaram de `timeout`."""
+        self.elapsed[lanes] += seconds
+        for group in list(self.groups):
+            late = self.elapsed[group.lanes] > timeout
+            if late.any():
+                text = LimitExceeded(TIME, group.pc, self._lines.line_of(group.pc), f"{timeout} s")
+                self._retire(group.lanes[late], LIMIT, limit=str(text))
+                group.lanes = group.lanes[~late]
+                if not len(group.lanes):
+                    self.groups.remove(group)
+
+    def _merge(self) -> None:
+        """Junta os grupos que estão no mesmo `pc` com o mesmo topo de pilha e display."""
+        by_state: Dict[tuple, _Group] = {}
+        for group in self.groups:
+            key = (group.pc, group.sp, group.display)
+            other = by_state.get(key)
+            if other is None:
+                by_state[key] = group
+            else:
+                other.lanes = np.sort(np.concatenate((other.lanes, group.lanes)))
+        self.groups = list(by_state.values())
+
+    def _retire(
+        self, lanes: Any, status: str, error: Optional[str] = None, limit: Optional[str] = None,
+    ) -> None:
+        for lane in lanes.tolist():
+            self.results[lane] = RunResult(
+                lane, status, self.outputs[lane], int(self.steps[lane]), error, 0.0, limit
+            )
+
+    def _limit_text(self, pc: int, limit: int) -> str:
+        return str(LimitExceeded(STEPS, pc, self._lines.line_of(pc), f"{limit} instruções"))
+
+    def _error_text(self, pc: Optional[int], detalhe: str) -> str:
+        line = self._lines.line_of(pc) if pc is not None else None
+        return str(MepaRuntimeError(pc, detalhe, line))
+
+    # ----------------------------------------------------------
+    def _run_block(self, group: _Group, limit: int) -> None:
+        """Executa o grupo até o próximo desvio (ou o fim do orçamento)."""
+        steps = self.steps
+        spent = steps[group.lanes] >= limit
+        if spent.any():
+            self._retire(group.lanes[spent], LIMIT, limit=self._limit_text(group.pc, limit))
+            group.lanes = group.lanes[~spent]
+            if not len(group.lanes):
+                self.groups.remove(group)
+                return
+        budget = limit - int(steps[group.lanes].max())
+
+        rows = self.memory.shape[0]
+        code, args = self._code, self._args
+        lanes = group.lanes
+        get, put = self._accessors(lanes)
+        pc, s = group.pc, group.sp
+        D = list(group.display)
+        executed = 0
+        successors: Optional[List[_Group]] = None
+        try:
+            while executed < budget:
+                op = code[pc]
+                arg = args[pc]
+                if op == CRVL:
+                    s += 1
+                    if s >= rows:
+                        rows, get, put = self._grow(s, lanes)
+                    put(s, get(arg))
+                    pc += 1
+                elif op == CRCT:
+                    s += 1
+                    if s >= rows:
+                        rows, get, put = self._grow(s, lanes)
+                    put(s, arg)
+                    pc += 1
+                elif op == ARMZ:
+                    put(arg, get(s))
+                    s -= 1
+                    pc += 1
+                elif op in _BINARY:
+                    a, b = get(s - 1), get(s)
+                    r = _BINARY[op](a, b)
+                    if op in _OVERFLOW:
+                        wrapped = _OVERFLOW[op](a, b, r)
+                        if wrapped.any():
+                            self._to_scalar(lanes[wrapped], pc, s, D, executed, limit)
+                            lanes = lanes[~wrapped]
+                            group.lanes = lanes
+                            if not len(lanes):
+                                break
+                            get, put = self._accessors(lanes)
+                            r = r[~wrapped]
+                    s -= 1
+                    put(s, r)
+                    pc += 1
+                elif op == DIVI:
+                    b = get(s)
+                    zero = b == 0
+                    if zero.any():
+                        # faixas que dividem por zero param aqui com erro
+                        steps[lanes[zero]] += executed + 1
+                        self._retire(lanes[zero], ERROR, self._error_text(pc, "divisão por zero"))
+                        lanes = lanes[~zero]
+                        group.lanes = lanes
+                        if not len(lanes):
+                            break
+                        get, put = self._accessors(lanes)
+                        b = b[~zero]
+                    a = get(s - 1)
+                    wrapped = (a == _INT64[0]) & (b == -1)
+                    if wrapped.any():
+                        self._to_scalar(lanes[wrapped], pc, s, D, executed, limit)
+                        lanes = lanes[~wrapped]
+                        group.lanes = lanes
+                        if not len(lanes):
+                            break
+                        get, put = self._accessors(lanes)
+                        a, b = a[~wrapped], b[~wrapped]
+                    s -= 1
+                    q = a // b
+                    q += (q < 0) & (q * b != a)  # trunca em direção a zero
+                    put(s, q)
+                    pc += 1
+                elif op == DSVF:
+                    go_on = get(s) != 0
+                    s -= 1
+                    executed += 1
+                    if go_on.all():
+                        pc += 1
+                    elif not go_on.any():
+                        pc = arg
+                    else:
+                        self.splits += 1
+                        successors = [
+                            _Group(pc + 1, s, lanes[go_on], tuple(D)),
+                            _Group(arg, s, lanes[~go_on], tuple(D)),
+                        ]
+                    break
+                elif op == DSVS:
+                    pc = arg
+                    executed += 1
+                    break
+                elif op == NADA:
+                    pc += 1
+                elif op == CRCS:
+                    s += 1
+                    if s >= rows:
+                        rows, get, put = self._grow(s, lanes)
+                    put(s, self.program.constants[arg])
+                    pc += 1
+                elif op == INVR:
+                    a = get(s)
+                    wrapped = a == _INT64[0]
+                    if wrapped.any():
+                        self._to_scalar(lanes[wrapped], pc, s, D, executed, limit)
+                        lanes = lanes[~wrapped]
+                        group.lanes = lanes
+                        if not len(lanes):
+                            break
+                        get, put = self._accessors(lanes)
+                        a = a[~wrapped]
+                    put(s, -a)
+                    pc += 1
+                elif op == NEGA:
+                    put(s, get(s) == 0)
+                    pc += 1
+                elif op == CONJ or op == DISJ:
+                    b = get(s) != 0
+                    s -= 1
+                    a = get(s) != 0
+                    put(s, a & b if op == CONJ else a | b)
+                    pc += 1
+                elif op == IMPR:
+                    outputs = self.outputs
+                    for lane, value in zip(lanes.tolist(), get(s).tolist()):
+                        outputs[lane].append(value)
+                    s -= 1
+                    pc += 1
+                elif op == LEIT:
+                    cursor = self._cursor[lanes]
+                    empty = cursor >= self._available[lanes]
+                    if empty.any():
+                        steps[lanes[empty]] += executed + 1
+                        self._retire(lanes[empty], ERROR, self._error_text(None, "entrada esgotada"))
+                        lanes = lanes[~empty]
+                        group.lanes = lanes
+                        if not len(lanes):
+                            break
+                        get, put = self._accessors(lanes)
+                        cursor = cursor[~empty]
+                    s += 1
+                    if s >= rows:
+                        rows, get, put = self._grow(s, lanes)
+                    put(s, self._inputs[lanes, cursor])
+                    self._cursor[lanes] = cursor + 1
+                    pc += 1
+                elif op == AMEM:
+                    s += arg
+                    if s >= rows:
+                        rows, get, put = self._grow(s, lanes)
+                    pc += 1
+                elif op == DMEM:
+                    s -= arg
+                    pc += 1
+                elif op == CHPR:
+                    s += 1
+                    if s >= rows:
+                        rows, get, put = self._grow(s, lanes)
+                    put(s, pc + 1)
+                    pc = arg
+                    executed += 1
+                    break
+                elif op == RTPR:
+                    ret = get(s)
+                    s -= 1 + arg
+                    executed += 1
+                    targets = np.unique(ret)
+                    if len(targets) == 1:
+                        pc = int(targets[0])
+                    else:
+                        self.splits += 1
+                        successors = [
+                            _Group(int(t), s, lanes[ret == t], tuple(D)) for t in targets
+                        ]
+                    break
+                elif op == CRVL_K:
+                    s += 1
+                    if s >= rows:
+                        rows, get, put = self._grow(s, lanes)
+                    put(s, get(D[arg[0]] + arg[1]))
+                    pc += 1
+                elif op == ARMZ_K:
+                    put(D[arg[0]] + arg[1], get(s))
+                    s -= 1
+                    pc += 1
+                elif op == ENPR:
+                    s += 1
+                    if s >= rows:
+                        rows, get, put = self._grow(s, lanes)
+                    put(s, D[arg])
+                    D[arg] = s + 1
+                    pc += 1
+                elif op == RTPR_K:
+                    level, params = arg
+                    saved, ret = get(s), get(s - 1)
+                    s -= params + 2
+                    executed += 1
+                    states = np.unique(np.stack((ret, saved)), axis=1)
+                    if states.shape[1] == 1:
+                        pc, D[level] = int(states[0, 0]), int(states[1, 0])
+                    else:
+                        self.splits += 1
+                        successors = []
+                        for target, base in states.T.tolist():
+                            D[level] = base
+                            chosen = lanes[(ret == target) & (saved == base)]
+                            successors.append(_Group(target, s, chosen, tuple(D)))
+                    break
+                elif op == INPP:
+                    s = -1
+                    pc += 1
+                elif op == PARA:
+                    executed += 1
+                    steps[lanes] += executed
+                    self._retire(lanes, OK)
+                    self.groups.remove(group)
+                    self.vector_dispatches += executed
+                    return
+                else:
+                    raise ValueError(f"instrução sem execução em faixas: {OPNAMES[op]}")
+                executed += 1
+        except IndexError:
+            steps[lanes] += executed + 1
+            if not 0 <= pc < len(code):
+                self._retire(lanes, ERROR, self._error_text(pc, "desvio para fora do programa"))
+            elif self.limits is not None and self.limits.max_memory is not None:
+                text = LimitExceeded(
+                    MEMORY, pc, self._lines.line_of(pc), f"{self.memory_size} slots"
+                )
+                self._retire(lanes, LIMIT, limit=str(text))
+            else:
+                detalhe = f"{OPNAMES[code[pc]]} fora da memória (topo {s})"
+                self._retire(lanes, ERROR, self._error_text(pc, detalhe))
+            self.groups.remove(group)
+            self.vector_dispatches += executed + 1
+            return
+
+        steps[lanes] += executed
+        self.vector_dispatches += executed
+        if not len(lanes):
+            self.groups.remove(group)
+        elif successors is not None:
+            self.groups.remove(group)
+            self.groups.extend(successors)
+        else:
+            group.pc, group.sp, group.display = pc, s, tuple(D)
+
+    def _grow(self, top: int, lanes: Any) -> Tuple[int, Any, Any]:
+        """Aumenta a matriz para caber o endereço `top`; devolve linhas e acessos novos."""
+        if top >= self.memory_size:
+            raise IndexError(top)
+        old = self.memory
+        rows = min(self.memory_size, max(2 * old.shape[0], top + 1))
+        self.memory = np.zeros((rows, self.lanes), dtype=np.int64)
+        self.memory[:old.shape[0]] = old
+        return (rows,) + self._accessors(lanes)
+
+    def _accessors(self, lanes: Any):
+        """Leitura e escrita de uma linha da memória restritas às faixas do grupo."""
+        M = self.memory
+        if len(lanes) == self.lanes:  # todas as faixas: visões da linha, sem cópia
+            def get(address: int) -> Any:
+                return M[address]
+
+            def put(address: int, value: Any) -> None:
+                M[address] = value
+        else:
+            def get(address: int) -> Any:
+                return M[address, lanes]
+
+            def put(address: int, value: Any) -> None:
+                M[address, lanes] = value
+        return get, put
+
+    # ----------------------------------------------------------
+    def _to_scalar(
+        self, lanes: Any, pc: int, sp: int, display: List[int], executed: int, limit: int,
+    ) -> None:
+        """Termina `lanes` na máquina escalar a partir da instrução em `pc`, ainda não executada."""
+        self.steps[lanes] += executed
+        group = _Group(pc, sp, lanes, tuple(display))
+        self.groups.append(group)
+        self._finish_scalar(group, limit)
+
+    def _finish_scalar(self, group: _Group, limit: int) -> None:
+        """Termina as faixas do grupo uma a uma na máquina escalar."""
+        self.groups.remove(group)
+        # o orçamento de passos vai em `run`; memória e tempo, nos limites da máquina
+        limits = replace(self.limits, max_steps=None) if self.limits is not None else None
+        if self._scalar is None:
+            # sem superinstruções: erros apontam a mesma instrução que nas faixas
+            self._scalar = MepaVM(
+                self.program, memory_size=self.memory_size, limits=limits, fuse=False
+            )
+        vm = self._scalar
+        top = min(self.memory.shape[0], max(group.sp, self._top_address) + 1)
+        for lane in group.lanes.tolist():
+            self.scalar_lanes += 1
+            vm.reset()
+            vm.memory[:top] = self.memory[:top, lane].tolist()
+            vm.pc, vm.sp, vm.steps = group.pc, group.sp, int(self.steps[lane])
+            vm.display[:] = group.display
+            vm.output.extend(self.outputs[lane])
+            vm.read = input_reader(self.input_sets[lane][int(self._cursor[lane]):])
+            if limits is not None and limits.timeout is not None:
+                # o tempo que a faixa já passou em blocos conta para ela
+                timeout = max(0.0, limits.timeout - float(self.elapsed[lane]))
+                vm.limits = replace(limits, timeout=timeout)
+            try:
+                result = vm.run(max(0, limit - vm.steps))
+            except MepaRuntimeError as exc:
+                self.results[lane] = RunResult(lane, ERROR, list(vm.output), vm.steps, str(exc))
+                continue
+            if result.halted:
+                self.results[lane] = RunResult(lane, OK, list(result.output), result.steps)
+            else:
+                text = str(result.limit) if result.limit is not None \
+                    else self._limit_text(vm.pc, limit)
+                self.results[lane] = RunResult(
+                    lane, LIMIT, list(result.output), result.steps, None, 0.0, text
+                )
+
+
+if np is not None:
+    _BINARY = {
+        SOMA: np.add, SUBT: np.subtract, MULT: np.multiply,
+        CMME: np.less, CMMA: np.greater, CMIG: np.equal,
+        CMDG: np.not_equal, CMEG: np.less_equal, CMAG: np.greater_equal,
+    }
+else:
+    _BINARY = {}
+
+
+# Estouro de 64 bits de `r`, o resultado (já truncado) de `a op b`
+def _add_wraps(a: Any, b: Any, r: Any) -> Any:
+    return ((a ^ r) & (b ^ r)) < 0
+
+
+def _subtract_wraps(a: Any, b: Any, r: Any) -> Any:
+    return ((a ^ b) & (a ^ r)) < 0
+
+
+def _multiply_wraps(a: Any, b: Any, r: Any) -> Any:
+    trivial = (a == 0) | (a == -1)
+    # sem estouro, r // a devolve b exatamente; -1 * mínimo é o único caso de a == -1
+    return np.where(a == -1, b == _INT64[0], ~trivial & (r // np.where(trivial, 1, a) != b))
+
+
+_OVERFLOW = {SOMA: _add_wraps, SUBT: _subtract_wraps, MULT: _multiply_wraps}
+
+
+def run_lanes(
+    program: MepaProgram,
+    input_sets: Sequence[Sequence[int]],
+    *,
+    max_steps: Optional[int] = None,
+    **options: Any,
+) -> BatchReport:
+    """Atalho: `LaneVM(program, input_sets, **options).run(max_steps)`."""
+    return LaneVM(program, input_sets, **options).run(max_steps)
+
+
+__all__ = [
+    "LaneVM", "run_lanes", "HAS_NUMPY", "DEFAULT_LANE_MEMORY", "DEFAULT_MIN_LANES",
+    "DEFAULT_MAX_GROUPS",
+]
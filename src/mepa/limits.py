@@ -0,0 +1,61 @@
+"""Limites de recursos para executar programas MEPA não confiáveis.
+
+`Limits` reúne três limites independentes, todos opcionais:
+
+- `max_steps`: instruções MEPA desde o `reset`, exato (é o mesmo
+  orçamento de `run(max_steps)`, sem custo no laço de despacho);
+- `max_memory`: slots de memória (variáveis mais pilha). A memória da
+  máquina é criada com esse tamanho, então o estouro aparece sozinho no
+  primeiro acesso fora dela, também sem teste a mais no laço;
+- `timeout`: segundos de parede por chamada de `run`. O relógio é lido a
+  cada `check_every` instruções: a máquina executa fatias desse tamanho.
+
+Ao estourar um limite, `run` não levanta exceção: devolve o resultado com
+`limit` preenchido (`LimitExceeded`), com a instrução e a linha do fonte
+onde a execução parou.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+
+STEPS, MEMORY, TIME = "passos", "memória", "tempo"
+
+DEFAULT_CHECK_EVERY = 1 << 14
+
+
+@dataclass(frozen=True)
+class Limits:
+    """Limites de uma execução (None: sem limite)."""
+    max_steps: Optional[int] = None
+    max_memory: Optional[int] = None
+    timeout: Optional[float] = None
+    check_every: int = DEFAULT_CHECK_EVERY
+
+    def __post_init__(self) -> None:
+        for name in ("max_steps", "max_memory", "timeout"):
+            value = getattr(self, name)
+            if value is not None and value < 0:
+                raise ValueError(f"{name} não pode ser negativo")
+        if self.check_every < 1:
+            raise ValueError("check_every deve ser positivo")
+
+
+@dataclass(frozen=True)
+class LimitExceeded:
+    """Limite estourado: qual (`STEPS`, `MEMORY` ou `TIME`) e onde."""
+    kind: str
+    pc: int
+    line: Optional[int]
+    detail: str
+
+    def __str__(self) -> str:
+        where = f"na instrução {self.pc}"
+        if self.line is not None:
+            where += f" (linha {self.line})"
+        return f"Limite de {self.kind} excedido {where}: {self.detail}"
+
+
+__all__ = ["Limits", "LimitExceeded", "STEPS", "MEMORY", "TIME", "DEFAULT_CHECK_EVERY"]
@@ -0,0 +1,32 @@
+"""Carga de programas MEPA para a máquina."""
+
+from __future__ import annotations
+
+from typing import Union
+
+from .assembler import Source, assemble, unescape_string
+from .binary import MAGIC, from_bytes, is_binary, load_binary
+from .program import MepaProgram
+
+
+def load_program(source: Union[Source, bytes]) -> MepaProgram:
+    """Monta a listagem (texto, linhas do gerador ou `Instr`) em `MepaProgram`.
+
+    Bytes no formato ``.mepab`` são lidos direto, sem montagem.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return from_bytes(source)
+    return assemble(source)
+
+
+def load_file(path: str) -> MepaProgram:
+    """Carrega um arquivo ``.mepab`` (via `mmap`) ou uma listagem textual."""
+    with open(path, "rb") as f:
+        head = f.read(len(MAGIC))
+    if is_binary(head):
+        return load_binary(path)
+    with open(path, "r", encoding="utf-8") as f:
+        return assemble(f.read())
+
+
+__all__ = ["MepaProgram", "load_program", "load_file", "unescape_string"]
@@ -0,0 +1,88 @@
+"""Códigos numéricos das instruções MEPA executadas pela máquina.
+
+A ordem segue a frequência típica no laço de despacho: cargas e
+armazenamentos primeiro, depois aritmética, comparações e desvios.
+
+As instruções de nível léxico (``ENPR k``, ``CRVL k,n``, ``ARMZ k,n``,
+``RTPR k,n``) vêm depois das superinstruções (fusion.py): o operando é o
+par (nível, deslocamento), endereçado pelo display ``D[k]`` da máquina.
+No programa montado o par vai num único inteiro, ``n << 8 | k``.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+
+CRVL = 0
+CRCT = 1
+ARMZ = 2
+SOMA = 3
+SUBT = 4
+MULT = 5
+DIVI = 6
+CMME = 7
+CMMA = 8
+CMIG = 9
+CMDG = 10
+CMEG = 11
+CMAG = 12
+DSVF = 13
+DSVS = 14
+NADA = 15
+CRCS = 16
+INVR = 17
+NEGA = 18
+CONJ = 19
+DISJ = 20
+IMPR = 21
+LEIT = 22
+AMEM = 23
+DMEM = 24
+CHPR = 25
+RTPR = 26
+INPP = 27
+PARA = 28
+ENPR = 41
+CRVL_K = 42   # CRVL k,n
+ARMZ_K = 43   # ARMZ k,n
+RTPR_K = 44   # RTPR k,n: restaura D[k] e desempilha o retorno e n parâmetros
+
+# tamanho do display: níveis léxicos 0 .. LEVELS - 1 (o nível 0 é o
+# programa principal, com endereços absolutos, e D[0] é sempre 0)
+LEVELS = 16
+
+OPCODES: Dict[str, int] = {
+    name: value for name, value in globals().items()
+    if name.isupper() and len(name) == 4 and isinstance(value, int)
+}
+
+OPNAMES: List[str] = [""] * (RTPR_K + 1)
+for _name, _value in OPCODES.items():
+    OPNAMES[_value] = _name
+OPNAMES[CRVL_K], OPNAMES[ARMZ_K], OPNAMES[RTPR_K] = "CRVL", "ARMZ", "RTPR"
+
+# Operando é o par (nível, deslocamento)
+LEXICAL_OPS = frozenset({CRVL_K, ARMZ_K, RTPR_K})
+# Códigos que a máquina executa (os que faltam são superinstruções e sondas)
+VALID_OPS = frozenset(code for code, name in enumerate(OPNAMES) if name)
+
+# Operando é um rótulo, resolvido para o índice da instrução de destino
+TARGET_OPS = frozenset({DSVS, DSVF, CHPR})
+# Operando inteiro obrigatório
+INT_OPS = frozenset({CRVL, ARMZ, AMEM, DMEM, ENPR})
+
+
+def pack_lexical(level: int, offset: int) -> int:
+    """Par (nível, deslocamento) no inteiro do operando."""
+    return offset << 8 | level
+
+
+def unpack_lexical(value: int) -> Tuple[int, int]:
+    """Inverso de `pack_lexical` (o deslocamento pode ser negativo)."""
+    return value & 0xFF, value >> 8
+
+
+__all__ = [
+    "OPCODES", "OPNAMES", "TARGET_OPS", "INT_OPS", "LEXICAL_OPS", "VALID_OPS", "LEVELS",
+    "CRVL_K", "ARMZ_K", "RTPR_K", "pack_lexical", "unpack_lexical", *OPCODES,
+]
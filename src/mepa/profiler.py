@@ -0,0 +1,228 @@
+"""Perfil de execução de programas MEPA.
+
+Com ``MepaVM(..., profile=True)`` a máquina roda um laço separado que
+executa um bloco básico por vez no interpretador sem fusão e anota quantas
+vezes cada bloco foi iniciado e quantas instruções dele rodaram. Como um
+bloco só desvia na última instrução, isso dá a contagem exata de cada
+instrução. O tempo de parede é medido na primeira entrada de cada bloco e
+depois em uma a cada `sample_every`, e extrapolado para todas.
+
+Sem `profile`, `run` nem passa por este módulo: o laço de despacho normal
+não tem nenhum teste a mais.
+
+Saídas: `Profile.report()` (texto ordenado), `Profile.to_json()` e
+`Profile.to_folded()` (pilhas colapsadas do flamegraph.pl/speedscope, com
+os laços naturais que envolvem cada bloco como quadros).
+"""
+
+from __future__ import annotations
+
+import json
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from analysis import build_cfg
+from analysis.loops import find_loops
+from codegen.line_table import LineTable
+from .assembler import disassemble
+from .compiler import find_leaders
+from .program import MepaProgram
+
+
+DEFAULT_SAMPLE_EVERY = 16
+
+
+@dataclass
+class BlockStats:
+    """Execuções e tempo amostrado de um bloco (de `start` até `end`)."""
+    start: int
+    end: int
+    name: str
+    entries: int = 0
+    samples: int = 0
+    sampled_time: float = 0.0
+
+    @property
+    def estimated_time(self) -> float:
+        """Tempo total estimado em segundos (média das amostras x entradas)."""
+        if not self.samples:
+            return 0.0
+        return self.sampled_time / self.samples * self.entries
+
+
+class Profile:
+    """Contagens e tempos coletados durante a execução de um programa."""
+
+    def __init__(self, program: MepaProgram, sample_every: int = DEFAULT_SAMPLE_EVERY) -> None:
+        if sample_every < 1:
+            raise ValueError("sample_every deve ser positivo")
+        self.program = program
+        self.sample_every = sample_every
+        self.listing = disassemble(program)
+
+        names = {index: label for label, index in program.labels.items()}
+        starts = sorted(set(find_leaders(program)) | set(names))
+        bounds = starts + [len(program)]
+        self.blocks: Dict[int, BlockStats] = {
+            start: BlockStats(start, end, names.get(start, f"@{start}"))
+            for start, end in zip(bounds, bounds[1:])
+        }
+        # fim do bloco de cada instrução: execução parcial (retomada) cabe nele
+        self.block_end: List[int] = [0] * len(program)
+        for start, end in zip(bounds, bounds[1:]):
+            for i in range(start, end):
+                self.block_end[i] = end
+        # (início, instruções executadas) -> vezes
+        self.runs: Counter = Counter()
+        self._lines = LineTable.from_dict(program.lines)
+
+    # ----------------------------------------------------------
+    def record(self, start: int, executed: int, elapsed: Optional[float]) -> None:
+        """Uma execução de `executed` instruções a partir de `start`."""
+        self.runs[start, executed] += 1
+        block = self.blocks.get(start)
+        if block is None:  # retomada no meio de um bloco
+            return
+        block.entries += 1
+        if elapsed is not None:
+            block.samples += 1
+            block.sampled_time += elapsed
+
+    def instruction_counts(self) -> List[int]:
+        """Execuções de cada instrução, por índice."""
+        counts = [0] * len(self.program)
+        for (start, executed), times in self.runs.items():
+            for i in range(start, start + executed):
+                counts[i] += times
+        return counts
+
+    def label_counts(self) -> Dict[str, int]:
+        """Quantas vezes a execução passou por cada rótulo."""
+        counts = self.instruction_counts()
+        ordered = sorted(self.program.labels.items(), key=lambda item: item[1])
+        return {label: counts[index] for label, index in ordered}
+
+    def line_of(self, index: int) -> Optional[int]:
+        """Linha do fonte da instrução (a última anotada até ela), se houver."""
+        return self._lines.line_of(index)
+
+    def line_counts(self) -> Dict[int, int]:
+        """Instruções executadas por linha do fonte."""
+        totals: Counter = Counter()
+        for index, count in enumerate(self.instruction_counts()):
+            line = self.line_of(index)
+            if line is not None and count:
+                totals[line] += count
+        return dict(sorted(totals.items()))
+
+    def hot_blocks(self, limit: Optional[int] = None) -> List[BlockStats]:
+        """Blocos executados, do mais caro (tempo estimado) ao mais barato."""
+        executed = [block for block in self.blocks.values() if block.entries]
+        executed.sort(key=lambda block: (-block.estimated_time, -block.entries, block.start))
+        return executed[:limit] if limit is not None else executed
+
+    def loop_stacks(self) -> Dict[int, List[str]]:
+        """Para cada bloco, os rótulos dos laços que o envolvem (externo primeiro)."""
+        cfg = build_cfg(self.listing)
+        loops = find_loops(cfg)
+        stacks: Dict[int, List[str]] = {}
+        for start in self.blocks:
+            block = cfg.block_of(start)
+            frames = [loop for loop in loops if block in loop.blocks]
+            frames.sort(key=lambda loop: loop.depth)
+            stacks[start] = [self._header_name(cfg.blocks[loop.header].start) for loop in frames]
+        return stacks
+
+    def _header_name(self, start: int) -> str:
+        block = self.blocks.get(start)
+        return f"laco_{block.name}" if block is not None else f"laco_@{start}"
+
+    # ----------------------------------------------------------
+    def report(self, top: int = 15) -> str:
+        """Relatório textual: blocos, instruções, rótulos e linhas mais executados."""
+        counts = self.instruction_counts()
+        total = sum(counts) or 1
+        lines = [f"instruções executadas: {sum(counts)}"]
+
+        lines.append("")
+        lines.append(f"{'bloco':<14} {'instr.':>9} {'entradas':>10} {'tempo est. (ms)':>16}")
+        for block in self.hot_blocks(top):
+            lines.append(
+                f"{block.name:<14} {block.start:>4}-{block.end - 1:<4} {block.entries:>10} "
+                f"{1000 * block.estimated_time:>16.3f}"
+            )
+
+        lines.append("")
+        lines.append(f"{'índice':>6} {'execuções':>10} {'%':>6} {'linha':>5}  instrução")
+        hottest = sorted(range(len(counts)), key=lambda i: (-counts[i], i))[:top]
+        for i in hottest:
+            if not counts[i]:
+                break
+            line = self.line_of(i)
+            lines.append(
+                f"{i:>6} {counts[i]:>10} {100 * counts[i] / total:>5.1f}% "
+                f"{line if line is not None else '-':>5}  {self.listing[i]}"
+            )
+
+        labels = [(label, count) for label, count in self.label_counts().items() if count]
+        if labels:
+            lines.append("")
+            lines.append(f"{'rótulo':<14} {'execuções':>10}")
+            for label, count in sorted(labels, key=lambda item: -item[1])[:top]:
+                lines.append(f"{label:<14} {count:>10}")
+
+        by_line = self.line_counts()
+        if by_line:
+            lines.append("")
+            lines.append(f"{'linha':>5} {'instruções':>11}")
+            for line, count in sorted(by_line.items(), key=lambda item: (-item[1], item[0]))[:top]:
+                lines.append(f"{line:>5} {count:>11}")
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict:
+        counts = self.instruction_counts()
+        return {
+            "instructions": [
+                {"index": i, "text": self.listing[i], "count": count, "line": self.line_of(i)}
+                for i, count in enumerate(counts)
+            ],
+            "labels": self.label_counts(),
+            "lines": {str(line): count for line, count in self.line_counts().items()},
+            "blocks": [
+                {
+                    "name": block.name, "start": block.start, "end": block.end,
+                    "entries": block.entries, "samples": block.samples,
+                    "estimated_time": block.estimated_time,
+                }
+                for block in self.hot_blocks()
+            ],
+            "sample_every": self.sample_every,
+        }
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.to_dict(), indent=indent, ensure_ascii=False)
+
+    def to_folded(self, weight: str = "time", root: str = "programa") -> str:
+        """Pilhas colapsadas (``raiz;laço;bloco valor``) para gerar flamegraphs.
+
+        `weight` é ``"time"`` (microssegundos estimados) ou ``"count"``
+        (instruções executadas).
+        """
+        if weight not in ("time", "count"):
+            raise ValueError(f"peso inválido: {weight}")
+        stacks = self.loop_stacks()
+        counts = self.instruction_counts()
+        lines: List[str] = []
+        for block in self.hot_blocks():
+            if weight == "time":
+                value = round(block.estimated_time * 1e6)
+            else:
+                value = sum(counts[block.start:block.end])
+            if value:
+                frames = [root, *stacks[block.start], block.name]
+                lines.append(f"{';'.join(frames)} {value}")
+        return "\n".join(lines) + ("\n" if lines else "")
+
+
+__all__ = ["Profile", "BlockStats", "DEFAULT_SAMPLE_EVERY"]
@@ -0,0 +1,65 @@
+"""Representação compacta de um programa MEPA montado."""
+
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Union
+
+from .opcodes import CRCS, LEXICAL_OPS, unpack_lexical
+
+
+Constant = Union[str, int, float]
+
+
+@dataclass
+class MepaProgram:
+    """Programa pronto para a máquina.
+
+    `opcodes` (um byte por instrução) e `operands` (inteiro de 64 bits) são
+    vetores paralelos. Desvios e chamadas guardam o índice da instrução de
+    destino. Constantes que não são inteiros de 64 bits (strings de `CRCS`,
+    reais e inteiros grandes de `CRCT`) ficam em `constants` e a instrução
+    vira `CRCS` com o índice da constante como operando. O par (nível,
+    deslocamento) de ``CRVL k,n``/``ARMZ k,n``/``RTPR k,n`` vai num só
+    inteiro (`opcodes.pack_lexical`).
+    """
+    opcodes: array = field(default_factory=lambda: array("B"))
+    operands: array = field(default_factory=lambda: array("q"))
+    constants: List[Constant] = field(default_factory=list)
+    labels: Dict[str, int] = field(default_factory=dict)   # rótulo -> índice
+    symbols: Dict[int, str] = field(default_factory=dict)  # endereço -> nome da variável
+    lines: Dict[int, int] = field(default_factory=dict)    # instrução -> linha do fonte (depuração)
+
+    def __len__(self) -> int:
+        return len(self.opcodes)
+
+    @property
+    def uses_objects(self) -> bool:
+        """Há constantes que não cabem numa memória de inteiros de 64 bits."""
+        return any(not isinstance(c, int) for c in self.constants)
+
+    def operand_values(self) -> List[Constant]:
+        """Operandos como lista, com as constantes do `CRCS` já substituídas
+        e os pares (nível, deslocamento) como tuplas."""
+        values = self.operands.tolist()
+        code = self.opcodes.tobytes()
+        for op in LEXICAL_OPS:
+            for i in _positions(code, op):
+                values[i] = unpack_lexical(values[i])
+        if self.constants:
+            for i in _positions(code, CRCS):
+                values[i] = self.constants[values[i]]
+        return values
+
+
+def _positions(code: bytes, op: int) -> Iterator[int]:
+    """Índices das instruções `op` (busca nos bytes, sem percorrer item a item)."""
+    marker = bytes([op])
+    i = code.find(marker)
+    while i >= 0:
+        yield i
+        i = code.find(marker, i + 1)
+
+
+__all__ = ["MepaProgram", "Constant"]
@@ -0,0 +1,115 @@
+"""Sessões interativas: muitos programas MEPA num só laço asyncio.
+
+Cada `Session` tem a sua máquina, mas nenhuma thread: `Session.run` é uma
+corrotina que executa fatias de `quantum` instruções e cede o laço entre
+elas. Num `LEIT` sem valor a função de leitura da máquina levanta
+`InputPending`; a máquina para com `pc` no `LEIT` (sem executá-lo) e a
+sessão espera a fonte assíncrona (`read`, ex.: ``queue.get``). Quando o
+valor chega, o próximo `run` refaz o `LEIT` e segue.
+
+A saída de `IMPR` fica num buffer e vai para o escritor assíncrono
+(`write`, recebe a lista de valores) a cada cessão: antes de esperar
+entrada, ao fim de cada fatia e no fim da execução. Sem `write`, a saída
+fica em `ExecutionResult.output`, como na máquina comum.
+
+A fonte de entrada sinaliza o fim com `EOFError`; um `LEIT` depois disso é
+erro de execução ("entrada esgotada"). Limites (`limits=`) valem como na
+máquina, exceto o de tempo, que conta por fatia.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Iterable, List, Optional, Union
+
+from .errors import InputPending, MepaRuntimeError
+from .program import MepaProgram
+from .vm import ExecutionResult, MepaVM
+
+
+# instruções por fatia: com 10 mil sessões, uma fatia leva ~1 ms
+DEFAULT_QUANTUM = 1 << 12
+# slots por sessão (a máquina comum usa 64 Ki, caro com milhares de sessões)
+DEFAULT_SESSION_MEMORY = 1 << 12
+
+Reader = Callable[[], Awaitable[Any]]
+Writer = Callable[[List[Any]], Awaitable[None]]
+
+
+class Session:
+    """Uma execução interativa de um programa MEPA no laço asyncio."""
+
+    def __init__(
+        self,
+        program: MepaProgram,
+        read: Reader,
+        write: Optional[Writer] = None,
+        *,
+        quantum: int = DEFAULT_QUANTUM,
+        memory_size: int = DEFAULT_SESSION_MEMORY,
+        **options: Any,
+    ) -> None:
+        if quantum < 1:
+            raise ValueError("quantum deve ser positivo")
+        self.quantum = quantum
+        self._read = read
+        self._write = write
+        self._inputs: deque = deque()
+        self._closed = False
+        self._buffer: List[Any] = []
+        self.vm = MepaVM(
+            program,
+            memory_size=memory_size,
+            read=self._next_input,
+            write=self._buffer.append if write is not None else None,
+            **options,
+        )
+        self.waits = 0     # LEITs que esperaram a fonte de entrada
+        self.slices = 0    # fatias executadas
+
+    def _next_input(self) -> Any:
+        if self._inputs:
+            return self._inputs.popleft()
+        if self._closed:
+            raise MepaRuntimeError(None, "entrada esgotada")
+        raise InputPending
+
+    async def _flush(self) -> None:
+        if self._buffer:
+            values = self._buffer[:]
+            self._buffer.clear()
+            await self._write(values)
+
+    async def run(self) -> ExecutionResult:
+        """Executa até `PARA` ou um limite; cede o laço em `LEIT` e a cada fatia."""
+        vm = self.vm
+        try:
+            while True:
+                self.slices += 1
+                try:
+                    result = vm.run(self.quantum)
+                except InputPending:
+                    await self._flush()
+                    self.waits += 1
+                    try:
+                        self._inputs.append(await self._read())
+                    except EOFError:
+                        self._closed = True
+                    continue
+                if result.halted or result.limit is not None:
+                    return result
+                await self._flush()
+                await asyncio.sleep(0)
+        finally:
+            await self._flush()
+
+
+async def run_sessions(
+    sessions: Iterable[Session],
+) -> List[Union[ExecutionResult, BaseException]]:
+    """Executa as sessões concorrentemente; erros voltam no lugar do resultado."""
+    return await asyncio.gather(*(session.run() for session in sessions), return_exceptions=True)
+
+
+__all__ = ["Session", "run_sessions", "DEFAULT_QUANTUM", "DEFAULT_SESSION_MEMORY"]
@@ -0,0 +1,251 @@
+"""Snapshot do estado de execução da máquina MEPA (``.meps``).
+
+`snapshot(vm)` serializa a máquina parada entre duas instruções (ao fim de
+um `run`): pc, topo da pilha, passos, a memória até o topo, o display, a
+saída ainda no buffer da máquina e a posição da entrada. Os registros de
+ativação de `CHPR`/`RTPR` ficam na própria pilha, então vão junto com a
+memória; os slots acima do topo estão mortos e não são gravados.
+
+`resume(dados, programa)` cria uma máquina nova (em qualquer processo, com
+qualquer motor) e a põe no mesmo ponto; o próximo `run` continua dali.
+Útil para migrar execuções longas e para snapshots pré-aquecidos, tirados
+logo depois da inicialização: cada execução parte do snapshot em vez de
+refazer a inicialização.
+
+Layout (inteiros little-endian)::
+
+    cabeçalho   "MEPS" | versão u16 | flags u16 | resumo do programa 8 bytes |
+                pc i64 | topo i64 | passos u64 | despachos u64 | entrada u64 |
+                memória u32 | display u32 | saída u32 | programa u32
+    memória     "q" + inteiros i64, ou "t" + valores marcados (abaixo)
+    display     idem (até a última posição diferente de zero)
+    saída       idem
+    programa    ``.mepab`` embutido (só com FLAG_PROGRAM)
+
+Valores marcados: tipo u8 ('q' i64, 'i' inteiro grande, 'f' real,
+'s' string) | dados. O resumo (BLAKE2b do ``.mepab``) confere que o
+snapshot é retomado no mesmo programa.
+"""
+
+from __future__ import annotations
+
+import struct
+from array import array
+from dataclasses import dataclass
+from typing import Any, Iterable, List, Optional, Sequence
+
+from .binary import _F64, _SIGNED, _Reader, _pack, _sized, from_bytes, program_digest, to_bytes
+from .errors import MepaAssemblyError, MepaSnapshotError
+from .opcodes import LEVELS
+from .program import MepaProgram
+from .vm import MepaVM, input_reader
+
+
+MAGIC = b"MEPS"
+VERSION = 2
+FLAG_HALTED = 0x1
+FLAG_INPUT = 0x2     # a leitura é um `InputReader`: a posição vale
+FLAG_PROGRAM = 0x4
+
+_HEADER = struct.Struct("<4sHH8sqqQQQIIII")
+_I64 = struct.Struct("<q")
+
+
+def snapshot(vm: MepaVM, include_program: bool = False, include_output: bool = True) -> bytes:
+    """Serializa o estado de `vm`; com `include_program`, o programa vai junto.
+
+    Sem `include_output`, a saída já produzida fica de fora (o rastro grava
+    um snapshot por pedaço e não precisa dela).
+    """
+    output = vm.output if include_output else []
+    position = getattr(vm.read, "position", None)
+    flags = (FLAG_HALTED if vm.halted else 0) | (FLAG_INPUT if position is not None else 0)
+    program_data = b""
+    if include_program:
+        flags |= FLAG_PROGRAM
+        program_data = to_bytes(vm.program)
+    live = vm.memory[:vm.sp + 1] if vm.sp >= 0 else []
+    display = list(vm.display)
+    while display and not display[-1]:
+        display.pop()
+    return b"".join([
+        _HEADER.pack(
+            MAGIC, VERSION, flags, program_digest(vm.program), vm.pc, vm.sp, vm.steps,
+            vm.dispatches, position or 0, len(live), len(display), len(output), len(program_data),
+        ),
+        _values(live),
+        _values(display),
+        _values(output),
+        program_data,
+    ])
+
+
+def restore(vm: MepaVM, data: bytes) -> None:
+    """Põe `vm` (do mesmo programa) no estado gravado em `data`.
+
+    A leitura de `LEIT` é a que `vm` já tem; veja `resume` para recomeçar
+    uma sequência de entradas na posição gravada.
+    """
+    state = _parse(data)
+    if state.digest != program_digest(vm.program):
+        raise MepaSnapshotError("o snapshot é de outro programa")
+    if len(state.memory) > vm.memory_size:
+        raise MepaSnapshotError(
+            f"a pilha gravada ({len(state.memory)} slots) não cabe na memória ({vm.memory_size})"
+        )
+    memory: Any = state.memory
+    if vm.storage == "array":
+        try:
+            memory = array("q", memory)
+        except (TypeError, OverflowError):
+            raise MepaSnapshotError("a memória gravada não cabe em inteiros de 64 bits") from None
+    vm.reset()
+    # atribuição no lugar: os blocos compilados guardam as referências à
+    # memória e ao display
+    vm.memory[:len(memory)] = memory
+    vm.display[:len(state.display)] = state.display
+    vm.output.extend(state.output)
+    vm.pc, vm.sp = state.pc, state.sp
+    vm.steps, vm.dispatches = state.steps, state.dispatches
+    vm.halted = state.halted
+
+
+def resume(
+    data: bytes,
+    program: Optional[MepaProgram] = None,
+    inputs: Optional[Iterable[Any]] = None,
+    **options: Any,
+) -> MepaVM:
+    """Máquina nova no estado de `data`.
+
+    Sem `program`, usa o programa embutido no snapshot. Com `inputs`, a
+    leitura recomeça dessa sequência na posição gravada (a mesma
+    sequência da execução original). `options` vão para `MepaVM`.
+    """
+    state = _parse(data)
+    if program is None:
+        if state.program is None:
+            raise MepaSnapshotError("o snapshot não traz o programa")
+        program = state.program
+    if inputs is not None:
+        if state.position is None:
+            raise MepaSnapshotError("a posição da entrada não foi gravada")
+        options["read"] = input_reader(inputs, state.position)
+    vm = MepaVM(program, **options)
+    restore(vm, data)
+    return vm
+
+
+def save_snapshot(vm: MepaVM, path: str, include_program: bool = False) -> int:
+    """Grava o snapshot de `vm` em `path`; devolve o tamanho em bytes."""
+    data = snapshot(vm, include_program)
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(data)
+
+
+def load_snapshot(path: str) -> bytes:
+    """Lê um arquivo ``.meps`` (para `resume` ou `restore`)."""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def is_snapshot(head: bytes) -> bool:
+    """Os primeiros bytes de um arquivo indicam um snapshot ``.meps``."""
+    return head[:len(MAGIC)] == MAGIC
+
+
+@dataclass
+class _State:
+    """Campos de um snapshot lido."""
+    digest: bytes
+    pc: int
+    sp: int
+    steps: int
+    dispatches: int
+    halted: bool
+    position: Optional[int]
+    memory: List[Any]
+    display: List[int]
+    output: List[Any]
+    program: Optional[MepaProgram]
+
+
+def _parse(data: bytes) -> _State:
+    reader = _Reader(data)
+    try:
+        (magic, version, flags, digest, pc, sp, steps, dispatches, position,
+         n_memory, n_display, n_output, program_size) = reader.struct(_HEADER)
+        if magic != MAGIC:
+            raise MepaSnapshotError("arquivo não é um snapshot MEPA")
+        if version != VERSION:
+            raise MepaSnapshotError(f"versão {version} do snapshot não suportada")
+        if n_memory != max(sp + 1, 0):
+            raise ValueError("topo da pilha não confere com a memória gravada")
+        if n_display > LEVELS:
+            raise ValueError(f"display com {n_display} níveis (a máquina tem {LEVELS})")
+        memory = _read_values(reader, n_memory)
+        display = _read_values(reader, n_display)
+        output = _read_values(reader, n_output)
+        program_data = reader.take(program_size) if flags & FLAG_PROGRAM else None
+    except (struct.error, UnicodeDecodeError, ValueError) as exc:
+        raise MepaSnapshotError(f"dados corrompidos: {exc}") from None
+    finally:
+        reader.close()
+    program = None
+    if program_data is not None:
+        try:
+            program = from_bytes(program_data)
+        except MepaAssemblyError as exc:
+            raise MepaSnapshotError(f"programa embutido: {exc}") from None
+    return _State(
+        digest, pc, sp, steps, dispatches, bool(flags & FLAG_HALTED),
+        position if flags & FLAG_INPUT else None, memory, display, output, program,
+    )
+
+
+def _values(values: Sequence[Any]) -> bytes:
+    """Valores da memória: vetor de i64 direto quando todos cabem."""
+    try:
+        return b"q" + _pack(array(_SIGNED[8], values))
+    except (TypeError, OverflowError):
+        pass
+    parts = [b"t"]
+    for value in values:
+        if isinstance(value, str):
+            parts.append(b"s" + _sized(value.encode("utf-8")))
+        elif isinstance(value, float):
+            parts.append(b"f" + _F64.pack(value))
+        elif -(1 << 63) <= value < (1 << 63):
+            parts.append(b"q" + _I64.pack(value))
+        else:
+            parts.append(b"i" + _sized(str(value).encode("ascii")))
+    return b"".join(parts)
+
+
+def _read_values(reader: _Reader, count: int) -> List[Any]:
+    layout = reader.take(1)
+    if layout == b"q":
+        return reader.array(_SIGNED[8], count).tolist()
+    if layout != b"t":
+        raise ValueError(f"formato de valores inválido {layout!r}")
+    values: List[Any] = []
+    for _ in range(count):
+        kind = reader.take(1)
+        if kind == b"q":
+            values.append(reader.struct(_I64)[0])
+        elif kind == b"f":
+            values.append(reader.struct(_F64)[0])
+        elif kind == b"s":
+            values.append(reader.sized().decode("utf-8"))
+        elif kind == b"i":
+            values.append(int(reader.sized().decode("ascii")))
+        else:
+            raise ValueError(f"tipo de valor inválido {kind!r}")
+    return values
+
+
+__all__ = [
+    "MAGIC", "VERSION", "snapshot", "restore", "resume", "save_snapshot", "load_snapshot",
+    "is_snapshot", "program_digest",
+]
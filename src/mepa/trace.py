@@ -0,0 +1,451 @@
+"""Rastro binário de execução (``.mept``) e consultas sobre ele.
+
+Com ``MepaVM(..., trace=TraceWriter("exec.mept"))`` a máquina roda um laço
+separado (como o do perfil) que executa um bloco por vez e, depois de cada
+bloco, anota um registro: início do bloco, instruções executadas, topo da
+pilha (`sp` e o valor no topo) e os valores gravados por `ARMZ`. Os slots
+gravados são fixos em cada bloco (o operando do `ARMZ`), então só os
+valores vão para o arquivo. Um ``ARMZ k,n`` grava em ``D[k] + n``, que muda
+a cada ativação: vão o endereço e o valor.
+
+Os blocos do rastro são os blocos básicos cortados também antes de um
+`ARMZ` que repete um slot já gravado no mesmo bloco: cada bloco grava cada
+slot no máximo uma vez, e o valor lido da memória depois do bloco é
+exatamente o valor gravado por aquela instrução. Depois de um ``ARMZ k,n``
+o bloco também é cortado antes de `ENPR`, ``RTPR k,n``, `DMEM` e `INPP`,
+que mudam o display ou liberam o registro: o endereço calculado com o
+display do fim do bloco é o da gravação.
+
+Os registros ficam em colunas na memória e vão para o arquivo em pedaços
+de ~`chunk_steps` instruções: inícios de bloco e topos como diferenças do
+registro anterior, tudo comprimido com zlib. Cada pedaço começa com um
+snapshot da máquina (snapshot.py) e leva os valores lidos por `LEIT`, então
+`TraceReader.state_at` refaz a execução exata a partir do pedaço certo.
+
+Layout (inteiros little-endian)::
+
+    cabeçalho   "MEPT" | versão u16 | 2 bytes zero | programa u32 | ``.mepab``
+    pedaço      primeiro passo u64 | passos u64 | registros u32 | parciais u32 |
+                entradas u32 | gravações u32 | snapshot u32 | colunas u32 |
+                snapshot | zlib(inícios, topos, valores no topo, parciais,
+                gravações, entradas)
+
+Inícios e topos vão como diferença do registro anterior. Um registro sem
+entrada em "parciais" (pares registro, instruções) executou o bloco
+inteiro, o caso comum.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import zlib
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from itertools import accumulate, chain
+from operator import sub
+from typing import Any, BinaryIO, Iterator, List, Optional, Tuple, Union
+
+from codegen.line_table import LineTable
+from .binary import _Reader, from_bytes, to_bytes
+from .compiler import find_leaders
+from .errors import MepaAssemblyError
+from .opcodes import ARMZ, ARMZ_K, DMEM, ENPR, INPP, RTPR_K, unpack_lexical
+from .program import MepaProgram
+from .snapshot import _read_values, _values, resume, snapshot
+from .vm import MepaVM, input_reader
+
+
+MAGIC = b"MEPT"
+VERSION = 2
+DEFAULT_CHUNK_STEPS = 1 << 20
+
+_FILE_HEADER = struct.Struct("<4sH2xI")
+_CHUNK_HEADER = struct.Struct("<QQIIIIII")
+
+
+# mudam o display ou liberam o registro de ativação
+_FRAME_CHANGES = frozenset({ENPR, RTPR_K, DMEM, INPP})
+
+
+def trace_leaders(program: MepaProgram) -> List[int]:
+    """Inícios dos blocos do rastro: blocos básicos sem `ARMZ` repetido."""
+    leaders = set(find_leaders(program))
+    written: set = set()
+    frames = False   # o bloco já tem um ARMZ k,n
+    for i, (op, slot) in enumerate(zip(program.opcodes, program.operands)):
+        if i in leaders:
+            written, frames = set(), False
+        if op == ARMZ or op == ARMZ_K:
+            if op == ARMZ_K:
+                slot = unpack_lexical(slot)
+            if slot in written:
+                leaders.add(i)
+                written, frames = set(), False
+            written.add(slot)
+            frames = frames or op == ARMZ_K
+        elif frames and op in _FRAME_CHANGES:
+            leaders.add(i)
+            written, frames = set(), False
+    return sorted(leaders)
+
+
+class _Layout:
+    """Blocos do rastro e os slots gravados por cada trecho executado."""
+
+    def __init__(self, program: MepaProgram) -> None:
+        self.leaders = trace_leaders(program)
+        count = len(program)
+        bounds = self.leaders + [count]
+        # fim do bloco de cada instrução: uma retomada no meio cabe nele
+        self.block_end: List[int] = [0] * count
+        for start, end in zip(bounds, bounds[1:]):
+            for i in range(start, end):
+                self.block_end[i] = end
+        # instruções de cada pc até o fim do seu bloco
+        self.size: List[int] = [end - i for i, end in enumerate(self.block_end)]
+        # slot de cada ARMZ, ou o par (nível, deslocamento) de cada ARMZ k,n
+        self.armz: List[Union[int, Tuple[int, int], None]] = [
+            slot if op == ARMZ else unpack_lexical(slot) if op == ARMZ_K else None
+            for op, slot in zip(program.opcodes, program.operands)
+        ]
+        # gravações do bloco inteiro a partir de cada pc (o caso comum)
+        full = [self.slots(i, size) for i, size in enumerate(self.size)]
+        self.full_slots: List[Tuple[int, ...]] = [slots for slots, _ in full]
+        self.full_frames: List[Tuple[Tuple[int, int], ...]] = [frames for _, frames in full]
+
+    def slots(self, start: int, count: int) -> Tuple[Tuple[int, ...], Tuple[Tuple[int, int], ...]]:
+        """Slots fixos e pares (nível, deslocamento) gravados pelas instruções
+        ``start .. start + count - 1``, cada um em ordem."""
+        written = [slot for slot in self.armz[start:start + count] if slot is not None]
+        return (
+            tuple(slot for slot in written if type(slot) is int),
+            tuple(slot for slot in written if type(slot) is tuple),
+        )
+
+
+class TraceWriter:
+    """Grava o rastro de uma máquina num arquivo (caminho ou arquivo binário aberto)."""
+
+    def __init__(
+        self,
+        target: Union[str, os.PathLike, BinaryIO],
+        chunk_steps: int = DEFAULT_CHUNK_STEPS,
+        level: int = 1,
+    ) -> None:
+        if chunk_steps < 1:
+            raise ValueError("chunk_steps deve ser positivo")
+        self._owns = isinstance(target, (str, os.PathLike))
+        self._file: BinaryIO = open(target, "wb") if self._owns else target
+        self.chunk_steps = chunk_steps
+        self.level = level
+        self.layout: Optional[_Layout] = None
+        self.chunks = 0
+        self.records = 0
+        self.size = 0
+        self._keyframe: Optional[bytes] = None
+        self._first_step = 0
+        self._reset_columns()
+
+    def _reset_columns(self) -> None:
+        # (início, sp, topo) de cada bloco, em sequência: um `extend` por bloco
+        self.head: List[Any] = []
+        # (registro, instruções) dos blocos executados só em parte
+        self.partial: List[int] = []
+        self.written: List[Any] = []
+        self.inputs: List[Any] = []
+
+    def attach(self, program: MepaProgram) -> List[int]:
+        """Chamado pela máquina: grava o cabeçalho e devolve os inícios de bloco."""
+        if self.layout is not None:
+            raise ValueError("um TraceWriter grava o rastro de uma só máquina")
+        data = to_bytes(program)
+        self._write(_FILE_HEADER.pack(MAGIC, VERSION, len(data)) + data)
+        self.layout = _Layout(program)
+        return self.layout.leaders
+
+    def begin(self, vm: MepaVM) -> int:
+        """Abre um pedaço no estado de `vm`, se não há um aberto; devolve os passos que cabem nele."""
+        if self._keyframe is None:
+            self._keyframe = snapshot(vm, include_output=False)
+            self._first_step = vm.steps
+        return self._first_step + self.chunk_steps - vm.steps
+
+    def record(self, start: int, count: int, sp: int, memory: Any, display: List[int]) -> None:
+        """Um bloco executado: `count` instruções a partir de `start`."""
+        layout = self.layout
+        if count == layout.size[start]:
+            slots, frames = layout.full_slots[start], layout.full_frames[start]
+        else:
+            self.partial += (len(self.head) // 3, count)
+            slots, frames = layout.slots(start, count)
+        self.head += (start, sp, memory[sp] if sp >= 0 else 0)
+        if slots:
+            self.written.extend(map(memory.__getitem__, slots))
+        if frames:
+            self.record_frames(frames, memory, display)
+
+    def record_frames(
+        self, frames: Tuple[Tuple[int, int], ...], memory: Any, display: List[int]
+    ) -> None:
+        """Endereço e valor de cada ``ARMZ k,n`` do bloco."""
+        for level, offset in frames:
+            address = display[level] + offset
+            self.written += (address, memory[address])
+
+    def end_chunk(self) -> None:
+        """Comprime e grava o pedaço aberto, se houver."""
+        if self._keyframe is None:
+            return
+        head = self.head
+        if head or self.inputs:
+            starts = head[0::3]
+            size = self.layout.size
+            steps = sum(map(size.__getitem__, starts))
+            for index, count in zip(self.partial[0::2], self.partial[1::2]):
+                steps += count - size[starts[index]]
+            columns = zlib.compress(b"".join([
+                _values(_deltas(starts)),
+                _values(_deltas(head[1::3])),
+                _values(head[2::3]),
+                _values(self.partial),
+                _values(self.written),
+                _values(self.inputs),
+            ]), self.level)
+            self._write(_CHUNK_HEADER.pack(
+                self._first_step, steps, len(starts), len(self.partial) // 2, len(self.inputs),
+                len(self.written), len(self._keyframe), len(columns),
+            ) + self._keyframe + columns)
+            self.chunks += 1
+            self.records += len(starts)
+        self._keyframe = None
+        self._reset_columns()
+
+    def close(self) -> None:
+        """Grava o pedaço aberto e fecha o arquivo (se foi aberto aqui)."""
+        if self._file is None:
+            return
+        self.end_chunk()
+        self._file.flush()
+        if self._owns:
+            self._file.close()
+        self._file = None
+
+    def __enter__(self) -> "TraceWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _write(self, data: bytes) -> None:
+        self._file.write(data)
+        self.size += len(data)
+
+
+@dataclass
+class TraceWrite:
+    """Uma gravação de `ARMZ` encontrada no rastro."""
+    step: int                  # passo da instrução (0 = primeira executada)
+    pc: int
+    slot: int                  # endereço gravado (o de ``D[k] + n`` no ARMZ k,n)
+    value: Any
+    line: Optional[int] = None
+
+
+@dataclass
+class TraceRecord:
+    """Um bloco executado."""
+    step: int                  # passo da primeira instrução do bloco
+    pc: int
+    count: int
+    sp: int                    # topo da pilha depois do bloco
+    top: Any                   # valor no topo depois do bloco
+    writes: List[Tuple[int, int, Any]] = field(default_factory=list)  # (pc, slot, valor)
+
+
+@dataclass
+class _Chunk:
+    first_step: int
+    steps: int
+    records: int
+    partial: int
+    inputs: int
+    writes: int
+    keyframe: Tuple[int, int]  # (início, fim) no arquivo
+    columns: Tuple[int, int]
+
+
+class TraceReader:
+    """Leitura e consultas de um rastro ``.mept`` (o programa vem embutido)."""
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as f:
+            try:
+                self._data: Any = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # arquivo vazio não pode ser mapeado
+                raise MepaAssemblyError(None, "rastro vazio") from None
+        reader = _Reader(self._data)
+        try:
+            magic, version, size = reader.struct(_FILE_HEADER)
+            if magic != MAGIC:
+                raise MepaAssemblyError(None, "arquivo não é um rastro MEPA")
+            if version != VERSION:
+                raise MepaAssemblyError(None, f"versão {version} do rastro não suportada")
+            self.program = from_bytes(reader.take(size))
+            self.chunks: List[_Chunk] = []
+            while reader.offset < len(self._data):
+                first, steps, records, partial, inputs, writes, n_key, n_columns = (
+                    reader.struct(_CHUNK_HEADER)
+                )
+                key = (reader.offset, reader.offset + n_key)
+                columns = (key[1], key[1] + n_columns)
+                reader.take(n_key + n_columns)
+                self.chunks.append(
+                    _Chunk(first, steps, records, partial, inputs, writes, key, columns)
+                )
+        except (struct.error, ValueError) as exc:
+            raise MepaAssemblyError(None, f"rastro corrompido: {exc}") from None
+        finally:
+            reader.close()
+        self.layout = _Layout(self.program)
+        self._lines = LineTable.from_dict(self.program.lines)
+        self._firsts = [chunk.first_step for chunk in self.chunks]
+
+    @property
+    def steps(self) -> int:
+        """Passo seguinte ao último registrado."""
+        if not self.chunks:
+            return 0
+        last = self.chunks[-1]
+        return last.first_step + last.steps
+
+    @property
+    def records(self) -> int:
+        return sum(chunk.records for chunk in self.chunks)
+
+    def close(self) -> None:
+        self._data.close()
+
+    def __enter__(self) -> "TraceReader":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    # ----------------------------------------------------------
+    def chunk_records(self, index: int) -> List[TraceRecord]:
+        """Registros do pedaço `index`, decodificados."""
+        chunk = self.chunks[index]
+        starts, counts, sps, tops, written, _ = self._columns(chunk)
+        slots = self.layout.slots
+        records: List[TraceRecord] = []
+        step, k = chunk.first_step, 0
+        for start, count, sp, top in zip(starts, counts, sps, tops):
+            record = TraceRecord(step, start, count, sp, top)
+            fixed, frames = slots(start, count)
+            for slot in fixed:
+                record.writes.append((self._armz_pc(start, count, slot), slot, written[k]))
+                k += 1
+            if frames:
+                for frame in frames:
+                    pc = self._armz_pc(start, count, frame)
+                    record.writes.append((pc, written[k], written[k + 1]))
+                    k += 2
+                record.writes.sort(key=lambda write: write[0])
+            records.append(record)
+            step += count
+        return records
+
+    def iter_records(self) -> Iterator[TraceRecord]:
+        for index in range(len(self.chunks)):
+            yield from self.chunk_records(index)
+
+    def last_write(self, slot: int, before: Optional[int] = None) -> Optional[TraceWrite]:
+        """Última gravação em `slot` por uma instrução de passo menor que `before`."""
+        if before is None:
+            before = self.steps
+        last = bisect_right(self._firsts, before - 1) - 1
+        for index in range(last, -1, -1):
+            for record in reversed(self.chunk_records(index)):
+                if record.step >= before:
+                    continue
+                for pc, written, value in reversed(record.writes):
+                    step = record.step + pc - record.pc
+                    if written == slot and step < before:
+                        return TraceWrite(step, pc, slot, value, self.line_of(pc))
+        return None
+
+    def state_at(self, step: int, **options: Any) -> MepaVM:
+        """Máquina no estado logo antes do passo `step`, refeita a partir do pedaço."""
+        if not self.chunks or not 0 <= step <= self.steps:
+            raise ValueError(f"passo {step} fora do rastro (0 a {self.steps})")
+        index = max(bisect_right(self._firsts, step) - 1, 0)
+        chunk = self.chunks[index]
+        inputs = self._columns(chunk)[5]
+        vm = resume(self._slice(chunk.keyframe), self.program, read=input_reader(inputs), **options)
+        vm.run(max_steps=step - chunk.first_step)
+        return vm
+
+    def line_of(self, pc: int) -> Optional[int]:
+        return self._lines.line_of(pc)
+
+    def slot_of(self, name: str) -> int:
+        """Endereço de uma variável pelo nome (ou o próprio número)."""
+        if name.lstrip("-").isdigit():
+            return int(name)
+        for address, symbol in self.program.symbols.items():
+            if symbol == name:
+                return address
+        raise KeyError(f"variável {name!r} não está no programa")
+
+    def summary(self) -> str:
+        size = len(self._data)
+        per_step = 8 * size / self.steps if self.steps else 0.0
+        return (
+            f"passos: {self.steps}  blocos: {self.records}  pedaços: {len(self.chunks)}  "
+            f"tamanho: {size} bytes ({per_step:.2f} bits por instrução)"
+        )
+
+    # ----------------------------------------------------------
+    def _slice(self, bounds: Tuple[int, int]) -> bytes:
+        return self._data[bounds[0]:bounds[1]]
+
+    def _columns(self, chunk: _Chunk) -> Tuple[List[Any], ...]:
+        reader = _Reader(zlib.decompress(self._slice(chunk.columns)))
+        try:
+            starts = list(accumulate(_read_values(reader, chunk.records)))
+            sps = list(accumulate(_read_values(reader, chunk.records)))
+            tops = _read_values(reader, chunk.records)
+            partial = _read_values(reader, 2 * chunk.partial)
+            written = _read_values(reader, chunk.writes)
+            inputs = _read_values(reader, chunk.inputs)
+        finally:
+            reader.close()
+        counts = list(map(self.layout.size.__getitem__, starts))
+        for index, count in zip(partial[0::2], partial[1::2]):
+            counts[index] = count
+        return starts, counts, sps, tops, written, inputs
+
+    def _armz_pc(self, start: int, count: int, slot: Union[int, Tuple[int, int]]) -> int:
+        armz = self.layout.armz
+        for pc in range(start, start + count):
+            if armz[pc] == slot:
+                return pc
+        raise AssertionError("gravação sem ARMZ correspondente")
+
+
+def _deltas(values: List[int]) -> List[int]:
+    """Diferença de cada valor para o anterior (o primeiro contra 0)."""
+    return list(map(sub, values, chain((0,), values)))
+
+
+def is_trace(head: bytes) -> bool:
+    """Os primeiros bytes de um arquivo indicam um rastro ``.mept``."""
+    return head[:len(MAGIC)] == MAGIC
+
+
+__all__ = [
+    "TraceWriter", "TraceReader", "TraceRecord", "TraceWrite", "trace_leaders", "is_trace",
+    "MAGIC", "VERSION", "DEFAULT_CHUNK_STEPS",
+]
@@ -0,0 +1,348 @@
+"""Verificação estática de programas MEPA.
+
+`verify` percorre o fluxo de controle uma vez, instrução por instrução, e
+calcula a profundidade da pilha antes de cada instrução alcançável. O
+programa é rejeitado com `MepaVerifyError` se:
+
+- um desvio ou chamada aponta para fora do programa, ou a execução passa
+  do fim sem `PARA`;
+- uma instrução desempilha mais do que há (inclusive `DMEM` e os
+  parâmetros de `CHPR`), ou dois caminhos chegam à mesma instrução com
+  profundidades diferentes;
+- um procedimento (destino de `CHPR`) desempilha o endereço de retorno,
+  chega ao `RTPR` com valores a mais, tem `RTPR` com números de parâmetros
+  diferentes ou compartilha instruções com outro procedimento;
+- `CRVL`/`ARMZ` usam um endereço negativo ou fora da área viva: no
+  programa principal, no topo da pilha ou acima dele; num procedimento,
+  no endereço de retorno da chamada mais rasa ou acima dele;
+- ``ENPR k`` não é a primeira instrução de um procedimento, ``RTPR k,n``
+  não fecha um procedimento que começa com ``ENPR k`` (com só o display
+  salvo na pilha), ou ``CRVL k,n``/``ARMZ k,n`` usam outro nível que não o
+  do procedimento, o endereço de retorno ou o display salvo, um slot
+  acima do topo ou, com n negativo, abaixo da pilha de quem chama.
+
+Nos procedimentos a profundidade é contada a partir do endereço de
+retorno, então a mesma conta vale para todas as chamadas. Sem recursão, a
+maior profundidade da execução sai das profundidades nas chamadas e
+`Verification.max_depth` é o tamanho exato da memória da máquina.
+
+Com ``MepaVM(..., checked=False)`` a máquina verifica o programa, aloca só
+essa memória e, no motor compilado, despacha os blocos sem conferir o pc
+(ver vm.py).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from codegen.line_table import LineTable
+from .errors import MepaVerifyError
+from .opcodes import (
+    OPNAMES, CRVL, CRCT, ARMZ, SOMA, SUBT, MULT, DIVI, CMME, CMMA, CMIG, CMDG, CMEG,
+    CMAG, DSVF, DSVS, NADA, CRCS, INVR, NEGA, CONJ, DISJ, IMPR, LEIT, AMEM, DMEM, CHPR,
+    RTPR, INPP, PARA, ENPR, CRVL_K, ARMZ_K, RTPR_K, LEVELS, TARGET_OPS, VALID_OPS,
+    unpack_lexical,
+)
+from .program import MepaProgram
+
+
+# (desempilha, empilha) das instruções de efeito fixo na pilha
+_EFFECTS: Dict[int, Tuple[int, int]] = {
+    CRVL: (0, 1), CRCT: (0, 1), CRCS: (0, 1), LEIT: (0, 1),
+    ARMZ: (1, 0), IMPR: (1, 0), DSVF: (1, 0), CRVL_K: (0, 1), ARMZ_K: (1, 0),
+    INVR: (1, 1), NEGA: (1, 1),
+    SOMA: (2, 1), SUBT: (2, 1), MULT: (2, 1), DIVI: (2, 1),
+    CMME: (2, 1), CMMA: (2, 1), CMIG: (2, 1), CMDG: (2, 1), CMEG: (2, 1), CMAG: (2, 1),
+    CONJ: (2, 1), DISJ: (2, 1),
+    NADA: (0, 0), DSVS: (0, 0),
+}
+
+# o programa principal é o "procedimento" que começa na instrução 0
+MAIN = 0
+
+
+@dataclass
+class Verification:
+    """Resultado de `verify` para um programa aceito."""
+    # profundidade antes de cada instrução (None se inalcançável); nos
+    # procedimentos, contada a partir do endereço de retorno
+    depths: List[Optional[int]]
+    # entrada de cada procedimento chamado -> parâmetros do RTPR (None: nunca retorna)
+    procedures: Dict[int, Optional[int]] = field(default_factory=dict)
+    # maior profundidade da execução = slots de memória que bastam (None com recursão)
+    max_depth: Optional[int] = None
+
+    @property
+    def reachable(self) -> int:
+        return len(self.depths) - self.depths.count(None)
+
+    def summary(self) -> str:
+        depth = "sem limite (recursão)" if self.max_depth is None else f"até {self.max_depth} slots"
+        return (
+            f"programa verificado: {self.reachable}/{len(self.depths)} instruções alcançáveis, "
+            f"pilha {depth}, {len(self.procedures)} procedimento(s)"
+        )
+
+
+def verify(program: MepaProgram) -> Verification:
+    """Verifica `program`; levanta `MepaVerifyError` no primeiro problema."""
+    return _Verifier(program).run()
+
+
+class _Verifier:
+    def __init__(self, program: MepaProgram) -> None:
+        self.program = program
+        self.code: List[int] = program.opcodes.tolist()
+        self.args: List[int] = program.operands.tolist()
+        self.count = len(self.code)
+        self.owner: List[Optional[int]] = [None] * self.count
+        self.depths: List[Optional[int]] = [None] * self.count
+        self.returns: Dict[int, Optional[int]] = {}
+        self.levels: Dict[int, int] = {}    # procedimento que começa com ENPR k -> k
+        self.calls: Dict[int, List[Tuple[int, int]]] = {}
+        self.peaks: Dict[int, int] = {}     # só as instruções do procedimento
+        self.totals: Dict[int, int] = {}    # com as chamadas
+        self._lines: Optional[LineTable] = None
+
+    def run(self) -> Verification:
+        if not self.count:
+            raise MepaVerifyError(None, "programa vazio")
+        self.check_operands()
+        self.assign_owners()
+        procedures: Dict[int, Optional[int]] = {}
+        pending = [MAIN]
+        while pending:
+            entry = pending.pop()
+            self.propagate(entry)
+            for _, callee in self.calls[entry]:
+                if callee not in procedures:
+                    procedures[callee] = self.returns[callee]
+                    pending.append(callee)
+        self.check_addresses()
+        return Verification(self.depths, procedures, self.peak(MAIN, set()))
+
+    def error(self, pc: int, detalhe: str) -> MepaVerifyError:
+        if self._lines is None:
+            self._lines = LineTable.from_dict(self.program.lines)
+        return MepaVerifyError(pc, detalhe, self._lines.line_of(pc))
+
+    # ----------------------------------------------------------
+    def check_operands(self) -> None:
+        for pc, (op, arg) in enumerate(zip(self.code, self.args)):
+            if op not in VALID_OPS:
+                raise self.error(pc, f"código de instrução inválido {op}")
+            if op == ENPR and not 0 < arg < LEVELS or op in (CRVL_K, ARMZ_K, RTPR_K) and not (
+                0 < unpack_lexical(arg)[0] < LEVELS
+            ):
+                raise self.error(pc, f"{OPNAMES[op]} com nível léxico inválido")
+            if op == RTPR_K and unpack_lexical(arg)[1] < 0:
+                raise self.error(pc, f"RTPR com operando negativo {unpack_lexical(arg)[1]}")
+            if op in TARGET_OPS and not 0 <= arg < self.count:
+                raise self.error(pc, f"{OPNAMES[op]} para {arg}, fora do programa")
+            if op in (CRVL, ARMZ) and arg < 0:
+                raise self.error(pc, f"{OPNAMES[op]} com endereço negativo {arg}")
+            if op in (AMEM, DMEM, RTPR) and arg < 0:
+                raise self.error(pc, f"{OPNAMES[op]} com operando negativo {arg}")
+            if op == CHPR and arg == MAIN:
+                raise self.error(pc, "CHPR para o início do programa")
+
+    def successors(self, pc: int, op: int) -> Tuple[int, ...]:
+        """Próximas instruções dentro do mesmo procedimento (CHPR segue após o retorno)."""
+        if op == DSVS:
+            return (self.args[pc],)
+        if op == DSVF:
+            return (pc + 1, self.args[pc])
+        if op == PARA or op == RTPR or op == RTPR_K:
+            return ()
+        return (pc + 1,)
+
+    def assign_owners(self) -> None:
+        """Procedimento dono de cada instrução e o operando dos seus RTPR."""
+        code, owner = self.code, self.owner
+        pending = [MAIN]
+        owner[MAIN] = MAIN
+        while pending:
+            entry = pending.pop()
+            self.returns[entry] = None
+            if code[entry] == ENPR and entry != MAIN:
+                self.levels[entry] = self.args[entry]
+            stack = [entry]
+            while stack:
+                pc = stack.pop()
+                op = code[pc]
+                if op == CHPR:
+                    callee = self.args[pc]
+                    if owner[callee] is None:
+                        owner[callee] = callee
+                        pending.append(callee)
+                    elif owner[callee] != callee:
+                        raise self.error(callee, self.shared(owner[callee], callee))
+                elif op == RTPR or op == RTPR_K:
+                    if entry == MAIN:
+                        raise self.error(pc, "RTPR fora de procedimento")
+                    level = self.levels.get(entry)
+                    params = self.args[pc]
+                    if op == RTPR_K:
+                        restored, params = unpack_lexical(params)
+                        if restored != level:
+                            raise self.error(pc, f"RTPR {restored},{params} num procedimento "
+                                                 f"sem ENPR {restored}")
+                    elif level is not None:
+                        raise self.error(pc, f"RTPR {params} não restaura o display salvo "
+                                             f"por ENPR {level}")
+                    k = self.returns[entry]
+                    if k is not None and k != params:
+                        prefix = "RTPR " if level is None else f"RTPR {level},"
+                        raise self.error(pc, f"{prefix}{params}, mas outro retorno do "
+                                             f"procedimento em {entry} é {prefix}{k}")
+                    self.returns[entry] = params
+                elif op == ENPR and pc != entry:
+                    raise self.error(pc, "ENPR fora da entrada de um procedimento")
+                elif op == INPP and entry != MAIN:
+                    raise self.error(pc, "INPP dentro de procedimento")
+                for nxt in self.successors(pc, op):
+                    if nxt >= self.count:
+                        raise self.error(pc, "a execução passa do fim do programa sem PARA")
+                    if owner[nxt] is None:
+                        owner[nxt] = entry
+                        stack.append(nxt)
+                    elif owner[nxt] != entry:
+                        raise self.error(nxt, self.shared(owner[nxt], entry))
+
+    @staticmethod
+    def shared(first: int, second: int) -> str:
+        names = ["pelo programa principal" if e == MAIN else f"pelo procedimento em {e}"
+                 for e in (first, second)]
+        return f"instrução alcançada {names[0]} e {names[1]}"
+
+    def propagate(self, entry: int) -> None:
+        """Profundidade antes de cada instrução do procedimento `entry`."""
+        code, args, depths = self.code, self.args, self.depths
+        calls: List[Tuple[int, int]] = []
+        self.calls[entry] = calls
+        depths[entry] = 0
+        peak = 0
+        stack = [entry]
+        while stack:
+            pc = stack.pop()
+            op, arg, d = code[pc], args[pc], depths[pc]
+            if op == CHPR:
+                k = self.returns[arg]
+                if k is not None and d < k:
+                    raise self.error(pc, f"CHPR passa {k} parâmetro(s) e a pilha tem {d}")
+                calls.append((d, arg))
+                if k is None:
+                    continue  # o procedimento nunca retorna
+                after = d - k
+            elif op == RTPR:
+                if d:
+                    raise self.error(pc, f"RTPR com {d} valor(es) a mais na pilha do procedimento")
+                continue
+            elif op == RTPR_K:
+                if d != 1:
+                    raise self.error(pc, f"RTPR com {d} valor(es) na pilha do procedimento, "
+                                         "em vez de só o display salvo")
+                continue
+            elif op == ENPR:
+                after = d + 1
+            elif op == PARA:
+                continue
+            elif op == INPP:
+                after = 0
+            elif op == AMEM:
+                after = d + arg
+            elif op == DMEM:
+                if d < arg:
+                    raise self.error(pc, f"DMEM {arg} com {d} valor(es) na pilha")
+                after = d - arg
+            else:
+                pops, pushes = _EFFECTS[op]
+                if d < pops:
+                    raise self.error(pc, f"{OPNAMES[op]} desempilha {pops} valor(es) e a pilha tem {d}")
+                after = d - pops + pushes
+            if after > peak:
+                peak = after
+            for nxt in self.successors(pc, op):
+                seen = depths[nxt]
+                if seen is None:
+                    depths[nxt] = after
+                    stack.append(nxt)
+                elif seen != after:
+                    raise self.error(nxt, f"caminhos chegam com {seen} e com {after} valor(es) na pilha")
+        self.peaks[entry] = peak
+
+    def check_addresses(self) -> None:
+        """`CRVL`/`ARMZ` só usam slots vivos, abaixo dos endereços de retorno."""
+        # profundidade absoluta mínima na entrada de cada procedimento e a
+        # menor profundidade de quem chama (o que há abaixo do endereço de retorno)
+        base = {MAIN: 0}
+        lowest: Dict[int, int] = {}
+        pending = [MAIN]
+        while pending:
+            entry = pending.pop()
+            for d, callee in self.calls[entry]:
+                lowest[callee] = min(lowest.get(callee, d), d)
+                depth = base[entry] + d + 1
+                if callee not in base or depth < base[callee]:
+                    base[callee] = depth
+                    pending.append(callee)
+        for pc, (op, arg) in enumerate(zip(self.code, self.args)):
+            d = self.depths[pc]
+            if d is None:
+                continue
+            entry = self.owner[pc]
+            if op == CRVL_K or op == ARMZ_K:
+                self.check_frame_address(pc, op, arg, d, lowest.get(entry, 0))
+                continue
+            if op != CRVL and op != ARMZ:
+                continue
+            if entry == MAIN:
+                live = d if op == CRVL else d - 1  # ARMZ: o topo é o valor gravado
+                if arg >= live:
+                    raise self.error(pc, f"{OPNAMES[op]} {arg} fora da área viva da pilha "
+                                         f"({live} slot(s))")
+            elif arg >= base[entry] - 1:
+                raise self.error(pc, f"{OPNAMES[op]} {arg} alcança o endereço de retorno "
+                                     f"(slot {base[entry] - 1})")
+
+    def check_frame_address(self, pc: int, op: int, arg: int, d: int, caller_depth: int) -> None:
+        """``CRVL k,n``/``ARMZ k,n``: ``D[k] + n`` no registro do procedimento.
+
+        A profundidade conta a partir do slot acima do endereço de retorno,
+        onde fica o display salvo, então ``D[k] + n`` é a posição ``n + 1``;
+        abaixo do endereço de retorno estão os valores de quem chama (os
+        parâmetros), até a profundidade da chamada mais rasa.
+        """
+        level, n = unpack_lexical(arg)
+        text = f"{OPNAMES[op]} {level},{n}"
+        if self.levels.get(self.owner[pc]) != level:
+            raise self.error(pc, f"{text} fora de um procedimento que começa com ENPR {level}")
+        live = d - 1 if op == CRVL_K else d - 2  # ARMZ: o topo é o valor gravado
+        if n >= live:
+            raise self.error(pc, f"{text} fora da área viva do registro ({max(live, 0)} slot(s))")
+        if n == -1 or n == -2:
+            raise self.error(pc, f"{text} alcança o endereço de retorno ou o display salvo")
+        if n + 2 < -caller_depth:
+            raise self.error(pc, f"{text} passa do fundo da pilha de quem chama "
+                                 f"({caller_depth} valor(es))")
+
+    def peak(self, entry: int, active: Set[int]) -> Optional[int]:
+        """Maior profundidade a partir da entrada de `entry` (None se há recursão)."""
+        if entry in self.totals:
+            return self.totals[entry]
+        peak = self.peaks[entry]
+        active.add(entry)
+        for d, callee in self.calls[entry]:
+            if callee in active:
+                return None
+            inner = self.peak(callee, active)
+            if inner is None:
+                return None
+            peak = max(peak, d + 1 + inner)
+        active.discard(entry)
+        self.totals[entry] = peak
+        return peak
+
+
+__all__ = ["Verification", "verify", "MAIN"]
@@ -0,0 +1,880 @@
+"""Máquina virtual MEPA.
+
+A memória é um único vetor pré-alocado: os slots das variáveis ficam no
+início (reservados por ``INPP; AMEM n``) e a pilha de avaliação cresce logo
+acima deles, com `sp` apontando para o topo, como na MEPA dos livros-texto.
+Os endereços de `CRVL`/`ARMZ` são absolutos nesse vetor; os de ``CRVL k,n``
+e ``ARMZ k,n`` são ``D[k] + n``, com o display `D` numa lista fixa de
+`LEVELS` posições (acesso O(1)). ``ENPR k`` empilha ``D[k]`` e aponta
+``D[k]`` para o topo, ``RTPR k,n`` restaura o valor empilhado: cada
+ativação tem o próprio registro na pilha, do tamanho do seu quadro.
+
+Uma lista do Python aceita índice negativo (``M[-1]`` é o último slot),
+então a máquina confere que a pilha não desce abaixo de vazia (``sp = -1``)
+e que nenhum endereço fica negativo: os dois casos são `MepaMemoryError`.
+Passar do fim da memória é `MepaOutOfMemoryError`, a subclasse que um
+teto de memória (`Limits.max_memory`) transforma em limite.
+
+O estado (pc, sp, memória, passos) fica nos atributos da máquina, então
+`run(max_steps)` pode ser chamado de novo para continuar de onde parou.
+"""
+
+from __future__ import annotations
+
+import time
+from array import array
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import (
+    TYPE_CHECKING, Any, Callable, Iterable, List, MutableSequence, Optional, Tuple, Union,
+)
+
+from codegen.line_table import LineTable
+from codegen.mepa_ir import Instr, mepa_div, parse_constant
+from .errors import (
+    BelowMemory, InputPending, MepaMemoryError, MepaOutOfMemoryError, MepaRuntimeError,
+)
+from .limits import MEMORY, STEPS, TIME, LimitExceeded, Limits
+from .loader import load_program
+from .compiler import Block, CompiledProgram
+from .coverage import PROBE, PROBE_JUMP, PROBE_NEXT, Coverage
+from .fusion import MAX_FUSED_LENGTH, FusionReport, fuse_program
+from .profiler import DEFAULT_SAMPLE_EVERY, Profile
+from .program import MepaProgram
+from .opcodes import ARMZ, CRVL, LEVELS, OPNAMES
+from .verifier import Verification, verify
+
+if TYPE_CHECKING:
+    from .trace import TraceWriter
+
+
+DEFAULT_MEMORY_SIZE = 1 << 16
+
+# Memória de objetos Python ("list") ou de inteiros de 64 bits ("array").
+# A lista é o padrão: no CPython, ler de um array('q') cria um int a cada
+# acesso e o laço de despacho fica 30–40% mais lento. O array ocupa 8 bytes
+# por slot e acusa estouro de 64 bits, mas só aceita programas inteiros.
+STORAGES = ("list", "array")
+
+# Motor de execução: o interpretador (referência) ou blocos básicos
+# compilados para funções Python (`mepa.compiler`), várias vezes mais rápido
+# em laços. O compilado cai no interpretador para terminar um `max_steps`
+# que acaba no meio de um bloco.
+ENGINES = ("interpreter", "compiled")
+
+# Com `fuse`, o interpretador executa superinstruções (`mepa.fusion`). Um
+# despacho fundido conta como as várias instruções que substitui, então
+# `steps` e `max_steps` continuam em instruções MEPA.
+
+# Com `checked=True` (padrão) a máquina confere em execução a pilha abaixo
+# de vazia e os endereços negativos (`MepaMemoryError`), no interpretador e
+# nos blocos compilados. Com `checked=False` o programa passa antes pela
+# verificação estática (`mepa.verifier`), que prova as mesmas condições, e
+# a máquina deixa de conferir: os blocos compilados saem sem as guardas, a
+# memória fica com o tamanho exato que o programa usa (sem recursão) e
+# `run()` sem orçamento de passos despacha os blocos sem conferir pc, fim
+# de bloco e orçamento, porque todo desvio e retorno cai num início de
+# bloco. O interpretador, referência dos dois modos, confere sempre.
+
+# orçamento de `run()` sem `max_steps`
+UNBOUNDED = 1 << 62
+
+
+class _NegativeAddress:
+    """Operando no lugar de um endereço absoluto negativo: indexar com ele acusa o erro."""
+
+    def __index__(self) -> int:
+        raise BelowMemory
+
+
+_NEGATIVE = _NegativeAddress()
+
+
+@dataclass
+class ExecutionResult:
+    """Situação da máquina ao fim de uma chamada de `run`."""
+    halted: bool                 # PARA executado
+    steps: int                   # instruções executadas desde o início
+    output: List[Any] = field(default_factory=list)
+    dispatches: int = 0          # despachos (superinstrução ou bloco compilado conta 1)
+    limit: Optional[LimitExceeded] = None   # limite de `Limits` estourado, se houve
+
+
+def _read_number() -> Union[int, float]:
+    return parse_constant(input().strip())
+
+
+class MepaVM:
+    """Executa um `MepaProgram` (ou uma listagem, que é carregada antes)."""
+
+    def __init__(
+        self,
+        program: Union[MepaProgram, str, Iterable[Union[str, Instr]]],
+        *,
+        memory_size: int = DEFAULT_MEMORY_SIZE,
+        storage: str = "list",
+        engine: str = "interpreter",
+        fuse: bool = True,
+        profile: bool = False,
+        sample_every: int = DEFAULT_SAMPLE_EVERY,
+        limits: Optional[Limits] = None,
+        trace: Optional["TraceWriter"] = None,
+        coverage: Optional[Coverage] = None,
+        checked: bool = True,
+        read: Optional[Callable[[], Any]] = None,
+        write: Optional[Callable[[Any], None]] = None,
+    ) -> None:
+        if storage not in STORAGES:
+            raise ValueError(f"armazenamento inválido: {storage}")
+        if engine not in ENGINES:
+            raise ValueError(f"motor de execução inválido: {engine}")
+        if not isinstance(program, MepaProgram):
+            program = load_program(program)
+        self.program: MepaProgram = program
+        self.verification: Optional[Verification] = None
+        if not checked:
+            self.verification = verify(program)
+            if self.verification.max_depth is not None:
+                memory_size = self.verification.max_depth
+        self.limits = limits
+        if limits is not None and limits.max_memory is not None:
+            memory_size = min(memory_size, limits.max_memory)
+        self.memory_size = memory_size
+        if storage == "array" and self.program.uses_objects:
+            raise ValueError("memória 'array' só aceita programas com constantes inteiras")
+        self.storage = storage
+        # o despacho lê listas: indexar array('B')/array('q') cria um int por acesso
+        self._code: List[int] = program.opcodes.tolist()
+        self._args: List[Any] = program.operand_values()
+        for i, op in enumerate(self._code):
+            if (op == CRVL or op == ARMZ) and self._args[i] < 0:
+                # M[-1] seria o fim da memória
+                self._args[i] = _NEGATIVE
+        self.engine = engine
+        if trace is not None and profile:
+            raise ValueError("perfil e rastro não podem ser usados juntos")
+        if coverage is not None and (profile or trace is not None):
+            raise ValueError("a cobertura não pode ser usada com perfil ou rastro")
+        if coverage is not None and not coverage.matches(program):
+            raise ValueError("a cobertura é de outro programa")
+        self.trace = trace
+        # o rastro corta os blocos em pontos a mais (ver trace.py)
+        leaders = trace.attach(program) if trace is not None else ()
+        self._compiled = (
+            CompiledProgram(program, leaders, checked) if engine == "compiled" else None
+        )
+        self.fusion: Optional[FusionReport] = None
+        self.profile: Optional[Profile] = Profile(program, sample_every) if profile else None
+        if fuse and self._compiled is None:
+            self._fused_code, self._fused_args, self.fusion = fuse_program(
+                program, self._code, self._args
+            )
+        self.coverage = coverage
+        if coverage is not None:
+            # sondas nos blocos ainda não cobertos (ver coverage.py)
+            self._probes = set(coverage.leaders)
+            self._plain_code = list(self._code)
+            self._plain_fused = list(self._fused_code) if self.fusion is not None else None
+            self._plain_fused_args = list(self._fused_args) if self.fusion is not None else None
+        self._lines: Optional[LineTable] = None   # montada só no primeiro erro
+        self.output: List[Any] = []
+        self.read: Callable[[], Any] = read or _read_number
+        self.write: Callable[[Any], None] = write or self.output.append
+        self.reset()
+
+    def reset(self) -> None:
+        """Volta ao estado inicial (memória zerada, pc na primeira instrução)."""
+        self.memory: MutableSequence = (
+            array("q", bytes(8 * self.memory_size)) if self.storage == "array"
+            else [0] * self.memory_size
+        )
+        # D[k]: base do registro de ativação corrente do nível k
+        self.display: List[int] = [0] * LEVELS
+        self.pc = 0
+        self.sp = -1
+        self.steps = 0
+        self.dispatches = 0
+        self.halted = False
+        self.limit: Optional[LimitExceeded] = None
+        self.output.clear()
+        if self.trace is not None:
+            self.trace.end_chunk()
+        if self._compiled is not None:
+            self._blocks = self._compiled.bind(self.memory, self.read, self.write, self.display)
+        if self.coverage is not None:
+            self._place_probes()
+
+    # ----------------------------------------------------------
+    def run(self, max_steps: Optional[int] = None) -> ExecutionResult:
+        """Executa até `PARA` ou até `max_steps` instruções nesta chamada.
+
+        Com `limits`, um limite estourado encerra a chamada com
+        `ExecutionResult.limit` preenchido. Só o de tempo pode ser retomado
+        com outro `run`; depois dos de passos e memória a máquina fica parada.
+        """
+        if self.halted or self.limit is not None and self.limit.kind != TIME:
+            return self._result()
+        self.limit = None
+        limit = max_steps if max_steps is not None else UNBOUNDED
+        if self.limits is None:
+            self._dispatch(limit)
+        else:
+            self._run_limited(limit, self.limits)
+        return self._result()
+
+    def _run_limited(self, limit: int, limits: Limits) -> None:
+        """`_dispatch` com os limites de passos, memória e tempo."""
+        if limits.max_steps is not None:
+            limit = min(limit, limits.max_steps - self.steps)
+        try:
+            if limits.timeout is None:
+                self._dispatch(limit)
+            else:
+                deadline = time.perf_counter() + limits.timeout
+                # o relógio só é lido entre fatias de `check_every` instruções
+                while not self.halted and limit > 0:
+                    before = self.steps
+                    self._dispatch(min(limit, limits.check_every))
+                    limit -= self.steps - before
+                    if not self.halted and time.perf_counter() > deadline:
+                        self.limit = self._exceeded(TIME, f"{limits.timeout} s")
+                        return
+        except MepaOutOfMemoryError as exc:
+            if limits.max_memory is None:
+                raise
+            self.limit = self._exceeded(MEMORY, f"{self.memory_size} slots", exc.indice)
+            return
+        if not self.halted and limits.max_steps is not None and self.steps >= limits.max_steps:
+            self.limit = self._exceeded(STEPS, f"{limits.max_steps} instruções")
+
+    def _exceeded(self, kind: str, detail: str, pc: Optional[int] = None) -> LimitExceeded:
+        pc = self.pc if pc is None else pc
+        return LimitExceeded(kind, pc, self._line_of(pc), detail)
+
+    def _dispatch(self, limit: int) -> None:
+        """Executa até `limit` instruções no motor escolhido."""
+        if self.profile is not None:
+            self._run_profiled(limit)
+            return
+        if self.trace is not None:
+            self._run_traced(limit)
+            return
+        if self.coverage is not None:
+            self._run_covered(limit)
+            return
+        if self._compiled is None:
+            if self.fusion is not None:
+                # cada despacho fundido executa até MAX_FUSED_LENGTH instruções:
+                # o orçamento em despachos nunca ultrapassa o limite de instruções
+                while not self.halted and limit >= MAX_FUSED_LENGTH:
+                    before = self.steps
+                    self._interpret(limit // MAX_FUSED_LENGTH, fused=True)
+                    limit -= self.steps - before
+            if not self.halted and limit > 0:
+                self._interpret(limit)
+            return
+        run_blocks = self._run_blocks
+        if self.verification is not None and limit >= UNBOUNDED:
+            run_blocks = self._run_verified
+        while not self.halted and limit > 0:
+            limit -= run_blocks(limit)
+            if self.halted or limit <= 0:
+                break
+            # parado no meio de um bloco (ou o bloco não cabe no limite):
+            # o interpretador segue até o início do próximo bloco
+            before = self.steps
+            self._interpret(min(limit, self._compiled.distance_to_leader(self.pc)))
+            limit -= self.steps - before
+
+    def _result(self) -> ExecutionResult:
+        return ExecutionResult(self.halted, self.steps, self.output, self.dispatches, self.limit)
+
+    def _line_of(self, pc: int) -> Optional[int]:
+        if self._lines is None:
+            self._lines = LineTable.from_dict(self.program.lines)
+        return self._lines.line_of(pc)
+
+    def _error(self, pc: int, detalhe: str, kind: type = MepaRuntimeError) -> MepaRuntimeError:
+        """Erro de execução em `pc`, com a linha do fonte se o programa a tiver."""
+        return kind(pc, detalhe, self._line_of(pc))
+
+    def _run_profiled(self, limit: int) -> None:
+        """Interpreta um bloco básico por vez, anotando contagens e tempos."""
+        profile = self.profile
+        blocks, block_end = profile.blocks, profile.block_end
+        every = profile.sample_every
+        clock = time.perf_counter
+        count = len(block_end)
+        while not self.halted and limit > 0:
+            start = self.pc
+            if not 0 <= start < count:
+                self._interpret(1)  # acusa o desvio para fora do programa
+            before = self.steps
+            block = blocks.get(start)
+            # mede a primeira entrada de cada bloco e depois uma a cada `every`
+            if block is not None and block.entries % every == 0:
+                began = clock()
+                self._interpret(min(limit, block_end[start] - start))
+                elapsed: Optional[float] = clock() - began
+            else:
+                self._interpret(min(limit, block_end[start] - start))
+                elapsed = None
+            executed = self.steps - before
+            profile.record(start, executed, elapsed)
+            limit -= executed
+
+    def _run_traced(self, limit: int) -> None:
+        """Executa um bloco do rastro por vez e anota cada um (ver trace.py)."""
+        trace = self.trace
+        compiled = self._compiled
+        read = self.read
+
+        def recording_read() -> Any:
+            value = read()
+            trace.inputs.append(value)
+            return value
+
+        self.read = recording_read
+        if compiled is not None:
+            self._blocks = compiled.bind(self.memory, recording_read, self.write, self.display)
+        try:
+            while not self.halted and limit > 0:
+                room = trace.begin(self)
+                if room <= 0:
+                    trace.end_chunk()
+                    continue
+                before = self.steps
+                if compiled is not None:
+                    self._trace_blocks(min(limit, room))
+                else:
+                    self._trace_interpreted(min(limit, room))
+                limit -= self.steps - before
+            if self.halted:
+                trace.end_chunk()
+        finally:
+            self.read = read
+            if compiled is not None:
+                self._blocks = compiled.bind(self.memory, read, self.write, self.display)
+
+    def _trace_blocks(self, limit: int) -> None:
+        """Blocos compilados com o registro de cada um; o resto no interpretador."""
+        trace = self.trace
+        blocks = self._blocks
+        sizes = self._compiled.sizes
+        full_slots, full_frames = trace.layout.full_slots, trace.layout.full_frames
+        head, written = trace.head, trace.written
+        M, D = self.memory, self.display
+        get = M.__getitem__
+        count = len(blocks)
+        pc, s, n, calls = self.pc, self.sp, 0, 0
+        try:
+            while 0 <= pc < count:
+                size = sizes[pc]
+                if not size or n + size > limit:
+                    break  # meio de bloco ou fim do orçamento: segue no interpretador
+                next_pc, s = blocks[pc](s)
+                n += size
+                calls += 1
+                head += (pc, s, M[s] if s >= 0 else 0)
+                slots = full_slots[pc]
+                if slots:
+                    written.extend(map(get, slots))
+                if full_frames[pc]:
+                    trace.record_frames(full_frames[pc], M, D)
+                if next_pc < 0:  # PARA
+                    pc = ~next_pc
+                    self.halted = True
+                    break
+                pc = next_pc
+        except (ZeroDivisionError, IndexError, TypeError, OverflowError) as exc:
+            raise self._block_error(pc, exc) from None
+        finally:
+            self.pc, self.sp = pc, s
+            self.steps += n
+            self.dispatches += calls
+        if not self.halted and n < limit:
+            self._trace_interpreted(min(limit - n, trace.layout.size[pc] if 0 <= pc < count else 1))
+
+    def _trace_interpreted(self, limit: int) -> None:
+        """Interpreta um bloco do rastro por vez, com o registro de cada um."""
+        trace = self.trace
+        size = trace.layout.size
+        count = len(size)
+        while not self.halted and limit > 0:
+            start = self.pc
+            if not 0 <= start < count:
+                self._interpret(1)  # acusa o desvio para fora do programa
+            before = self.steps
+            try:
+                self._interpret(min(limit, size[start]))
+            except InputPending:
+                if self.steps > before:
+                    trace.record(start, self.steps - before, self.sp, self.memory, self.display)
+                raise
+            except MepaRuntimeError:
+                # a instrução que falhou já foi contada em `steps`
+                if self.steps - before > 1:
+                    trace.record(start, self.steps - before - 1, self.sp, self.memory, self.display)
+                raise
+            executed = self.steps - before
+            trace.record(start, executed, self.sp, self.memory, self.display)
+            limit -= executed
+
+    def _place_probes(self) -> None:
+        """Põe nos blocos ainda não cobertos a sonda do que falta cobrir neles."""
+        if self._compiled is not None:
+            self._plain_blocks = list(self._blocks)
+        for start in list(self._probes):
+            self._update_probe(start)
+
+    def _update_probe(self, start: int) -> None:
+        """Sonda do bloco de `start`: o bloco inteiro, só a aresta que falta ou nenhuma."""
+        coverage = self.coverage
+        end = coverage.block_end[start]
+        # volta ao código sem sonda
+        self._code[start] = self._plain_code[start]
+        self._code[end - 1] = self._plain_code[end - 1]
+        if self._plain_fused is not None:
+            self._fused_code[start:end] = self._plain_fused[start:end]
+            self._fused_args[start:end] = self._plain_fused_args[start:end]
+        if self._compiled is not None:
+            self._blocks[start] = self._plain_blocks[start]
+        if coverage.complete(start):
+            self._probes.discard(start)
+            return
+        self._probes.add(start)
+        target = coverage.missing_edge(start)
+        if target is None:
+            # instruções ainda não alcançadas: para antes do bloco
+            self._code[start] = PROBE
+            if self._plain_fused is not None:
+                self._fused_code[start] = PROBE
+            if self._compiled is not None:
+                self._blocks[start] = None
+            return
+        # só falta uma aresta do DSVF final: o bloco roda normalmente e
+        # para (ou marca) apenas quando for seguir por ela
+        jumps = target == self.program.operands[end - 1]
+        self._code[end - 1] = PROBE_JUMP if jumps else PROBE_NEXT
+        if self._plain_fused is not None:
+            # sem fusão neste bloco, para o DSVF ser despachado sozinho
+            self._fused_code[start:end] = self._code[start:end]
+            self._fused_args[start:end] = self._args[start:end]
+        if self._compiled is not None:
+            self._blocks[start] = self._edge_probe(start, self._plain_blocks[start], target)
+
+    def _edge_probe(self, start: int, block: Block, target: int) -> Block:
+        """Bloco compilado que marca a aresta do DSVF final para `target`."""
+        coverage = self.coverage
+        branch = coverage.block_end[start] - 1
+
+        def probed(s: int) -> Tuple[int, int]:
+            next_pc, s = block(s)
+            if next_pc == target:
+                coverage.mark(branch, 1, next_pc)
+                self._update_probe(start)
+            return next_pc, s
+
+        return probed
+
+    def _run_covered(self, limit: int) -> None:
+        """Despacho normal que para nas sondas dos blocos ainda não cobertos."""
+        block_start = self.coverage.block_start
+        count = len(block_start)
+        probes = self._probes
+        while not self.halted and limit > 0:
+            pc = self.pc
+            if not 0 <= pc < count:
+                self._interpret(1)  # acusa o desvio para fora do programa
+            before = self.steps
+            if block_start[pc] in probes:
+                self._cover_block(block_start[pc], limit)
+            elif self._compiled is not None:
+                if not self._run_blocks(limit) and not self.halted:
+                    # meio de bloco, ou o bloco não cabe no limite
+                    self._interpret(min(limit, self._compiled.distance_to_leader(pc)))
+            elif self.fusion is not None and limit >= MAX_FUSED_LENGTH:
+                self._interpret(limit // MAX_FUSED_LENGTH, fused=True)
+            else:
+                self._interpret(limit)
+            limit -= self.steps - before
+
+    def _cover_block(self, start: int, limit: int) -> None:
+        """Interpreta o bloco de `start` (ou o resto dele) sem sonda e marca o que rodou."""
+        pc, before = self.pc, self.steps
+        end = self.coverage.block_end[start]
+        self._code[start:end] = self._plain_code[start:end]
+        try:
+            self._interpret(min(limit, end - pc))
+        finally:
+            self.coverage.mark(pc, self.steps - before, self.pc)
+            self._update_probe(start)
+
+    def _run_blocks(self, limit: int) -> int:
+        """Executa blocos compilados enquanto couberem em `limit`; devolve os passos."""
+        blocks = self._blocks
+        sizes = self._compiled.sizes
+        count = len(blocks)
+        pc, s, n, calls = self.pc, self.sp, 0, 0
+        try:
+            while 0 <= pc < count:
+                block = blocks[pc]
+                if block is None or n + sizes[pc] > limit:
+                    break  # meio de bloco ou fim do orçamento: segue no interpretador
+                next_pc, s = block(s)
+                n += sizes[pc]
+                calls += 1
+                if next_pc < 0:  # PARA
+                    pc = ~next_pc
+                    self.halted = True
+                    break
+                pc = next_pc
+        except (ZeroDivisionError, IndexError, TypeError, OverflowError) as exc:
+            raise self._block_error(pc, exc) from None
+        finally:
+            self.pc, self.sp = pc, s
+            self.steps += n
+            self.dispatches += calls
+        return n
+
+    def _run_verified(self, limit: int) -> int:
+        """`_run_blocks` sem conferências, até `PARA`, para programas verificados."""
+        blocks = self._blocks
+        sizes = self._compiled.sizes
+        pc, s, n, calls = self.pc, self.sp, 0, 0
+        if blocks[pc] is None:
+            return 0  # retomada no meio de um bloco: o interpretador vai até o próximo
+        try:
+            while True:
+                next_pc, s = blocks[pc](s)
+                n += sizes[pc]
+                calls += 1
+                if next_pc < 0:  # PARA
+                    pc = ~next_pc
+                    self.halted = True
+                    break
+                pc = next_pc
+        except (ZeroDivisionError, IndexError, TypeError, OverflowError) as exc:
+            raise self._block_error(pc, exc) from None
+        finally:
+            self.pc, self.sp = pc, s
+            self.steps += n
+            self.dispatches += calls
+        return n
+
+    def _block_error(self, pc: int, exc: Exception) -> MepaRuntimeError:
+        """Erro de execução para uma exceção Python dentro do bloco compilado em `pc`.
+
+        O erro aponta a instrução do bloco cujo código levantou a exceção.
+        """
+        fault = self._compiled.fault_pc(exc)
+        if fault is not None:
+            pc = fault
+        name = OPNAMES[self.program.opcodes[pc]]
+        if isinstance(exc, ZeroDivisionError):
+            return self._error(pc, "divisão por zero")
+        if isinstance(exc, BelowMemory):
+            return self._error(pc, f"{name} fora da memória", MepaMemoryError)
+        if isinstance(exc, IndexError):
+            return self._error(pc, f"{name} fora da memória", MepaOutOfMemoryError)
+        return self._error(pc, f"{name}: {exc}")
+
+    def _interpret(self, limit: int, fused: bool = False) -> None:
+        """Executa até `limit` despachos (instruções, ou superinstruções se `fused`)."""
+        code = self._fused_code if fused else self._code
+        args = self._fused_args if fused else self._args
+        M, D = self.memory, self.display
+        read, write = self.read, self.write
+        pc, s, n = self.pc, self.sp, 0
+        extra = 0  # instruções a mais executadas pelas superinstruções
+        halted = False
+        try:
+            # Despacho por cadeia de `if` sobre códigos inteiros (ver opcodes.py
+            # e fusion.py); as instruções mais frequentes vêm primeiro.
+            for n in range(1, limit + 1):
+                op = code[pc]
+                if op >= 32:  # superinstruções e nível léxico: operando é uma tupla
+                    x = args[pc]
+                    if op >= 41:
+                        if op == 42:  # CRVL k,n
+                            a = D[x[0]] + x[1]
+                            if a < 0:
+                                raise BelowMemory
+                            s += 1
+                            M[s] = M[a]
+                            pc += 1
+                        elif op == 43:  # ARMZ k,n
+                            a = D[x[0]] + x[1]
+                            if a < 0 or s < 0:
+                                raise BelowMemory
+                            M[a] = M[s]
+                            s -= 1
+                            pc += 1
+                        elif op == 41:  # ENPR k: salva D[k], que passa a ser a base do registro
+                            s += 1
+                            M[s] = D[x]
+                            D[x] = s + 1
+                            pc += 1
+                        elif op == 44:  # RTPR k,n: restaura D[k], desempilha retorno e n valores
+                            if s < 1 or s < x[1] + 1:
+                                raise BelowMemory
+                            D[x[0]] = M[s]
+                            pc = M[s - 1]
+                            s -= x[1] + 2
+                        else:
+                            raise self._error(pc, f"código de instrução inválido {op}")
+                    elif op == 32:  # JCVV: CRVL a; CRVL b; CMxx; DSVF L
+                        if x[2](M[x[0]], M[x[1]]):
+                            pc += 4
+                        else:
+                            pc = x[3]
+                        extra += 3
+                    elif op == 34:  # OPVKS: CRVL a; CRCT k; op; ARMZ c
+                        M[x[3]] = x[2](M[x[0]], x[1])
+                        pc += 4
+                        extra += 3
+                    elif op == 33:  # JCVK: CRVL a; CRCT k; CMxx; DSVF L
+                        if x[2](M[x[0]], x[1]):
+                            pc += 4
+                        else:
+                            pc = x[3]
+                        extra += 3
+                    elif op == 35:  # OPVVS: CRVL a; CRVL b; op; ARMZ c
+                        M[x[3]] = x[2](M[x[0]], M[x[1]])
+                        pc += 4
+                        extra += 3
+                    elif op == 36:  # OPVK: CRVL a; CRCT k; op
+                        s += 1
+                        M[s] = x[2](M[x[0]], x[1])
+                        pc += 3
+                        extra += 2
+                    elif op == 37:  # OPVV: CRVL a; CRVL b; op
+                        s += 1
+                        M[s] = x[2](M[x[0]], M[x[1]])
+                        pc += 3
+                        extra += 2
+                    elif op == 38:  # JCMP: CMxx; DSVF L
+                        if s < 1:
+                            raise BelowMemory
+                        s -= 2
+                        if x[0](M[s + 1], M[s + 2]):
+                            pc += 2
+                        else:
+                            pc = x[1]
+                        extra += 1
+                    elif op == 39:  # MOVE: CRVL a; ARMZ b
+                        M[x[1]] = M[x[0]]
+                        pc += 2
+                        extra += 1
+                    elif op == 40:  # STCT: CRCT k; ARMZ a
+                        M[x[1]] = x[0]
+                        pc += 2
+                        extra += 1
+                    else:
+                        raise self._error(pc, f"código de instrução inválido {op}")
+                elif op == 0:  # CRVL
+                    s += 1
+                    M[s] = M[args[pc]]
+                    pc += 1
+                elif op == 1:  # CRCT
+                    s += 1
+                    M[s] = args[pc]
+                    pc += 1
+                elif op == 2:  # ARMZ
+                    if s < 0:
+                        raise BelowMemory
+                    M[args[pc]] = M[s]
+                    s -= 1
+                    pc += 1
+                elif op == 3:  # SOMA
+                    s -= 1
+                    if s < 0:
+                        raise BelowMemory
+                    M[s] = M[s] + M[s + 1]
+                    pc += 1
+                elif op == 13:  # DSVF
+                    if s < 0:
+                        raise BelowMemory
+                    if M[s] == 0:
+                        pc = args[pc]
+                    else:
+                        pc += 1
+                    s -= 1
+                elif op == 14:  # DSVS
+                    pc = args[pc]
+                elif op <= 12:
+                    s -= 1
+                    if s < 0:
+                        raise BelowMemory
+                    a, b = M[s], M[s + 1]
+                    if op == 4:  # SUBT
+                        M[s] = a - b
+                    elif op == 5:  # MULT
+                        M[s] = a * b
+                    elif op == 6:  # DIVI
+                        if b == 0:
+                            raise ZeroDivisionError
+                        if type(a) is int and type(b) is int:
+                            q = a // b
+                            if q < 0 and q * b != a:
+                                q += 1  # trunca em direção a zero
+                            M[s] = q
+                        else:
+                            M[s] = mepa_div(a, b)
+                    elif op == 7:  # CMME
+                        M[s] = 1 if a < b else 0
+                    elif op == 8:  # CMMA
+                        M[s] = 1 if a > b else 0
+                    elif op == 9:  # CMIG
+                        M[s] = 1 if a == b else 0
+                    elif op == 10:  # CMDG
+                        M[s] = 1 if a != b else 0
+                    elif op == 11:  # CMEG
+                        M[s] = 1 if a <= b else 0
+                    else:  # CMAG
+                        M[s] = 1 if a >= b else 0
+                    pc += 1
+                elif op == 15:  # NADA
+                    pc += 1
+                elif op == 16:  # CRCS: constante do programa (string, real, inteiro grande)
+                    s += 1
+                    M[s] = args[pc]
+                    pc += 1
+                elif op == 17:  # INVR
+                    if s < 0:
+                        raise BelowMemory
+                    M[s] = -M[s]
+                    pc += 1
+                elif op == 18:  # NEGA
+                    if s < 0:
+                        raise BelowMemory
+                    M[s] = 0 if M[s] else 1
+                    pc += 1
+                elif op == 19:  # CONJ
+                    s -= 1
+                    if s < 0:
+                        raise BelowMemory
+                    M[s] = 1 if M[s] and M[s + 1] else 0
+                    pc += 1
+                elif op == 20:  # DISJ
+                    s -= 1
+                    if s < 0:
+                        raise BelowMemory
+                    M[s] = 1 if M[s] or M[s + 1] else 0
+                    pc += 1
+                elif op == 21:  # IMPR
+                    if s < 0:
+                        raise BelowMemory
+                    write(M[s])
+                    s -= 1
+                    pc += 1
+                elif op == 22:  # LEIT (lê antes de empilhar: ver InputPending)
+                    M[s + 1] = read()
+                    s += 1
+                    pc += 1
+                elif op == 23 or op == 24:  # AMEM, DMEM
+                    top = s + args[pc] if op == 23 else s - args[pc]
+                    if top < -1:
+                        raise BelowMemory
+                    s = top
+                    pc += 1
+                elif op == 25:  # CHPR: empilha o endereço de retorno
+                    s += 1
+                    M[s] = pc + 1
+                    pc = args[pc]
+                elif op == 26:  # RTPR k: desempilha o retorno e k parâmetros
+                    if s < 0 or s < args[pc]:
+                        raise BelowMemory
+                    ret = M[s]
+                    s -= 1 + args[pc]
+                    pc = ret
+                elif op == 27:  # INPP
+                    s = -1
+                    pc += 1
+                elif op == 28:  # PARA
+                    halted = True
+                    pc += 1
+                    break
+                elif op == PROBE:  # sondas de cobertura (coverage.py): para antes do bloco
+                    n -= 1
+                    break
+                elif op == PROBE_JUMP:  # DSVF que para antes de desviar
+                    if s < 0:
+                        raise BelowMemory
+                    if M[s] == 0:
+                        n -= 1
+                        break
+                    pc += 1
+                    s -= 1
+                elif op == PROBE_NEXT:  # DSVF que para antes de seguir
+                    if s < 0:
+                        raise BelowMemory
+                    if M[s] != 0:
+                        n -= 1
+                        break
+                    pc = args[pc]
+                    s -= 1
+                else:
+                    raise self._error(pc, f"código de instrução inválido {op}")
+        except InputPending:
+            n -= 1  # o LEIT não foi executado
+            raise
+        except ZeroDivisionError:
+            raise self._error(pc, "divisão por zero") from None
+        except BelowMemory:
+            raise self._error(
+                pc, f"{OPNAMES[self._code[pc]]} fora da memória (topo {s})", MepaMemoryError
+            ) from None
+        except IndexError:
+            if not 0 <= pc < len(code):
+                raise self._error(pc, "desvio para fora do programa") from None
+            raise self._error(
+                pc, f"{OPNAMES[self._code[pc]]} fora da memória (topo {s})", MepaOutOfMemoryError
+            ) from None
+        except (TypeError, OverflowError) as exc:
+            raise self._error(pc, f"{OPNAMES[self._code[pc]]}: {exc}") from None
+        finally:
+            self.pc, self.sp = pc, s
+            self.steps += n + extra
+            self.dispatches += n
+            self.halted = halted
+
+
+def run_listing(
+    listing: Iterable[Union[str, Instr]],
+    inputs: Iterable[Any] = (),
+    **options: Any,
+) -> ExecutionResult:
+    """Carrega e executa uma listagem lendo `inputs` em ordem; devolve o resultado."""
+    return MepaVM(listing, read=input_reader(inputs), **options).run()
+
+
+def input_reader(inputs: Iterable[Any], start: int = 0) -> "InputReader":
+    """Função de leitura para `LEIT` que devolve `inputs` em ordem, a partir de `start`."""
+    return InputReader(inputs, start)
+
+
+class InputReader:
+    """Leitura de `LEIT` de uma sequência; `position` conta os valores já lidos.
+
+    A posição vai no snapshot da máquina (snapshot.py): ao retomar, a
+    leitura recomeça do mesmo ponto da mesma sequência.
+    """
+
+    def __init__(self, inputs: Iterable[Any], start: int = 0) -> None:
+        self._pending = islice(inputs, start, None)
+        self.position = start
+
+    def __call__(self) -> Any:
+        try:
+            value = next(self._pending)
+        except StopIteration:
+            raise MepaRuntimeError(None, "entrada esgotada") from None
+        self.position += 1
+        return value
+
+
+__all__ = [
+    "MepaVM", "ExecutionResult", "Limits", "LimitExceeded", "run_listing", "input_reader",
+    "InputReader", "DEFAULT_MEMORY_SIZE", "STORAGES", "ENGINES",
+]
@@ -0,0 +1,3 @@
+from .pipeline import MepaOptimizer, OptimizationReport, optimize
+
+__all__ = ["MepaOptimizer", "OptimizationReport", "optimize"]
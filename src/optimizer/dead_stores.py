@@ -0,0 +1,46 @@
+"""Eliminação de armazenamentos mortos em slots MEPA.
+
+Um ``ARMZ x`` é morto quando `x` não está vivo logo depois dele. Se o valor
+armazenado vem de um trecho puro no mesmo bloco (constantes, leituras e
+operações sem divisão), o trecho e o ``ARMZ`` são removidos juntos.
+"""
+
+from __future__ import annotations
+
+from typing import List, Tuple
+
+from codegen.mepa_ir import Instr, PURE_OPS, slot_of
+from analysis.cfg import build_cfg
+from analysis.slots import LiveSlots
+from .rewrite import delete, producer_start
+
+
+def eliminate_dead_stores(instrs: List[Instr]) -> Tuple[List[Instr], int]:
+    """Remove armazenamentos cujo valor nunca é lido."""
+    cfg = build_cfg(instrs)
+    live = LiveSlots(cfg)
+    reachable = cfg.reachable()
+    doomed: List[int] = []
+    removed = 0
+    for block in cfg.blocks:
+        if not reachable[block.index]:
+            continue
+        claimed = block.end  # evita sobrepor trechos já marcados neste bloco
+        for i, live_after in live.walk_backward(block.index):
+            instr = cfg.instructions[i]
+            if instr.op != "ARMZ" or instr.label is not None or i >= claimed:
+                continue
+            if live.is_live(live_after, slot_of(instr)):
+                continue
+            start = producer_start(cfg, i)
+            if start is None:
+                continue
+            if not all(cfg.instructions[j].op in PURE_OPS for j in range(start, i)):
+                continue
+            doomed.extend(range(start, i + 1))
+            claimed = start
+            removed += 1
+    return delete(cfg.instructions, doomed), removed
+
+
+__all__ = ["eliminate_dead_stores"]
@@ -0,0 +1,124 @@
+"""Dobramento de constantes e remoção de código inalcançável."""
+
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+
+from codegen.mepa_ir import (
+    Instr, BINARY_OPS, UNARY_OPS, BINARY_SEMANTICS, UNARY_SEMANTICS,
+    parse_constant, format_constant, is_nop,
+)
+from analysis.cfg import build_cfg
+from .rewrite import delete
+
+
+def fold_constants(instrs: List[Instr]) -> Tuple[List[Instr], int]:
+    """Avalia em tempo de compilação operações sobre `CRCT` consecutivos.
+
+    - ``CRCT a; CRCT b; SOMA`` → ``CRCT a+b`` (idem demais binárias; não dobra divisão por zero)
+    - ``CRCT a; INVR`` → ``CRCT -a`` (idem `NEGA`)
+    - ``CRCT k; DSVF L`` → ``DSVS L`` se k == 0, ou nada caso contrário
+
+    Nenhuma instrução consumida pode ter rótulo, exceto a primeira do trecho.
+    """
+    out: List[Instr] = []
+    changes = 0
+
+    def const_at(pos: int) -> bool:
+        return len(out) >= pos and out[-pos].op == "CRCT"
+
+    for instr in instrs:
+        if instr.label is None:
+            if instr.op in BINARY_OPS and const_at(1) and const_at(2) and out[-1].label is None:
+                a = parse_constant(out[-2].arg)
+                b = parse_constant(out[-1].arg)
+                if not (instr.op == "DIVI" and b == 0):
+                    value = BINARY_SEMANTICS[instr.op](a, b)
+                    label = out[-2].label
+                    del out[-2:]
+                    out.append(Instr("CRCT", format_constant(value), label))
+                    changes += 1
+                    continue
+            if instr.op in UNARY_OPS and const_at(1):
+                value = UNARY_SEMANTICS[instr.op](parse_constant(out[-1].arg))
+                out[-1] = Instr("CRCT", format_constant(value), out[-1].label)
+                changes += 1
+                continue
+            if instr.op == "DSVF" and const_at(1):
+                cond = out.pop()
+                if parse_constant(cond.arg) == 0:
+                    out.append(Instr("DSVS", instr.arg, cond.label))
+                elif cond.label is not None:
+                    out.append(Instr("NADA", label=cond.label))
+                changes += 1
+                continue
+        out.append(instr)
+    return out, changes
+
+
+def remove_unreachable(instrs: List[Instr]) -> Tuple[List[Instr], int]:
+    """Remove blocos que nenhuma entrada alcança (ex.: `DSVS` após `continue`)."""
+    cfg = build_cfg(instrs)
+    reachable = cfg.reachable()
+    doomed = [
+        i
+        for block in cfg.blocks if not reachable[block.index]
+        for i in range(block.start, block.end)
+    ]
+    if not doomed:
+        return instrs, 0
+    # rótulos de blocos inalcançáveis só são referenciados por código inalcançável
+    doomed_set = set(doomed)
+    kept = [instr for i, instr in enumerate(instrs) if i not in doomed_set]
+    return kept, len(doomed)
+
+
+def remove_jumps_to_next(instrs: List[Instr]) -> Tuple[List[Instr], int]:
+    """Remove `DSVS L` quando só há `NADA` entre o desvio e o rótulo `L`."""
+    doomed: List[int] = []
+    for i, instr in enumerate(instrs):
+        if instr.op != "DSVS":
+            continue
+        j = i + 1
+        while j < len(instrs) and instrs[j].op == "NADA" and instrs[j].label != instr.arg:
+            j += 1
+        if j < len(instrs) and instrs[j].label == instr.arg:
+            doomed.append(i)
+    return delete(instrs, doomed), len(doomed)
+
+
+def remove_nops(instrs: List[Instr]) -> Tuple[List[Instr], int]:
+    """Remove `NADA`, movendo o rótulo para a instrução seguinte.
+
+    Quando a seguinte também tem rótulo, os desvios para o rótulo do `NADA`
+    passam a usar o rótulo dela. ``AMEM 0``/``DMEM 0`` também são tratados como `NADA`.
+    """
+    instrs = [
+        Instr("NADA", label=ins.label) if is_nop(ins) and ins.op != "NADA" else ins
+        for ins in instrs
+    ]
+    alias: Dict[str, str] = {}
+    for i in range(len(instrs) - 2, -1, -1):
+        instr, nxt = instrs[i], instrs[i + 1]
+        if instr.op == "NADA" and instr.label is not None and nxt.label is not None:
+            alias[instr.label] = alias.get(nxt.label, nxt.label)
+    doomed = [
+        i for i, instr in enumerate(instrs)
+        if instr.op == "NADA" and (instr.label is None or instr.label in alias)
+    ]
+    instrs = [
+        Instr("NADA") if ins.label in alias and ins.op == "NADA"
+        else ins.with_target(alias[ins.target]) if ins.target in alias
+        else ins
+        for ins in instrs
+    ]
+    result = delete(instrs, doomed)
+    # NADAs rotulados seguidos de instrução sem rótulo: `delete` transfere o rótulo
+    movable = [
+        i for i, instr in enumerate(result[:-1])
+        if instr.op == "NADA" and instr.label is not None and result[i + 1].label is None
+    ]
+    return delete(result, movable), len(doomed) + len(movable)
+
+
+__all__ = ["fold_constants", "remove_unreachable", "remove_jumps_to_next", "remove_nops"]
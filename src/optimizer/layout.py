@@ -0,0 +1,144 @@
+"""Leiaute dos blocos: troca desvios tomados por execução em sequência."""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Set, Tuple
+
+from codegen.mepa_ir import (
+    Instr, JUMP_OPS, BRANCH_OPS, EXIT_OPS, NEGATED_COMPARISONS, is_nop,
+)
+from analysis.cfg import build_cfg
+from .rewrite import delete
+from .folding import remove_jumps_to_next
+
+
+def improve_layout(instrs: List[Instr]) -> Tuple[List[Instr], int]:
+    """Reduz desvios executados sem mudar o que o programa faz.
+
+    - desvio para um ``DSVS M`` passa a ir direto para `M`;
+    - ``CMxx; DSVF L; DSVS M; L:`` vira ``CMyy; DSVF M; L:`` (comparação
+      oposta; com ``NEGA`` antes do `DSVF`, o `NEGA` é removido);
+    - cadeias de blocos que terminam em ``DSVS L`` são seguidas pela cadeia
+      que começa em `L`, quando ninguém cai nela, e o desvio some.
+    """
+    instrs, threaded = _thread_jumps(instrs)
+    instrs, inverted = _invert_branches(instrs)
+    instrs, placed = _place_chains(instrs)
+    return instrs, threaded + inverted + placed
+
+
+def _first_real(instrs: List[Instr], index: int) -> int:
+    while index < len(instrs) and is_nop(instrs[index]):
+        index += 1
+    return index
+
+
+def _thread_jumps(instrs: List[Instr]) -> Tuple[List[Instr], int]:
+    label_at = {ins.label: i for i, ins in enumerate(instrs) if ins.label is not None}
+    result = list(instrs)
+    changes = 0
+    for i, instr in enumerate(instrs):
+        if instr.op not in JUMP_OPS and instr.op not in BRANCH_OPS:
+            continue
+        target = instr.target
+        seen: Set[str] = {target}
+        while target in label_at:
+            k = _first_real(instrs, label_at[target])
+            if k >= len(instrs) or instrs[k].op not in JUMP_OPS:
+                break
+            target = instrs[k].target
+            if target in seen:
+                # laço formado só por desvios: mantém o destino original
+                target = instr.target
+                break
+            seen.add(target)
+        if target != instr.target:
+            result[i] = instr.with_target(target)
+            changes += 1
+    return result, changes
+
+
+def _invert_branches(instrs: List[Instr]) -> Tuple[List[Instr], int]:
+    result = list(instrs)
+    doomed: List[int] = []
+    changes = 0
+    for i in range(1, len(instrs) - 1):
+        branch, cond = instrs[i], instrs[i - 1]
+        if branch.op not in BRANCH_OPS or branch.label is not None:
+            continue
+        # ``AMEM 0`` de um bloco vazio pode separar o DSVF do DSVS
+        k = i + 1
+        while k < len(instrs) and is_nop(instrs[k]) and instrs[k].label is None:
+            k += 1
+        if k >= len(instrs) or instrs[k].op not in JUMP_OPS or instrs[k].label is not None:
+            continue
+        jump = instrs[k]
+        j = k + 1
+        while j < len(instrs) and is_nop(instrs[j]) and instrs[j].label != branch.target:
+            j += 1
+        if j >= len(instrs) or instrs[j].label != branch.target:
+            continue
+        if cond.op in NEGATED_COMPARISONS:
+            result[i - 1] = Instr(NEGATED_COMPARISONS[cond.op], cond.arg, cond.label, cond.comment)
+        elif cond.op == "NEGA":
+            doomed.append(i - 1)
+        else:
+            continue
+        result[i] = branch.with_target(jump.target)
+        doomed.append(k)
+        changes += 1
+    return delete(result, doomed), changes
+
+
+def _place_chains(instrs: List[Instr]) -> Tuple[List[Instr], int]:
+    if not instrs:
+        return instrs, 0
+    cfg = build_cfg(instrs)
+
+    # cadeias: blocos ligados por queda, que precisam ficar juntos e em ordem
+    chains: List[List[int]] = []
+    chain_of: Dict[int, int] = {}
+    for block in cfg.blocks:
+        prev_falls = block.index > 0 and _falls_through(instrs[cfg.blocks[block.index - 1].last])
+        if not prev_falls:
+            chains.append([])
+        chains[-1].append(block.index)
+        chain_of[block.index] = len(chains) - 1
+    # a última cadeia, se não termina em desvio/parada, precisa continuar no fim
+    pinned = len(chains) - 1 if _falls_through(instrs[-1]) else None
+
+    def pulled(chain: int) -> Optional[int]:
+        last = instrs[cfg.blocks[chains[chain][-1]].last]
+        if last.op not in JUMP_OPS:
+            return None
+        block = cfg.labels[last.target]
+        target = chain_of[block]
+        if chains[target][0] != block or placed[target] or target == pinned:
+            return None
+        return target
+
+    placed = [False] * len(chains)
+    order: List[int] = []
+    for start in range(len(chains)):
+        current: Optional[int] = start
+        while current is not None and not placed[current] and current != pinned:
+            placed[current] = True
+            order.append(current)
+            current = pulled(current)
+    if pinned is not None:
+        order.append(pinned)
+    if order == list(range(len(chains))):
+        return instrs, 0
+
+    result: List[Instr] = []
+    for chain in order:
+        first, last = cfg.blocks[chains[chain][0]], cfg.blocks[chains[chain][-1]]
+        result.extend(instrs[first.start:last.end])
+    return remove_jumps_to_next(result)
+
+
+def _falls_through(instr: Instr) -> bool:
+    return instr.op not in JUMP_OPS and instr.op not in EXIT_OPS
+
+
+__all__ = ["improve_layout"]
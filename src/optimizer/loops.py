@@ -0,0 +1,355 @@
+"""Otimizações de laço: movimentação de código invariante e redução de força.
+
+Ambas trabalham sobre os laços naturais (`analysis.loops`) que têm um
+pré-cabeçalho: o ponto entre o bloco que "cai" no cabeçalho e o rótulo do
+cabeçalho, executado uma única vez antes da primeira iteração. Desvios de
+`continue` (para o cabeçalho ou para o incremento) e de `break` (para a
+saída) não passam por esse ponto, então o código inserido ali não se repete.
+
+Laços que contêm `CHPR` são ignorados: a chamada pode alterar qualquer slot.
+Os resultados ficam em slots temporários novos, reservados no ``AMEM`` global.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from codegen.mepa_ir import (
+    Instr, BINARY_OPS, UNARY_OPS, CALL_OPS, STACK_EFFECTS, parse_constant, format_constant, slot_of,
+)
+from analysis.cfg import build_cfg, ControlFlowGraph
+from analysis.loops import Loop, find_loops, loop_depths
+from .rewrite import allocate_temporary, producer_start
+
+
+@dataclass
+class _Expr:
+    """Subexpressão reconhecida na pilha: instruções [start, end] de um bloco."""
+    start: int
+    end: int
+    invariant: bool
+    operators: int = 0
+    children: List["_Expr"] = field(default_factory=list)
+
+
+def _modified_slots(cfg: ControlFlowGraph, loop: Loop) -> Optional[Set[str]]:
+    """Slots escritos no laço, ou None se o laço chama procedimentos."""
+    written: Set[str] = set()
+    for b in loop.blocks:
+        for instr in cfg.block_instructions(b):
+            if instr.op in CALL_OPS:
+                return None
+            if instr.op == "ARMZ":
+                written.add(slot_of(instr))
+    return written
+
+
+def _block_expressions(cfg: ControlFlowGraph, block: int, modified: Set[str]) -> List[_Expr]:
+    """Subexpressões do bloco com a marcação de invariância em relação ao laço."""
+    instrs = cfg.instructions
+    blk = cfg.blocks[block]
+    stack: List[_Expr] = []
+    found: List[_Expr] = []
+    for i in range(blk.start, blk.end):
+        instr = instrs[i]
+        if instr.op in ("CRCT", "CRCS"):
+            node = _Expr(i, i, True)
+        elif instr.op == "CRVL":
+            node = _Expr(i, i, slot_of(instr) not in modified)
+        elif instr.op in BINARY_OPS and len(stack) >= 2:
+            right, left = stack.pop(), stack.pop()
+            safe = instr.op != "DIVI" or _nonzero_constant(instrs[right.start], right)
+            node = _Expr(
+                left.start, i, left.invariant and right.invariant and safe,
+                left.operators + right.operators + 1, [left, right],
+            )
+        elif instr.op in UNARY_OPS and stack:
+            operand = stack.pop()
+            node = _Expr(operand.start, i, operand.invariant, operand.operators + 1, [operand])
+        else:
+            effect = STACK_EFFECTS.get(instr.op)
+            if effect is None:
+                stack.clear()
+                continue
+            pops, pushes = effect
+            del stack[max(0, len(stack) - pops):]
+            for _ in range(pushes):
+                stack.append(_Expr(i, i, False))
+            continue
+        stack.append(node)
+        found.append(node)
+    return found
+
+
+def _nonzero_constant(instr: Instr, node: _Expr) -> bool:
+    return node.start == node.end and instr.op == "CRCT" and parse_constant(instr.arg) != 0
+
+
+def _key(instrs: List[Instr], node: _Expr) -> Tuple[Tuple[str, Optional[str]], ...]:
+    return tuple((instrs[j].op, instrs[j].arg) for j in range(node.start, node.end + 1))
+
+
+def _splice(
+    instrs: List[Instr],
+    replacements: Dict[int, Tuple[int, List[Instr]]],
+    insert_before: Dict[int, List[Instr]],
+) -> List[Instr]:
+    """Aplica substituições {início: (fim, novas)} e inserções {índice: novas}.
+
+    O rótulo da primeira instrução substituída passa para a primeira nova.
+    """
+    result: List[Instr] = []
+    i = 0
+    n = len(instrs)
+    while i < n:
+        if i in insert_before:
+            result.extend(insert_before[i])
+        if i in replacements:
+            end, new = replacements[i]
+            label = instrs[i].label
+            first = new[0]
+            result.append(Instr(first.op, first.arg, label, first.comment))
+            result.extend(new[1:])
+            i = end + 1
+            continue
+        result.append(instrs[i])
+        i += 1
+    if n in insert_before:
+        result.extend(insert_before[n])
+    return result
+
+
+def _strip(instrs: List[Instr]) -> List[Instr]:
+    return [Instr(ins.op, ins.arg, None, ins.comment) for ins in instrs]
+
+
+# ================================================================
+# Movimentação de código invariante (LICM)
+# ================================================================
+def hoist_invariants(instrs: List[Instr]) -> Tuple[List[Instr], int]:
+    """Move subexpressões invariantes com ao menos um operador para o pré-cabeçalho."""
+    total = 0
+    while True:
+        instrs, count = _hoist_one_loop(instrs)
+        if not count:
+            return instrs, total
+        total += count
+
+
+def _hoist_one_loop(instrs: List[Instr]) -> Tuple[List[Instr], int]:
+    cfg = build_cfg(instrs)
+    for loop in find_loops(cfg):
+        if loop.preheader_edge(cfg) is None:
+            continue
+        modified = _modified_slots(cfg, loop)
+        if modified is None:
+            continue
+
+        # subexpressões invariantes maximais (o pai não é invariante)
+        candidates: List[_Expr] = []
+        for b in sorted(loop.blocks):
+            nodes = _block_expressions(cfg, b, modified)
+            inner: Set[int] = set()
+            for node in nodes:
+                if node.invariant:
+                    for child in node.children:
+                        inner.add(id(child))
+            candidates.extend(
+                node for node in nodes
+                if node.invariant and node.operators > 0 and id(node) not in inner
+            )
+        if not candidates:
+            continue
+
+        groups: Dict[tuple, List[_Expr]] = {}
+        for node in candidates:
+            groups.setdefault(_key(cfg.instructions, node), []).append(node)
+
+        current = list(cfg.instructions)
+        preheader: List[Instr] = []
+        replacements: Dict[int, Tuple[int, List[Instr]]] = {}
+        for nodes in groups.values():
+            allocated = allocate_temporary(current)
+            if allocated is None:
+                return instrs, 0
+            current, temp = allocated
+            first = nodes[0]
+            preheader.extend(_strip(cfg.instructions[first.start:first.end + 1]))
+            preheader.append(Instr("ARMZ", temp, comment="_inv"))
+            for node in nodes:
+                replacements[node.start] = (node.end, [Instr("CRVL", temp, comment="_inv")])
+
+        header_start = cfg.blocks[loop.header].start
+        return _splice(current, replacements, {header_start: preheader}), len(candidates)
+    return instrs, 0
+
+
+# ================================================================
+# Redução de força de multiplicações por variáveis de indução
+# ================================================================
+# Custo (em instruções executadas) de manter o temporário atualizado a cada
+# incremento, comparado ao ganho por uso (``CRVL i; CRCT k; MULT`` → ``CRVL t``).
+_UPDATE_COST = 4
+_USE_GAIN = 2
+# Peso de um uso em um laço interno em relação ao laço tratado
+_INNER_LOOP_WEIGHT = 8
+
+
+def _induction_step(cfg: ControlFlowGraph, armz: int) -> Optional[int]:
+    """Passo constante se o ARMZ for ``x = x + c`` / ``x = c + x`` / ``x = x - c``."""
+    start = producer_start(cfg, armz)
+    if start is None or armz - start != 3:
+        return None
+    instrs = cfg.instructions
+    slot = slot_of(instrs[armz])
+    a, b, op = instrs[start], instrs[start + 1], instrs[start + 2]
+    if op.op == "SOMA":
+        if a.op == "CRVL" and slot_of(a) == slot and b.op == "CRCT":
+            value = parse_constant(b.arg)
+        elif b.op == "CRVL" and slot_of(b) == slot and a.op == "CRCT":
+            value = parse_constant(a.arg)
+        else:
+            return None
+    elif op.op == "SUBT" and a.op == "CRVL" and slot_of(a) == slot and b.op == "CRCT":
+        value = -parse_constant(b.arg)
+    else:
+        return None
+    return value if isinstance(value, int) else None
+
+
+def reduce_strength(instrs: List[Instr]) -> Tuple[List[Instr], int]:
+    """Troca ``i * k`` (i de indução, k constante ou invariante) por um temporário.
+
+    O temporário recebe ``i * k`` no pré-cabeçalho e é incrementado logo após
+    cada incremento de `i`, mantendo ``t == i * k`` em todo o laço. Só é
+    aplicada quando os usos (ponderados pela profundidade) pagam as
+    atualizações extras.
+    """
+    total = 0
+    while True:
+        instrs, count = _reduce_one_loop(instrs)
+        if not count:
+            return instrs, total
+        total += count
+
+
+def _reduce_one_loop(instrs: List[Instr]) -> Tuple[List[Instr], int]:
+    cfg = build_cfg(instrs)
+    loops = find_loops(cfg)
+    depths = loop_depths(cfg, loops)
+    code = cfg.instructions
+    for loop in loops:
+        if loop.preheader_edge(cfg) is None:
+            continue
+        modified = _modified_slots(cfg, loop)
+        if modified is None:
+            continue
+
+        # variáveis de indução: todo ARMZ do slot no laço é um incremento constante
+        increments: Dict[str, List[Tuple[int, int]]] = {}
+        disqualified: Set[str] = set()
+        for b in loop.blocks:
+            blk = cfg.blocks[b]
+            for i in range(blk.start, blk.end):
+                if code[i].op != "ARMZ":
+                    continue
+                slot = slot_of(code[i])
+                step = _induction_step(cfg, i)
+                if step is None:
+                    disqualified.add(slot)
+                else:
+                    increments.setdefault(slot, []).append((i, step))
+        ivs = {s: incs for s, incs in increments.items() if s not in disqualified}
+        if not ivs:
+            continue
+
+        # usos: MULT entre a variável de indução e uma constante/slot invariante
+        uses: Dict[Tuple[str, str, str], List[Tuple[_Expr, int]]] = {}
+        for b in loop.blocks:
+            for node in _block_expressions(cfg, b, modified):
+                if code[node.end].op != "MULT" or node.operators != 1:
+                    continue
+                left, right = node.children
+                for iv_node, factor_node in ((left, right), (right, left)):
+                    iv_instr, factor = code[iv_node.start], code[factor_node.start]
+                    if iv_instr.op != "CRVL" or slot_of(iv_instr) not in ivs:
+                        continue
+                    if factor.op == "CRCT" and isinstance(parse_constant(factor.arg), int):
+                        key = (slot_of(iv_instr), "CRCT", factor.arg)
+                    elif factor.op == "CRVL" and slot_of(factor) not in modified:
+                        key = (slot_of(iv_instr), "CRVL", factor.arg)
+                    else:
+                        continue
+                    uses.setdefault(key, []).append((node, b))
+                    break
+
+        base_depth = depths[loop.header]
+        for (iv, kind, factor_arg), found in uses.items():
+            gain = sum(
+                _USE_GAIN * _INNER_LOOP_WEIGHT ** (depths[b] - base_depth) for _, b in found
+            )
+            cost = sum(
+                _UPDATE_COST * _INNER_LOOP_WEIGHT ** (depths[cfg.block_of(i)] - base_depth)
+                for i, _ in ivs[iv]
+            )
+            if gain <= cost:
+                continue
+            return _apply_reduction(cfg, loop, iv, kind, factor_arg, found, ivs[iv]), len(found)
+    return instrs, 0
+
+
+def _apply_reduction(
+    cfg: ControlFlowGraph,
+    loop: Loop,
+    iv: str,
+    kind: str,
+    factor_arg: str,
+    found: List[Tuple[_Expr, int]],
+    increments: List[Tuple[int, int]],
+) -> List[Instr]:
+    code = cfg.instructions
+    current, temp = allocate_temporary(list(code))
+    iv_comment = next((ins.comment for ins in code if slot_of(ins) == iv and ins.comment), None)
+
+    preheader = [
+        Instr("CRVL", iv, comment=iv_comment),
+        Instr(kind, factor_arg),
+        Instr("MULT"),
+        Instr("ARMZ", temp, comment="_ind"),
+    ]
+    steps: Dict[int, Instr] = {}
+    if kind == "CRCT":
+        k = parse_constant(factor_arg)
+        for _, step in increments:
+            steps[step] = Instr("CRCT", format_constant(step * k))
+    else:
+        for _, step in increments:
+            if step in steps:
+                continue
+            if step == 1:
+                steps[step] = Instr("CRVL", factor_arg)
+                continue
+            allocated = allocate_temporary(current)
+            current, delta = allocated
+            preheader += [
+                Instr("CRVL", factor_arg), Instr("CRCT", str(step)), Instr("MULT"),
+                Instr("ARMZ", delta, comment="_passo"),
+            ]
+            steps[step] = Instr("CRVL", delta, comment="_passo")
+
+    replacements = {
+        node.start: (node.end, [Instr("CRVL", temp, comment="_ind")]) for node, _ in found
+    }
+    inserts: Dict[int, List[Instr]] = {cfg.blocks[loop.header].start: preheader}
+    for armz, step in increments:
+        inserts[armz + 1] = [
+            Instr("CRVL", temp, comment="_ind"),
+            steps[step],
+            Instr("SOMA"),
+            Instr("ARMZ", temp, comment="_ind"),
+        ]
+    return _splice(current, replacements, inserts)
+
+
+__all__ = ["hoist_invariants", "reduce_strength"]
@@ -0,0 +1,106 @@
+"""Sequência de passes de otimização sobre a listagem MEPA."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Tuple, Union
+
+from codegen.mepa_ir import Instr, parse_listing, render_listing
+from .folding import fold_constants, remove_unreachable, remove_jumps_to_next, remove_nops
+from .propagation import propagate_constants, propagate_copies
+from .dead_stores import eliminate_dead_stores
+from .loops import hoist_invariants, reduce_strength
+from .layout import improve_layout
+
+
+Pass = Callable[[List[Instr]], Tuple[List[Instr], int]]
+
+# Passes por nível; cada rodada aplica todos em ordem até nada mudar.
+PASSES: Dict[int, List[Tuple[str, Pass]]] = {
+    1: [
+        ("dobramento", fold_constants),
+        ("inalcancavel", remove_unreachable),
+        ("propagacao_constantes", propagate_constants),
+        ("propagacao_copias", propagate_copies),
+        ("armazenamentos_mortos", eliminate_dead_stores),
+        ("desvios_para_seguinte", remove_jumps_to_next),
+        ("leiaute_de_blocos", improve_layout),
+    ],
+    2: [
+        ("invariantes_de_laco", hoist_invariants),
+        ("reducao_de_forca", reduce_strength),
+    ],
+}
+
+# Limpezas feitas uma única vez ao final
+FINAL_PASSES: Dict[int, List[Tuple[str, Pass]]] = {
+    1: [("nadas", remove_nops)],
+}
+
+
+@dataclass
+class OptimizationReport:
+    """Resumo das mudanças feitas pelo otimizador."""
+    before: int = 0
+    after: int = 0
+    rounds: int = 0
+    changes: Dict[str, int] = field(default_factory=dict)
+
+    def __str__(self) -> str:
+        lines = [f"instruções: {self.before} -> {self.after} ({self.rounds} rodada(s))"]
+        for name, count in self.changes.items():
+            if count:
+                lines.append(f"  {name}: {count}")
+        return "\n".join(lines)
+
+
+class MepaOptimizer:
+    """Aplica os passes do nível escolhido até atingir um ponto fixo."""
+
+    MAX_ROUNDS = 20
+
+    def __init__(self, level: int = 1) -> None:
+        self.level = level
+        self.report = OptimizationReport()
+
+    def passes(self) -> List[Tuple[str, Pass]]:
+        return [p for lvl in sorted(PASSES) if lvl <= self.level for p in PASSES[lvl]]
+
+    def final_passes(self) -> List[Tuple[str, Pass]]:
+        return [p for lvl in sorted(FINAL_PASSES) if lvl <= self.level for p in FINAL_PASSES[lvl]]
+
+    def optimize(self, listing: Iterable[Union[str, Instr]]) -> List[str]:
+        """Devolve a listagem otimizada no mesmo formato textual do gerador."""
+        instrs = parse_listing(listing)
+        self.report = OptimizationReport(before=len(instrs))
+        if self.level <= 0:
+            self.report.after = len(instrs)
+            return render_listing(instrs)
+
+        for name, _ in self.passes() + self.final_passes():
+            self.report.changes.setdefault(name, 0)
+
+        for _ in range(self.MAX_ROUNDS):
+            self.report.rounds += 1
+            changed = False
+            for name, run in self.passes():
+                instrs, count = run(instrs)
+                self.report.changes[name] += count
+                changed = changed or count > 0
+            if not changed:
+                break
+
+        for name, run in self.final_passes():
+            instrs, count = run(instrs)
+            self.report.changes[name] += count
+
+        self.report.after = len(instrs)
+        return render_listing(instrs)
+
+
+def optimize(listing: Iterable[Union[str, Instr]], level: int = 1) -> List[str]:
+    """Atalho para `MepaOptimizer(level).optimize(listing)`."""
+    return MepaOptimizer(level).optimize(listing)
+
+
+__all__ = ["MepaOptimizer", "OptimizationReport", "optimize", "PASSES"]
@@ -0,0 +1,75 @@
+"""Propagação de constantes e de cópias entre blocos básicos.
+
+Usa as definições que alcançam e as cópias disponíveis (`analysis.slots`)
+para substituir leituras `CRVL x`:
+
+- por ``CRCT k``/``CRCS s`` quando toda definição de `x` que alcança a
+  leitura armazena a mesma constante;
+- por ``CRVL y`` quando a cópia ``x := y`` está disponível no ponto.
+
+O dobramento de constantes (`folding`) aproveita o resultado na rodada seguinte.
+"""
+
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+
+from codegen.mepa_ir import Instr, slot_of
+from analysis.cfg import build_cfg, ControlFlowGraph
+from analysis.slots import ReachingDefinitions, AvailableCopies
+
+
+def _stored_constant(cfg: ControlFlowGraph, armz_index: int) -> Optional[Tuple[str, str]]:
+    """(opcode, operando) da constante gravada pelo ARMZ, se for ``CRCT``/``CRCS`` logo antes."""
+    if armz_index == 0 or cfg.instructions[armz_index].label is not None:
+        return None
+    prev = cfg.instructions[armz_index - 1]
+    if prev.op in ("CRCT", "CRCS"):
+        return prev.op, prev.arg
+    return None
+
+
+def propagate_constants(instrs: List[Instr]) -> Tuple[List[Instr], int]:
+    """Troca leituras de slots com valor constante conhecido pela própria constante."""
+    cfg = build_cfg(instrs)
+    reaching = ReachingDefinitions(cfg)
+    result = list(cfg.instructions)
+    changes = 0
+    for block in cfg.reverse_postorder():
+        for i, value in reaching.walk(block):
+            instr = result[i]
+            if instr.op != "CRVL":
+                continue
+            defs = reaching.reaching(value, slot_of(instr))
+            if not defs or any(d.index is None for d in defs):
+                continue
+            constants = {_stored_constant(cfg, d.index) for d in defs}
+            if len(constants) != 1 or None in constants:
+                continue
+            op, arg = constants.pop()
+            result[i] = Instr(op, arg, instr.label, instr.comment)
+            changes += 1
+    return result, changes
+
+
+def propagate_copies(instrs: List[Instr]) -> Tuple[List[Instr], int]:
+    """Troca leituras de `x` por leituras de `y` onde a cópia ``x := y`` está disponível."""
+    cfg = build_cfg(instrs)
+    copies = AvailableCopies(cfg)
+    result = list(cfg.instructions)
+    changes = 0
+    for block in cfg.reverse_postorder():
+        for i, value in copies.walk(block):
+            instr = result[i]
+            if instr.op != "CRVL":
+                continue
+            copy = copies.copy_for(value, slot_of(instr))
+            if copy is None:
+                continue
+            source = cfg.instructions[copy.index - 1]
+            result[i] = Instr("CRVL", source.arg, instr.label, source.comment)
+            changes += 1
+    return result, changes
+
+
+__all__ = ["propagate_constants", "propagate_copies"]
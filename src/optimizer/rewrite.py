@@ -0,0 +1,87 @@
+"""Utilidades para reescrever listagens MEPA preservando rótulos."""
+
+from __future__ import annotations
+
+from typing import Iterable, List, Optional, Set, Tuple
+
+from codegen.mepa_ir import Instr, STACK_EFFECTS
+from analysis.cfg import ControlFlowGraph
+
+
+def delete(instrs: List[Instr], indices: Iterable[int]) -> List[Instr]:
+    """Remove as instruções indicadas.
+
+    O rótulo de uma instrução removida passa para a próxima instrução mantida
+    (ou para um `NADA`, se ela já tiver rótulo), de modo que desvios continuem
+    válidos.
+    """
+    doomed: Set[int] = set(indices)
+    if not doomed:
+        return list(instrs)
+    result: List[Instr] = []
+    pending: Optional[str] = None
+    for i, instr in enumerate(instrs):
+        if i in doomed:
+            if instr.label is not None:
+                if pending is not None:
+                    result.append(Instr("NADA", label=pending))
+                pending = instr.label
+            continue
+        if pending is not None:
+            if instr.label is None:
+                instr = Instr(instr.op, instr.arg, pending, instr.comment)
+            else:
+                result.append(Instr("NADA", label=pending))
+            pending = None
+        result.append(instr)
+    if pending is not None:
+        result.append(Instr("NADA", label=pending))
+    return result
+
+
+def producer_start(cfg: ControlFlowGraph, index: int, values: int = 1) -> Optional[int]:
+    """Início do trecho que empilha os `values` valores consumidos pela instrução `index`.
+
+    Caminha para trás dentro do bloco somando os efeitos de pilha; devolve None
+    se o trecho atravessar um rótulo, o início do bloco ou uma instrução de
+    efeito desconhecido. O trecho devolvido é [início, index).
+    """
+    instrs = cfg.instructions
+    block = cfg.blocks[cfg.block_of(index)]
+    need = values
+    j = index
+    while need > 0:
+        # só o início do trecho pode ter rótulo (`delete` o preserva)
+        if j != index and instrs[j].label is not None:
+            return None
+        j -= 1
+        if j < block.start:
+            return None
+        effect = STACK_EFFECTS.get(instrs[j].op)
+        if effect is None:
+            return None
+        pops, pushes = effect
+        if pushes > need:
+            return None
+        need += pops - pushes
+    return j
+
+
+def allocate_temporary(instrs: List[Instr]) -> Optional[Tuple[List[Instr], str]]:
+    """Reserva um slot novo aumentando o ``AMEM`` global (``INPP; AMEM n``).
+
+    Devolve a listagem ajustada e o endereço do novo slot, ou None se a
+    listagem não começar pela reserva global.
+    """
+    if len(instrs) < 2 or instrs[0].op != "INPP" or instrs[1].op != "AMEM":
+        return None
+    try:
+        size = instrs[1].int_arg()
+    except ValueError:
+        return None
+    result = list(instrs)
+    result[1] = Instr("AMEM", str(size + 1), instrs[1].label, instrs[1].comment)
+    return result, str(size)
+
+
+__all__ = ["delete", "producer_start", "allocate_temporary"]
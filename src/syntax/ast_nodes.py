@@ -6,8 +6,12 @@ from typing import List, Optional, Union
 
 
 class ASTNode:
-    """Classe base para todos os nós da AST."""
-    pass
+    """Classe base para todos os nós da AST.
+
+    `line` é a linha do fonte onde o nó começa (None quando o nó foi criado
+    sem token de origem, por exemplo em testes ou por transformações).
+    """
+    line: Optional[int] = None
 
 
 class Program(ASTNode):
@@ -28,10 +32,11 @@ class Block(ASTNode):
 
 class FunctionDeclaration(ASTNode):
     """Declaração de função com nome, parâmetros e bloco do corpo."""
-    def __init__(self, name: str, params: List[str], body: Block) -> None:
+    def __init__(self, name: str, params: List[str], body: Block, line: Optional[int] = None) -> None:
         self.name: str = name
         self.params: List[str] = params
         self.body: Block = body
+        self.line: Optional[int] = line
     def __repr__(self) -> str:
         return f"FunctionDeclaration(name={self.name!r}, params={self.params!r}, body={self.body!r})"
 
@@ -48,10 +53,17 @@ class VarAssign(ASTNode):
 
 class IfStatement(ASTNode):
     """Condicional if/else com blocos then/else."""
-    def __init__(self, cond: ASTNode, then_block: Block, else_block: Optional[Block] = None) -> None:
+    def __init__(
+        self,
+        cond: ASTNode,
+        then_block: Block,
+        else_block: Optional[Block] = None,
+        line: Optional[int] = None,
+    ) -> None:
         self.cond: ASTNode = cond
         self.then_block: Block = then_block
         self.else_block: Optional[Block] = else_block
+        self.line: Optional[int] = line
     def __repr__(self) -> str:
         return (
             f"IfStatement(cond={self.cond!r}, then_block={self.then_block!r}, "
@@ -61,9 +73,10 @@ class IfStatement(ASTNode):
 
 class WhileStatement(ASTNode):
     """Laço while com condição e bloco de corpo."""
-    def __init__(self, cond: ASTNode, body: Block) -> None:
+    def __init__(self, cond: ASTNode, body: Block, line: Optional[int] = None) -> None:
         self.cond: ASTNode = cond
         self.body: Block = body
+        self.line: Optional[int] = line
     def __repr__(self) -> str:
         return f"WhileStatement(cond={self.cond!r}, body={self.body!r})"
 
@@ -84,20 +97,23 @@ class ForStatement(ASTNode):
 
 class ReturnStatement(ASTNode):
     """Comando return com expressão opcional."""
-    def __init__(self, expr: Optional[ASTNode]) -> None:
+    def __init__(self, expr: Optional[ASTNode], line: Optional[int] = None) -> None:
         self.expr: Optional[ASTNode] = expr
+        self.line: Optional[int] = line
     def __repr__(self) -> str:
         return f"ReturnStatement(expr={self.expr!r})"
 
 
 class BreakStatement(ASTNode):
     """Interrompe o laço mais próximo."""
-    pass
+    def __init__(self, line: Optional[int] = None) -> None:
+        self.line: Optional[int] = line
 
 
 class ContinueStatement(ASTNode):
     """Continua para a próxima iteração do laço."""
-    pass
+    def __init__(self, line: Optional[int] = None) -> None:
+        self.line: Optional[int] = line
 
 
 class BinaryOperation(ASTNode):
@@ -138,9 +154,10 @@ class Identifier(ASTNode):
 
 class Call(ASTNode):
     """Chamada no estilo de função: callee(args...)."""
-    def __init__(self, callee: ASTNode, args: List[ASTNode]) -> None:
+    def __init__(self, callee: ASTNode, args: List[ASTNode], line: Optional[int] = None) -> None:
         self.callee: ASTNode = callee
         self.args: List[ASTNode] = args
+        self.line: Optional[int] = line
     def __repr__(self) -> str:
         return f"Call(callee={self.callee!r}, args={self.args!r})"
 
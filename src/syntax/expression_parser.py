@@ -100,7 +100,7 @@ class ExpressionParser:
                     while parser.ts.match(TokenType.DELIMITER, ","):
                         args.append(self.parse_expression(parser, 0))
                 parser.ts.consume(TokenType.DELIMITER, ")", msg="Esperado ')' após argumentos")
-                ident = Call(ident, args)
+                ident = Call(ident, args, line=current.linha)
             return ident
 
         t = parser.ts.current
@@ -20,7 +20,7 @@ class BreakHandler(StatementHandler):
         if ctx is not None and not ctx.in_loop:
             t = parser.ts.current
             raise SyntaxErrorCompilador(t.linha, "'break' fora de loop")
-        parser.ts.consume(TokenType.KEYWORD, "break")
-        return BreakStatement()
+        keyword = parser.ts.consume(TokenType.KEYWORD, "break")
+        return BreakStatement(line=keyword.linha)
 
 __all__ = ["BreakHandler"]
@@ -20,7 +20,7 @@ class ContinueHandler(StatementHandler):
         if ctx is not None and not ctx.in_loop:
             t = parser.ts.current
             raise SyntaxErrorCompilador(t.linha, "'continue' fora de loop")
-        parser.ts.consume(TokenType.KEYWORD, "continue")
-        return ContinueStatement()
+        keyword = parser.ts.consume(TokenType.KEYWORD, "continue")
+        return ContinueStatement(line=keyword.linha)
 
 __all__ = ["ContinueHandler"]
@@ -17,7 +17,7 @@ class DefHandler(StatementHandler):
 
     def parse(self, parser: SyntaxAnalyzer, ctx: Optional[ParseContext] = None) -> FunctionDeclaration:
         """Analisa um comando def e retorna um nó FunctionDeclaration."""
-        parser.ts.consume(TokenType.KEYWORD, "def", msg="Esperado 'def'")
+        keyword = parser.ts.consume(TokenType.KEYWORD, "def", msg="Esperado 'def'")
         name = parser.ts.consume(
             TokenType.IDENTIFIER, msg="Esperado identificador do nome da função"
         ).lexema
@@ -36,6 +36,6 @@ class DefHandler(StatementHandler):
         parser.ts.consume(TokenType.NEWLINE, msg="Esperado nova linha após ':'")
         child_ctx = ctx.child(in_function=True) if ctx is not None else None
         body = parser.block_parser.parse_block(parser, child_ctx, parser.parse_one)
-        return FunctionDeclaration(name, params, body)
+        return FunctionDeclaration(name, params, body, line=keyword.linha)
 
 __all__ = ["DefHandler"]
@@ -18,7 +18,7 @@ class IfHandler(StatementHandler):
     def parse(self, parser: SyntaxAnalyzer, ctx: Optional[ParseContext] = None) -> IfStatement:
         """Analisa um if (e else opcional) e retorna seu nó."""
         # if <expr> : NEWLINE INDENT <stmts> DEDENT (else : NEWLINE INDENT <stmts> DEDENT)?
-        parser.ts.consume(TokenType.KEYWORD, "if", msg="Esperado 'if'")
+        keyword = parser.ts.consume(TokenType.KEYWORD, "if", msg="Esperado 'if'")
         cond = parser.expr_parser.parse_expression(parser)
         parser.ts.consume(TokenType.DELIMITER, ":", msg="Esperado ':' após condição do if")
         parser.ts.consume(TokenType.NEWLINE, msg="Esperado nova linha após ':'")
@@ -33,6 +33,6 @@ class IfHandler(StatementHandler):
             parser.ts.consume(TokenType.NEWLINE, msg="Esperado nova linha após ':'")
             else_block = parser.block_parser.parse_block(parser, ctx, parser.parse_one)
 
-        return IfStatement(cond, then_block, else_block)
+        return IfStatement(cond, then_block, else_block, line=keyword.linha)
 
 __all__ = ["IfHandler"]
@@ -16,12 +16,12 @@ class ReturnHandler(StatementHandler):
         return parser.ts.check(TokenType.KEYWORD, "return")
 
     def parse(self, parser: SyntaxAnalyzer, ctx: Optional[ParseContext] = None) -> ReturnStatement:
-        parser.ts.consume(TokenType.KEYWORD, "return")
+        keyword = parser.ts.consume(TokenType.KEYWORD, "return")
         # Expressão opcional: se o próximo token puder iniciar uma expressão, analisa; caso contrário, None
         if parser.expr_parser._can_start_expression(parser):
             expr = parser.expr_parser.parse_expression(parser)
         else:
             expr = None
-        return ReturnStatement(expr)
+        return ReturnStatement(expr, line=keyword.linha)
 
 __all__ = ["ReturnHandler"]
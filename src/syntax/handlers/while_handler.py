@@ -16,12 +16,12 @@ class WhileHandler(StatementHandler):
         return parser.ts.check(TokenType.KEYWORD, "while")
 
     def parse(self, parser: SyntaxAnalyzer, ctx: Optional[ParseContext] = None) -> WhileStatement:
-        parser.ts.consume(TokenType.KEYWORD, "while")
+        keyword = parser.ts.consume(TokenType.KEYWORD, "while")
         cond = parser.expr_parser.parse_expression(parser)
         parser.ts.consume(TokenType.DELIMITER, ":", msg="Esperado ':' após condição do while")
         parser.ts.consume(TokenType.NEWLINE, msg="Esperado nova linha após ':'")
         child_ctx = ctx.child(in_loop=True) if ctx is not None else None
         body = parser.block_parser.parse_block(parser, child_ctx, parser.parse_one)
-        return WhileStatement(cond, body)
+        return WhileStatement(cond, body, line=keyword.linha)
 
 __all__ = ["WhileHandler"]
@@ -0,0 +1,105 @@
+import json
+import unittest
+from pathlib import Path
+import sys
+
+# Garante que `src` seja importável
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from lexer import LexerPython
+from syntax import SyntaxAnalyzer
+from semantic import SemanticAnalyzer
+from codegen import MepaGenerator
+from codegen.mepa_ir import parse_instruction
+from analysis import build_cfg, AnalysisError
+
+
+def compile_source(source: str):
+    """Executa o pipeline completo até o código MEPA."""
+    tokens = LexerPython(source).get_tokens()
+    ast = SyntaxAnalyzer(tokens).parse()
+    SemanticAnalyzer(ast).analyze()
+    return MepaGenerator().generate(ast)
+
+
+class TestMepaInstructionParsing(unittest.TestCase):
+    def test_label_operand_and_comment(self):
+        instr = parse_instruction("L1: ARMZ 3 # x")
+        self.assertEqual((instr.label, instr.op, instr.arg, instr.comment), ("L1", "ARMZ", "3", "x"))
+        self.assertEqual(str(instr), "L1: ARMZ 3 # x")
+
+    def test_string_with_hash_and_colon(self):
+        instr = parse_instruction('CRCS "a: \\"b\\" # c"')
+        self.assertEqual(instr.op, "CRCS")
+        self.assertEqual(instr.arg, '"a: \\"b\\" # c"')
+        self.assertIsNone(instr.comment)
+
+
+class TestControlFlowGraph(unittest.TestCase):
+    def test_straight_line_program_is_single_chain(self):
+        cfg = build_cfg(compile_source("x=1\ny=x+2\nprint(y)\n"))
+        # corpo linear + bloco final (LEND: NADA / PARA)
+        self.assertEqual(len(cfg.blocks), 2)
+        self.assertEqual(cfg.blocks[0].successors, [1])
+        self.assertEqual(cfg.entries, [0])
+
+    def test_while_loop_has_back_edge_and_dominators(self):
+        code = (
+            "x=0\n"
+            "while x<3:\n"
+            "    x=x+1\n"
+            "print(x)\n"
+        )
+        cfg = build_cfg(compile_source(code))
+        header = cfg.labels["L1"]
+        exit_block = cfg.labels["L2"]
+        body = next(b for b in cfg.blocks[header].successors if b != exit_block)
+
+        self.assertIn(header, cfg.blocks[body].successors)  # aresta de retorno
+        self.assertEqual(cfg.immediate_dominators()[body], header)
+        self.assertTrue(cfg.dominates(header, exit_block))
+        self.assertFalse(cfg.dominates(body, exit_block))
+        kinds = {(e.source, e.target): e.kind for e in cfg.edges}
+        self.assertEqual(kinds[(header, exit_block)], "false")
+        self.assertEqual(kinds[(body, header)], "jump")
+
+    def test_if_else_join_is_dominated_by_condition(self):
+        code = (
+            "x=1\n"
+            "if x>0:\n"
+            "    print(x)\n"
+            "else:\n"
+            "    print(0)\n"
+            "print(x)\n"
+        )
+        cfg = build_cfg(compile_source(code))
+        then_block, else_block = cfg.blocks[0].successors[1], cfg.labels["L1"]
+        join = cfg.labels["L2"]
+        self.assertEqual(cfg.immediate_dominators()[join], 0)
+        self.assertNotEqual(then_block, else_block)
+        self.assertEqual(set(cfg.blocks[join].predecessors), {cfg.block_of(cfg.blocks[then_block].last), else_block})
+
+    def test_undefined_label_raises(self):
+        with self.assertRaises(AnalysisError):
+            build_cfg(["INPP", "DSVS L9", "PARA"])
+
+    def test_call_targets_become_entries(self):
+        cfg = build_cfg(["INPP", "CHPR F1", "PARA", "F1: NADA", "RTPR"])
+        self.assertEqual(cfg.entries, [0, cfg.labels["F1"]])
+        self.assertIsNone(cfg.immediate_dominators()[cfg.labels["F1"]])
+
+    def test_json_and_dot_dumps(self):
+        cfg = build_cfg(compile_source("x=0\nwhile x<3:\n    x=x+1\n"))
+        data = json.loads(cfg.to_json())
+        self.assertEqual(len(data["blocks"]), len(cfg.blocks))
+        self.assertEqual(data["blocks"][0]["instructions"][0], "INPP")
+        dot = cfg.to_dot()
+        self.assertTrue(dot.startswith("digraph"))
+        self.assertIn('B1 -> B3 [label="false"];', dot)
+
+
+if __name__ == "__main__":
+    unittest.main()
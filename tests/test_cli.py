@@ -1,8 +1,10 @@
 import unittest
 from pathlib import Path
 import sys
+import json
+import tempfile
 from io import StringIO
-from contextlib import redirect_stdout
+from contextlib import redirect_stderr, redirect_stdout
 
 ROOT = Path(__file__).resolve().parents[1]
 SRC = ROOT / "src"
@@ -30,5 +32,65 @@ class TestCLI(unittest.TestCase):
         self.assertIn("PARA", out)
         self.assertIn("AMEM", out)
 
+    def test_cli_runs_program(self):
+        file_path = ROOT / "tests" / "files" / "exemplo_valido.txt"
+
+        argv_backup = sys.argv[:]
+        try:
+            sys.argv = ["prog", "--file", str(file_path), "--run", "-O2"]
+            buf = StringIO()
+            with redirect_stdout(buf):
+                main.main()
+        finally:
+            sys.argv = argv_backup
+
+        self.assertEqual(buf.getvalue().splitlines(), ['"A soma é:"', "3"])
+
+    def test_cli_writes_and_runs_binary_program(self):
+        file_path = ROOT / "tests" / "files" / "exemplo_valido.txt"
+
+        argv_backup = sys.argv[:]
+        with tempfile.TemporaryDirectory() as tmp:
+            binary_path = str(Path(tmp) / "exemplo.mepab")
+            try:
+                sys.argv = ["prog", "--file", str(file_path), "--format", "binary", "-o", binary_path]
+                main.main()
+                sys.argv = ["prog", "--file", binary_path, "--run"]
+                buf = StringIO()
+                with redirect_stdout(buf):
+                    main.main()
+            finally:
+                sys.argv = argv_backup
+
+        self.assertEqual(buf.getvalue().splitlines(), ['"A soma é:"', "3"])
+
+    def run_batch_file(self, lines, *options):
+        argv_backup = sys.argv[:]
+        with tempfile.TemporaryDirectory() as tmp:
+            source = Path(tmp) / "dobro.py"
+            source.write_text("n=input()\nprint(n*2)\n", encoding="utf-8")
+            inputs = Path(tmp) / "entradas.txt"
+            inputs.write_text(lines, encoding="utf-8")
+            try:
+                sys.argv = ["prog", "--file", str(source), "--batch", str(inputs), *options]
+                buf = StringIO()
+                with redirect_stdout(buf), redirect_stderr(StringIO()):
+                    main.main()
+            finally:
+                sys.argv = argv_backup
+        return buf.getvalue()
+
+    def test_cli_batch_keeps_one_run_per_line(self):
+        report = json.loads(self.run_batch_file("4\n\n3\n", "--jobs", "1"))
+        results = report["results"]
+        self.assertEqual([r["index"] for r in results], [0, 1, 2])
+        self.assertEqual([r["status"] for r in results], ["ok", "erro", "ok"])
+        self.assertEqual(results[2]["output"], [6])
+        self.assertIn("entrada esgotada", results[1]["error"])
+
+    def test_cli_batch_reports_invalid_value_with_line(self):
+        out = self.run_batch_file("4\n5\nx\n", "--jobs", "1")
+        self.assertIn("linha 3: valor inválido 'x'", out)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,132 @@
+import unittest
+from pathlib import Path
+import sys
+
+# Garante que `src` seja importável
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from lexer import LexerPython
+from syntax import SyntaxAnalyzer
+from semantic import SemanticAnalyzer
+from codegen import (
+    ClosureCompiler, CodeGenerationError, ExecutionError, MepaGenerator, PythonGenerator,
+)
+from mepa import run_listing
+from mepa.vm import input_reader
+
+
+def parse(source: str):
+    ast = SyntaxAnalyzer(LexerPython(source).get_tokens()).parse()
+    SemanticAnalyzer(ast).analyze()
+    return ast
+
+
+def run_closures(source: str, inputs=()):
+    return ClosureCompiler().compile(parse(source)).run(read=input_reader(inputs))
+
+
+# programas sem funções: a saída tem de ser a mesma da máquina MEPA
+SAME_AS_MEPA = [
+    ("x=7\ny=2\nprint(x/2, -x/2, x//y, -x//2, 7.0/2, -7.5/2, x-y, y*x, 3-x)\n", []),
+    ("a=True\nb=False\nprint(a, b, 3<4, 3==4, (2<3)+(4>1), -a, a!=b, a>=b, 1<=0)\n", []),
+    ('s="oi"\nprint(s, "a soma é:", 1.5*2)\n', []),
+    (
+        "n=input()\ns=0\ni=0\nwhile i<n:\n    i=i+1\n    if i>3:\n        if i==8:\n"
+        "            break\n        s=s+i*i\n    else:\n        s=s-1\n        continue\n"
+        "    s=s+1\nprint(i, s)\n",
+        [12],
+    ),
+    ("i=5\nn=input()\nfor i in range(n):\n    x=i\nprint(i)\n", [4]),
+    ("i=5\nn=input()\nfor i in range(n):\n    x=i\nprint(i)\n", [-3]),
+    ("i=5\nfor i in range(2.5):\n    x=i\nprint(i)\n", []),
+    (
+        "i=0\ns=0\nfor i in range(10):\n    if i==3:\n        continue\n    if i==6:\n"
+        "        break\n    s=s+i\nprint(i, s)\n",
+        [],
+    ),
+    (
+        "j=0\ns=0\nfor j in range(10):\n    j=j+2\n    if j==5:\n        continue\n    s=s+j\n"
+        "print(j, s)\n",
+        [],
+    ),
+    (
+        "n=input()\nt=0\nfor i in range(n):\n    for k in range(i):\n        t=t+i*k\nprint(t)\n",
+        [7],
+    ),
+]
+
+FUNCTIONS = (
+    "def fat(n):\n"
+    "    if n <= 1:\n"
+    "        return 1\n"
+    "    return n * fat(n - 1)\n"
+    "total = 0\n"
+    "def soma(k):\n"
+    "    total = total + k\n"
+    "    parcial = k * 2\n"
+    "def nada():\n"
+    "    return\n"
+    "def primeiro(n):\n"
+    "    for i in range(n):\n"
+    "        if i * i > n:\n"
+    "            return i\n"
+    "    while n > 0:\n"
+    "        n = n - 1\n"
+    "        if n == 1:\n"
+    "            return -n\n"
+    "parcial = 100\n"
+    "soma(3)\n"
+    "soma(4)\n"
+    "print(fat(10), total, parcial, nada(), dobro(21), primeiro(20), primeiro(2), primeiro(0))\n"
+    "def dobro(x):\n"
+    "    return x + x\n"
+)
+
+
+class TestClosureCompiler(unittest.TestCase):
+    def test_same_output_as_mepa(self):
+        for source, inputs in SAME_AS_MEPA:
+            with self.subTest(fonte=source):
+                expected = run_listing(MepaGenerator().generate(parse(source)), inputs).output
+                self.assertEqual(run_closures(source, inputs), expected)
+
+    def test_functions_match_python_backend(self):
+        expected = PythonGenerator().generate(parse(FUNCTIONS)).run()
+        self.assertEqual(expected, [3628800, 7, 100, 0, 42, 5, -1, 0])
+        self.assertEqual(run_closures(FUNCTIONS), expected)
+
+    def test_program_runs_again(self):
+        source = "n=input()\ns=0\nfor i in range(n):\n    s=s+i\nprint(s)\n"
+        program = ClosureCompiler().compile(parse(source))
+        self.assertEqual(program.run(read=input_reader([4])), [6])
+        self.assertEqual(program.run(read=input_reader([5])), [10])
+        written = []
+        program.run(read=input_reader([3]), write=written.append)
+        self.assertEqual(written, [3])
+
+    def test_runtime_errors_report_the_source_line(self):
+        with self.assertRaises(ExecutionError) as ctx:
+            run_closures("n=input()\nx=1\nwhile x < 3:\n    x = x + 1\n    print(x/(n-2))\n", [2])
+        self.assertEqual(ctx.exception.linha, 5)
+        self.assertIn("divisão por zero", str(ctx.exception))
+
+        with self.assertRaises(ExecutionError) as ctx:
+            run_closures("def f(n):\n    return f(n + 1)\nprint(f(0))\n")
+        self.assertIn("recursão", str(ctx.exception))
+
+    def test_unsupported_programs(self):
+        for source in (
+            "x=7 % 2\n",
+            "return 1\n",
+            "x=range(3)\n",
+            "def f(a):\n    return a\nprint(f(1, 2))\n",
+        ):
+            with self.subTest(fonte=source), self.assertRaises(CodeGenerationError):
+                ClosureCompiler().compile(parse(source))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -11,7 +11,10 @@ if str(SRC) not in sys.path:
 from lexer import LexerPython
 from syntax import SyntaxAnalyzer
 from semantic import SemanticAnalyzer
-from codegen import MepaGenerator, CodeGenerationError
+from codegen import MepaGenerator, CodeGenerationError, LineTable, PythonGenerator
+from mepa import MepaVM, assemble, run_listing, verify
+from mepa.vm import input_reader
+from optimizer import MepaOptimizer
 
 
 class TestMepaGenerator(unittest.TestCase):
@@ -71,11 +74,86 @@ class TestMepaGenerator(unittest.TestCase):
         self.assertIn("CMME", joined)
         self.assertIn("IMPR", joined)
 
-    # ======================================================
-    # TESTES NÃO IMPLEMENTADOS (IGNORADOS)
-    # ======================================================
+    def test_outer_variable_keeps_address_inside_block(self):
+        """Variável global lida/escrita dentro de bloco usa o mesmo endereço."""
+        code = (
+            "x=0\n"
+            "y=5\n"
+            "while x<y:\n"
+            "    x=x+1\n"
+        )
+        instructions = self.compile_source(code)
+        self.assertIn("CRVL 0 # x", instructions)
+        self.assertIn("CRVL 1 # y", instructions)
+        self.assertEqual(instructions.count("ARMZ 0 # x"), 2)
+
+    def test_unary_minus_uses_invr(self):
+        """Menos unário é INVR; NEGA fica reservado à negação lógica."""
+        instructions = self.compile_source("x=1\ny=-x\n")
+        self.assertIn("INVR", instructions)
+        self.assertNotIn("NEGA", instructions)
+
+    def test_block_allocation_matches_its_own_scope(self):
+        """AMEM de um bloco externo não é confundido com o de um bloco interno vazio."""
+        code = (
+            "i=0\n"
+            "while i<2:\n"
+            "    j=0\n"
+            "    while j<2:\n"
+            "        i=i+0\n"
+            "        j=j+1\n"
+            "    i=i+1\n"
+        )
+        instructions = self.compile_source(code)
+        amem = [k for k, line in enumerate(instructions) if line.startswith("AMEM")]
+        self.assertEqual([instructions[k] for k in amem[1:]], ["AMEM 1", "AMEM 0"])
+        # o AMEM 1 do corpo externo vem antes do laço interno
+        self.assertLess(amem[1], instructions.index("ARMZ 1 # j"))
+
+    def test_break_releases_block_variables(self):
+        """break de dentro de blocos com variáveis libera todos antes de sair."""
+        code = (
+            "x=0\n"
+            "while x<5:\n"
+            "    y=x\n"
+            "    if y==2:\n"
+            "        z=1\n"
+            "        break\n"
+            "    x=x+1\n"
+        )
+        instructions = self.compile_source(code)
+        jump = instructions.index("DSVS L2")
+        self.assertEqual(instructions[jump - 1], "DMEM 2")
+        self.assertNotIn("DMEM 0", instructions)
+
+    def test_continue_in_for_runs_increment(self):
+        """continue no for desvia para o incremento, não para o teste."""
+        code = (
+            "x=0\n"
+            "for i in range(3):\n"
+            "    continue\n"
+        )
+        instructions = self.compile_source(code)
+        jump = next(line for line in instructions if line.startswith("DSVS Lincfor"))
+        label = jump.split()[1]
+        increment = instructions.index(f"{label}: NADA")
+        self.assertEqual(instructions[increment + 1], "CRVL 1 # i")
+        self.assertEqual(instructions[increment + 4], "ARMZ 1 # i")
+
+    def test_inverted_while_tests_at_bottom(self):
+        """Com invert_loops, o teste fica no fim e só há um desvio por iteração."""
+        tokens = LexerPython("x=0\nwhile x<3:\n    x=x+1\nprint(x)\n").get_tokens()
+        ast = SyntaxAnalyzer(tokens).parse()
+        instructions = MepaGenerator(invert_loops=True).generate(ast)
+        ops = [line.split(": ")[-1].split()[0] for line in instructions]
+        # guarda: x < 3 ; teste no fim: x >= 3 volta ao corpo quando falso
+        self.assertEqual(ops.count("CMME"), 1)
+        self.assertEqual(ops.count("CMAG"), 1)
+        self.assertLess(ops.index("CMME"), ops.index("SOMA"), ops.index("CMAG"))
+        bottom = ops.index("CMAG") + 1
+        self.assertEqual(instructions[bottom], "DSVF L1")
+        self.assertEqual(ops.count("DSVS"), 1)  # só o desvio final do programa
 
-    @unittest.skip("Funções ainda não suportadas pelo gerador MEPA atual.")
     def test_function_call_with_return(self):
         code = (
             "def soma(a, b):\n"
@@ -87,8 +165,8 @@ class TestMepaGenerator(unittest.TestCase):
         )
         instructions = self.compile_source(code)
         self.assertIn("CHPR", " ".join(instructions))
+        self.assertEqual(run_listing(instructions).output, [3])
 
-    @unittest.skip("Loop for-range ainda não suportado pelo gerador MEPA atual.")
     def test_for_range_loop(self):
         code = (
             "x=0\n"
@@ -101,5 +179,381 @@ class TestMepaGenerator(unittest.TestCase):
         self.assertIn("IMPR", " ".join(instructions))
 
 
+class TestCommonSubexpressions(unittest.TestCase):
+    def compile_source(self, source: str):
+        tokens = LexerPython(source).get_tokens()
+        ast = SyntaxAnalyzer(tokens).parse()
+        SemanticAnalyzer(ast).analyze()
+        return MepaGenerator(cse=True).generate(ast)
+
+    def test_repeated_product_is_computed_once(self):
+        code = (
+            "a=input()\n"
+            "b=input()\n"
+            "x=a*b+1\n"
+            "y=a*b+2\n"
+            "z=a*b+3\n"
+            "print(x+y+z)\n"
+        )
+        instructions = self.compile_source(code)
+        self.assertEqual(instructions.count("MULT"), 1)
+        reloads = [line for line in instructions if line.startswith("CRVL") and "cse.1" in line]
+        self.assertEqual(len(reloads), 3)
+
+    def test_store_invalidates_expression(self):
+        code = (
+            "a=input()\n"
+            "b=input()\n"
+            "x=a*b+1\n"
+            "a=2\n"
+            "y=a*b+2\n"
+            "z=a*b+3\n"
+            "w=a*b+4\n"
+            "print(x+y+z+w)\n"
+        )
+        instructions = self.compile_source(code)
+        # a*b antes da escrita em a é outro valor; depois dela, um só cálculo
+        self.assertEqual(instructions.count("MULT"), 2)
+
+    def test_copy_shares_value_number(self):
+        code = (
+            "a=input()\n"
+            "b=a\n"
+            "x=a*3+1\n"
+            "y=b*3+2\n"
+            "z=a*3+3\n"
+            "print(x+y+z)\n"
+        )
+        instructions = self.compile_source(code)
+        self.assertEqual(instructions.count("MULT"), 1)
+
+    def test_break_even_expression_is_not_cached(self):
+        instructions = self.compile_source("a=input()\nb=input()\nx=(a+b)*(a+b)\nprint(x)\n")
+        # guardar a+b custaria ARMZ+CRVL para economizar CRVL+CRVL+SOMA uma vez
+        self.assertEqual(instructions.count("SOMA"), 2)
+        self.assertFalse(any("cse" in line for line in instructions))
+
+    def test_input_is_never_reused(self):
+        instructions = self.compile_source("x=input()*2+input()*2+input()*2\nprint(x)\n")
+        self.assertEqual(instructions.count("LEIT"), 3)
+        self.assertEqual(instructions.count("MULT"), 3)
+
+    def test_condition_reuses_value_from_block(self):
+        code = (
+            "a=input()\n"
+            "b=input()\n"
+            "x=(a+b)*3\n"
+            "y=(a+b)*3\n"
+            "if (a+b)*3>10:\n"
+            "    print(x+y)\n"
+        )
+        instructions = self.compile_source(code)
+        self.assertEqual(instructions.count("MULT"), 1)
+        temp = next(line for line in instructions if line.startswith("ARMZ") and "cse" in line)
+        self.assertLess(instructions.index(temp), instructions.index("CMMA"))
+        # temporários não entram no AMEM dos blocos
+        self.assertNotIn("AMEM 1", instructions[2:])
+
+
+FUNCTIONS = (
+    "def fat(n):\n"
+    "    if n <= 1:\n"
+    "        return 1\n"
+    "    return n * fat(n - 1)\n"
+    "total = 0\n"
+    "def soma(k):\n"
+    "    total = total + k\n"
+    "    parcial = k * 2\n"
+    "def nada():\n"
+    "    return\n"
+    "def primeiro(n):\n"
+    "    for i in range(n):\n"
+    "        if i * i > n:\n"
+    "            return i\n"
+    "    while n > 0:\n"
+    "        n = n - 1\n"
+    "        if n == 1:\n"
+    "            return -n\n"
+    "parcial = 100\n"
+    "soma(3)\n"
+    "soma(4)\n"
+    "print(fat(10), total, parcial, nada(), dobro(21), primeiro(20), primeiro(2), primeiro(0))\n"
+    "def dobro(x):\n"
+    "    return x + x\n"
+)
+
+CALL_PROGRAMS = [
+    (FUNCTIONS, []),
+    # recursão mútua: cada chamada tem o seu registro
+    (
+        "def par(n):\n"
+        "    if n == 0:\n"
+        "        return 1\n"
+        "    return impar(n - 1)\n"
+        "def impar(n):\n"
+        "    if n == 0:\n"
+        "        return 0\n"
+        "    return par(n - 1)\n"
+        "print(par(10), par(7), impar(7))\n",
+        [],
+    ),
+    (
+        "def fib(n):\n"
+        "    if n < 2:\n"
+        "        return n\n"
+        "    return fib(n - 1) + fib(n - 2)\n"
+        "def quadrado(x):\n"
+        "    return x * x\n"
+        "n=input()\n"
+        "s=0\n"
+        "for i in range(n):\n"
+        "    s=s+quadrado(i)+quadrado(i)\n"
+        "print(fib(n), s)\n",
+        [15],
+    ),
+    # chamadas de cauda a si mesma, também dentro de laço, e recursão comum
+    (
+        "def fat(n, acc):\n"
+        "    if n <= 1:\n"
+        "        return acc\n"
+        "    return fat(n - 1, acc * n)\n"
+        "def f(n, t):\n"
+        "    for i in range(n):\n"
+        "        if i == 3:\n"
+        "            return f(n - 1, t + i)\n"
+        "    return t + fat(n, 1)\n"
+        "def g(n):\n"
+        "    if n < 1:\n"
+        "        return 0\n"
+        "    return g(n - 1) + fat(n, 1)\n"
+        "print(f(6, 0), g(5), fat(10, 1))\n",
+        [],
+    ),
+    # return dentro de laços da função; chamada usada como comando
+    (
+        "def achar(n):\n"
+        "    for i in range(n):\n"
+        "        for j in range(i):\n"
+        "            if i * j > n:\n"
+        "                return i * 10 + j\n"
+        "    return -1\n"
+        "def maior(a, b):\n"
+        "    if a > b:\n"
+        "        return a\n"
+        "    return b\n"
+        "x = 0\n"
+        "def marca(v):\n"
+        "    x = maior(x, v)\n"
+        "marca(3)\n"
+        "marca(2)\n"
+        "print(achar(20), achar(1), x)\n",
+        [],
+    ),
+]
+
+
+class TestFunctions(unittest.TestCase):
+    def parse(self, source: str):
+        tokens = LexerPython(source).get_tokens()
+        ast = SyntaxAnalyzer(tokens).parse()
+        SemanticAnalyzer(ast).analyze()
+        return ast
+
+    def test_same_output_as_python_backend(self):
+        for source, inputs in CALL_PROGRAMS:
+            expected = PythonGenerator().generate(self.parse(source)).run(read=input_reader(inputs))
+            for level in (0, 1, 2):
+                for inline in (False, True):
+                    with self.subTest(fonte=source, nivel=level, inline=inline):
+                        generator = MepaGenerator(cse=level >= 1, inline=inline)
+                        code = generator.generate(self.parse(source))
+                        if level:
+                            code = MepaOptimizer(level).optimize(code)
+                        program = assemble(code)
+                        verify(program)
+                        for engine in ("interpreter", "compiled"):
+                            result = run_listing(code, inputs, engine=engine)
+                            self.assertEqual(result.output, expected)
+
+    def test_functions_output(self):
+        code = MepaGenerator().generate(self.parse(FUNCTIONS))
+        self.assertEqual(run_listing(code).output, [3628800, 7, 100, 0, 42, 5, -1, 0])
+
+    def test_recursive_calls_get_separate_frames(self):
+        source = (
+            "def f(n):\n"
+            "    x = n * 2\n"
+            "    y = 0\n"
+            "    if n > 0:\n"
+            "        y = f(n - 1)\n"
+            "    return x + y\n"
+            "print(f(input()))\n"
+        )
+        code = MepaGenerator().generate(self.parse(source))
+        entry = code.index("F_f: ENPR 1")
+        # registro só com x e y; n e o resultado ficam abaixo de D[1]
+        self.assertEqual(code[entry + 1], "AMEM 2")
+        self.assertIn("CRVL 1,-3 # n", code)
+        self.assertIn("ARMZ 1,-4 # f.retorno", code)
+        self.assertEqual(code[-3], "RTPR 1,1")
+        verify(assemble(code))
+
+        def peak(n):
+            vm = MepaVM(assemble(code), read=input_reader([n]), fuse=False)
+            top = 0
+            while not vm.halted:
+                vm.run(max_steps=1)
+                top = max(top, vm.sp)
+            self.assertEqual(vm.output, [n * (n + 1)])
+            return top
+
+        # cada nível da recursão ocupa resultado, n, endereço de retorno,
+        # display salvo, x e y
+        self.assertEqual(peak(8) - peak(4), 4 * 6)
+
+    def test_cached_subexpression_in_function_block_stays_in_frame(self):
+        source = (
+            "x = 3\n"
+            "def f(a):\n"
+            "    y = 0\n"
+            "    if a > 1:\n"
+            "        while y < 1:\n"
+            "            y = (a+x*2)*(a+x*2) + f(a-1)\n"
+            "    return y\n"
+            "print(f(3))\n"
+            "print(x)\n"
+        )
+        expected = PythonGenerator().generate(self.parse(source)).run()
+        self.assertEqual(expected, [145, 3])
+        for level in (0, 1, 2):
+            with self.subTest(nivel=level):
+                code = MepaGenerator(cse=level >= 1, inline=True).generate(self.parse(source))
+                if level:
+                    code = MepaOptimizer(level).optimize(code)
+                # o temporário fica no registro de f, não sobre a global x
+                self.assertFalse(any(line.startswith("ARMZ 0 # cse") for line in code))
+                verify(assemble(code))
+                for engine in ("interpreter", "compiled"):
+                    self.assertEqual(run_listing(code, engine=engine).output, expected)
+
+    def test_function_without_locals_has_no_frame_allocation(self):
+        source = "def dobro(x):\n    return x + x\nprint(dobro(21))\n"
+        code = MepaGenerator().generate(self.parse(source))
+        entry = code.index("F_dobro: ENPR 1")
+        self.assertEqual(code[entry + 1:entry + 6], [
+            "CRVL 1,-3 # x", "CRVL 1,-3 # x", "SOMA", "ARMZ 1,-4 # dobro.retorno",
+            "Lfim1: RTPR 1,1",
+        ])
+        self.assertEqual(code[:5], ["INPP", "AMEM 0", "CRCT 0", "CRCT 21", "CHPR F_dobro"])
+
+    def test_small_leaf_function_is_inlined(self):
+        source = "def quadrado(x):\n    return x * x\nn=input()\nprint(quadrado(n) + 1)\n"
+        plain = MepaGenerator().generate(self.parse(source))
+        inlined = MepaGenerator(inline=True).generate(self.parse(source))
+        self.assertIn("CHPR F_quadrado", plain)
+        self.assertFalse(any(line.startswith("CHPR") for line in inlined))
+        self.assertEqual(run_listing(inlined, [6]).output, [37])
+
+    def test_recursive_function_is_not_inlined(self):
+        source = "def f(n):\n    if n < 1:\n        return 0\n    return f(n - 1) + 1\nprint(f(3))\n"
+        code = MepaGenerator(inline=True).generate(self.parse(source))
+        self.assertIn("CHPR F_f", code)
+        self.assertEqual(run_listing(code).output, [3])
+
+    def test_self_tail_call_runs_in_constant_stack(self):
+        source = (
+            "def soma(n, acc):\n"
+            "    if n == 0:\n"
+            "        return acc\n"
+            "    return soma(n - 1, acc + n)\n"
+            "print(soma(input(), 0))\n"
+        )
+        code = MepaGenerator().generate(self.parse(source))
+        # só a chamada do programa principal sobra; a de cauda vira desvio
+        self.assertEqual(sum(line.startswith("CHPR") for line in code), 1)
+        depth = verify(assemble(code)).max_depth
+        self.assertIsNotNone(depth)
+        self.assertEqual(run_listing(code, [100000], memory_size=depth).output, [5000050000])
+
+        plain = MepaGenerator(tail_calls=False).generate(self.parse(source))
+        self.assertIsNone(verify(assemble(plain)).max_depth)
+        self.assertEqual(run_listing(plain, [50]).output, [1275])
+
+    def test_tail_call_evaluates_all_arguments_first(self):
+        source = (
+            "def mdc(a, b):\n"
+            "    if b == 0:\n"
+            "        return a\n"
+            "    if a < b:\n"
+            "        return mdc(b, a)\n"
+            "    while a >= b:\n"
+            "        return mdc(a - b, b)\n"
+            "x = mdc(1071, 462)\n"
+            "print(x, mdc(0, 7))\n"
+        )
+        code = MepaGenerator().generate(self.parse(source))
+        self.assertEqual(run_listing(code).output, [21, 7])
+
+    def test_invalid_calls(self):
+        for source in (
+            "def f(a):\n    return a\nprint(f(1, 2))\n",
+            "print(g(1))\n",
+        ):
+            # sem a análise semântica, que já recusaria a função não declarada
+            ast = SyntaxAnalyzer(LexerPython(source).get_tokens()).parse()
+            with self.subTest(fonte=source), self.assertRaises(CodeGenerationError):
+                MepaGenerator().generate(ast)
+
+
+class TestLineTable(unittest.TestCase):
+    def generate(self, source: str, **options):
+        tokens = LexerPython(source).get_tokens()
+        ast = SyntaxAnalyzer(tokens).parse()
+        SemanticAnalyzer(ast).analyze()
+        generator = MepaGenerator(**options)
+        return generator.generate(ast), generator.line_table
+
+    def test_instructions_map_to_statement_lines(self):
+        code = (
+            "x=0\n"
+            "while x<3:\n"
+            "    x=x+1\n"
+            "print(x)\n"
+        )
+        instructions, table = self.generate(code)
+        self.assertIsNone(table.line_of(0))  # INPP
+        self.assertEqual(table.line_of(instructions.index("CRCT 0")), 1)
+        self.assertEqual(table.line_of(instructions.index("CMME")), 2)
+        self.assertEqual(table.line_of(instructions.index("SOMA")), 3)
+        # o desvio de volta pertence ao while, não ao último comando do corpo
+        self.assertEqual(table.line_of(instructions.index("DSVS L1")), 2)
+        self.assertEqual(table.line_of(instructions.index("IMPR")), 4)
+        self.assertEqual(table.line_of(len(instructions) - 1), 4)
+
+    def test_table_is_run_length_encoded(self):
+        instructions, table = self.generate("a=1\nb=a*2+a*3\nprint(a+b)\n")
+        self.assertEqual(list(table), [(2, 1), (4, 2), (12, 3)])
+        self.assertLess(len(table), len(instructions))
+
+    def test_indices_follow_removed_instructions(self):
+        code = (
+            "x=0\n"
+            "while x<5:\n"
+            "    x=x+1\n"
+            "    if x==3:\n"
+            "        break\n"
+            "print(x)\n"
+        )
+        instructions, table = self.generate(code)
+        # o DMEM 0 do break é retirado no fim: os índices já são os finais
+        self.assertEqual(table.line_of(instructions.index("DSVS L2")), 5)
+        self.assertEqual(table.line_of(instructions.index("IMPR")), 6)
+
+    def test_mark_merges_runs(self):
+        table = LineTable([(0, 1), (3, 1), (5, 2), (5, 3), (8, 3)])
+        self.assertEqual(table.to_dict(), {0: 1, 5: 3})
+        self.assertEqual(LineTable.from_dict(table.to_dict()).line_of(7), 3)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+from pathlib import Path
+import sys
+
+# Garante que `src` seja importável
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from lexer import LexerPython
+from syntax import SyntaxAnalyzer
+from semantic import SemanticAnalyzer
+from codegen import MepaGenerator
+from codegen.mepa_ir import parse_instruction
+from mepa import MepaAssemblyError, assemble, disassemble, run_listing
+from mepa.opcodes import ARMZ_K, CRCS, CRVL, CRVL_K, DSVF, DSVS, ENPR, NADA, RTPR_K
+
+
+def compile_source(source: str):
+    tokens = LexerPython(source).get_tokens()
+    ast = SyntaxAnalyzer(tokens).parse()
+    SemanticAnalyzer(ast).analyze()
+    return MepaGenerator().generate(ast)
+
+
+class TestMepaAssembler(unittest.TestCase):
+    def test_jump_targets_are_resolved_to_indices(self):
+        program = assemble("INPP\nL1: NADA\nCRCT 0\nDSVF L2\nDSVS L1\nL2: NADA\nPARA\n")
+        self.assertEqual(program.labels, {"L1": 1, "L2": 5})
+        self.assertEqual(program.opcodes[3], DSVF)
+        self.assertEqual(program.operands[3], 5)
+        self.assertEqual(program.opcodes[4], DSVS)
+        self.assertEqual(program.operands[4], 1)
+        self.assertEqual(program.opcodes[5], NADA)
+
+    def test_variable_comments_become_symbols(self):
+        program = assemble(["INPP", "AMEM 2", "CRVL 1 # total", "ARMZ 0 # x", "PARA"])
+        self.assertEqual(program.symbols, {1: "total", 0: "x"})
+        self.assertEqual(program.opcodes[2], CRVL)
+        self.assertEqual(program.operands[2], 1)
+
+    def test_strings_and_reals_go_to_constant_pool(self):
+        program = assemble(['INPP', 'CRCS "a # \\"b\\""', "CRCT 2.5", "CRCT 7", "PARA"])
+        self.assertEqual(program.constants, ['a # "b"', 2.5])
+        self.assertEqual(list(program.opcodes[1:3]), [CRCS, CRCS])
+        self.assertEqual(program.operand_values()[1:4], ['a # "b"', 2.5, 7])
+        self.assertTrue(program.uses_objects)
+
+    def test_errors_report_line_number(self):
+        cases = {
+            "INPP\nXPTO\nPARA": 2,
+            "INPP\nDSVS L9\nPARA": 2,
+            "L1: NADA\nL1: NADA": 2,
+            "INPP\nAMEM x": 2,
+            "INPP\nSOMA 3": 2,
+            "INPP\nCRCT\n": 2,
+        }
+        for text, line in cases.items():
+            with self.subTest(text=text):
+                with self.assertRaises(MepaAssemblyError) as ctx:
+                    assemble(text)
+                self.assertEqual(ctx.exception.linha, line)
+
+    def test_lexical_level_operands(self):
+        program = assemble([
+            "INPP", "CHPR F", "PARA",
+            "F: ENPR 1", "CRVL 1,-3 # n", "ARMZ 1,0", "CRVL 0,2", "RTPR 1,1",
+        ])
+        self.assertEqual(list(program.opcodes[3:]), [ENPR, CRVL_K, ARMZ_K, CRVL, RTPR_K])
+        self.assertEqual(program.operand_values()[3:], [1, (1, -3), (1, 0), 2, (1, 1)])
+        self.assertEqual(program.symbols, {})  # nomes no registro não são endereços absolutos
+        self.assertEqual(disassemble(program)[3:],
+                         ["F: ENPR 1", "CRVL 1,-3", "ARMZ 1,0", "CRVL 2", "RTPR 1,1"])
+        for line in ("ENPR 0", "CRVL 16,0", "RTPR 0,1", "ARMZ 1,x"):
+            with self.subTest(line=line), self.assertRaises(MepaAssemblyError):
+                assemble(["INPP", line, "PARA"])
+
+        listing = compile_source(
+            "def f(n):\n    if n < 1:\n        return 0\n    return f(n - 1) + n\nprint(f(4))\n"
+        )
+        text = disassemble(assemble(listing))
+        self.assertEqual([parse_instruction(line).arg for line in text],
+                         [parse_instruction(line).arg for line in listing])
+        self.assertEqual(run_listing(text).output, [10])
+
+    def test_blank_and_comment_lines_are_skipped(self):
+        program = assemble("\n# início\nINPP\n\n   \nPARA # fim\n")
+        self.assertEqual(len(program), 2)
+
+    def test_disassemble_round_trips_generator_output(self):
+        listing = compile_source(
+            "x=0\n"
+            "while x<3:\n"
+            "    x=x+1\n"
+            "    if x==2:\n"
+            "        print(\"dois\")\n"
+            "print(x)\n"
+        )
+        text = disassemble(assemble(listing))
+        self.assertEqual([parse_instruction(line) for line in text],
+                         [parse_instruction(line) for line in listing])
+        self.assertEqual(run_listing(text).output, run_listing(listing).output)
+
+
+if __name__ == "__main__":
+    unittest.main()
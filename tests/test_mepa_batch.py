@@ -0,0 +1,83 @@
+import unittest
+from pathlib import Path
+import sys
+
+# Garante que `src` seja importável
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from lexer import LexerPython
+from syntax import SyntaxAnalyzer
+from semantic import SemanticAnalyzer
+from codegen import MepaGenerator
+from mepa import assemble, run_batch, run_listing
+from mepa.batch import OK, LIMIT, ERROR
+from mepa.limits import Limits
+
+
+SOURCE = (
+    "n=input()\n"
+    "s=0\n"
+    "while n>0:\n"
+    "    s=s+n\n"
+    "    n=n-1\n"
+    "print(s)\n"
+)
+
+
+def compile_program(source: str):
+    tokens = LexerPython(source).get_tokens()
+    ast = SyntaxAnalyzer(tokens).parse()
+    SemanticAnalyzer(ast).analyze()
+    return assemble(MepaGenerator().generate(ast))
+
+
+class TestBatchRunner(unittest.TestCase):
+    def setUp(self):
+        self.program = compile_program(SOURCE)
+        self.inputs = [[n] for n in range(12)]
+
+    def test_results_match_single_runs(self):
+        report = run_batch(self.program, self.inputs, workers=1)
+        self.assertEqual([r.index for r in report.results], list(range(12)))
+        for result, inputs in zip(report.results, self.inputs):
+            single = run_listing(self.program, inputs)
+            self.assertEqual(result.status, OK)
+            self.assertEqual(result.output, single.output)
+            self.assertEqual(result.steps, single.steps)
+        self.assertGreater(report.runs_per_second, 0)
+
+    def test_process_pool_keeps_order(self):
+        serial = run_batch(self.program, self.inputs, workers=1)
+        parallel = run_batch(self.program, self.inputs, workers=2, chunksize=5)
+        self.assertEqual(parallel.workers, 2)
+        self.assertEqual(
+            [(r.index, r.output, r.steps) for r in parallel.results],
+            [(r.index, r.output, r.steps) for r in serial.results],
+        )
+
+    def test_budget_and_errors_are_per_run(self):
+        report = run_batch(self.program, [[3], [10 ** 6], [], [2]], max_steps=500, workers=1)
+        self.assertEqual([r.status for r in report.results], [OK, LIMIT, ERROR, OK])
+        self.assertEqual(report.results[1].steps, 500)
+        self.assertIn("entrada esgotada", report.results[2].error)
+        # a máquina reaproveitada não carrega estado de uma execução para outra
+        self.assertEqual(report.results[3].output, [3])
+        self.assertEqual(report.counts(), {OK: 2, LIMIT: 1, ERROR: 1})
+
+    def test_limits_are_described_per_run(self):
+        limits = Limits(max_memory=64, timeout=30.0)
+        report = run_batch(self.program, [[3], [10 ** 6]], max_steps=500, workers=1, limits=limits)
+        self.assertEqual([r.status for r in report.results], [OK, LIMIT])
+        self.assertIsNone(report.results[0].limit)
+        self.assertIn("Limite de passos", report.results[1].limit)
+
+    def test_compiled_engine_in_batch(self):
+        report = run_batch(self.program, self.inputs, workers=1, engine="compiled")
+        self.assertEqual([r.output[0] for r in report.results], [n * (n + 1) // 2 for n in range(12)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+import sys
+
+# Garante que `src` seja importável
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from mepa import (
+    MepaAssemblyError, assemble, from_bytes, load_binary, load_file, run_listing,
+    save_binary, to_bytes,
+)
+from mepa.binary import MAGIC
+
+
+LISTING = [
+    "INPP",
+    "AMEM 2",
+    "CRCT 0",
+    "ARMZ 0 # i",
+    "L1: NADA",
+    "CRVL 0 # i",
+    "CRCT 100000",
+    "CMME",
+    "DSVF L2",
+    "CRVL 0 # i",
+    "CRCT 25000",
+    "SOMA",
+    "ARMZ 0 # i",
+    "DSVS L1",
+    "L2: NADA",
+    'CRCS "fim: \\"ok\\""',
+    "IMPR",
+    "CRCT 2.5",
+    "CRCT 123456789012345678901234567890",
+    "MULT",
+    "IMPR",
+    "CRVL 0 # i",
+    "IMPR",
+    "PARA",
+]
+
+
+class TestMepaBinary(unittest.TestCase):
+    def test_round_trip_keeps_every_table(self):
+        program = assemble(LISTING)
+        program.lines = {0: 1, 4: 3, 15: 7}
+        data = to_bytes(program)
+        self.assertTrue(data.startswith(MAGIC))
+        self.assertEqual(from_bytes(data), program)
+
+    def test_operands_use_smallest_width(self):
+        small = to_bytes(assemble(["INPP", "CRCT 1", "IMPR", "PARA"]))
+        large = to_bytes(assemble(["INPP", "CRCT 100000", "IMPR", "PARA"]))
+        self.assertEqual(len(large) - len(small), 4 * 3)
+
+    def test_file_is_loaded_through_mmap_and_runs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "programa.mepab")
+            size = save_binary(assemble(LISTING), path)
+            self.assertEqual(os.path.getsize(path), size)
+            program = load_binary(path)
+            self.assertEqual(load_file(path), program)
+        expected = run_listing(LISTING).output
+        self.assertEqual(run_listing(program).output, expected)
+        self.assertEqual(expected[0], 'fim: "ok"')
+
+    def test_truncated_or_invalid_data_is_rejected(self):
+        data = to_bytes(assemble(LISTING))
+        for size in (0, 3, 20, len(data) // 2, len(data) - 1):
+            with self.subTest(size=size):
+                with self.assertRaises(MepaAssemblyError):
+                    from_bytes(data[:size])
+        with self.assertRaises(MepaAssemblyError):
+            from_bytes(b"XXXX" + data[4:])
+
+    def test_lexical_operands_round_trip(self):
+        program = assemble([
+            "INPP", "CRCT 0", "CRCT 6", "CHPR F", "IMPR", "PARA",
+            "F: ENPR 1", "AMEM 1", "CRVL 1,-3", "CRVL 1,-3", "MULT", "ARMZ 1,0",
+            "CRVL 1,0", "ARMZ 1,-4", "DMEM 1", "RTPR 1,1",
+        ])
+        loaded = from_bytes(to_bytes(program))
+        self.assertEqual(loaded, program)
+        self.assertEqual(run_listing(loaded).output, [36])
+        program.opcodes[4] = 40  # código sem instrução
+        with self.assertRaises(MepaAssemblyError):
+            from_bytes(to_bytes(program))
+
+    def test_jump_outside_program_is_rejected(self):
+        program = assemble(["INPP", "L1: DSVS L1", "PARA"])
+        program.operands[1] = 7
+        with self.assertRaises(MepaAssemblyError):
+            from_bytes(to_bytes(program))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+import sys
+
+# Garante que `src` seja importável
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from lexer import LexerPython
+from syntax import SyntaxAnalyzer
+from semantic import SemanticAnalyzer
+from codegen import MepaGenerator
+from mepa import (
+    Coverage, MepaAssemblyError, MepaRuntimeError, MepaVM, assemble, load_coverage, load_program,
+    run_batch, save_coverage,
+)
+from mepa.opcodes import DSVF
+from mepa.vm import input_reader
+
+
+SOURCE = (
+    "n=input()\n"
+    "s=0\n"
+    "while n>0:\n"
+    "    if n>5:\n"
+    "        s=s+n\n"
+    "    else:\n"
+    "        s=s-1\n"
+    "    n=n-1\n"
+    "print(s)\n"
+)
+ENGINES = ({}, {"fuse": False}, {"engine": "compiled"})
+
+
+def compile_program(source: str):
+    tokens = LexerPython(source).get_tokens()
+    ast = SyntaxAnalyzer(tokens).parse()
+    SemanticAnalyzer(ast).analyze()
+    generator = MepaGenerator()
+    code = generator.generate(ast)
+    return assemble(code, generator.line_table.to_dict())
+
+
+def stepped_coverage(program, inputs):
+    """Instruções e arestas percorridas, executando uma instrução por vez."""
+    vm = MepaVM(program, read=input_reader(inputs), fuse=False)
+    reached, edges = set(), set()
+    while not vm.halted:
+        pc = vm.pc
+        vm.run(max_steps=1)
+        reached.add(pc)
+        if program.opcodes[pc] == DSVF:
+            edges.add((pc, vm.pc == program.operands[pc]))
+    return reached, edges
+
+
+def collected(coverage):
+    reached = {pc for pc, bit in enumerate(coverage.instructions) if bit}
+    edges = set()
+    for k, pc in enumerate(coverage.branches):
+        if coverage.edges[2 * k]:
+            edges.add((pc, True))
+        if coverage.edges[2 * k + 1]:
+            edges.add((pc, False))
+    return reached, edges
+
+
+class TestCoverage(unittest.TestCase):
+    def setUp(self):
+        self.program = compile_program(SOURCE)
+
+    def test_matches_stepping_on_every_engine(self):
+        for inputs in ([0], [3], [8]):
+            expected = stepped_coverage(self.program, inputs)
+            plain = MepaVM(self.program, read=input_reader(inputs)).run()
+            for options in ENGINES:
+                with self.subTest(entradas=inputs, **options):
+                    coverage = Coverage(self.program)
+                    vm = MepaVM(self.program, read=input_reader(inputs), coverage=coverage, **options)
+                    vm.run(max_steps=11)  # parada no meio de um bloco
+                    result = vm.run()
+                    self.assertEqual((result.output, result.steps), (plain.output, plain.steps))
+                    self.assertEqual(collected(coverage), expected)
+
+    def test_covered_blocks_run_without_probes(self):
+        for options in ENGINES:
+            with self.subTest(**options):
+                plain = MepaVM(self.program, read=input_reader([8]), **options).run()
+                coverage = Coverage(self.program)
+                vm = MepaVM(self.program, read=input_reader([8]), coverage=coverage, **options)
+                vm.run()
+                self.assertEqual(coverage.covered, len(self.program))
+                vm.read = input_reader([8])
+                vm.reset()
+                # tudo coberto: os mesmos despachos da máquina sem cobertura
+                self.assertEqual(vm.run().dispatches, plain.dispatches)
+
+    def test_merge_and_batch(self):
+        separate = Coverage(self.program)
+        for inputs in ([0], [3]):
+            MepaVM(self.program, read=input_reader(inputs), coverage=separate).run()
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                report = run_batch(self.program, [[0], [3]], workers=workers, coverage=True)
+                self.assertEqual(report.coverage.bits(), separate.bits())
+                self.assertIn("coverage", report.to_dict())
+        self.assertLess(separate.covered, len(self.program))
+        other = Coverage(self.program)
+        MepaVM(self.program, read=input_reader([8]), coverage=other, engine="compiled").run()
+        separate.merge(other)
+        self.assertEqual(separate.covered, len(self.program))
+        self.assertEqual(separate.branches_covered, len(separate.edges))
+        with self.assertRaises(ValueError):
+            separate.merge(Coverage(compile_program("print(1)\n")))
+        with self.assertRaises(ValueError):
+            MepaVM(self.program, coverage=Coverage(compile_program("print(1)\n")))
+
+    def test_runtime_error_marks_up_to_the_failing_instruction(self):
+        listing = ["INPP", "AMEM 1", "CRCT 0", "ARMZ 0", "CRCT 1", "CRVL 0", "DIVI", "IMPR", "PARA"]
+        program = load_program(listing)
+        for options in ({}, {"fuse": False}):
+            with self.subTest(**options):
+                coverage = Coverage(program)
+                with self.assertRaises(MepaRuntimeError):
+                    MepaVM(program, coverage=coverage, **options).run()
+                self.assertEqual(coverage.uncovered(), [7, 8])
+
+    def test_line_report(self):
+        coverage = Coverage(self.program)
+        MepaVM(self.program, read=input_reader([3]), coverage=coverage).run()
+        lines = {entry.line: entry for entry in coverage.lines()}
+        self.assertEqual(lines[5].covered, 0)       # s=s+n nunca roda com n <= 5
+        self.assertTrue(lines[7].complete)
+        self.assertFalse(lines[4].complete)         # o if só seguiu por um lado
+        self.assertEqual((lines[4].branches, lines[4].branches_covered), (2, 1))
+        report = coverage.report(SOURCE).splitlines()
+        self.assertTrue(report[0].startswith("instruções:"))
+        self.assertIn("!", next(line for line in report if line.endswith("s=s+n")))
+        self.assertIn("~", next(line for line in report if line.endswith("if n>5:")))
+
+    def test_save_and_load(self):
+        coverage = Coverage(self.program)
+        MepaVM(self.program, read=input_reader([3]), coverage=coverage).run()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cobertura.mepc")
+            save_coverage(coverage, path)
+            loaded = load_coverage(path, self.program)
+            self.assertEqual(loaded.bits(), coverage.bits())
+            with self.assertRaises(MepaAssemblyError):
+                load_coverage(path, compile_program("print(1)\n"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+import unittest
+from pathlib import Path
+import sys
+
+# Garante que `src` seja importável
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from lexer import LexerPython
+from syntax import SyntaxAnalyzer
+from semantic import SemanticAnalyzer
+from codegen import MepaGenerator
+from mepa import assemble, run_batch, verify
+from mepa.batch import OK, LIMIT, ERROR
+from mepa.lanes import DEFAULT_LANE_MEMORY, HAS_NUMPY, LaneVM
+from mepa.limits import Limits
+
+
+def compile_program(source: str):
+    tokens = LexerPython(source).get_tokens()
+    ast = SyntaxAnalyzer(tokens).parse()
+    SemanticAnalyzer(ast).analyze()
+    generator = MepaGenerator()
+    listing = generator.generate(ast)
+    return assemble(listing, generator.line_table.to_dict())
+
+
+COLLATZ = (
+    "n=input()\n"
+    "c=0\n"
+    "while n!=1:\n"
+    "    if n/2*2==n:\n"
+    "        n=n/2\n"
+    "    else:\n"
+    "        n=3*n+1\n"
+    "    c=c+1\n"
+    "print(c)\n"
+)
+
+
+def summary(report):
+    return [(r.index, r.status, r.output, r.steps, r.error, r.limit) for r in report.results]
+
+
+@unittest.skipUnless(HAS_NUMPY, "NumPy não instalado")
+class TestLaneVM(unittest.TestCase):
+    def assertSameAsScalar(self, program, inputs, max_steps=None, **options):
+        scalar = run_batch(program, inputs, workers=1, max_steps=max_steps, fuse=False)
+        vm = LaneVM(program, inputs, **options)
+        self.assertEqual(summary(vm.run(max_steps)), summary(scalar))
+        return vm
+
+    def test_uniform_loop_runs_without_splits(self):
+        program = compile_program("x=input()\ns=0\nfor i in range(20):\n    s=s+x*i-i/3\nprint(s)\n")
+        vm = self.assertSameAsScalar(program, [[x] for x in range(-20, 20)])
+        self.assertEqual(vm.splits, 0)
+        self.assertEqual(vm.scalar_lanes, 0)
+
+    def test_divergent_branches_split_and_merge(self):
+        program = compile_program(COLLATZ)
+        vm = self.assertSameAsScalar(program, [[n] for n in range(1, 65)], min_lanes=1, max_groups=100)
+        self.assertGreater(vm.splits, 0)
+        self.assertEqual(vm.scalar_lanes, 0)
+
+    def test_falls_back_to_scalar_when_lanes_diverge(self):
+        program = compile_program(COLLATZ)
+        vm = self.assertSameAsScalar(program, [[n] for n in range(1, 65)], min_lanes=16, max_groups=2)
+        self.assertGreater(vm.scalar_lanes, 0)
+
+    def test_recursive_frames_split_on_return(self):
+        program = compile_program(
+            "def fib(n):\n"
+            "    if n < 2:\n"
+            "        return n\n"
+            "    a = fib(n - 1)\n"
+            "    return a + fib(n - 2)\n"
+            "print(fib(input()))\n"
+        )
+        inputs = [[n] for n in range(12)]
+        vm = self.assertSameAsScalar(program, inputs, min_lanes=1, max_groups=100)
+        self.assertGreater(vm.splits, 0)
+        self.assertEqual(vm.scalar_lanes, 0)
+        self.assertSameAsScalar(program, inputs, min_lanes=4, max_groups=2)
+
+    def test_budget_and_errors_per_lane(self):
+        program = compile_program("a=input()\nb=input()\nwhile a>0:\n    a=a-b\nprint(a)\n")
+        inputs = [[10, 3], [10, 0], [5], [10 ** 6, 1]]
+        report = LaneVM(program, inputs, min_lanes=1).run(max_steps=300)
+        self.assertEqual([r.status for r in report.results], [OK, LIMIT, ERROR, LIMIT])
+        self.assertSameAsScalar(program, inputs, max_steps=300, min_lanes=1)
+
+    def test_division_by_zero_reports_source_line(self):
+        program = compile_program("a=input()\nb=input()\nprint(a/b)\n")
+        report = LaneVM(program, [[7, 2], [7, 0]], min_lanes=1).run()
+        self.assertEqual(report.results[0].output, [3])
+        self.assertEqual(report.results[1].status, ERROR)
+        self.assertIn("(linha 3): divisão por zero", report.results[1].error)
+
+    def test_lanes_past_64_bits_continue_on_scalar_machine(self):
+        factorial = compile_program("n=input()\nf=1\nwhile n>1:\n    f=f*n\n    n=n-1\nprint(f)\n")
+        vm = self.assertSameAsScalar(factorial, [[n] for n in range(15, 31)], min_lanes=1)
+        self.assertEqual(vm.scalar_lanes, 10)   # 21! já passa de 2**63
+
+        low, high = -(1 << 63), (1 << 63) - 1
+        program = compile_program(
+            "a=input()\nb=input()\nprint(a+b)\nprint(a-b)\nprint(a*b)\nprint(-a)\nprint(a/b)\n"
+        )
+        inputs = [[high, 1], [low, 1], [low, -1], [high, high], [3, 4], [-5, 2], [1 << 32, 1 << 31]]
+        vm = self.assertSameAsScalar(program, inputs, min_lanes=1)
+        self.assertEqual(vm.results[4].output, [7, -1, 12, -3, 0])
+        self.assertGreater(vm.scalar_lanes, 0)
+
+    def test_memory_grows_to_the_scalar_size_and_limits_apply(self):
+        program = compile_program(
+            "def soma(n):\n"
+            "    if n < 1:\n"
+            "        return 0\n"
+            "    return n + soma(n - 1)\n"
+            "print(soma(input()))\n"
+        )
+        inputs = [[n] for n in (10, 700, 1500)]   # 1500 níveis passam de DEFAULT_LANE_MEMORY
+        vm = self.assertSameAsScalar(program, inputs, min_lanes=1)
+        self.assertGreater(vm.memory.shape[0], DEFAULT_LANE_MEMORY)
+        self.assertEqual(vm.results[2].output, [1500 * 1501 // 2])
+
+        limits = Limits(max_memory=3000, max_steps=20000)
+        scalar = run_batch(program, inputs, workers=1, fuse=False, limits=limits)
+        for options in ({"min_lanes": 1}, {"min_lanes": 8}):   # faixas e máquina escalar
+            with self.subTest(**options):
+                report = LaneVM(program, inputs, limits=limits, **options).run()
+                self.assertEqual(summary(report), summary(scalar))
+                self.assertEqual(
+                    [r.status for r in report.results], [OK, LIMIT, LIMIT]
+                )
+
+    def test_timeout_stops_endless_lanes(self):
+        program = compile_program("x=input()\nwhile x>0:\n    x=x+1\nprint(x)\n")
+        inputs = [[0]] * 4 + [[1]] * 4
+        for options in ({"min_lanes": 1}, {"min_lanes": 8}):   # faixas e máquina escalar
+            with self.subTest(**options):
+                report = LaneVM(program, inputs, limits=Limits(timeout=0.05), **options).run()
+                self.assertEqual([r.status for r in report.results], [OK] * 4 + [LIMIT] * 4)
+                self.assertIn("Limite de tempo", report.results[-1].limit)
+
+    def test_verified_program_gets_exact_memory(self):
+        program = compile_program(COLLATZ)
+        vm = LaneVM(program, [[n] for n in range(1, 9)], checked=False, min_lanes=1)
+        self.assertEqual(vm.memory.shape[0], verify(program).max_depth)
+        self.assertEqual([r.status for r in vm.run().results], [OK] * 8)
+
+    def test_rejects_non_integer_programs(self):
+        with self.assertRaises(ValueError):
+            LaneVM(compile_program('print("oi")\n'), [[]])
+        with self.assertRaises(ValueError):
+            LaneVM(compile_program("print(input())\n"), [[1 << 63]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import json
+import unittest
+from pathlib import Path
+import sys
+
+# Garante que `src` seja importável
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from lexer import LexerPython
+from syntax import SyntaxAnalyzer
+from semantic import SemanticAnalyzer
+from codegen import MepaGenerator
+from mepa import MepaVM, run_listing
+
+
+def compile_source(source: str):
+    tokens = LexerPython(source).get_tokens()
+    ast = SyntaxAnalyzer(tokens).parse()
+    SemanticAnalyzer(ast).analyze()
+    return MepaGenerator().generate(ast)
+
+
+NESTED = (
+    "s=0\n"
+    "i=0\n"
+    "while i<4:\n"
+    "    j=0\n"
+    "    while j<5:\n"
+    "        s=s+j\n"
+    "        j=j+1\n"
+    "    i=i+1\n"
+    "print(s)\n"
+)
+
+
+class TestMepaProfiler(unittest.TestCase):
+    def setUp(self):
+        self.listing = compile_source(NESTED)
+        self.vm = MepaVM(self.listing, profile=True, sample_every=2)
+        self.result = self.vm.run()
+
+    def test_profiling_does_not_change_execution(self):
+        plain = run_listing(self.listing)
+        self.assertEqual(self.result.output, plain.output)
+        self.assertEqual(self.result.steps, plain.steps)
+
+    def test_instruction_and_label_counts_are_exact(self):
+        profile = self.vm.profile
+        counts = profile.instruction_counts()
+        self.assertEqual(sum(counts), self.result.steps)
+        inner_store = len(self.listing) - 1 - self.listing[::-1].index("ARMZ 0 # s")
+        self.assertEqual(counts[inner_store], 20)
+        self.assertEqual(counts[-1], 1)  # PARA
+        labels = profile.label_counts()
+        self.assertEqual(labels["L1"], 5)   # teste do laço externo: 4 voltas + saída
+        self.assertEqual(labels["L3"], 24)  # teste do laço interno: 4 x (5 + 1)
+
+    def test_hot_block_is_inner_loop_body(self):
+        hottest = self.vm.profile.hot_blocks(1)[0]
+        self.assertEqual(hottest.entries, 20)
+        self.assertGreater(hottest.samples, 0)
+        self.assertIn("ARMZ 0 # s", self.listing[hottest.start:hottest.end])
+        self.assertIn("instruções executadas", self.vm.profile.report())
+
+    def test_folded_stacks_nest_loops(self):
+        folded = self.vm.profile.to_folded(weight="count").splitlines()
+        stacks = dict(line.rsplit(" ", 1) for line in folded)
+        inner = [stack for stack in stacks if stack.count("laco_") == 2]
+        self.assertTrue(inner)
+        self.assertTrue(all(stack.startswith("programa;laco_L1;laco_L3;") for stack in inner))
+        self.assertEqual(sum(int(v) for v in stacks.values()), self.result.steps)
+
+    def test_json_dump(self):
+        data = json.loads(self.vm.profile.to_json())
+        self.assertEqual(sum(item["count"] for item in data["instructions"]), self.result.steps)
+        self.assertEqual(data["labels"]["L3"], 24)
+
+    def test_step_limit_and_resume_are_profiled(self):
+        vm = MepaVM(self.listing, profile=True)
+        while not vm.run(max_steps=7).halted:
+            pass
+        self.assertEqual(vm.steps, self.result.steps)
+        self.assertEqual(vm.profile.instruction_counts(), self.vm.profile.instruction_counts())
+
+
+if __name__ == "__main__":
+    unittest.main()
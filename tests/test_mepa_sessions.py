@@ -0,0 +1,118 @@
+import asyncio
+import unittest
+from pathlib import Path
+import sys
+
+# Garante que `src` seja importável
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from lexer import LexerPython
+from syntax import SyntaxAnalyzer
+from semantic import SemanticAnalyzer
+from codegen import MepaGenerator
+from mepa import MepaRuntimeError, Session, assemble, run_listing, run_sessions
+from mepa.limits import Limits, STEPS
+
+
+ECHO = (
+    "s=0\n"
+    "n=input()\n"
+    "while n!=0:\n"
+    "    s=s+n\n"
+    "    print(s)\n"
+    "    n=input()\n"
+    "print(s*2)\n"
+)
+
+
+def compile_program(source: str):
+    tokens = LexerPython(source).get_tokens()
+    ast = SyntaxAnalyzer(tokens).parse()
+    SemanticAnalyzer(ast).analyze()
+    return assemble(MepaGenerator().generate(ast))
+
+
+def feeder(values):
+    """Fonte assíncrona que entrega `values` em ordem e depois EOFError."""
+    pending = list(values)
+
+    async def read():
+        await asyncio.sleep(0)
+        if not pending:
+            raise EOFError
+        return pending.pop(0)
+
+    return read
+
+
+class TestSessions(unittest.TestCase):
+    def setUp(self):
+        self.program = compile_program(ECHO)
+
+    def test_output_and_steps_match_plain_run(self):
+        inputs = [3, 4, 5, 0]
+        expected = run_listing(self.program, inputs)
+        for options in ({}, {"fuse": False}, {"engine": "compiled"}):
+            with self.subTest(**options):
+                chunks = []
+
+                async def write(values):
+                    chunks.append(values)
+
+                session = Session(self.program, feeder(inputs), write, quantum=7, **options)
+                result = asyncio.run(session.run())
+                self.assertTrue(result.halted)
+                self.assertEqual(result.steps, expected.steps)
+                self.assertEqual([v for chunk in chunks for v in chunk], expected.output)
+                self.assertEqual(session.waits, len(inputs))
+                self.assertGreater(session.slices, session.waits)
+
+    def test_output_stays_in_result_without_writer(self):
+        result = asyncio.run(Session(self.program, feeder([2, 0])).run())
+        self.assertEqual(result.output, [2, 4])
+
+    def test_busy_session_does_not_block_others(self):
+        busy = compile_program("x=0\nwhile x>=0:\n    x=x+1\n")
+        finished = []
+
+        async def scenario():
+            async def track(name, session):
+                result = await session.run()
+                finished.append(name)
+                return result
+
+            queue = asyncio.Queue()
+            loop_session = Session(busy, feeder([]), quantum=100, limits=Limits(max_steps=50_000))
+            echo_session = Session(self.program, queue.get, quantum=100)
+            tasks = [
+                asyncio.ensure_future(track("laço", loop_session)),
+                asyncio.ensure_future(track("eco", echo_session)),
+            ]
+            for value in (1, 2, 0):
+                await asyncio.sleep(0)
+                await queue.put(value)
+            return await asyncio.gather(*tasks)
+
+        loop_result, echo_result = asyncio.run(scenario())
+        self.assertEqual(finished, ["eco", "laço"])
+        self.assertEqual(echo_result.output, [1, 3, 6])
+        self.assertEqual(loop_result.limit.kind, STEPS)
+
+    def test_end_of_input_is_runtime_error(self):
+        sessions = [Session(self.program, feeder([1, 0])), Session(self.program, feeder([1]))]
+        ok, failed = asyncio.run(run_sessions(sessions))
+        self.assertEqual(ok.output, [1, 2])
+        self.assertIsInstance(failed, MepaRuntimeError)
+        self.assertIn("entrada esgotada", str(failed))
+
+    def test_many_concurrent_sessions(self):
+        sessions = [Session(self.program, feeder([k, k, 0]), memory_size=64) for k in range(1, 201)]
+        results = asyncio.run(run_sessions(sessions))
+        self.assertEqual([r.output for r in results], [[k, 2 * k, 4 * k] for k in range(1, 201)])
+
+
+if __name__ == "__main__":
+    unittest.main()
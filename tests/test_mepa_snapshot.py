@@ -0,0 +1,139 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+import sys
+
+# Garante que `src` seja importável
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from lexer import LexerPython
+from syntax import SyntaxAnalyzer
+from semantic import SemanticAnalyzer
+from codegen import MepaGenerator
+from mepa import (
+    MepaSnapshotError, MepaVM, assemble, load_program, load_snapshot, restore, resume,
+    save_snapshot, snapshot,
+)
+from mepa.vm import input_reader
+
+
+SOURCE = (
+    "n=input()\n"
+    "s=0\n"
+    "while n>0:\n"
+    "    m=input()\n"
+    "    s=s+m*n\n"
+    "    print(s)\n"
+    "    n=n-1\n"
+    "print(s)\n"
+)
+INPUTS = [4, 10, 20, 30, 40]
+
+
+def compile_program(source: str):
+    tokens = LexerPython(source).get_tokens()
+    ast = SyntaxAnalyzer(tokens).parse()
+    SemanticAnalyzer(ast).analyze()
+    return assemble(MepaGenerator().generate(ast))
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.program = compile_program(SOURCE)
+        self.expected = MepaVM(self.program, read=input_reader(INPUTS)).run()
+
+    def test_resume_at_any_instruction(self):
+        for options in ({}, {"fuse": False}, {"engine": "compiled"}, {"storage": "array"}):
+            for stop in (1, 5, 17, 40, self.expected.steps - 1):
+                with self.subTest(parada=stop, **options):
+                    vm = MepaVM(self.program, read=input_reader(INPUTS), **options)
+                    vm.run(max_steps=stop)
+                    data = snapshot(vm)
+                    resumed = resume(data, self.program, INPUTS, **options)
+                    self.assertEqual((resumed.pc, resumed.sp, resumed.steps), (vm.pc, vm.sp, vm.steps))
+                    result = resumed.run()
+                    self.assertEqual(result.output, self.expected.output)
+                    self.assertEqual(result.steps, self.expected.steps)
+
+    def test_restore_into_used_machine(self):
+        vm = MepaVM(self.program, read=input_reader(INPUTS))
+        vm.run(max_steps=30)
+        data = snapshot(vm)
+        vm.run()
+        vm.read = input_reader(INPUTS[2:])
+        restore(vm, data)
+        self.assertFalse(vm.halted)
+        self.assertEqual(vm.run().output, self.expected.output)
+
+    def test_call_frames_live_in_the_stack(self):
+        listing = [
+            "INPP", "AMEM 1", "CRCT 4", "ARMZ 0", "CHPR F", "CRVL 0", "IMPR", "PARA",
+            "F: CRVL 0", "CRVL 0", "MULT", "ARMZ 0", "RTPR",
+        ]
+        program = load_program(listing)
+        vm = MepaVM(program)
+        vm.run(max_steps=6)  # dentro de F, com o endereço de retorno na pilha
+        self.assertGreaterEqual(vm.pc, 8)
+        self.assertEqual(resume(snapshot(vm), program).run().output, [16])
+
+    def test_display_is_saved_with_the_frames(self):
+        program = compile_program(
+            "def fat(n):\n"
+            "    if n < 2:\n"
+            "        return 1\n"
+            "    return n * fat(n - 1)\n"
+            "print(fat(6))\n"
+        )
+        for options in ({}, {"engine": "compiled"}):
+            with self.subTest(**options):
+                vm = MepaVM(program, **options)
+                vm.run(max_steps=40)  # algumas chamadas dentro da recursão
+                self.assertNotEqual(vm.display[1], 0)
+                resumed = resume(snapshot(vm), program, **options)
+                self.assertEqual(resumed.display, vm.display)
+                self.assertEqual(resumed.run().output, [720])
+
+    def test_embedded_program_and_tagged_values(self):
+        listing = [
+            "INPP", "AMEM 3", 'CRCS "olá"', "ARMZ 0", "CRCT 2.5", "ARMZ 1",
+            "CRCT 123456789012345678901234567890", "ARMZ 2", "CRVL 0", "IMPR",
+            "CRVL 1", "CRVL 2", "PARA",
+        ]
+        vm = MepaVM(listing)
+        vm.run(max_steps=12)
+        data = snapshot(vm, include_program=True)
+        resumed = resume(data)
+        self.assertEqual(resumed.memory[:5], vm.memory[:5])
+        self.assertEqual(resumed.output, ["olá"])
+        self.assertTrue(resumed.run().halted)
+
+    def test_invalid_snapshots_are_rejected(self):
+        vm = MepaVM(self.program, read=input_reader(INPUTS))
+        vm.run(max_steps=10)
+        data = snapshot(vm)
+        with self.assertRaises(MepaSnapshotError):
+            resume(data, compile_program("print(1)\n"))
+        with self.assertRaises(MepaSnapshotError):
+            resume(data)  # sem o programa
+        with self.assertRaises(MepaSnapshotError):
+            resume(data[:-3], self.program)
+        with self.assertRaises(MepaSnapshotError):
+            resume(b"MEPB" + data[4:], self.program)
+
+    def test_save_and_load_file(self):
+        vm = MepaVM(self.program, read=input_reader(INPUTS))
+        vm.run(max_steps=25)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "estado.meps")
+            size = save_snapshot(vm, path, include_program=True)
+            self.assertEqual(size, os.path.getsize(path))
+            resumed = resume(load_snapshot(path), inputs=INPUTS, engine="compiled")
+        self.assertEqual(resumed.run().output, self.expected.output)
+
+
+if __name__ == "__main__":
+    unittest.main()
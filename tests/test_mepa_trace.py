@@ -0,0 +1,203 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+import sys
+
+# Garante que `src` seja importável
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from lexer import LexerPython
+from syntax import SyntaxAnalyzer
+from semantic import SemanticAnalyzer
+from codegen import MepaGenerator
+from mepa import (
+    InputPending, MepaAssemblyError, MepaRuntimeError, MepaVM, TraceReader, TraceWriter,
+    assemble, load_program,
+)
+from mepa.opcodes import ARMZ
+from mepa.trace import trace_leaders
+from mepa.vm import input_reader
+
+
+SOURCE = (
+    "n=input()\n"
+    "s=0\n"
+    "i=0\n"
+    "while i<n:\n"
+    "    if i>3:\n"
+    "        s=s+i*i\n"
+    "    else:\n"
+    "        s=s-1\n"
+    "    i=i+1\n"
+    "print(s)\n"
+)
+INPUTS = [12]
+
+
+def compile_program(source: str):
+    tokens = LexerPython(source).get_tokens()
+    ast = SyntaxAnalyzer(tokens).parse()
+    SemanticAnalyzer(ast).analyze()
+    return assemble(MepaGenerator().generate(ast))
+
+
+def history(program, inputs):
+    """Gravações de cada slot, (passo, valor), executando uma instrução por vez."""
+    vm = MepaVM(program, read=input_reader(inputs), fuse=False)
+    writes = {}
+    while not vm.halted:
+        pc, step = vm.pc, vm.steps
+        vm.run(max_steps=1)
+        if program.opcodes[pc] == ARMZ:
+            slot = program.operands[pc]
+            writes.setdefault(slot, []).append((step, vm.memory[slot]))
+    return writes, vm.steps
+
+
+class TestTrace(unittest.TestCase):
+    def setUp(self):
+        self.program = compile_program(SOURCE)
+        self.expected = MepaVM(self.program, read=input_reader(INPUTS)).run()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "exec.mept")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def record(self, chunk_steps=40, **options):
+        with TraceWriter(self.path, chunk_steps=chunk_steps) as trace:
+            vm = MepaVM(self.program, read=input_reader(INPUTS), trace=trace, **options)
+            vm.run(max_steps=17)  # execução retomada continua no mesmo rastro
+            result = vm.run()
+        return result
+
+    def test_tracing_does_not_change_execution(self):
+        for options in ({}, {"fuse": False}, {"engine": "compiled"}):
+            with self.subTest(**options):
+                result = self.record(**options)
+                self.assertEqual(result.output, self.expected.output)
+                self.assertEqual(result.steps, self.expected.steps)
+                with TraceReader(self.path) as reader:
+                    self.assertEqual(reader.steps, self.expected.steps)
+                    self.assertGreater(len(reader.chunks), 1)
+                    records = list(reader.iter_records())
+                    self.assertEqual(sum(r.count for r in records), self.expected.steps)
+                    self.assertEqual(len(records), reader.records)
+                    for previous, record in zip(records, records[1:]):
+                        self.assertEqual(record.step, previous.step + previous.count)
+
+    def test_last_write_matches_stepping(self):
+        writes, steps = history(self.program, INPUTS)
+        for engine in ("interpreter", "compiled"):
+            self.record(engine=engine)
+            with TraceReader(self.path) as reader:
+                for slot, found in writes.items():
+                    for before in range(0, steps + 1, 5):
+                        with self.subTest(engine=engine, slot=slot, before=before):
+                            earlier = [w for w in found if w[0] < before]
+                            write = reader.last_write(slot, before)
+                            if not earlier:
+                                self.assertIsNone(write)
+                            else:
+                                self.assertEqual((write.step, write.value), earlier[-1])
+                                self.assertEqual(write.line, reader.line_of(write.pc))
+
+    def test_state_at_replays_exactly(self):
+        self.record(engine="compiled")
+        symbols = self.program.symbols
+        with TraceReader(self.path) as reader:
+            for step in range(0, self.expected.steps + 1, 11):
+                with self.subTest(passo=step):
+                    vm = reader.state_at(step)
+                    ref = MepaVM(self.program, read=input_reader(INPUTS))
+                    ref.run(max_steps=step)
+                    self.assertEqual((vm.steps, vm.pc, vm.sp), (ref.steps, ref.pc, ref.sp))
+                    for slot in symbols:
+                        self.assertEqual(vm.memory[slot], ref.memory[slot])
+            with self.assertRaises(ValueError):
+                reader.state_at(self.expected.steps + 1)
+            self.assertEqual(reader.slot_of("s"), next(k for k, v in symbols.items() if v == "s"))
+
+    def test_frame_writes_are_replayed(self):
+        self.program = compile_program(
+            "def fat(n):\n"
+            "    r = 1\n"
+            "    if n > 1:\n"
+            "        r = n * fat(n - 1)\n"
+            "    return r\n"
+            "print(fat(input()))\n"
+        )
+        for engine in ("interpreter", "compiled"):
+            result = self.record(chunk_steps=25, engine=engine)
+            self.assertEqual(result.output, [479001600])
+            with TraceReader(self.path) as reader:
+                for step in range(0, result.steps + 1, 7):
+                    with self.subTest(engine=engine, passo=step):
+                        vm = reader.state_at(step)
+                        ref = MepaVM(self.program, read=input_reader(INPUTS))
+                        ref.run(max_steps=step)
+                        self.assertEqual((vm.pc, vm.sp, vm.display), (ref.pc, ref.sp, ref.display))
+                        self.assertEqual(vm.memory[:ref.sp + 1], ref.memory[:ref.sp + 1])
+
+    def test_blocks_write_each_slot_once(self):
+        listing = [
+            "INPP", "AMEM 1", "CRCT 1", "ARMZ 0", "CRVL 0", "CRCT 2", "SOMA", "ARMZ 0",
+            "CRVL 0", "IMPR", "PARA",
+        ]
+        program = load_program(listing)
+        self.assertIn(7, trace_leaders(program))
+        with TraceWriter(self.path) as trace:
+            MepaVM(program, engine="compiled", trace=trace).run()
+        with TraceReader(self.path) as reader:
+            self.assertEqual(reader.last_write(0, 7).value, 1)
+            self.assertEqual(reader.last_write(0).value, 3)
+
+    def test_interrupted_blocks_are_recorded(self):
+        pending = []
+
+        def read():
+            if pending:  # a primeira leitura sinaliza que a entrada ainda não chegou
+                pending.pop()
+                raise InputPending
+            return 12
+
+        for engine in ("interpreter", "compiled"):
+            with TraceWriter(self.path) as trace:
+                vm = MepaVM(self.program, read=read, engine=engine, trace=trace)
+                pending.append(True)
+                with self.assertRaises(InputPending):
+                    vm.run()
+                result = vm.run()
+            with TraceReader(self.path) as reader:
+                self.assertEqual(reader.steps, result.steps)
+            self.assertEqual(result.output, self.expected.output)
+
+        failing = load_program(["INPP", "AMEM 1", "CRCT 1", "ARMZ 0", "CRVL 0", "CRCT 0", "DIVI", "PARA"])
+        with TraceWriter(self.path) as trace:
+            vm = MepaVM(failing, trace=trace)
+            with self.assertRaises(MepaRuntimeError):
+                vm.run()
+        with TraceReader(self.path) as reader:
+            # a instrução que falhou conta em `steps`, mas não entra no rastro
+            self.assertEqual(reader.steps, vm.steps - 1)
+            self.assertEqual(reader.last_write(0).value, 1)
+
+    def test_invalid_traces_are_rejected(self):
+        self.record()
+        with open(self.path, "rb") as f:
+            data = f.read()
+        for bad in (b"", b"MEPB" + data[4:], data[:-5]):
+            with open(self.path, "wb") as f:
+                f.write(bad)
+            with self.subTest(tamanho=len(bad)), self.assertRaises(MepaAssemblyError):
+                TraceReader(self.path).close()
+        with self.assertRaises(ValueError):
+            MepaVM(self.program, profile=True, trace=TraceWriter(os.path.join(self.tmp.name, "x")))
+
+
+if __name__ == "__main__":
+    unittest.main()
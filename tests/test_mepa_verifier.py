@@ -0,0 +1,201 @@
+import unittest
+from pathlib import Path
+import sys
+
+# Garante que `src` seja importável
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from lexer import LexerPython
+from syntax import SyntaxAnalyzer
+from semantic import SemanticAnalyzer
+from codegen import MepaGenerator
+from optimizer import MepaOptimizer
+from mepa import (
+    MepaVM, MepaMemoryError, MepaVerifyError, assemble, load_program, run_batch, verify,
+)
+from mepa.compiler import CompiledProgram
+from mepa.vm import DEFAULT_MEMORY_SIZE, input_reader
+
+
+SOURCE = (
+    "n=input()\n"
+    "s=0\n"
+    "i=0\n"
+    "while i<n:\n"
+    "    if i>3:\n"
+    "        s=s+i*(i-1)\n"
+    "    else:\n"
+    "        s=s-1\n"
+    "    i=i+1\n"
+    "print(s)\n"
+)
+
+# G grava 7 em x e descarta o parâmetro
+CALL = [
+    "INPP", "AMEM 1", "CRCT 5", "CHPR G", "CRVL 0", "IMPR", "PARA",
+    "G: CRCT 7", "ARMZ 0", "RTPR 1",
+]
+# F imprime x e chama a si mesma até x chegar a 0
+RECURSIVE = [
+    "INPP", "AMEM 1", "CRCT 3", "ARMZ 0", "CHPR F", "PARA",
+    "F: CRVL 0", "DSVF FIM", "CRVL 0", "IMPR", "CRVL 0", "CRCT 1", "SUBT", "ARMZ 0",
+    "CHPR F", "FIM: RTPR",
+]
+
+
+def compile_listing(source: str, level: int = 0):
+    tokens = LexerPython(source).get_tokens()
+    ast = SyntaxAnalyzer(tokens).parse()
+    SemanticAnalyzer(ast).analyze()
+    code = MepaGenerator(cse=level >= 1).generate(ast)
+    return MepaOptimizer(level).optimize(code) if level else code
+
+
+def stepped_peak(program, inputs=()):
+    """Maior profundidade da pilha, executando uma instrução por vez."""
+    vm = MepaVM(program, read=input_reader(inputs), fuse=False)
+    peak = 0
+    while not vm.halted:
+        vm.run(max_steps=1)
+        peak = max(peak, vm.sp + 1)
+    return peak
+
+
+class TestVerifier(unittest.TestCase):
+    def test_generated_programs_have_exact_depth(self):
+        for level in (0, 1, 2):
+            with self.subTest(nivel=level):
+                program = assemble(compile_listing(SOURCE, level))
+                verification = verify(program)
+                self.assertEqual(verification.reachable, len(program))
+                self.assertEqual(verification.max_depth, stepped_peak(program, [12]))
+
+    def test_procedures(self):
+        program = load_program(CALL)
+        verification = verify(program)
+        self.assertEqual(verification.procedures, {7: 1})
+        self.assertEqual(verification.depths[4], 1)   # depois do CHPR, sem o parâmetro
+        self.assertEqual(verification.depths[8], 1)   # relativa ao endereço de retorno
+        self.assertEqual(verification.max_depth, stepped_peak(program))
+
+        recursive = verify(load_program(RECURSIVE))
+        self.assertIsNone(recursive.max_depth)
+        self.assertIn("recursão", recursive.summary())
+
+    def test_lexical_frames(self):
+        source = (
+            "def soma(a, b):\n"
+            "    t = a + b\n"
+            "    return t * quadrado(t)\n"
+            "def quadrado(x):\n"
+            "    return x * x\n"
+            "print(soma(input(), 2))\n"
+        )
+        for level in (0, 1, 2):
+            with self.subTest(nivel=level):
+                program = assemble(compile_listing(source, level))
+                verification = verify(program)
+                self.assertEqual(verification.max_depth, stepped_peak(program, [3]))
+
+        frame = ["INPP", "CRCT 0", "CRCT 5", "CHPR F", "IMPR", "PARA", "F: ENPR 1", "AMEM 1"]
+        cases = [
+            (frame + ["CRVL 1,-3", "ARMZ 1,-4", "DMEM 1", "RTPR 1,1"], None, None),
+            (frame + ["CRVL 1,1", "ARMZ 1,-4", "DMEM 1", "RTPR 1,1"], 8, "área viva"),
+            (frame + ["CRVL 1,-2", "ARMZ 1,-4", "DMEM 1", "RTPR 1,1"], 8, "endereço de retorno"),
+            (frame + ["CRVL 1,-5", "ARMZ 1,-4", "DMEM 1", "RTPR 1,1"], 8, "fundo da pilha"),
+            (frame + ["CRVL 2,0", "ARMZ 1,-4", "DMEM 1", "RTPR 1,1"], 8, "ENPR 2"),
+            (frame + ["CRCT 1", "DSVF G", "DMEM 1", "RTPR 1,1", "G: DMEM 1", "RTPR 1,2"], 11,
+             "outro retorno"),
+            (frame + ["CRVL 1,0", "ARMZ 1,-4", "RTPR 1,1"], 10, "só o display"),
+            (frame + ["DMEM 1", "RTPR 1"], 9, "não restaura"),
+            (frame + ["DMEM 1", "ENPR 1", "RTPR 1,1"], 9, "ENPR fora"),
+        ]
+        for listing, index, detail in cases:
+            with self.subTest(listagem=listing):
+                if index is None:
+                    verify(load_program(listing))
+                    continue
+                with self.assertRaises(MepaVerifyError) as ctx:
+                    verify(load_program(listing))
+                self.assertEqual(ctx.exception.indice, index)
+                self.assertIn(detail, str(ctx.exception))
+
+    def test_rejected_programs(self):
+        cases = [
+            (["INPP", "CRCT 1", "SOMA", "PARA"], 2, "desempilha 2"),
+            (["INPP", "CRCT 0", "DSVF L", "CRCT 5", "L: PARA"], 4, "caminhos chegam"),
+            (["INPP", "AMEM 1", "CRCT 1", "ARMZ 0"], 3, "fim do programa"),
+            (["INPP", "AMEM 1", "CRVL 2", "IMPR", "PARA"], 2, "área viva"),
+            (["INPP", "AMEM 2", "DMEM 3", "PARA"], 2, "DMEM 3"),
+            (["INPP", "RTPR", "PARA"], 1, "fora de procedimento"),
+            (["INPP", "CHPR F", "PARA", "F: CRCT 1", "RTPR"], 4, "a mais"),
+            (["INPP", "CHPR F", "PARA", "F: DMEM 1", "RTPR"], 3, "DMEM 1"),
+            (["INPP", "CHPR F", "PARA", "F: CRVL 0", "IMPR", "RTPR"], 3, "endereço de retorno"),
+            (["INPP", "CHPR F", "PARA", "F: CRVL 0", "DSVF G", "RTPR", "G: RTPR 1"], 5, "RTPR 1"),
+            (["INPP", "CHPR F", "CHPR G", "PARA", "F: NADA", "G: RTPR"], 5, "pelo procedimento em 4"),
+        ]
+        for listing, index, detail in cases:
+            with self.subTest(listagem=listing):
+                with self.assertRaises(MepaVerifyError) as ctx:
+                    verify(load_program(listing))
+                self.assertEqual(ctx.exception.indice, index)
+                self.assertIn(detail, str(ctx.exception))
+
+        program = load_program(["INPP", "DSVS L", "L: PARA"])
+        program.operands[1] = 9
+        with self.assertRaises(MepaVerifyError):
+            verify(program)
+
+    def test_unchecked_vm_matches_checked(self):
+        program = assemble(compile_listing(SOURCE))
+        for options in ({}, {"engine": "compiled"}):
+            with self.subTest(**options):
+                expected = MepaVM(program, read=input_reader([12]), **options).run()
+                vm = MepaVM(program, read=input_reader([12]), checked=False, **options)
+                self.assertEqual(vm.memory_size, vm.verification.max_depth)
+                vm.run(max_steps=9)  # retomada no meio de um bloco
+                result = vm.run()
+                self.assertEqual((result.output, result.steps), (expected.output, expected.steps))
+
+        for listing, output in ((CALL, [7]), (RECURSIVE, [3, 2, 1])):
+            vm = MepaVM(listing, engine="compiled", checked=False)
+            self.assertEqual(vm.run().output, output)
+        self.assertEqual(vm.memory_size, DEFAULT_MEMORY_SIZE)  # recursão: tamanho padrão
+
+        with self.assertRaises(MepaVerifyError):
+            MepaVM(["INPP", "SOMA", "PARA"], checked=False)
+
+    def test_unchecked_vm_drops_runtime_guards(self):
+        listing = ["INPP", "CRCT 7", "DSVS L", "L: IMPR", "PARA"]
+        # o verificador rejeita a pilha vazia no IMPR...
+        with self.assertRaises(MepaVerifyError):
+            MepaVM(["INPP", "IMPR", "PARA"], checked=False)
+        # ...mas uma máquina verificada confia no estado: posta fora dele, o
+        # bloco do IMPR roda sem conferir, enquanto a conferida o acusa
+        checked = MepaVM(listing, engine="compiled")
+        unchecked = MepaVM(listing, engine="compiled", checked=False)
+        for vm in (checked, unchecked):
+            vm.pc, vm.sp = 3, -1
+        with self.assertRaises(MepaMemoryError):
+            checked.run()
+        self.assertEqual(unchecked.run().output, [0])
+
+        program = load_program(["INPP", "AMEM 1", "CRVL 1,-2", "IMPR", "DMEM 1", "PARA"])
+        self.assertIn("raise BelowMemory", CompiledProgram(program).source)
+        self.assertNotIn("raise BelowMemory", CompiledProgram(program, checked=False).source)
+
+    def test_unchecked_batch(self):
+        program = assemble(compile_listing(SOURCE))
+        inputs = [[n] for n in range(10)]
+        expected = run_batch(program, inputs, workers=1, engine="compiled")
+        report = run_batch(program, inputs, workers=1, engine="compiled", checked=False)
+        self.assertEqual(
+            [r.output for r in report.results], [r.output for r in expected.results]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
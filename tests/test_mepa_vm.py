@@ -0,0 +1,440 @@
+import unittest
+from pathlib import Path
+import sys
+
+# Garante que `src` seja importável
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from lexer import LexerPython
+from syntax import SyntaxAnalyzer
+from semantic import SemanticAnalyzer
+from codegen import MepaGenerator
+from optimizer import MepaOptimizer
+from mepa import (
+    MepaVM, MepaRuntimeError, MepaMemoryError, MepaOutOfMemoryError, MepaAssemblyError,
+    assemble, load_program, run_listing,
+)
+from mepa.limits import Limits, STEPS, MEMORY, TIME
+
+
+def compile_source(source: str, **options):
+    """Executa o pipeline completo até o código MEPA."""
+    tokens = LexerPython(source).get_tokens()
+    ast = SyntaxAnalyzer(tokens).parse()
+    SemanticAnalyzer(ast).analyze()
+    return MepaGenerator(**options).generate(ast)
+
+
+# Programas usados para comparar execução com e sem otimização
+PROGRAMS = {
+    "laco": (
+        "a=5\n"
+        "i=0\n"
+        "s=0\n"
+        "while i<100:\n"
+        "    b=a*2\n"
+        "    s=s+b+i*3+i*3+i*3\n"
+        "    i=i+1\n"
+        "print(s)\n",
+        [],
+    ),
+    "aninhado": (
+        "n=input()\n"
+        "t=0\n"
+        "for i in range(n):\n"
+        "    for j in range(n):\n"
+        "        t=t+i*n+j\n"
+        "print(t)\n",
+        [12],
+    ),
+    "break_continue": (
+        "x=0\n"
+        "s=0\n"
+        "while x<50:\n"
+        "    x=x+1\n"
+        "    if x==20:\n"
+        "        continue\n"
+        "    if x==40:\n"
+        "        break\n"
+        "    s=s+x\n"
+        "print(s)\n"
+        "print(x)\n",
+        [],
+    ),
+    "subexpressoes": (
+        "n=input()\n"
+        "i=0\n"
+        "s=0\n"
+        "while i<n:\n"
+        "    d=(i+n)*(i-1)\n"
+        "    t=(i+n)*(i-1)*2\n"
+        "    s=s+d+(i+n)*(i-1)+t\n"
+        "    i=i+1\n"
+        "print(s)\n",
+        [30],
+    ),
+}
+
+
+class TestMepaVM(unittest.TestCase):
+    def run_source(self, source: str, inputs=()):
+        return run_listing(compile_source(source), inputs)
+
+    def test_loop_and_print(self):
+        result = self.run_source("x=0\nwhile x<3:\n    x=x+1\nprint(x)\n")
+        self.assertTrue(result.halted)
+        self.assertEqual(result.output, [3])
+
+    def test_for_range_runs_n_times(self):
+        result = self.run_source("x=0\nfor i in range(4):\n    x=x+1\nprint(x)\n")
+        self.assertEqual(result.output, [4])
+
+    def test_input_and_string_output(self):
+        result = self.run_source('n=input()\nprint("dobro", n*2)\n', [21])
+        self.assertEqual(result.output, ['"dobro"', 42])
+
+    def test_division_truncates_toward_zero(self):
+        result = self.run_source("a=0-7\nprint(a/2)\nprint(7/2)\n")
+        self.assertEqual(result.output, [-3, 3])
+
+    def test_division_by_zero_is_reported(self):
+        with self.assertRaises(MepaRuntimeError) as ctx:
+            self.run_source("a=0\nprint(1/a)\n")
+        self.assertIn("divisão por zero", str(ctx.exception))
+
+    def test_runtime_error_reports_source_line(self):
+        tokens = LexerPython("a=2\nb=a-2\nprint(a/b)\n").get_tokens()
+        generator = MepaGenerator()
+        listing = generator.generate(SyntaxAnalyzer(tokens).parse())
+        program = assemble(listing, generator.line_table.to_dict())
+        for fuse in (True, False):
+            with self.assertRaises(MepaRuntimeError) as ctx:
+                MepaVM(program, fuse=fuse).run()
+            self.assertEqual(ctx.exception.linha, 3)
+            self.assertIn("(linha 3)", str(ctx.exception))
+
+    def test_run_can_resume_after_step_limit(self):
+        vm = MepaVM(compile_source("x=0\nwhile x<10:\n    x=x+1\nprint(x)\n"))
+        first = vm.run(max_steps=5)
+        self.assertFalse(first.halted)
+        self.assertEqual(first.steps, 5)
+        final = vm.run()
+        self.assertTrue(final.halted)
+        self.assertEqual(final.output, [10])
+
+    def test_call_and_return(self):
+        listing = [
+            "INPP", "AMEM 1", "CRCT 4", "ARMZ 0", "CHPR F", "CRVL 0", "IMPR", "PARA",
+            "F: CRVL 0", "CRVL 0", "MULT", "ARMZ 0", "RTPR",
+        ]
+        self.assertEqual(run_listing(listing).output, [16])
+
+    def test_array_memory_detects_overflow(self):
+        listing = ["INPP", "CRCT 9223372036854775807", "CRCT 2", "MULT", "IMPR", "PARA"]
+        with self.assertRaises(MepaRuntimeError):
+            run_listing(listing, storage="array")
+        self.assertEqual(run_listing(listing).output, [2 * 9223372036854775807])
+
+    def test_array_memory_rejects_strings(self):
+        with self.assertRaises(ValueError):
+            MepaVM(['INPP', 'CRCS "\\"a\\""', "IMPR", "PARA"], storage="array")
+
+    def test_loader_rejects_unknown_instruction_and_label(self):
+        with self.assertRaises(MepaAssemblyError):
+            load_program(["INPP", "XPTO", "PARA"])
+        with self.assertRaises(MepaAssemblyError):
+            load_program(["INPP", "DSVS L9", "PARA"])
+
+    def test_stack_overflow_is_reported(self):
+        with self.assertRaises(MepaRuntimeError):
+            run_listing(["INPP", "L1: CRCT 1", "DSVS L1"], memory_size=16)
+
+
+class TestOptimizedExecution(unittest.TestCase):
+    """Otimizações preservam a saída e executam menos instruções."""
+
+    def execute(self, source, inputs, level, **options):
+        code = MepaOptimizer(level).optimize(compile_source(source, **options))
+        return run_listing(code, inputs)
+
+    def test_levels_preserve_output_and_reduce_steps(self):
+        for name, (source, inputs) in PROGRAMS.items():
+            with self.subTest(programa=name):
+                base = self.execute(source, inputs, 0)
+                previous = base
+                for level in (1, 2):
+                    result = self.execute(source, inputs, level)
+                    self.assertEqual(result.output, base.output)
+                    self.assertLessEqual(result.steps, previous.steps)
+                    previous = result
+                self.assertLess(previous.steps, base.steps)
+
+    def test_inverted_loops_and_cse_preserve_output(self):
+        for name, (source, inputs) in PROGRAMS.items():
+            with self.subTest(programa=name):
+                base = self.execute(source, inputs, 0)
+                tuned = self.execute(source, inputs, 2, invert_loops=True, cse=True)
+                self.assertEqual(tuned.output, base.output)
+                self.assertLess(tuned.steps, self.execute(source, inputs, 2).steps)
+
+
+class TestCompiledEngine(unittest.TestCase):
+    """Blocos compilados produzem a mesma execução que o interpretador."""
+
+    def both(self, listing, inputs=(), **options):
+        reference = run_listing(listing, inputs, **options)
+        compiled = run_listing(listing, inputs, engine="compiled", **options)
+        return reference, compiled
+
+    def test_programs_match_interpreter(self):
+        for name, (source, inputs) in PROGRAMS.items():
+            for level in (0, 2):
+                with self.subTest(programa=name, nivel=level):
+                    listing = MepaOptimizer(level).optimize(compile_source(source, cse=level > 0))
+                    reference, compiled = self.both(listing, inputs)
+                    self.assertEqual(compiled.output, reference.output)
+                    self.assertEqual(compiled.steps, reference.steps)
+                    self.assertTrue(compiled.halted)
+
+    def test_step_limit_stops_inside_block_and_resumes(self):
+        listing = compile_source("x=0\nwhile x<10:\n    x=x+1\nprint(x)\n")
+        reference = MepaVM(listing)
+        compiled = MepaVM(listing, engine="compiled")
+        for _ in range(4):
+            expected = reference.run(max_steps=7)
+            result = compiled.run(max_steps=7)
+            self.assertEqual(result.steps, expected.steps)
+            self.assertEqual(compiled.pc, reference.pc)
+        self.assertEqual(compiled.run().output, [10])
+
+    def test_operators_and_stack_across_blocks(self):
+        listing = [
+            "INPP", "AMEM 2", "LEIT", "ARMZ 0 # a",
+            # valor deixado na pilha antes de um desvio e usado depois dele
+            "CRCT 5", "CRVL 0 # a", "CRCT 0", "CMMA", "DSVF L1",
+            "CRCT 3", "SOMA", "L1: NADA", "IMPR",
+            "CRVL 0 # a", "CRCT 2", "DIVI", "INVR", "IMPR",
+            "CRVL 0 # a", "CRCT 0", "CMIG", "NEGA", "CRCT 0", "DISJ", "IMPR",
+            'CRCS "x"', "CRCT 2.5", "CONJ", "IMPR",
+            "CRVL 0 # a", "CRVL 0 # a", "CRCT 1", "SOMA", "ARMZ 0 # a", "IMPR", "CRVL 0 # a", "IMPR",
+            "PARA",
+        ]
+        for inputs in ([-7], [4]):
+            with self.subTest(entrada=inputs):
+                reference, compiled = self.both(listing, inputs)
+                self.assertEqual(compiled.output, reference.output)
+                self.assertEqual(compiled.steps, reference.steps)
+
+    def test_call_and_return(self):
+        listing = [
+            "INPP", "AMEM 1", "CRCT 4", "ARMZ 0", "CHPR F", "CRVL 0", "IMPR", "PARA",
+            "F: CRVL 0", "CRVL 0", "MULT", "ARMZ 0", "RTPR",
+        ]
+        reference, compiled = self.both(listing)
+        self.assertEqual(compiled.output, [16])
+        self.assertEqual(compiled.steps, reference.steps)
+
+    def test_runtime_errors_are_reported(self):
+        with self.assertRaises(MepaRuntimeError):
+            run_listing(compile_source("a=0\nprint(1/a)\n"), engine="compiled")
+        with self.assertRaises(MepaRuntimeError):
+            run_listing(["INPP", "L1: CRCT 1", "DSVS L1"], memory_size=16, engine="compiled")
+
+    def test_division_error_stops_at_its_instruction(self):
+        listing = ["INPP", "CRCT 5", "IMPR", "CRCT 1", "CRCT 0", "DIVI", "CRCT 7", "IMPR", "PARA"]
+        tokens = LexerPython("a=0\nprint(2)\nprint(1/a)\nprint(7)\n").get_tokens()
+        generator = MepaGenerator()
+        source = assemble(
+            generator.generate(SyntaxAnalyzer(tokens).parse()), generator.line_table.to_dict()
+        )
+        for program, output in ((load_program(listing), [5]), (source, [2])):
+            errors = []
+            for engine in ("interpreter", "compiled"):
+                vm = MepaVM(program, engine=engine, fuse=False)
+                with self.assertRaises(MepaRuntimeError) as ctx:
+                    vm.run()
+                self.assertEqual(vm.output, output)
+                errors.append((ctx.exception.indice, ctx.exception.linha, str(ctx.exception)))
+            self.assertEqual(errors[1], errors[0])
+        self.assertEqual(errors[0][1], 3)
+
+
+class TestMemoryGuards(unittest.TestCase):
+    """Pilha abaixo de vazia e endereço negativo não leem o fim da memória."""
+
+    def assertMemoryError(self, listing, pc):
+        for engine in ("interpreter", "compiled"):
+            for fuse in (False, True):
+                with self.subTest(motor=engine, fusao=fuse):
+                    vm = MepaVM(listing, engine=engine, fuse=fuse)
+                    with self.assertRaises(MepaMemoryError):
+                        vm.run()
+                    self.assertEqual(vm.output, [])
+                    if engine == "interpreter" and not fuse:
+                        self.assertEqual(vm.pc, pc)
+
+    def test_print_on_empty_stack(self):
+        self.assertMemoryError(["INPP", "IMPR", "PARA"], 1)
+
+    def test_store_on_empty_stack(self):
+        self.assertMemoryError(["INPP", "ARMZ 0", "PARA"], 1)
+        self.assertMemoryError(["INPP", "AMEM 1", "ARMZ 1,-1", "PARA"], 2)
+
+    def test_operator_with_one_operand(self):
+        self.assertMemoryError(["INPP", "CRCT 1", "SOMA", "IMPR", "PARA"], 2)
+        self.assertMemoryError(["INPP", "CRCT 1", "CRCT 2", "CMME", "CONJ", "IMPR", "PARA"], 4)
+
+    def test_negative_frame_address(self):
+        self.assertMemoryError(["INPP", "AMEM 1", "CRVL 1,-9", "IMPR", "PARA"], 2)
+
+    def test_negative_absolute_address(self):
+        self.assertMemoryError(["INPP", "CRVL -1", "IMPR", "PARA"], 1)
+        self.assertMemoryError(["INPP", "CRCT 2", "ARMZ -1", "PARA"], 2)
+
+    def test_release_and_return_below_empty_stack(self):
+        self.assertMemoryError(["INPP", "DMEM 1", "CRCT 1", "IMPR", "PARA"], 1)
+        self.assertMemoryError(["INPP", "CRCT 3", "RTPR 1", "PARA"], 2)
+
+    def test_values_left_by_previous_block_are_not_guarded_again(self):
+        listing = [
+            "INPP", "CRCT 4", "CRCT 5", "DSVS L1",
+            "L1: SOMA", "IMPR", "PARA",
+        ]
+        self.assertEqual(run_listing(listing, engine="compiled").output, [9])
+
+
+class TestSuperinstructions(unittest.TestCase):
+    """Fusão na carga: mesma execução com menos despachos."""
+
+    def test_fusion_preserves_output_and_steps(self):
+        for name, (source, inputs) in PROGRAMS.items():
+            for level in (0, 2):
+                with self.subTest(programa=name, nivel=level):
+                    listing = MepaOptimizer(level).optimize(compile_source(source, cse=level > 0))
+                    plain = run_listing(listing, inputs, fuse=False)
+                    fused = run_listing(listing, inputs)
+                    self.assertEqual(fused.output, plain.output)
+                    self.assertEqual(fused.steps, plain.steps)
+                    self.assertEqual(plain.dispatches, plain.steps)
+                    self.assertLess(fused.dispatches, plain.dispatches)
+
+    def test_increment_and_loop_test_are_fused(self):
+        vm = MepaVM(compile_source("x=0\nwhile x<10:\n    x=x+1\nprint(x)\n"))
+        self.assertEqual(vm.fusion.patterns["compara_vars_e_desvia"], 0)
+        self.assertEqual(vm.fusion.patterns["compara_var_const_e_desvia"], 1)
+        self.assertEqual(vm.fusion.patterns["opera_var_const_e_armazena"], 1)
+        self.assertIn("fundidas", vm.fusion.format())
+
+    def test_jump_target_inside_sequence_blocks_fusion(self):
+        listing = [
+            "INPP", "AMEM 1", "CRVL 0", "L1: CRCT 1", "SOMA", "ARMZ 0",
+            "CRVL 0", "CRCT 3", "CMME", "DSVF L2", "CRVL 0", "DSVS L1", "L2: NADA", "PARA",
+        ]
+        vm = MepaVM(listing)
+        self.assertNotIn("opera_var_const_e_armazena", vm.fusion.patterns)
+        self.assertEqual(vm.run().steps, run_listing(listing, fuse=False).steps)
+
+    def test_step_limit_is_exact_with_fusion(self):
+        listing = compile_source("x=0\nwhile x<10:\n    x=x+1\nprint(x)\n")
+        reference = MepaVM(listing, fuse=False)
+        fused = MepaVM(listing)
+        for _ in range(6):
+            expected = reference.run(max_steps=5)
+            result = fused.run(max_steps=5)
+            self.assertEqual(result.steps, expected.steps)
+            self.assertEqual(fused.pc, reference.pc)
+        self.assertEqual(fused.run().output, [10])
+
+
+class TestLimits(unittest.TestCase):
+    """Orçamento de passos, teto de memória e tempo de parede."""
+
+    LOOP = "x=0\nwhile x>=0:\n    x=x+1\n"
+
+    def compile_with_lines(self, source: str):
+        tokens = LexerPython(source).get_tokens()
+        generator = MepaGenerator()
+        listing = generator.generate(SyntaxAnalyzer(tokens).parse())
+        return assemble(listing, generator.line_table.to_dict())
+
+    def test_step_limit_is_exact_and_final(self):
+        program = self.compile_with_lines(self.LOOP)
+        for engine in ("interpreter", "compiled"):
+            with self.subTest(motor=engine):
+                vm = MepaVM(program, engine=engine, limits=Limits(max_steps=1000))
+                result = vm.run()
+                self.assertFalse(result.halted)
+                self.assertEqual(result.steps, 1000)
+                self.assertEqual(result.limit.kind, STEPS)
+                self.assertIn(result.limit.line, (2, 3))
+                self.assertIn("Limite de passos", str(result.limit))
+                # o orçamento vale desde o reset: outra chamada não executa nada
+                self.assertEqual(vm.run().steps, 1000)
+                vm.reset()
+                self.assertIsNone(vm.limit)
+                self.assertEqual(vm.run(max_steps=10).steps, 10)
+
+    def test_memory_cap_becomes_limit(self):
+        listing = ["INPP", "L1: CRCT 1", "DSVS L1"]
+        for engine in ("interpreter", "compiled"):
+            with self.subTest(motor=engine):
+                result = run_listing(listing, engine=engine, limits=Limits(max_memory=16))
+                self.assertEqual(result.limit.kind, MEMORY)
+                self.assertEqual(result.limit.pc, 1)
+                self.assertLess(result.steps, 2 * 16 + 4)
+        # sem teto de memória, o estouro continua sendo erro de execução
+        with self.assertRaises(MepaRuntimeError):
+            run_listing(listing, memory_size=16, limits=Limits(max_steps=1000))
+
+    def test_underflow_and_negative_address_are_not_memory_limits(self):
+        listings = [
+            ["INPP", "CRVL -1", "IMPR", "PARA"],
+            ["INPP", "IMPR", "PARA"],
+            ["INPP", "AMEM 1", "CRVL 1,-9", "IMPR", "PARA"],
+        ]
+        for listing in listings:
+            for engine in ("interpreter", "compiled"):
+                with self.subTest(listagem=listing, motor=engine):
+                    with self.assertRaises(MepaMemoryError) as ctx:
+                        run_listing(listing, engine=engine, limits=Limits(max_memory=100))
+                    self.assertNotIsInstance(ctx.exception, MepaOutOfMemoryError)
+                    self.assertIn("fora da memória", str(ctx.exception))
+        with self.assertRaises(MepaOutOfMemoryError):
+            run_listing(["INPP", "L1: CRCT 1", "DSVS L1"], memory_size=16)
+
+    def test_timeout_preempts_and_resumes(self):
+        program = self.compile_with_lines(self.LOOP)
+        for engine in ("interpreter", "compiled"):
+            with self.subTest(motor=engine):
+                vm = MepaVM(program, engine=engine, limits=Limits(timeout=0.02, check_every=256))
+                first = vm.run()
+                self.assertEqual(first.limit.kind, TIME)
+                self.assertGreater(first.steps, 0)
+                second = vm.run()
+                self.assertEqual(second.limit.kind, TIME)
+                self.assertGreater(second.steps, first.steps)
+
+    def test_limits_do_not_change_execution(self):
+        limits = Limits(max_steps=10 ** 6, max_memory=256, timeout=60.0, check_every=64)
+        for name, (source, inputs) in PROGRAMS.items():
+            with self.subTest(programa=name):
+                listing = compile_source(source)
+                plain = run_listing(listing, inputs)
+                limited = run_listing(listing, inputs, limits=limits)
+                self.assertTrue(limited.halted)
+                self.assertIsNone(limited.limit)
+                self.assertEqual(limited.output, plain.output)
+                self.assertEqual(limited.steps, plain.steps)
+
+    def test_invalid_limits_are_rejected(self):
+        with self.assertRaises(ValueError):
+            Limits(max_steps=-1)
+        with self.assertRaises(ValueError):
+            Limits(check_every=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+from pathlib import Path
+import sys
+
+# Garante que `src` seja importável
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from analysis import build_cfg
+from analysis.loops import find_loops, loop_depths
+
+
+# Dois laços aninhados; o interno tem um único pré-cabeçalho por queda
+NESTED = [
+    "INPP",
+    "AMEM 2",
+    "CRCT 0",
+    "ARMZ 0",
+    "L1: CRVL 0",      # 4: cabeçalho externo
+    "CRCT 3",
+    "CMME",
+    "DSVF L2",
+    "CRCT 0",          # 8: pré-cabeçalho interno
+    "ARMZ 1",
+    "L3: CRVL 1",      # 10: cabeçalho interno
+    "CRCT 3",
+    "CMME",
+    "DSVF L4",
+    "CRVL 1",
+    "CRCT 1",
+    "SOMA",
+    "ARMZ 1",
+    "DSVS L3",
+    "L4: CRVL 0",      # 19
+    "CRCT 1",
+    "SOMA",
+    "ARMZ 0",
+    "DSVS L1",
+    "L2: PARA",
+]
+
+
+class TestNaturalLoops(unittest.TestCase):
+    def setUp(self):
+        self.cfg = build_cfg(NESTED)
+        self.loops = find_loops(self.cfg)
+
+    def test_loops_are_nested_innermost_first(self):
+        inner, outer = self.loops
+        self.assertEqual(inner.header, self.cfg.block_of(10))
+        self.assertEqual(outer.header, self.cfg.block_of(4))
+        self.assertIs(inner.parent, outer)
+        self.assertEqual((inner.depth, outer.depth), (2, 1))
+        self.assertTrue(inner.blocks < outer.blocks)
+
+    def test_preheader_and_exits(self):
+        inner, outer = self.loops
+        self.assertEqual(inner.preheader_edge(self.cfg), self.cfg.block_of(8))
+        self.assertEqual(outer.exits(self.cfg), [self.cfg.block_of(24)])
+        self.assertEqual(inner.exits(self.cfg), [self.cfg.block_of(19)])
+
+    def test_loop_depths(self):
+        depths = loop_depths(self.cfg, self.loops)
+        self.assertEqual(depths[self.cfg.block_of(14)], 2)
+        self.assertEqual(depths[self.cfg.block_of(19)], 1)
+        self.assertEqual(depths[self.cfg.block_of(24)], 0)
+
+    def test_jump_into_header_has_no_preheader(self):
+        cfg = build_cfg([
+            "INPP", "DSVS L2", "L1: CRCT 1", "IMPR",
+            "L2: CRCT 0", "DSVF L1", "PARA",
+        ])
+        (loop,) = find_loops(cfg)
+        self.assertIsNone(loop.preheader_edge(cfg))
+
+
+if __name__ == "__main__":
+    unittest.main()
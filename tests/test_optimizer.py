@@ -0,0 +1,229 @@
+import unittest
+from pathlib import Path
+import sys
+
+# Garante que `src` seja importável
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from lexer import LexerPython
+from syntax import SyntaxAnalyzer
+from semantic import SemanticAnalyzer
+from codegen import MepaGenerator
+from optimizer import MepaOptimizer
+
+
+def compile_source(source: str):
+    """Executa o pipeline completo até o código MEPA."""
+    tokens = LexerPython(source).get_tokens()
+    ast = SyntaxAnalyzer(tokens).parse()
+    SemanticAnalyzer(ast).analyze()
+    return MepaGenerator().generate(ast)
+
+
+class TestMepaOptimizer(unittest.TestCase):
+    def optimize(self, source: str):
+        optimizer = MepaOptimizer(level=1)
+        code = optimizer.optimize(compile_source(source))
+        # remove os comentários "# nome" para comparar só instrução e operando
+        return [line.split(" #")[0] for line in code], optimizer.report
+
+    def test_constant_propagates_across_statements(self):
+        code, report = self.optimize("a=5\nb=a*2\nprint(b)\n")
+        ops = [line.split()[0] for line in code]
+        self.assertNotIn("MULT", ops)
+        self.assertNotIn("ARMZ", ops)
+        self.assertIn("CRCT 10", code)
+        self.assertLess(report.after, report.before)
+
+    def test_loop_carried_variable_is_not_constant(self):
+        code, _ = self.optimize(
+            "x=0\n"
+            "while x<3:\n"
+            "    x=x+1\n"
+            "print(x)\n"
+        )
+        self.assertTrue(any(line.startswith("CRVL 0") for line in code))
+        self.assertTrue(any(line.startswith("ARMZ 0") for line in code))
+
+    def test_copy_propagation_removes_copy(self):
+        code, _ = self.optimize("x=input()\ny=x\nprint(y)\nprint(y)\n")
+        self.assertEqual(sum(1 for line in code if line.startswith("ARMZ")), 1)
+        self.assertEqual(sum(1 for line in code if line.startswith("CRVL 0")), 2)
+
+    def test_store_with_side_effect_is_kept(self):
+        code, _ = self.optimize("x=input()\nx=1\nprint(x)\n")
+        self.assertIn("LEIT", code)
+
+    def test_unary_minus_is_folded(self):
+        code, _ = self.optimize("x=-3\nprint(x)\n")
+        self.assertIn("CRCT -3", code)
+
+    def test_division_by_zero_is_not_folded(self):
+        code, _ = self.optimize("x=1/0\nprint(x)\n")
+        self.assertIn("DIVI", code)
+
+    def test_branch_on_constant_removes_dead_arm(self):
+        code, _ = self.optimize(
+            "x=1\n"
+            "if x>2:\n"
+            "    print(100)\n"
+            "print(x)\n"
+        )
+        self.assertNotIn("CRCT 100", code)
+        self.assertNotIn("DSVF", " ".join(code))
+
+    def test_level_zero_keeps_listing(self):
+        original = compile_source("a=5\nb=a*2\nprint(b)\n")
+        self.assertEqual(MepaOptimizer(level=0).optimize(original), original)
+
+
+class TestLoopOptimizations(unittest.TestCase):
+    def optimize(self, source: str):
+        optimizer = MepaOptimizer(level=2)
+        code = optimizer.optimize(compile_source(source))
+        return [line.split(" #")[0] for line in code], optimizer.report
+
+    def test_invariant_product_is_hoisted_before_header(self):
+        code, report = self.optimize(
+            "a=input()\n"
+            "b=input()\n"
+            "i=0\n"
+            "s=0\n"
+            "while i<10:\n"
+            "    s=s+a*b\n"
+            "    i=i+1\n"
+            "print(s)\n"
+        )
+        header = next(k for k, line in enumerate(code) if line.startswith("L1:"))
+        self.assertEqual([k for k, line in enumerate(code) if line == "MULT"], [header - 2])
+        self.assertEqual(report.changes["invariantes_de_laco"], 1)
+
+    def test_division_by_variable_stays_in_loop(self):
+        code, report = self.optimize(
+            "a=input()\n"
+            "b=input()\n"
+            "i=0\n"
+            "s=0\n"
+            "while i<10:\n"
+            "    s=s+a/b\n"
+            "    i=i+1\n"
+            "print(s)\n"
+        )
+        header = next(k for k, line in enumerate(code) if line.startswith("L1:"))
+        self.assertGreater(code.index("DIVI"), header)
+        self.assertEqual(report.changes["invariantes_de_laco"], 0)
+
+    def test_call_in_loop_blocks_hoisting(self):
+        from optimizer.loops import hoist_invariants
+        from codegen.mepa_ir import parse_listing
+        listing = parse_listing([
+            "INPP", "AMEM 3", "CRCT 0", "ARMZ 0",
+            "L1: CRVL 0", "CRCT 5", "CMME", "DSVF L2",
+            "CRVL 1", "CRVL 2", "MULT", "IMPR", "CHPR F",
+            "CRVL 0", "CRCT 1", "SOMA", "ARMZ 0", "DSVS L1",
+            "L2: PARA", "F: RTPR",
+        ])
+        _, count = hoist_invariants(listing)
+        self.assertEqual(count, 0)
+
+    def test_repeated_induction_products_are_reduced(self):
+        code, report = self.optimize(
+            "n=input()\n"
+            "i=0\n"
+            "s=0\n"
+            "while i<n:\n"
+            "    s=s+i*3+i*3+i*3\n"
+            "    i=i+1\n"
+            "print(s)\n"
+        )
+        self.assertNotIn("MULT", code)
+        self.assertEqual(report.changes["reducao_de_forca"], 3)
+
+    def test_single_product_is_not_worth_reducing(self):
+        code, report = self.optimize(
+            "n=input()\n"
+            "i=0\n"
+            "s=0\n"
+            "while i<n:\n"
+            "    s=s+i*3\n"
+            "    i=i+1\n"
+            "print(s)\n"
+        )
+        self.assertIn("MULT", code)
+        self.assertEqual(report.changes["reducao_de_forca"], 0)
+
+    def test_irregular_increment_blocks_reduction(self):
+        code, _ = self.optimize(
+            "n=input()\n"
+            "i=0\n"
+            "s=0\n"
+            "while i<n:\n"
+            "    s=s+i*5+i*5+i*5\n"
+            "    if i==7:\n"
+            "        i=i*2\n"
+            "        continue\n"
+            "    i=i+1\n"
+            "print(s)\n"
+        )
+        self.assertEqual(code.count("MULT"), 4)
+
+
+class TestBlockLayout(unittest.TestCase):
+    def run_layout(self, listing):
+        from optimizer.layout import improve_layout
+        from codegen.mepa_ir import parse_listing, render_listing
+        instrs, count = improve_layout(parse_listing(listing))
+        return render_listing(instrs), count
+
+    def test_branch_over_jump_uses_opposite_comparison(self):
+        code, count = self.run_layout([
+            "INPP", "L1: CRVL 0", "CRCT 2", "CMIG", "DSVF L5", "AMEM 0", "DSVS L9",
+            "L5: CRVL 0", "IMPR", "DSVS L1", "L9: PARA",
+        ])
+        self.assertEqual(count, 1)
+        self.assertEqual(code[3:5], ["CMDG", "DSVF L9"])
+        self.assertNotIn("DSVS L9", code)
+
+    def test_negated_condition_drops_nega(self):
+        code, _ = self.run_layout([
+            "INPP", "CRVL 0", "NEGA", "DSVF L5", "DSVS L9", "L5: CRCT 1", "IMPR", "L9: PARA",
+        ])
+        self.assertEqual(code[:3], ["INPP", "CRVL 0", "DSVF L9"])
+
+    def test_jump_to_jump_is_threaded(self):
+        code, _ = self.run_layout([
+            "INPP", "CRVL 0", "DSVF L2", "CRCT 1", "IMPR", "L2: NADA", "DSVS L3",
+            "L4: CRCT 2", "IMPR", "L3: PARA",
+        ])
+        self.assertIn("DSVF L3", code)
+
+    def test_jump_target_chain_is_placed_after_jump(self):
+        code, count = self.run_layout([
+            "INPP", "CRCT 1", "IMPR", "DSVS L2",
+            "L1: CRCT 2", "IMPR", "RTPR",
+            "L2: CRCT 3", "IMPR", "PARA",
+        ])
+        self.assertEqual(count, 1)
+        self.assertEqual(code, [
+            "INPP", "CRCT 1", "IMPR",
+            "L2: CRCT 3", "IMPR", "PARA",
+            "L1: CRCT 2", "IMPR", "RTPR",
+        ])
+
+    def test_chain_reached_by_fall_stays(self):
+        listing = [
+            "INPP", "CRVL 0", "DSVF L1", "DSVS L2",
+            "L1: CRCT 2", "IMPR",
+            "L2: PARA",
+        ]
+        code, count = self.run_layout(listing)
+        # L2 recebe a queda de L1 e o DSVF não vem de uma comparação: nada muda
+        self.assertEqual(count, 0)
+        self.assertEqual(code, listing)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import unittest
+from pathlib import Path
+import sys
+
+# Garante que `src` seja importável
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from lexer import LexerPython
+from syntax import SyntaxAnalyzer
+from semantic import SemanticAnalyzer
+from codegen import CodeGenerationError, ExecutionError, MepaGenerator, PythonGenerator
+from mepa import run_listing
+from mepa.vm import input_reader
+
+
+def parse(source: str):
+    ast = SyntaxAnalyzer(LexerPython(source).get_tokens()).parse()
+    SemanticAnalyzer(ast).analyze()
+    return ast
+
+
+def run_python(source: str, inputs=()):
+    return PythonGenerator().generate(parse(source)).run(read=input_reader(inputs))
+
+
+# programas sem funções: a saída tem de ser a mesma da máquina MEPA
+SAME_AS_MEPA = [
+    ("x=7\nprint(x/2, -x/2, x//2, -x//2, 7.0/2, -7.5/2)\n", []),
+    ("a=True\nb=False\nprint(a, b, 3<4, 3==4, (2<3)+(4>1), -a)\n", []),
+    ('s="oi"\nprint(s, "a soma é:", 1.5*2)\n', []),
+    (
+        "n=input()\ns=0\ni=0\nwhile i<n:\n    i=i+1\n    if i>3:\n        if i==8:\n"
+        "            break\n        s=s+i*i\n    else:\n        s=s-1\n        continue\n"
+        "    s=s+1\nprint(i, s)\n",
+        [12],
+    ),
+    # o contador continua visível depois do laço: vale o limite (ou 0)
+    ("i=5\nn=input()\nfor i in range(n):\n    x=i\nprint(i)\n", [4]),
+    ("i=5\nn=input()\nfor i in range(n):\n    x=i\nprint(i)\n", [-3]),
+    ("i=5\nfor i in range(2.5):\n    x=i\nprint(i)\n", []),
+    # break deixa o contador onde estava; continue incrementa
+    (
+        "i=0\ns=0\nfor i in range(10):\n    if i==3:\n        continue\n    if i==6:\n"
+        "        break\n    s=s+i\nprint(i, s)\n",
+        [],
+    ),
+    # contador alterado no corpo
+    (
+        "j=0\ns=0\nfor j in range(10):\n    j=j+2\n    if j==5:\n        continue\n    s=s+j\n"
+        "print(j, s)\n",
+        [],
+    ),
+    (
+        "n=input()\nt=0\nfor i in range(n):\n    for k in range(i):\n        t=t+i*k\nprint(t)\n",
+        [7],
+    ),
+]
+
+
+class TestPythonBackend(unittest.TestCase):
+    def test_same_output_as_mepa(self):
+        for source, inputs in SAME_AS_MEPA:
+            with self.subTest(fonte=source):
+                expected = run_listing(MepaGenerator().generate(parse(source)), inputs).output
+                self.assertEqual(run_python(source, inputs), expected)
+
+    def test_functions(self):
+        source = (
+            "def fat(n):\n"
+            "    if n <= 1:\n"
+            "        return 1\n"
+            "    return n * fat(n - 1)\n"
+            "total = 0\n"
+            "def soma(k):\n"
+            "    total = total + k\n"
+            "    parcial = k * 2\n"
+            "def nada():\n"
+            "    return\n"
+            "parcial = 100\n"
+            "soma(3)\n"
+            "soma(4)\n"
+            "print(fat(10), total, parcial, nada(), dobro(21))\n"
+            "def dobro(x):\n"
+            "    return x + x\n"
+        )
+        # `total` é global (atribuída antes do def); `parcial` é local de soma
+        self.assertEqual(run_python(source), [3628800, 7, 100, 0, 42])
+
+    def test_runtime_errors_report_the_source_line(self):
+        source = "n=input()\nx=1\nprint(x/(n-2))\n"
+        with self.assertRaises(ExecutionError) as ctx:
+            run_python(source, [2])
+        self.assertEqual(ctx.exception.linha, 3)
+        self.assertIn("divisão por zero", str(ctx.exception))
+
+        source = "def f(n):\n    return f(n + 1)\nprint(f(0))\n"
+        with self.assertRaises(ExecutionError) as ctx:
+            run_python(source)
+        self.assertIn("recursão", str(ctx.exception))
+
+    def test_unsupported_programs(self):
+        for source in (
+            "x=7 % 2\n",
+            "return 1\n",
+            "x=range(3)\n",
+            "def f(a):\n    return a\nprint(f(1, 2))\n",
+        ):
+            with self.subTest(fonte=source), self.assertRaises(CodeGenerationError):
+                PythonGenerator().generate(parse(source))
+
+    def test_source_is_inspectable(self):
+        program = PythonGenerator().generate(parse("x=input()\nprint(x/2)\n"))
+        self.assertIn("_div(v_x, 2)", program.source)
+        self.assertEqual(program.run(read=input_reader([9])), [4])
+
+
+if __name__ == "__main__":
+    unittest.main()